@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+
+# Benchmark the simulator throughput of the reference benches and compare with
+# their history, see simulation_shared/python/blitsim/benchmark.py
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "simulation_shared" / "python"))
+
+from blitsim import benchmark
+
+sys.exit(benchmark.main())
@@ -545,7 +545,8 @@ begin
 								r_state <= exec_move16_1;
 								r_con_cyc_ack <= '1';
 								if r_op(4) = '0' then
-									r_arg_1 <= std_logic_vector(unsigned(r_arg_1) + 1);
+									-- MOVE16I, second byte to the next register
+									r_arg_0 <= std_logic_vector(unsigned(r_arg_0) + 1);
 								end if;
 							end if;
 						when exec_move16_1 =>
@@ -112,7 +112,12 @@ entity fb_dmac_blit is
 		fb_con_p2c_i						: in		fb_con_i_per_o_t;
 
 		cpu_halt_o							: out		std_logic;
-		blit_halt_i							: in		std_logic
+		blit_halt_i							: in		std_logic;
+
+		-- performance counter events, a pulse per byte moved by channels A..E
+		-- and per D byte that clears the collision flag
+		perf_bytes_o						: out		std_logic_vector(4 downto 0);
+		perf_collision_o					: out		std_logic
 	);
 
    -- note addresses are odd to cater for extended registers at $A0 and baseic at $60
@@ -241,6 +246,7 @@ architecture Behavioral of fb_dmac_blit is
 	signal r_cha_B_data_pre			: std_logic_vector(6 downto 0);		-- previous data
 	signal r_cha_C_data				: std_logic_vector(7 downto 0);
 	signal i_cha_D_data				: std_logic_vector(7 downto 0);		-- note not a register
+	signal i_mem_ack					: std_logic;								-- controller cycle done, for the perf events
 	signal r_cha_A_addr				: std_logic_vector(23 downto 0);
 	signal r_cha_B_addr				: std_logic_vector(23 downto 0);
 	signal r_cha_C_addr				: std_logic_vector(23 downto 0);
@@ -1340,6 +1346,22 @@ begin
 	fb_per_p2c_o.ack <= r_per_ack;
 	fb_per_p2c_o.stall <= '0' when r_per_state = idle else '1';
 
+	-- performance counter events
+	i_mem_ack <= '1' when r_con_state = waitack and fb_con_p2c_i.ack = '1' else '0';
+
+	perf_bytes_o(0) <= i_mem_ack when r_blit_state = sMemAccA else '0';
+	perf_bytes_o(1) <= i_mem_ack when r_blit_state = sMemAccB else '0';
+	perf_bytes_o(2) <= i_mem_ack when r_blit_state = sMemAccC else '0';
+	perf_bytes_o(3) <= i_mem_ack when r_blit_state = sMemAccD else '0';
+	perf_bytes_o(4) <= i_mem_ack when r_blit_state = sMemAccE else '0';
+
+	-- a collision hit, once per non-zero D byte: on the write's ack or, with D
+	-- off, the one clock sMemAccD lasts, not every clock the flag is cleared
+	perf_collision_o <= '1' when r_blit_state = sMemAccD 
+										and (i_mem_ack = '1' or r_BLTCON_execD = '0') 
+										and my_or_reduce(i_cha_D_data) /= '0' else 
+							  '0';
+
 end Behavioral;
 
 
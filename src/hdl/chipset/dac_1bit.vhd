@@ -106,7 +106,7 @@ GG_SIG:IF not G_PWM GENERATE
 
    process (clk_dac)
    variable samu:unsigned(G_SAMPLE_SIZE downto 0); -- 1 larger than sample?
-   variable sum:unsigned(G_SAMPLE_SIZE downto 0);
+   variable sum:unsigned(G_SAMPLE_SIZE downto 0) := (others => '0');
    begin		
 		if rising_edge(clk_dac) then
 			if clken_dac = '1' then
@@ -70,7 +70,10 @@ entity fb_DMAC_int_sound is
 		-- sound specific
 		snd_clk_i							: in		std_logic;
 		snd_dat_o							: out		signed(9 downto 0);
-		snd_dat_change_clken_o			: out		std_logic
+		snd_dat_change_clken_o			: out		std_logic;
+
+		-- performance counter events, a pulse per byte fetched by each channel
+		perf_bytes_o						: out		std_logic_vector(G_CHANNELS-1 downto 0)
 	 );
 
 	 -- sound
@@ -384,6 +387,8 @@ begin
 	i_cha_data_ack <= r_cha_data_cur_oh when r_con_state = act and fb_con_p2c_i.ack = '1' else
 							(others => '0');
 
+	perf_bytes_o <= i_cha_data_ack;
+
 	i_cha_data_data <= signed(fb_con_p2c_i.D_rd);
 
 	i_cur_cha_addr <= i_cha_data_addr(to_integer(r_cha_data_cur_ix));
@@ -49,6 +49,7 @@ use work.fishbone.all;
 use work.fb_intcon_pack.all;
 use work.common.all;
 use work.board_config_pack.all;
+use work.fb_chipset_pack.all;
 
 entity fb_chipset is
 	generic (
@@ -133,7 +134,8 @@ architecture rtl of fb_chipset is
 	constant PERIPHERAL_NO_CHIPSET_AERIS	: natural := PERIPHERAL_NO_CHIPSET_BLIT + B2OZ(G_INCL_CS_BLIT);
 	constant PERIPHERAL_NO_CHIPSET_EEPROM	: natural := PERIPHERAL_NO_CHIPSET_AERIS + B2OZ(G_INCL_CS_AERIS);
 	constant PERIPHERAL_NO_CHIPSET_SDCARD	: natural := PERIPHERAL_NO_CHIPSET_EEPROM + B2OZ(G_INCL_CS_EEPROM);
-	constant PERIPHERAL_COUNT_CHIPSET		: natural := PERIPHERAL_NO_CHIPSET_SDCARD + B2OZ(G_INCL_CS_SDCARD);
+	constant PERIPHERAL_NO_CHIPSET_PERF		: natural := PERIPHERAL_NO_CHIPSET_SDCARD + B2OZ(G_INCL_CS_SDCARD);
+	constant PERIPHERAL_COUNT_CHIPSET		: natural := PERIPHERAL_NO_CHIPSET_PERF + B2OZ(G_INCL_CS_PERF);
 
 
 	-----------------------------------------------------------------------------
@@ -185,7 +187,10 @@ architecture rtl of fb_chipset is
 			fb_con_p2c_i						: in		fb_con_i_per_o_t;
 
 			cpu_halt_o							: out		std_logic;
-			blit_halt_i							: in		std_logic
+			blit_halt_i							: in		std_logic;
+
+			perf_bytes_o						: out		std_logic_vector(4 downto 0);
+			perf_collision_o					: out		std_logic
 		);
 	end component;
 
@@ -236,7 +241,9 @@ architecture rtl of fb_chipset is
 			-- sound specific
 			snd_clk_i							: in		std_logic;
 			snd_dat_o							: out		signed(9 downto 0);
-			snd_dat_change_clken_o			: out		std_logic
+			snd_dat_change_clken_o			: out		std_logic;
+
+			perf_bytes_o						: out		std_logic_vector(G_CHANNELS-1 downto 0)
 		);
 	end component;
 
@@ -329,6 +336,10 @@ architecture rtl of fb_chipset is
 	signal i_p2c_sdcard_per		: fb_con_i_per_o_t;
 
 
+	-- performance counter control registers
+	signal i_c2p_perf_per		: fb_con_o_per_i_t;
+	signal i_p2c_perf_per		: fb_con_i_per_o_t;
+
 	-- null peripheral for out-of range addresses
 	signal i_c2p_null_per		: fb_con_o_per_i_t;
 	signal i_p2c_null_per		: fb_con_i_per_o_t;
@@ -357,6 +368,10 @@ architecture rtl of fb_chipset is
 	signal i_blit_cpu_halt				: std_logic;							-- cpu halt request out from blit
 	signal i_aeris_cpu_halt				: std_logic;							-- cpu halt request out from aeris
 
+	signal i_snd_perf_bytes				: std_logic_vector(G_SND_CHANNELS-1 downto 0);	-- byte fetched per sound channel
+	signal i_blit_perf_bytes			: std_logic_vector(4 downto 0);		-- byte moved per blitter channel
+	signal i_blit_perf_collision		: std_logic;							-- D byte cleared collision flag
+
 
 begin
 
@@ -427,6 +442,7 @@ begin
 		G_PERIPHERAL_NO_CHIPSET_AERIS		=> PERIPHERAL_NO_CHIPSET_AERIS,
 		G_PERIPHERAL_NO_CHIPSET_EEPROM 	=> PERIPHERAL_NO_CHIPSET_EEPROM,
 		G_PERIPHERAL_NO_CHIPSET_SDCARD 	=> PERIPHERAL_NO_CHIPSET_SDCARD,
+		G_PERIPHERAL_NO_CHIPSET_PERF 		=> PERIPHERAL_NO_CHIPSET_PERF,
 		G_PERIPHERAL_COUNT_CHIPSET 		=> PERIPHERAL_COUNT_CHIPSET
 	)
 	port map (
@@ -542,7 +558,10 @@ GBLIT:IF G_INCL_CS_BLIT GENERATE
 		fb_con_p2c_i						=> i_p2c_blit_con,
 
 		cpu_halt_o							=> i_blit_cpu_halt,
-		blit_halt_i							=> i_aeris_cpu_halt
+		blit_halt_i							=> i_aeris_cpu_halt,
+
+		perf_bytes_o						=> i_blit_perf_bytes,
+		perf_collision_o					=> i_blit_perf_collision
 
 	 );
 END GENERATE;
@@ -617,7 +636,9 @@ GSND:IF G_INCL_CS_SND GENERATE
 
 		snd_clk_i							=> clk_snd_i,
 		snd_dat_o							=> snd_dat_o,
-		snd_dat_change_clken_o			=> snd_dat_change_clken_o
+		snd_dat_change_clken_o			=> snd_dat_change_clken_o,
+
+		perf_bytes_o						=> i_snd_perf_bytes
 	 );
 
 END GENERATE;
@@ -691,6 +712,73 @@ GNOEEPROM: IF NOT G_INCL_CS_EEPROM GENERATE
 	I2C_SCL_io <= 'Z';
 END GENERATE;
 
+GPERF: IF G_INCL_CS_PERF GENERATE
+b_perf:block
+	signal	i_mon_c2p	: fb_con_o_per_i_arr(PERF_UNITS-1 downto 0);
+	signal	i_mon_p2c	: fb_con_i_per_o_arr(PERF_UNITS-1 downto 0);
+	signal	i_events		: std_logic_vector(PERF_EVENTS-1 downto 0);
+begin
+
+	i_c2p_perf_per <= i_per_c2p_chipset(PERIPHERAL_NO_CHIPSET_PERF);
+	i_per_p2c_chipset(PERIPHERAL_NO_CHIPSET_PERF)	<=	i_p2c_perf_per;
+
+	-- the units' controller ports, the units not fitted are never active
+	p_mon:process(all)
+	begin
+		i_mon_c2p <= (others => fb_c2p_unsel);
+		i_mon_p2c <= (others => fb_p2c_unsel);
+		i_events <= (others => '0');
+
+		if G_INCL_CS_DMA then
+			for I in 0 to G_DMA_CHANNELS-1 loop
+				if I < 2 then
+					i_mon_c2p(PERF_UNIT_DMA_0 + I) <= i_c2p_dma_con(I);
+					i_mon_p2c(PERF_UNIT_DMA_0 + I) <= i_p2c_dma_con(I);
+				end if;
+			end loop;
+		end if;
+
+		if G_INCL_CS_SND then
+			i_mon_c2p(PERF_UNIT_SND) <= i_c2p_snd_con;
+			i_mon_p2c(PERF_UNIT_SND) <= i_p2c_snd_con;
+			for I in 0 to G_SND_CHANNELS-1 loop
+				if I < 4 then
+					i_events(PERF_EVT_SND_BYTES + I) <= i_snd_perf_bytes(I);
+				end if;
+			end loop;
+		end if;
+
+		if G_INCL_CS_BLIT then
+			i_mon_c2p(PERF_UNIT_BLIT) <= i_c2p_blit_con;
+			i_mon_p2c(PERF_UNIT_BLIT) <= i_p2c_blit_con;
+			i_events(PERF_EVT_BLIT_BYTES + 4 downto PERF_EVT_BLIT_BYTES) <= i_blit_perf_bytes;
+			i_events(PERF_EVT_BLIT_COLLISION) <= i_blit_perf_collision;
+		end if;
+
+		if G_INCL_CS_AERIS then
+			i_mon_c2p(PERF_UNIT_AERIS) <= i_c2p_aeris_con;
+			i_mon_p2c(PERF_UNIT_AERIS) <= i_p2c_aeris_con;
+		end if;
+	end process;
+
+	e_fb_perf:entity work.fb_chipset_perf
+	generic map (
+		SIM									=> SIM
+	)
+	port map (
+		fb_syscon_i							=> fb_syscon_i,
+
+		fb_per_c2p_i						=> i_c2p_perf_per,
+		fb_per_p2c_o						=> i_p2c_perf_per,
+
+		mon_c2p_i							=> i_mon_c2p,
+		mon_p2c_i							=> i_mon_p2c,
+
+		events_i								=> i_events
+	);
+end block;
+END GENERATE;
+
 
 	cpu_halt_o <= i_dma_cpu_halt or i_blit_cpu_halt or i_aeris_cpu_halt;
 	cpu_int_o <= i_dma_cpu_int;
@@ -49,6 +49,38 @@ use work.fishbone.all;
 
 package fb_chipset_pack is
 
+	-- performance counters, see fb_chipset_perf.vhd, the layout is the same
+	-- whatever is fitted, the counters of a unit that is not fitted read 0
+
+	-- controller ports counted, each has PERF_UNIT_CTRS counters from
+	-- PERF_UNIT_CTRS * unit number
+	constant PERF_UNIT_DMA_0			: natural := 0;
+	constant PERF_UNIT_DMA_1			: natural := 1;
+	constant PERF_UNIT_SND				: natural := 2;
+	constant PERF_UNIT_BLIT				: natural := 3;
+	constant PERF_UNIT_AERIS			: natural := 4;
+	constant PERF_UNITS					: natural := 5;
+
+	-- counters per unit
+	constant PERF_CTR_ACTIVE			: natural := 0;		-- clocks with cyc
+	constant PERF_CTR_STALL				: natural := 1;		-- clocks with a_stb stalled
+	constant PERF_CTR_WAIT				: natural := 2;		-- clocks after the address was taken before ack
+	constant PERF_CTR_CYCLES			: natural := 3;		-- acks, bytes moved
+	constant PERF_CTR_SYS_ACTIVE		: natural := 4;		-- clocks with cyc to FF xxxx
+	constant PERF_CTR_SYS_CYCLES		: natural := 5;		-- acks to FF xxxx
+	constant PERF_UNIT_CTRS				: natural := 6;
+
+	-- event counters after the units' counters
+	constant PERF_EVT_SND_BYTES		: natural := 0;		-- 4, bytes per sound channel
+	constant PERF_EVT_BLIT_BYTES		: natural := 4;		-- 5, bytes per blitter channel A..E
+	constant PERF_EVT_BLIT_COLLISION	: natural := 9;		-- D bytes that cleared the collision flag
+	constant PERF_EVENTS					: natural := 10;
+
+	constant PERF_EVT_BASE				: natural := PERF_UNITS * PERF_UNIT_CTRS;
+	constant PERF_COUNT					: natural := PERF_EVT_BASE + PERF_EVENTS;
+
+	type perf_ctr_arr is array(natural range <>) of unsigned(31 downto 0);
+
 component fb_chipset
 	generic (
 		SIM						: boolean := false;							-- skip some stuff, i.e. slow sdram start up
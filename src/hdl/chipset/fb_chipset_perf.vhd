@@ -0,0 +1,281 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2026 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+-- Company: 			Dossytronics
+-- Engineer: 			Dominic Beesley
+-- 
+-- Create Date:    	18/10/2026
+-- Design Name: 
+-- Module Name:    	fishbone bus - chipset performance counters
+-- Project Name: 
+-- Target Devices: 
+-- Tool versions: 
+-- Description: 		32 bit counters of the bus cycles of the chipset's DMA
+--							controllers and of bytes moved per channel
+-- Dependencies: 
+--
+-- Revision: 
+-- Additional Comments: 
+--
+-- The counters watch the controller port of each unit as it goes into the
+-- chipset's controller intcon, the layout is in fb_chipset_pack, for each unit:
+--		active		clocks with cyc
+--		stall			clocks with a_stb held off by stall
+--		wait			clocks after the address was taken until ack
+--		cycles		acks, bytes moved
+--		sys active	active clocks with an address in FF xxxx
+--		sys cycles	acks with an address in FF xxxx
+-- then the event counters, a count of the clocks each of events_i is high.
+--
+-- Registers
+--		+0	SEL			r/w counter number, a write latches that counter in DATA
+--		+1	CTL			r/w bit 0 set counters run (reset value),
+--							w   bit 7 set clears all the counters
+--		+2	COUNT			r   number of counters
+--		+4..+7 DATA		r   the latched counter, least significant byte first at
+--							    FE FExx, most significant byte first at FE FCxx
+----------------------------------------------------------------------------------
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library work;
+use work.fishbone.all;
+use work.fb_chipset_pack.all;
+
+entity fb_chipset_perf is
+	generic (
+		SIM									: boolean := false							-- skip some stuff, i.e. slow sdram start up
+	);
+	port (
+		-- fishbone signals
+		fb_syscon_i							: in		fb_syscon_t;
+
+		-- peripheral interface (control registers)
+		fb_per_c2p_i						: in		fb_con_o_per_i_t;
+		fb_per_p2c_o						: out		fb_con_i_per_o_t;
+
+		-- the controller ports of the units, fb_c2p_unsel for those not fitted
+		mon_c2p_i							: in		fb_con_o_per_i_arr(PERF_UNITS-1 downto 0);
+		mon_p2c_i							: in		fb_con_i_per_o_arr(PERF_UNITS-1 downto 0);
+
+		-- counted each clock they are high
+		events_i								: in		std_logic_vector(PERF_EVENTS-1 downto 0)
+	);
+end fb_chipset_perf;
+
+architecture rtl of fb_chipset_perf is
+
+	type		per_state_t is (idle, wait_d_stb);
+
+	signal	r_per_state		: per_state_t;
+	signal	r_per_ack		: std_logic;
+	signal	r_per_D_rd		: std_logic_vector(7 downto 0);
+	signal	r_per_reg		: std_logic_vector(3 downto 0);
+
+	signal	r_sel				: unsigned(7 downto 0);
+	signal	r_run				: std_logic;
+	signal	r_clear			: std_logic;
+	signal	r_latch_req		: std_logic;
+	signal	r_latch			: std_logic_vector(31 downto 0);
+
+	signal	r_ctr				: perf_ctr_arr(0 to PERF_COUNT-1);
+	signal	r_taken			: std_logic_vector(PERF_UNITS-1 downto 0);	-- address taken, waiting for ack
+
+	-- register number, 4..7 is the byte of DATA, most significant first
+	function fnReg(A : std_logic_vector(23 downto 0)) return std_logic_vector is
+	begin
+		if A(9) = '1' and A(2) = '1' then
+			-- little endian
+			return A(3 downto 2) & not A(1 downto 0);
+		else
+			return A(3 downto 0);
+		end if;
+	end function;
+
+begin
+
+	p_per:process(fb_syscon_i)
+	variable v_write : boolean;
+	variable v_reg : std_logic_vector(3 downto 0);
+	begin
+		if fb_syscon_i.rst = '1' then
+			r_per_state <= idle;
+			r_per_ack <= '0';
+			r_per_D_rd <= (others => '0');
+			r_per_reg <= (others => '0');
+			r_sel <= (others => '0');
+			r_run <= '1';
+			r_clear <= '0';
+			r_latch_req <= '0';
+		elsif rising_edge(fb_syscon_i.clk) then
+
+			r_per_ack <= '0';
+			r_clear <= '0';
+			r_latch_req <= '0';
+			v_write := false;
+
+			case r_per_state is
+				when idle =>
+					if fb_per_c2p_i.cyc = '1' and fb_per_c2p_i.A_stb = '1' then
+						v_reg := fnReg(fb_per_c2p_i.A);
+						r_per_reg <= v_reg;
+						if fb_per_c2p_i.we = '0' then
+							case v_reg is
+								when x"0" =>
+									r_per_D_rd <= std_logic_vector(r_sel);
+								when x"1" =>
+									r_per_D_rd <= "0000000" & r_run;
+								when x"2" =>
+									r_per_D_rd <= std_logic_vector(to_unsigned(PERF_COUNT, 8));
+								when x"4" =>
+									r_per_D_rd <= r_latch(31 downto 24);
+								when x"5" =>
+									r_per_D_rd <= r_latch(23 downto 16);
+								when x"6" =>
+									r_per_D_rd <= r_latch(15 downto 8);
+								when x"7" =>
+									r_per_D_rd <= r_latch(7 downto 0);
+								when others =>
+									r_per_D_rd <= (others => '0');
+							end case;
+							r_per_ack <= '1';
+						else
+							v_write := true;
+						end if;
+					end if;
+				when wait_d_stb =>
+					v_reg := r_per_reg;
+					v_write := true;
+				when others =>
+					r_per_state <= idle;
+			end case;
+
+			if v_write then
+				if fb_per_c2p_i.D_wr_stb = '1' then
+					case v_reg is
+						when x"0" =>
+							r_sel <= unsigned(fb_per_c2p_i.D_wr);
+							r_latch_req <= '1';
+						when x"1" =>
+							r_run <= fb_per_c2p_i.D_wr(0);
+							r_clear <= fb_per_c2p_i.D_wr(7);
+						when others =>
+							null;
+					end case;
+					r_per_state <= idle;
+					r_per_ack <= '1';
+				else
+					r_per_state <= wait_d_stb;
+				end if;
+			end if;
+
+			if fb_per_c2p_i.cyc = '0' then
+				r_per_state <= idle;
+			end if;
+
+		end if;
+	end process;
+
+	fb_per_p2c_o.D_rd <= r_per_D_rd;
+	fb_per_p2c_o.rdy <= r_per_ack;
+	fb_per_p2c_o.ack <= r_per_ack;
+	fb_per_p2c_o.stall <= '0' when r_per_state = idle else '1';
+
+
+	p_latch:process(fb_syscon_i)
+	begin
+		if fb_syscon_i.rst = '1' then
+			r_latch <= (others => '0');
+		elsif rising_edge(fb_syscon_i.clk) then
+			if r_latch_req = '1' then
+				if to_integer(r_sel) < PERF_COUNT then
+					r_latch <= std_logic_vector(r_ctr(to_integer(r_sel)));
+				else
+					r_latch <= (others => '0');
+				end if;
+			end if;
+		end if;
+	end process;
+
+
+	p_ctr:process(fb_syscon_i)
+	variable v_c2p : fb_con_o_per_i_t;
+	variable v_p2c : fb_con_i_per_o_t;
+	variable v_b : natural;
+	variable v_sys : boolean;
+	begin
+		if fb_syscon_i.rst = '1' then
+			r_ctr <= (others => (others => '0'));
+			r_taken <= (others => '0');
+		elsif rising_edge(fb_syscon_i.clk) then
+
+			for I in 0 to PERF_UNITS-1 loop
+				v_c2p := mon_c2p_i(I);
+				v_p2c := mon_p2c_i(I);
+				v_b := I * PERF_UNIT_CTRS;
+				v_sys := v_c2p.A(23 downto 16) = x"FF";
+
+				if v_c2p.cyc = '1' and r_run = '1' then
+					r_ctr(v_b + PERF_CTR_ACTIVE) <= r_ctr(v_b + PERF_CTR_ACTIVE) + 1;
+					if v_sys then
+						r_ctr(v_b + PERF_CTR_SYS_ACTIVE) <= r_ctr(v_b + PERF_CTR_SYS_ACTIVE) + 1;
+					end if;
+					if v_c2p.A_stb = '1' and v_p2c.stall = '1' then
+						r_ctr(v_b + PERF_CTR_STALL) <= r_ctr(v_b + PERF_CTR_STALL) + 1;
+					end if;
+					if r_taken(I) = '1' and v_p2c.ack = '0' then
+						r_ctr(v_b + PERF_CTR_WAIT) <= r_ctr(v_b + PERF_CTR_WAIT) + 1;
+					end if;
+					if v_p2c.ack = '1' then
+						r_ctr(v_b + PERF_CTR_CYCLES) <= r_ctr(v_b + PERF_CTR_CYCLES) + 1;
+						if v_sys then
+							r_ctr(v_b + PERF_CTR_SYS_CYCLES) <= r_ctr(v_b + PERF_CTR_SYS_CYCLES) + 1;
+						end if;
+					end if;
+				end if;
+
+				if v_c2p.cyc = '0' then
+					r_taken(I) <= '0';
+				elsif v_c2p.A_stb = '1' and v_p2c.stall = '0' then
+					r_taken(I) <= '1';
+				elsif v_p2c.ack = '1' then
+					r_taken(I) <= '0';
+				end if;
+			end loop;
+
+			for I in 0 to PERF_EVENTS-1 loop
+				if events_i(I) = '1' and r_run = '1' then
+					r_ctr(PERF_EVT_BASE + I) <= r_ctr(PERF_EVT_BASE + I) + 1;
+				end if;
+			end loop;
+
+			if r_clear = '1' then
+				r_ctr <= (others => (others => '0'));
+			end if;
+
+		end if;
+	end process;
+
+end rtl;
@@ -45,6 +45,7 @@
 library IEEE;
 use IEEE.STD_LOGIC_1164.ALL;
 use IEEE.NUMERIC_STD.ALL;
+use std.textio.all;
 
 use work.common.all;
 
@@ -91,7 +92,51 @@ architecture Behavioral of RAM_tb is
 	signal	i_nWE_dly		: std_logic;
 	signal	i_D				: std_logic_vector(7 downto 0);	
 	signal	i_D_in_dly		: std_logic_vector(7 downto 0);
-	signal	i_data			: ram_type := (others => (others => '0'));
+
+	-- the image is loaded when the signal is elaborated rather than by a
+	-- process assigning a byte at a time. A romfile ending in .bitvec is a
+	-- word packed file of 256 bit lines (32 bytes, lowest address leftmost)
+	-- as made by blitsim.romimage, anything else is read as raw binary
+	impure function load_image return ram_type is
+		type char_file_t is file of character;
+		file char_file : char_file_t;
+		file vec_file : text;
+		variable ret : ram_type := (others => (others => '0'));
+		variable char_v : character;
+		variable l : line;
+		variable bv : bit_vector(255 downto 0);
+		variable i : integer;
+	begin
+		i := 0;
+		if romfile = "" then
+			return ret;
+		end if;
+		report "FILE:" & romfile severity note;
+		if romfile'length > 7 and romfile(romfile'high - 6 to romfile'high) = ".bitvec" then
+			file_open(vec_file, romfile, read_mode);
+			while not endfile(vec_file) and i < size loop
+				readline(vec_file, l);
+				read(l, bv);
+				for j in 31 downto 0 loop
+					exit when i >= size;
+					ret(i) := to_stdlogicvector(bv(j*8+7 downto j*8));
+					i := i + 1;
+				end loop;
+			end loop;
+			file_close(vec_file);
+		else
+			file_open(char_file, romfile );
+			while not endfile(char_file) and i < size loop
+				read(char_file, char_v);
+				ret(i) := std_logic_vector(to_unsigned(character'pos(char_v), 8));
+				i := i + 1;
+			end loop;
+			file_close(char_file);
+		end if;
+		return ret;
+	end function;
+
+	signal	i_data			: ram_type := load_image;
 	
 	function has_meta(X:std_logic_vector) return boolean is
 	begin
@@ -130,30 +175,8 @@ begin
 	--todo: modelling of write delays
 	
 	p_write: process(A, nWE, nCS, i_A_DLY, i_D_in_dly, i_nCS_OE_dly, i_nWE_dly)
-		type char_file_t is file of character;
-		file char_file : char_file_t;
-		variable char_v : character;
-		subtype byte_t is natural range 0 to 255;
-		variable byte_v : byte_t;
-		variable i : integer;
-		variable init : boolean := true;
 	begin
-		if (init) then
-			if (romfile /= "") then
-				report "FILE:" & romfile severity note;
-				i := 0;
-				file_open(char_file, romfile );
-				while not endfile(char_file) and i < size loop
-					read(char_file, char_v);
-					byte_v := character'pos(char_v);
-					i_data(i) <= std_logic_vector(to_unsigned(byte_v, 8));
-					i := i + 1;
-					--report "Char: " & " #" & integer'image(byte_v);
-				end loop;
-				file_close(char_file);
-			end if;
-			init := false;
-		elsif (rising_edge(nWE) and i_nCS_OE_dly = '0') or (rising_edge(nCS) and i_nWE_dly = '0') then
+		if (rising_edge(nWE) and i_nCS_OE_dly = '0') or (rising_edge(nCS) and i_nWE_dly = '0') then
 --			report "WRITE :" & integer'image(to_integer(unsigned(i_A_DLY))) & ":" & integer'image(to_integer(unsigned(i_D_in_dly)));
 			i_data(to_integer(unsigned(i_A_DLY)) mod size) <= i_D_in_dly;		-- TODO: using delayed address here not sure this is right check with datasheet!
 		end if;
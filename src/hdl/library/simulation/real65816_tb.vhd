@@ -118,6 +118,8 @@ ARCHITECTURE Behavioral OF real_65816_tb IS
 
 	SIGNAL	i_BE_dly			: STD_LOGIC;
 
+	SIGNAL	i_sync			: STD_LOGIC;	-- opcode fetch, for sim_cpu_trace
+
 BEGIN
 
 	i_cpu_clk <= not(PHI2);
@@ -205,5 +207,7 @@ BEGIN
 	RDY <= 	'0' when i_RDY_o = '0' else 
 				'H';
 
+	i_sync <= i_VPA and i_VDA;
+
 
 END Behavioral;
@@ -43,6 +43,7 @@
 library IEEE;
 use IEEE.STD_LOGIC_1164.ALL;
 use IEEE.NUMERIC_STD.ALL;
+use std.textio.all;
 
 use work.common.all;
 
@@ -70,31 +71,49 @@ architecture Behavioral of ROM_tb is
 	signal	i_D				: std_logic_vector(7 downto 0);
 	
 	type		ramtype			is array(0 to size) of std_logic_vector(7 downto 0);
-	signal	data				: ramtype;
-begin
 
-	p_init:process
+	-- the image is loaded when the signal is elaborated rather than by a
+	-- process assigning a byte at a time. A romfile ending in .bitvec is a
+	-- word packed file of 256 bit lines (32 bytes, lowest address leftmost)
+	-- as made by blitsim.romimage, anything else is read as raw binary
+	impure function load_image return ramtype is
 		type char_file_t is file of character;
 		file char_file : char_file_t;
+		file vec_file : text;
+		variable ret : ramtype := (others => (others => 'U'));
 		variable char_v : character;
-		subtype byte_t is natural range 0 to 255;
-		variable byte_v : byte_t;
+		variable l : line;
+		variable bv : bit_vector(255 downto 0);
 		variable i : integer;
 	begin
 		i := 0;
-		file_open(char_file, romfile );
-		while not endfile(char_file) and i < size loop
-			read(char_file, char_v);
-			byte_v := character'pos(char_v);
-			data(i) <= std_logic_vector(to_unsigned(byte_v, 8));
-			i := i + 1;
---			report "Char: " & " #" & integer'image(byte_v);
-		end loop;
-		file_close(char_file);
-		
-		wait;
-	end process;
-	
+		if romfile'length > 7 and romfile(romfile'high - 6 to romfile'high) = ".bitvec" then
+			file_open(vec_file, romfile, read_mode);
+			while not endfile(vec_file) and i < size loop
+				readline(vec_file, l);
+				read(l, bv);
+				for j in 31 downto 0 loop
+					exit when i >= size;
+					ret(i) := to_stdlogicvector(bv(j*8+7 downto j*8));
+					i := i + 1;
+				end loop;
+			end loop;
+			file_close(vec_file);
+		else
+			file_open(char_file, romfile );
+			while not endfile(char_file) and i < size loop
+				read(char_file, char_v);
+				ret(i) := std_logic_vector(to_unsigned(character'pos(char_v), 8));
+				i := i + 1;
+			end loop;
+			file_close(char_file);
+		end if;
+		return ret;
+	end function;
+
+	signal	data				: ramtype := load_image;
+begin
+
 	p_add2d: process(i_A_DLY)
 	begin
 		i_D <= data(to_integer(unsigned(i_A_DLY)) mod size);
@@ -31,20 +31,29 @@
 -- Target Devices: 
 -- Tool versions: 
 -- Description: 		For mk3 board simulation
+--							This has been set up to run from vunit
 --
 -- Dependencies: 
 --
 -- Revision: 
 ----------------------------------------------------------------------------------
 
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
 library IEEE;
 use IEEE.STD_LOGIC_1164.ALL;
 use IEEE.NUMERIC_STD.ALL;
 
+library work;
+use work.sim_run_pack.all;
+
 entity sim_65c02_tb is
 generic (
+		runner_cfg : string := "#";
 		G_MOSROMFILE : string := "../../../../../../sim_asm/test_asm/build/blit-bringup2-rom0.rom";
-		G_RAMDUMPFILE: string := "d:\\temp\\ram_dump_blit_dip40_poc-sysram.bin";
+		G_RAMDUMPFILE: string := "ram_dump_blit_dip40_poc-sysram.bin";		-- in the test's output path
 		G_CPU_8MHz	 : boolean := false -- if set 8MHZ WDC part, else 4MHz Rockwell
 	);
 end sim_65c02_tb;
@@ -133,7 +142,7 @@ begin
 	e_SYS:entity work.sim_SYS_tb
 	generic map (
 		G_MOSROMFILE => G_MOSROMFILE,
-		G_RAMDUMPFILE => G_RAMDUMPFILE,
+		G_RAMDUMPFILE => output_path(runner_cfg) & G_RAMDUMPFILE,
 		G_MK3 => true
 	)
 	port map (
@@ -389,7 +398,7 @@ END GENERATE;
 	e_blit_ram_2048: entity work.ram_tb 
 	generic map (
 		size 			=> 1024*1024,
-		dump_filename => "d:\\temp\\ram_dump_blit_dip40_poc-blitram.bin",
+		dump_filename => output_path(runner_cfg) & "ram_dump_blit_dip40_poc-blitram.bin",
 		tco => 10 ns,
 		taa => 10 ns,
 		toh => 2 ns,		
@@ -477,4 +486,14 @@ END GENERATE;
 	end process;
 
 
+-- VUNIT --
+
+	p_main:process
+	begin
+		test_runner_setup(runner, runner_cfg);
+		sim_run_to_halt(runner_cfg, sim_ENDSIM, sim_reg_halt);
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+
 end;
\ No newline at end of file
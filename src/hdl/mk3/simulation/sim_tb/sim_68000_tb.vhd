@@ -9,6 +9,7 @@
 -- Target Devices: 
 -- Tool versions: 
 -- Description: 		For mk3 board simulation
+--							This has been set up to run from vunit
 --
 -- Dependencies: 
 --
@@ -17,12 +18,20 @@
 
 --TODO: 18/4/2022 - use newer core for this sim? FCx, VMA, E not correctly emulated
 
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
 library IEEE;
 use IEEE.STD_LOGIC_1164.ALL;
 use IEEE.NUMERIC_STD.ALL;
 
+library work;
+use work.sim_run_pack.all;
+
 entity sim_68000_tb is
 generic (
+	runner_cfg : string := "#";
 	G_MOSROMFILE : string := "../../../../../../sim_asm/test_asm68k/build/boot68008_testbench_mos.bin"
 	);
 end sim_68000_tb;
@@ -113,7 +122,7 @@ begin
 	e_SYS:entity work.sim_SYS_tb
 	generic map (
 		G_MOSROMFILE => G_MOSROMFILE,
-		G_RAMDUMPFILE => "d:\\temp\\ram_dump_blit_dip40_poc-sysram.bin",
+		G_RAMDUMPFILE => output_path(runner_cfg) & "ram_dump_blit_dip40_poc-sysram.bin",
 		G_MK3 => true
 	)
 	port map (
@@ -348,7 +357,7 @@ begin
 	e_blit_ram_2048: entity work.ram_tb 
 	generic map (
 		size 			=> 1024*1024,
-		dump_filename => "d:\\temp\\ram_dump_blit_dip40_poc-blitram.bin",
+		dump_filename => output_path(runner_cfg) & "ram_dump_blit_dip40_poc-blitram.bin",
 		tco => 10 ns,
 		taa => 10 ns,
 		toh => 2 ns,		
@@ -436,4 +445,14 @@ begin
 	end process;
 
 
+-- VUNIT --
+
+	p_main:process
+	begin
+		test_runner_setup(runner, runner_cfg);
+		sim_run_to_halt(runner_cfg, sim_ENDSIM, sim_reg_halt);
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+
 end;
\ No newline at end of file
@@ -24,15 +24,36 @@ library IEEE;
 use IEEE.STD_LOGIC_1164.ALL;
 use IEEE.NUMERIC_STD.ALL;
 
+library lib816;
+
+library work;
+use work.common.all;
+use work.sim_bench_pack.all;
+
 entity sim_t65_model_bc_tb is
 generic (
 	runner_cfg : string := "#";
-	G_MOSROMFILE : string := "../../../../../../sim_asm/test_asm_model_BC/build/model_bc.rom"
+	G_MOSROMFILE : string := "../../../../../../sim_asm/test_asm_model_BC/build/model_bc.rom";
+	G_CPU : string := "t65";					-- "t65" or "65816" for a real_65816_tb on the expansion ports
+	G_SYS : string := "bbc";					-- system type jumpers "bbc" or "model_bc"
+	G_FRAMES : string := "";					-- capture the HDMI frames to this file (see blitsim.frames)
+	G_FRAME_COUNT : natural := 0				-- stop capturing after this many frames, 0 for all
 	);
 end sim_t65_model_bc_tb;
 
 architecture Behavioral of sim_t65_model_bc_tb is
 
+	function sys_type_pins(s : string) return std_logic_vector is
+	begin
+		if s = "model_bc" then
+			return "100";
+		else
+			return "111";
+		end if;
+	end function;
+
+	constant C_USE_65816	: boolean := G_CPU = "65816";
+
 	signal	sim_ENDSIM			: 	std_logic 		:= '0';
 	
 	signal	i_EXT_CLK_48M		: 	std_logic;
@@ -88,6 +109,13 @@ architecture Behavioral of sim_t65_model_bc_tb is
 	signal	i_i2c_write_rq			: std_logic;
 	signal	i_i2c_write_data		: std_logic_vector(7 downto 0);
 
+	signal	i_exp_PORTA_io_blit	: std_logic_vector(7 downto 0);
+	signal	i_exp_PORTA_nOE_blit	: std_logic;
+	signal	i_exp_PORTA_DIR_blit	: std_logic;
+	signal	i_exp_PORTB_o_blit	: std_logic_vector(7 downto 0);
+	signal	i_exp_PORTC_io			: std_logic_vector(11 downto 0);
+	signal	i_exp_PORTD_io			: std_logic_vector(11 downto 0);
+
 begin
 	
 	e_SYS:entity work.sim_SYS_tb
@@ -123,8 +151,8 @@ begin
 
 	-- config pins
 	i_exp_PORTG <= (
-		2 downto 0 => "111" -- Model B
-	,	3 => '0' -- t65
+		2 downto 0 => sys_type_pins(G_SYS) -- Model B or B/C
+	,	3 => b2s(C_USE_65816) -- t65 when '0' 
 	,	4 => '1' -- swromx off
 	,	5 => '1' -- mosram off
 	,  6 => '1' -- memi off (enable mem)
@@ -238,13 +266,13 @@ begin
 		I2C_SCL_io 							=> i_I2C_SCL,
 		I2C_SDA_io 							=> i_I2C_SDA,
 
-		exp_PORTA_io 						=> open,
-		exp_PORTA_nOE_o 					=> open,
-		exp_PORTA_DIR_o 					=> open,
+		exp_PORTA_io 						=> i_exp_PORTA_io_blit,
+		exp_PORTA_nOE_o 					=> i_exp_PORTA_nOE_blit,
+		exp_PORTA_DIR_o 					=> i_exp_PORTA_DIR_blit,
 		
-		exp_PORTB_o 						=> open,
-		exp_PORTC_io 						=> open,
-		exp_PORTD_io 						=> open,
+		exp_PORTB_o 						=> i_exp_PORTB_o_blit,
+		exp_PORTC_io 						=> i_exp_PORTC_io,
+		exp_PORTD_io 						=> i_exp_PORTD_io,
 		
 		exp_PORTEFG_io 					=> i_exp_PORTEFG_io,
 		exp_PORTE_nOE 						=> i_exp_PORTE_nOE,
@@ -259,6 +287,110 @@ begin
 
 
 
+	-- HDMI frame capture, the retimed pixels before the encoder
+	g_frames:if G_FRAMES /= "" generate
+		e_frames:entity work.sim_video_sink
+		generic map (
+			G_FILE				=> output_path(runner_cfg) & G_FRAMES,
+			G_MAX_FRAMES		=> G_FRAME_COUNT
+		)
+		port map (
+			clk_i					=> << signal .sim_t65_model_bc_tb.e_daughter.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_clk_hdmi_pixel : std_logic >>,
+			R_i					=> << signal .sim_t65_model_bc_tb.e_daughter.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_R_DVI : std_logic_vector(7 downto 0) >>,
+			G_i					=> << signal .sim_t65_model_bc_tb.e_daughter.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_G_DVI : std_logic_vector(7 downto 0) >>,
+			B_i					=> << signal .sim_t65_model_bc_tb.e_daughter.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_B_DVI : std_logic_vector(7 downto 0) >>,
+			blank_i				=> << signal .sim_t65_model_bc_tb.e_daughter.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_blank_DVI : std_logic >>,
+			vsync_i				=> << signal .sim_t65_model_bc_tb.e_daughter.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_vsync_DVI : std_logic >>
+		);
+	end generate;
+
+	-- a hard 65816 on the expansion ports, wired as in sim_65816_tb
+	g_65816:if C_USE_65816 generate
+		signal	i_exp_PORTA_io_cpu	: std_logic_vector(7 downto 0);
+		signal	i_exp_PORTA_nOE_dly	: std_logic;
+		signal	i_exp_PORTA_DIR_dly	: std_logic;
+		signal	i_exp_PORTB_o_cpu		: std_logic_vector(7 downto 0);
+
+		signal	i_CPU_A					: std_logic_vector(15 downto 0);
+		signal	i_CPU_nRES				: std_logic;
+		signal	i_CPU_RDY				: std_logic;
+		signal	i_CPU_nIRQ				: std_logic;
+		signal	i_CPU_nNMI				: std_logic;
+		signal	i_CPU_RnW				: std_logic;
+		signal	i_CPU_BE					: std_logic;
+		signal	i_CPU_VPA				: std_logic;
+		signal	i_CPU_VPB				: std_logic;
+		signal	i_CPU_VDA				: std_logic;
+		signal	i_CPU_MX					: std_logic;
+		signal	i_CPU_E					: std_logic;
+		signal	i_CPU_MLB				: std_logic;
+		signal	i_CPU_PHI0				: std_logic;
+	begin
+
+		-- model the 74LVC4245 on PORTA
+		i_exp_PORTA_nOE_dly <= i_exp_PORTA_nOE_blit after 8 ns;
+		i_exp_PORTA_DIR_dly <= i_exp_PORTA_DIR_blit after 8 ns;
+
+		i_exp_PORTA_io_cpu	<= 	(others => 'Z') when i_exp_PORTA_DIR_dly = '1' or i_exp_PORTA_nOE_dly = '1' else
+							   	i_exp_PORTA_io_blit after 6 ns;
+		i_exp_PORTA_io_blit	<= 	(others => 'Z') when i_exp_PORTA_DIR_dly = '0' or i_exp_PORTA_nOE_dly = '1' else
+						      	i_exp_PORTA_io_cpu after 6 ns;
+
+		-- model the 74LVC4245 on PORTB
+		i_exp_PORTB_o_cpu <= i_exp_PORTB_o_blit after 6 ns;
+
+		e_cpu: entity lib816.real_65816_tb 
+		generic map (
+			-- 14 MHz part from datasheet
+				dly_bank	 => 30 ns,	
+				hld_bank  => 10 ns,		
+				dly_addr  => 30 ns,
+				dly_dwrite=> 30 ns,	-- dwrite must be > dhold
+				dly_dhold => 10 ns,
+				hld_EMX	 => 5 ns,
+				dly_EMX	 => 45 ns
+		)
+		port map (
+			A 			=> i_CPU_A,
+			D 			=> i_exp_PORTA_io_cpu,
+			nRESET 	=> i_CPU_nRES,
+			RDY 		=> i_CPU_RDY,
+			nIRQ 		=> i_CPU_nIRQ,
+			nNMI 		=> i_CPU_nNMI,
+			RnW 		=> i_CPU_RnW,
+			BE			=> i_CPU_BE,
+			VPA		=> i_CPU_VPA,
+			VPB		=> i_CPU_VPB,
+			VDA		=> i_CPU_VDA,
+			MX			=> i_CPU_MX,
+			E			=> i_CPU_E,
+			MLB		=> i_CPU_MLB,
+			PHI2 		=> i_CPU_PHI0
+		);
+
+		i_CPU_BE 	<= i_exp_PORTB_o_cpu(0);
+		i_CPU_PHI0 	<= i_exp_PORTB_o_cpu(2);
+		i_CPU_RDY 	<= i_exp_PORTB_o_cpu(3);
+		i_CPU_nIRQ  <= i_exp_PORTB_o_cpu(4);
+		i_CPU_nNMI  <= i_exp_PORTB_o_cpu(5);
+		i_CPU_nRES  <= i_exp_PORTB_o_cpu(6);
+
+		i_exp_PORTC_io(7 downto 0) <= i_CPU_A(7 downto 0);
+		i_exp_PORTC_io(11 downto 8) <= (others => 'H');
+
+		i_exp_PORTD_io(0) <= i_CPU_E;
+		i_exp_PORTD_io(1) <= i_CPU_RnW;
+		i_exp_PORTD_io(3) <= i_CPU_VDA;
+		i_exp_PORTD_io(4) <= i_CPU_VPA;
+		i_exp_PORTD_io(5) <= i_CPU_VPB;
+		i_exp_PORTD_io(6) <= i_CPU_MX;
+		i_exp_PORTD_io(7) <= i_CPU_MLB;
+
+		i_exp_PORTE(7 downto 0) <= i_CPU_A(15 downto 8);
+
+	end generate;
+
+
 	e_blit_ram_2048_0: entity work.ram_tb 
 	generic map (
 		size 			=> 2048*1024,
@@ -438,6 +570,7 @@ begin
 
 		wait for 3 us;
 
+		sim_bench_time(output_path(runner_cfg));
 		test_runner_cleanup(runner); -- Simulation ends here
 	end process;
 
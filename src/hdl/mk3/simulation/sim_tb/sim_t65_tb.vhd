@@ -9,6 +9,7 @@
 -- Target Devices: 
 -- Tool versions: 
 -- Description: 		For mk3 board simulation
+--							This has been set up to run from vunit
 --
 -- Dependencies: 
 --
@@ -16,12 +17,20 @@
 -- Revision 0.01 - File Created
 ----------------------------------------------------------------------------------
 
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
 library IEEE;
 use IEEE.STD_LOGIC_1164.ALL;
 use IEEE.NUMERIC_STD.ALL;
 
+library work;
+use work.sim_run_pack.all;
+
 entity sim_t65_tb is
 generic (
+	runner_cfg : string := "#";
 	G_MOSROMFILE : string := "../../../../../../sim_asm/test_asm/build/blit-bringup2-rom0.rom"
 	);
 end sim_t65_tb;
@@ -88,7 +97,7 @@ begin
 	e_SYS:entity work.sim_SYS_tb
 	generic map (
 		G_MOSROMFILE => G_MOSROMFILE,
-		G_RAMDUMPFILE => "d:\\temp\\ram_dump_blit_dip40_poc-sysram.bin",
+		G_RAMDUMPFILE => output_path(runner_cfg) & "ram_dump_blit_dip40_poc-sysram.bin",
 		G_MK3 => true
 	)
 	port map (
@@ -271,7 +280,7 @@ begin
 	e_blit_ram_2048_0: entity work.ram_tb 
 	generic map (
 		size 			=> 2048*1024,
-		dump_filename => "d:\\temp\\ram_dump_blit_dip40_poc-blitram0.bin",
+		dump_filename => output_path(runner_cfg) & "ram_dump_blit_dip40_poc-blitram0.bin",
 		tco => 45 ns,
 		taa => 45 ns
 	)
@@ -289,7 +298,7 @@ begin
 	e_blit_ram_2048_1: entity work.ram_tb 
 	generic map (
 		size 			=> 2048*1024,
-		dump_filename => "d:\\temp\\ram_dump_blit_dip40_poc-blitram1.bin",
+		dump_filename => output_path(runner_cfg) & "ram_dump_blit_dip40_poc-blitram1.bin",
 		tco => 10 ns,
 		taa => 10 ns,
 		toh => 2 ns,		
@@ -314,7 +323,7 @@ begin
 	e_blit_ram_2048_2: entity work.ram_tb 
 	generic map (
 		size 			=> 2048*1024,
-		dump_filename => "d:\\temp\\ram_dump_blit_dip40_poc-blitram2.bin",
+		dump_filename => output_path(runner_cfg) & "ram_dump_blit_dip40_poc-blitram2.bin",
 		tco => 10 ns,
 		taa => 10 ns,
 		toh => 2 ns,		
@@ -340,7 +349,7 @@ begin
 	e_blit_ram_2048_3: entity work.ram_tb 
 	generic map (
 		size 			=> 2048*1024,
-		dump_filename => "d:\\temp\\ram_dump_blit_dip40_poc-blitram3.bin",
+		dump_filename => output_path(runner_cfg) & "ram_dump_blit_dip40_poc-blitram3.bin",
 		tco => 10 ns,
 		taa => 10 ns,
 		toh => 2 ns,		
@@ -427,4 +436,14 @@ begin
 	end process;
 
 
+-- VUNIT --
+
+	p_main:process
+	begin
+		test_runner_setup(runner, runner_cfg);
+		sim_run_to_halt(runner_cfg, sim_ENDSIM, sim_reg_halt);
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+
 end;
\ No newline at end of file
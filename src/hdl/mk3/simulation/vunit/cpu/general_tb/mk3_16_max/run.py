@@ -0,0 +1,99 @@
+import sys
+sys.path.insert(0, "../../../../../../simulation_shared/python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import sources, deps, matrix, romimage, waves, simasm
+
+# Create VUnit instance by parsing command line arguments
+cli = VUnitCLI()
+matrix.add_arguments(cli)
+waves.add_arguments(cli)
+simasm.add_arguments(cli)
+args = cli.parse_args()
+vu = VUnit.from_args(args)
+
+root = "../../../../../../"
+board = root + "mk3/boards/cpu-16-max"
+benches = root + "mk3/simulation/sim_tb/"
+asm = root + "../sim_asm/"
+
+# the CPU benches, each with the test ROM it runs from sim_asm and, where the
+# bench has them, the generics of each variant of its CPU. The 6x09, 6800 and
+# 80188 benches are not here, their cores are not in the tree
+BENCHES = {
+    "t65":          ("sim_t65_tb",          "test_asm/build/blit-bringup2-rom0.rom", {}),
+    "t65_elk":      ("sim_t65_elk_tb",      "test_asm/build/blit-bringup2-rom0.rom", {}),
+    "65c02":        ("sim_65c02_tb",        "test_asm/build/blit-bringup2-rom0.rom",
+        {"4mhz": dict(G_CPU_8MHz=False), "8mhz": dict(G_CPU_8MHz=True)}),
+    "65816":        ("sim_65816_tb",        "test_asm/build/blit-bringup2-rom0.rom", {}),
+    "65816_elk":    ("sim_65816_elk_tb",    "test_asm/build/blit-bringup2-rom0.rom", {}),
+    "68000":        ("sim_68000_tb",        "test_asm68k/build/boot68008_testbench_mos.bin", {}),
+    "80186":        ("sim_80186_tb",        "test_asmx86/build/bootx86_testbench_mos.rom", {}),
+    "arm2":         ("sim_arm2_tb",         "test_asm_arm/build/boot_arm_testbench_mos.bin", {}),
+    "z180":         ("sim_z180_tb",         "test_asmz180/build/z180_rom.bin", {}),
+}
+
+# components the simulator's own libraries have, altera_mf's altpll for the board's PLL
+VENDOR = {"altpll"}
+
+# libraries other than lib that a bench's files use, and the groups in them
+LIBRARIES = {"fmf": ["fmf"], "lib816": ["p65c816"]}
+
+verilog = vu.get_simulator_name() not in ("ghdl", "nvc")
+
+# every bench goes in the one library so that the board and the files the
+# benches share are compiled once, however many run
+index = deps.Index()
+prefer = deps.qsf_files(board + "/mk3_16_max.qsf") + [board]
+m = matrix.Matrix(args)
+tops = {}
+paths = []
+external = set()
+for cpu, (top, rom, variants) in BENCHES.items():
+    if not m.selected(cpu=cpu):
+        continue
+    res = deps.resolve(top, files=[benches + top + ".vhd"], prefer=prefer, index=index)
+    missing = sorted(set(res.missing) - VENDOR)
+    if missing:
+        print(f"cpu: {cpu} left out, nothing in the tree declares {', '.join(missing)}")
+        continue
+    if not verilog and any(p.suffix == ".v" for p in res.paths()):
+        print(f"cpu: {cpu} left out, it has Verilog files and {vu.get_simulator_name()} has no Verilog")
+        continue
+    tops[cpu] = (top, variants, res)
+
+# the test ROMs are made if they are stale, those of different CPUs at once
+images = simasm.roms(args, **{cpu: asm + BENCHES[cpu][1] for cpu in tops})
+for cpu in list(tops):
+    if cpu not in images:
+        print(f"cpu: {cpu} left out, its ROM could not be made")
+        del tops[cpu]
+        continue
+    res = tops[cpu][2]
+    paths += [p for p in res.paths() if p not in paths]
+    external |= {e.split(".")[0] for e in res.external}
+
+for name in sorted(external):
+    if name in LIBRARIES:
+        sources.add_groups(vu.add_library(name), *LIBRARIES[name])
+
+lib = vu.add_library("lib")
+for p in paths:
+    lib.add_source_file(str(p))
+
+# a test per CPU, the one test sim_run_pack gives each bench, the bench's own
+# variants as a matrix, all tagged with the board and CPU so --axis cpu=... or
+# --with-attributes .cpu_... picks some
+for cpu, (top, variants, res) in tops.items():
+    tb = lib.test_bench(top)
+    waves.attach(vu, tb, args)
+    tb.set_generic("G_MOSROMFILE", romimage.preload(images[cpu]))
+    matrix.Matrix(args, variant=variants).add_configs(tb, board="mk3_16_max", cpu=cpu)
+
+
+# the test code fails a test with a failure from sim_SYS_tb, errors in the design only report
+lib.set_sim_option("vhdl_assert_stop_level", "failure", allow_empty=True)
+lib.set_sim_option("disable_ieee_warnings", True, allow_empty=True)
+
+# Run vunit function
+vu.main()
@@ -1,7 +1,17 @@
-from vunit import VUnit
+import sys
+sys.path.insert(0, "../../../../../../../simulation_shared/python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import sprites
 
 # Create VUnit instance by parsing command line arguments
-vu = VUnit.from_argv()
+cli = VUnitCLI()
+cli.parser.add_argument("--seeds", type=int, default=16,
+    help="Number of random sprite setups, each is its own configuration")
+cli.parser.add_argument("--first-seed", type=int, default=0,
+    help="Seed of the first random setup")
+args = cli.parse_args()
+vu = VUnit.from_args(args)
 
 # Create library 'lib'
 lib = vu.add_library("lib")
@@ -20,11 +30,11 @@ lib.add_source_file(root + "mk3/shared/hdmi/sprites/sprite_int.vhd")
 lib.add_source_file(root + "mk3/shared/hdmi/sprites/fb_sprites.vhd")
 
 lib.add_source_file(root + "mk3/shared/hdmi/pll_hdmi.vhd")
-lib.add_source_file(root + "mk3/shared/hdmi/fb_hdmi_vidproc.vhd")
-lib.add_source_file(root + "mk3/shared/hdmi/fb_hdmi_crtc.vhd")
-lib.add_source_file(root + "mk3/shared/hdmi/fb_hdmi_ram.vhd")
-lib.add_source_file(root + "mk3/shared/hdmi/fb_hdmi_ctl.vhd")
-lib.add_source_file(root + "mk3/shared/hdmi/fb_hdmi_seq_ctl.vhd")
+lib.add_source_file(root + "mk3/shared/hdmi/fb_HDMI_vidproc.vhd")
+lib.add_source_file(root + "mk3/shared/hdmi/fb_HDMI_crtc.vhd")
+lib.add_source_file(root + "mk3/shared/hdmi/fb_HDMI_ram.vhd")
+lib.add_source_file(root + "mk3/shared/hdmi/fb_HDMI_ctl.vhd")
+lib.add_source_file(root + "mk3/shared/hdmi/fb_HDMI_seq_ctl.vhd")
 lib.add_source_file(root + "mk3/shared/hdmi/hdmi_blockram.vhd")
 lib.add_source_file(root + "mk3/shared/hdmi/vidmem_sequencer.vhd")
 
@@ -44,6 +54,12 @@ lib.add_source_file(root + "library/fishbone/fb_null.vhd")
 
 # Sim files
 lib.add_source_file("test_tb.vhd")
+lib.add_source_file("sprites_random_tb.vhd")
+
+# each seed is a random set of sprite lists checked against the reference renderer in blitsim.sprites
+test = lib.test_bench("sprites_random_tb").test("random")
+for seed in range(args.first_seed, args.first_seed + args.seeds):
+    sprites.add_config(test, "seed%d" % seed, sprites.random_setup(seed))
 
 tb = lib.test_bench("test_tb")
 #tb.set_generic("G_MOSROMFILE","../../" + root + "../sim_asm/test_asm_model_BC/build/model_bc.rom")
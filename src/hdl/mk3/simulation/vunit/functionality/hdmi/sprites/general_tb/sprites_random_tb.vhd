@@ -0,0 +1,269 @@
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library std;
+use std.textio.all;
+
+library work;
+use work.common.all;
+use work.sprites_pack.all;
+
+-- The sprite engine on its own with a random setup from run.py (blitsim.sprites).
+--
+-- The sprites' list pointers are written through the CPU port from cpu.txt
+-- and the bench stands in for vidmem_sequencer: after each line's data request
+-- it reads 4 bytes per sprite from a memory loaded from mem.txt, at the address
+-- and register group the sprite asks for, writing them only when the sprite is
+-- active. The fetch is done FETCH_START pixels after hsync and takes a couple of
+-- pixels per sprite, which is quicker than the real sequencer, so the setups
+-- keep the sprites' horizontal positions past FETCH_END.
+--
+-- pixel_act_o and pixel_o are captured at every pixel clock of G_FRAMES frames
+-- from the first vsync, a byte each (act in bit 4, the pixel in bits 3..0), to
+-- pixels.bin for run.py to compare with the reference renderer.
+
+entity sprites_random_tb is
+	generic (
+		runner_cfg : string;
+		G_N_SPRITES			: natural := 4;
+		G_LINE				: positive := 160;		-- pixel clocks per line
+		G_LINES				: positive := 32;			-- lines per frame
+		G_FRAMES				: positive := 2;			-- frames captured
+		G_MEM_SIZE			: positive := 4096		-- bytes in mem.txt, addresses wrap
+		);
+end sprites_random_tb;
+
+architecture rtl of sprites_random_tb is
+
+	constant CLOCK48_PER	: time := (1000000/48) * 1 ps;
+	constant PIXEL_DIV	: natural := 6;			-- 48MHz clocks per pixel, 8MHz as in fb_HDMI
+	constant HSYNC_W		: natural := 4;			-- pixels
+	constant VSYNC_L		: natural := 2;			-- lines
+	constant FETCH_START	: natural := 4;			-- pixels after hsync that the sequencer starts
+
+	constant C_A_SIZE		: natural := numbits(G_N_SPRITES) + 4;
+
+	type t_mem is array(0 to G_MEM_SIZE-1) of std_logic_vector(7 downto 0);
+
+	signal i_clk_48		: std_logic;
+	signal r_rst			: std_logic := '1';
+	signal r_run			: std_logic := '0';
+
+	signal r_div			: natural range 0 to PIXEL_DIV-1 := 0;
+	signal r_pixel_clken	: std_logic := '0';
+	signal r_x				: natural range 0 to G_LINE-1 := 0;
+	signal r_y				: natural range 0 to G_LINES-1 := 0;
+	signal i_hsync			: std_logic;
+	signal i_vsync			: std_logic;
+
+	signal r_SEQ_D			: std_logic_vector(7 downto 0) := (others => '0');
+	signal r_SEQ_wren		: std_logic := '0';
+	signal r_SEQ_A			: unsigned(C_A_SIZE-1 downto 0) := (others => '0');
+
+	signal i_SEQ_DATAPTR_A		: t_spr_addr_array(G_N_SPRITES-1 downto 0);
+	signal i_SEQ_DATAPTR_act	: std_logic_vector(G_N_SPRITES-1 downto 0);
+	signal i_SEQ_DATA_REQ		: std_logic;
+	signal i_SEQ_A_pre			: t_spr_pre_array(G_N_SPRITES-1 downto 0);
+
+	signal r_CPU_D			: std_logic_vector(7 downto 0) := (others => '0');
+	signal r_CPU_A			: unsigned(C_A_SIZE-1 downto 0) := (others => '0');
+	signal r_CPU_wren		: std_logic := '0';
+
+	signal i_pixel_act	: std_logic;
+	signal i_pixel			: std_logic_vector(3 downto 0);
+
+	signal r_done			: std_logic := '0';
+
+begin
+
+	p_clk_48:process
+	begin
+		i_clk_48 <= '1';
+		wait for CLOCK48_PER / 2;
+		i_clk_48 <= '0';
+		wait for CLOCK48_PER / 2;
+	end process;
+
+	p_main:process
+	file cpu_file : text;
+	variable l : line;
+	variable v_a : std_logic_vector(7 downto 0);
+	variable v_d : std_logic_vector(7 downto 0);
+	begin
+
+		test_runner_setup(runner, runner_cfg);
+
+		while test_suite loop
+
+			if run("random") then
+
+				r_rst <= '1';
+				wait for 1 us;
+				wait until rising_edge(i_clk_48);
+				r_rst <= '0';
+				wait until rising_edge(i_clk_48);
+
+				file_open(cpu_file, output_path(runner_cfg) & "cpu.txt", read_mode);
+				while not endfile(cpu_file) loop
+					readline(cpu_file, l);
+					hread(l, v_a);
+					hread(l, v_d);
+					r_CPU_A <= unsigned(v_a(C_A_SIZE-1 downto 0));
+					r_CPU_D <= v_d;
+					r_CPU_wren <= '1';
+					wait until rising_edge(i_clk_48);
+					r_CPU_wren <= '0';
+					wait until rising_edge(i_clk_48);
+				end loop;
+				file_close(cpu_file);
+
+				r_run <= '1';
+				wait until r_done = '1';
+
+			end if;
+
+		end loop;
+
+		wait for 3 us;
+
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+	-- pixel clock and a plain raster, r_x and r_y are the pixel and line as the
+	-- sprites see them on each pixel clock
+	p_raster:process(i_clk_48)
+	begin
+		if rising_edge(i_clk_48) then
+			r_pixel_clken <= '0';
+			if r_run = '1' then
+				if r_div = 0 then
+					r_pixel_clken <= '1';
+					r_div <= PIXEL_DIV-1;
+				else
+					r_div <= r_div - 1;
+				end if;
+			end if;
+
+			if r_pixel_clken = '1' then
+				if r_x = G_LINE-1 then
+					r_x <= 0;
+					if r_y = G_LINES-1 then
+						r_y <= 0;
+					else
+						r_y <= r_y + 1;
+					end if;
+				else
+					r_x <= r_x + 1;
+				end if;
+			end if;
+		end if;
+	end process;
+
+	i_hsync <= '1' when r_run = '1' and r_x < HSYNC_W else '0';
+	i_vsync <= '1' when r_run = '1' and r_y < VSYNC_L else '0';
+
+	-- stand in for vidmem_sequencer's sprite fetches
+	p_seq:process
+	file mem_file : text;
+	variable l : line;
+	variable v_mem : t_mem := (others => (others => '0'));
+	variable v_i : natural;
+	variable v_addr : natural;
+	variable v_pre : std_logic_vector(1 downto 0);
+	begin
+		file_open(mem_file, output_path(runner_cfg) & "mem.txt", read_mode);
+		v_i := 0;
+		while not endfile(mem_file) and v_i < G_MEM_SIZE loop
+			readline(mem_file, l);
+			hread(l, v_mem(v_i));
+			v_i := v_i + 1;
+		end loop;
+		file_close(mem_file);
+
+		-- SEQ_DATA_REQ_o also changes as the sprites come out of reset
+		wait until r_run = '1';
+
+		loop
+			wait on i_SEQ_DATA_REQ;
+			for i in 1 to FETCH_START loop
+				wait until rising_edge(i_clk_48) and r_pixel_clken = '1';
+			end loop;
+			wait until rising_edge(i_clk_48);
+
+			for s in 0 to G_N_SPRITES-1 loop
+				for b in 0 to 3 loop
+					v_addr := to_integer(unsigned(i_SEQ_DATAPTR_A(s))) mod G_MEM_SIZE;
+					v_pre := i_SEQ_A_pre(s);
+					r_SEQ_A <= to_unsigned(s, C_A_SIZE-4) & unsigned(v_pre) & to_unsigned(b, 2);
+					r_SEQ_D <= v_mem(v_addr);
+					r_SEQ_wren <= i_SEQ_DATAPTR_act(s);
+					wait until rising_edge(i_clk_48);
+					r_SEQ_wren <= '0';
+					-- let the pointers and list state move on before the next byte
+					wait until rising_edge(i_clk_48);
+				end loop;
+			end loop;
+		end loop;
+	end process;
+
+	p_capture:process
+	type char_file_t is file of character;
+	file pixel_file : char_file_t;
+	begin
+		wait until r_run = '1';
+		file_open(pixel_file, output_path(runner_cfg) & "pixels.bin", write_mode);
+		for i in 0 to G_FRAMES*G_LINES*G_LINE-1 loop
+			wait until rising_edge(i_clk_48) and r_pixel_clken = '1';
+			write(pixel_file, character'val(
+				to_integer(unsigned(std_logic_vector'(i_pixel_act & to_X01(i_pixel))))
+				));
+		end loop;
+		file_close(pixel_file);
+		r_done <= '1';
+		wait;
+	end process;
+
+	e_sprites:entity work.sprites
+	generic map (
+		SIM									=> true,
+		G_N_SPRITES							=> G_N_SPRITES
+	)
+	port map (
+		clk_48M_i							=> i_clk_48,
+		rst_i									=> r_rst,
+
+		SEQ_D_i								=> r_SEQ_D,
+		SEQ_wren_i							=> r_SEQ_wren,
+		SEQ_A_i								=> r_SEQ_A,
+
+		SEQ_DATAPTR_A_o					=> i_SEQ_DATAPTR_A,
+		SEQ_DATAPTR_act_o					=> i_SEQ_DATAPTR_act,
+		SEQ_DATA_REQ_o						=> i_SEQ_DATA_REQ,
+		SEQ_A_pre_o							=> i_SEQ_A_pre,
+
+		CPU_D_i								=> r_CPU_D,
+		CPU_A_i								=> r_CPU_A,
+		CPU_wren_i							=> r_CPU_wren,
+		CPU_rden_i							=> '0',
+		CPU_D_o								=> open,
+		CPU_wr_ack_o						=> open,
+		CPU_rd_ack_o						=> open,
+
+		pixel_clken_i						=> r_pixel_clken,
+		vsync_i								=> i_vsync,
+		hsync_i								=> i_hsync,
+		disen_i								=> '1',
+
+		pixel_act_o							=> i_pixel_act,
+		pixel_o								=> i_pixel,
+
+		vert_ctr_o							=> open,
+		horz_ctr_o							=> open
+	);
+
+end rtl;
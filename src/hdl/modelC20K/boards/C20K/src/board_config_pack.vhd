@@ -78,6 +78,7 @@ package board_config_pack is
 	constant G_INCL_CS_AERIS	: boolean := true;
 	constant G_INCL_CS_EEPROM	: boolean := true;
 	constant G_INCL_CS_SDCARD  : boolean := true;
+	constant G_INCL_CS_PERF    : boolean := false;		-- chipset performance counters
 	constant G_INCL_LED_ARR		: boolean := false;
 	constant G_INCL_DBG_UART	: boolean := true;
 	
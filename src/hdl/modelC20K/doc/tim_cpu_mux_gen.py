@@ -1,7 +1,18 @@
 #!/usr/bin/env python
 
+# Works out the 128MHz time slices for the CPU multiplexer (see cpu-multiplex.md)
+# for one CPU/Fishbone clock pair and prints a WaveDrom diagram. With --sweep
+# every combination of the given clocks and timing margins is checked at once
+# and a VHDL constants package and WaveDrom file are written for each legal one.
+#
+#   tim_cpu_mux_gen.py
+#   tim_cpu_mux_gen.py --sweep --cpu 2,4,8 --fb 96,128,144 --ads 30:50:5 -o sweep
+
+import argparse
 import math
 import json
+import os
+import sys
 
 def checkint(a, msg):
 	if (math.ceil(a) != math.floor(a)):
@@ -33,70 +44,234 @@ FB_speed = 128
 
 # timing constraints
 T_ADS = 40	# address setup from phi2
-T_DHR = 10  # 
+T_DHR = 10  #
 T_DSR = 10
 T_PCS = 10
 T_MDS = 30
 
-CPU_period = 1000 / CPU_speed
-FB_period = 1000 / FB_speed
-
-D_TOTAL = checkint(CPU_period / FB_period, "D_TOTAL not divisible by 2")
-D_PHI1  = 0
-D_PHI2  = math.ceil(D_TOTAL / 2)
-D_ADS   = math.ceil(T_ADS / FB_period)
-D_P1DHR = math.ceil(T_DHR / FB_period)
-D_P2DHR = D_PHI2 + math.ceil(T_DHR / FB_period)
-D_MDS   = D_PHI2 + math.ceil(T_MDS / FB_period)
-
-D_P2DSR = D_TOTAL - max([math.ceil(T_DSR / FB_period), math.ceil(T_PCS / FB_period)])
-
-lab_dict = {
-	"ADS": D_ADS,
-	"1DHR": D_P1DHR,
-	"2DHR": D_P2DHR,
-	"MDS": D_MDS,
-	"DSR": D_P2DSR
+# the timing constraints the sweep checks, in the order they are reported
+CONSTRAINTS = ["ADS", "DHR", "DSR", "PCS", "MDS"]
+
+# names of the matching constants in fb_C20K_mem_cpu_65816.vhd
+VHDL_NAMES = {
+	"TOTAL": "C_DIV_TOTAL",
+	"PHI1": "C_CPU_DIV_PHI1",
+	"PHI2": "C_CPU_DIV_PHI2",
+	"ADS": "C_CPU_DIV_ADS",
+	"1DHR": "C_CPU_DIV_PHI1_DHR",
+	"2DHR": "C_CPU_DIV_PHI2_DHR",
+	"MDS": "C_CPU_DIV_MDS",
+	"DSR": "C_CPU_DIV_PHI2_DSR"
 }
 
-labels = [""] * D_TOTAL
+def divisions(CPU_speed, FB_speed, T_ADS, T_DHR, T_DSR, T_PCS, T_MDS, np=math):
+	"""the slice of each event, works on numbers or (with np=numpy) on arrays"""
+	CPU_period = 1000 / CPU_speed
+	FB_period = 1000 / FB_speed
+	D_TOTAL = CPU_period / FB_period
+	D_PHI2  = np.ceil(D_TOTAL / 2)
+	maximum = getattr(np, "maximum", max)
+	return {
+		"TOTAL": D_TOTAL,
+		"PHI1": 0 * D_TOTAL,
+		"PHI2": D_PHI2,
+		"ADS": np.ceil(T_ADS / FB_period),
+		"1DHR": np.ceil(T_DHR / FB_period),
+		"2DHR": D_PHI2 + np.ceil(T_DHR / FB_period),
+		"MDS": D_PHI2 + np.ceil(T_MDS / FB_period),
+		"DSR": D_TOTAL - maximum(np.ceil(T_DSR / FB_period), np.ceil(T_PCS / FB_period))
+	}
 
-for k in lab_dict:
-	labels[lab_dict[k]] = k
+def slacks(d, FB_period, T_ADS, T_DHR, T_DSR, T_PCS, T_MDS, np=math):
+	"""
+	ns to spare on each timing constraint, the time fb_C20K_mem_cpu_65816.vhd
+	gives it less the time it needs, works on numbers or arrays as divisions():
+	  ADS  the address is latched in slices ADS and ADS+1, both in phi1
+	  DHR  the data is held into phi1 and into phi2, each in the same phase
+	  DSR  read data is sampled at DSR, in phi2
+	  PCS  as DSR
+	  MDS  write data is set up at MDS+1, in phi2 before its last slice
+	"""
+	minimum = getattr(np, "minimum", min)
+	phi1 = d["PHI2"]						# slices in phi1
+	phi2 = d["TOTAL"] - d["PHI2"]		# and in phi2
+	return {
+		"ADS": (phi1 - 2) * FB_period - T_ADS,
+		"DHR": minimum(phi1 - 1, phi2 - 1) * FB_period - T_DHR,
+		"DSR": (phi2 - 1) * FB_period - T_DSR,
+		"PCS": (phi2 - 1) * FB_period - T_PCS,
+		"MDS": (phi2 - 2) * FB_period - T_MDS
+	}
 
+def wavedrom(D_TOTAL, D_PHI2, lab_dict):
 
-#################################### Show results ############################
+	D_ADS = lab_dict["ADS"]
 
-print("==================== SPECIFIED VALUES =================================")
+	labels = [""] * D_TOTAL
 
+	for k in lab_dict:
+		labels[lab_dict[k]] = k
 
-print(f"CPU_speed       :{CPU_speed:12.10g} MHz");
-print(f"FB_speed        :{FB_speed:12.10g} MHz");
+	w_CPU_A_nOE = "".join(
+			map(
+				lambda n: "0" if n + 1 == D_ADS or n + 1 == D_ADS + 1 else "1",
+				range(0, D_TOTAL)
+			)
+		)
 
-print(f"T_ADS           :{T_ADS:12.10g}ns")
-print(f"T_DHR           :{T_DHR:12.10g}ns")
-print(f"T_DSR           :{T_DSR:12.10g}ns")
-print(f"T_PCS           :{T_PCS:12.10g}ns")
-print(f"T_MDS           :{T_MDS:12.10g}ns")
+	w_CPU_A_nOE = multidot(wraparound(w_CPU_A_nOE))
 
-print("==================== CALCULATED VALUES =================================")
+	return {"signal": [
+				{ "wave": "=" * (D_TOTAL + 2), "data": [D_TOTAL-1] + list(range(0, D_TOTAL)) + [0]},
+				{ "name": "div", "wave": "=" * (D_TOTAL + 2), "data": [""] + labels + [""]},
+				{ "name": "clk", "wave": "p" + "." * (D_TOTAL + 1)},
+				{ "name": "phi2", "wave": "hl" + "." * (D_PHI2 - 1) + "h" + "." * (D_TOTAL-D_PHI2-1) + "l"},
+				{ "name": "CPU_A_nOE", "wave": w_CPU_A_nOE}
+			]}
 
+def vhdl_package(name, point, d):
+	ret = "-- generated by tim_cpu_mux_gen.py --sweep, do not edit\n"
+	ret += "--\n"
+	for k in ["CPU_speed", "FB_speed"]:
+		ret += f"-- {k:<10}: {point[k]:g} MHz\n"
+	for k in ["T_ADS", "T_DHR", "T_DSR", "T_PCS", "T_MDS"]:
+		ret += f"-- {k:<10}: {point[k]:g} ns\n"
+	ret += f"-- slack     : {point['slack']:g} ns, on T_{point['tightest']}\n"
+	ret += "\n"
+	ret += f"package {name} is\n"
+	for k in ["TOTAL", "PHI1", "PHI2", "ADS", "1DHR", "2DHR", "MDS", "DSR"]:
+		ret += f"\tconstant {VHDL_NAMES[k]:<20}: integer := {d[k]};\n"
+	ret += f"end {name};\n"
+	return ret
 
-w_CPU_A_nOE = "".join(
-		map(
-			lambda n: "0" if n + 1 == D_ADS or n + 1 == D_ADS + 1 else "1",
-			range(0, D_TOTAL)
-		)
-	)
-
-w_CPU_A_nOE = multidot(wraparound(w_CPU_A_nOE))
-
-print(json.dumps(
-		{"signal": [
-			{ "wave": "=" * (D_TOTAL + 2), "data": [D_TOTAL-1] + list(range(0, D_TOTAL)) + [0]},
-			{ "name": "div", "wave": "=" * (D_TOTAL + 2), "data": [""] + labels + [""]},
-			{ "name": "clk", "wave": "p" + "." * (D_TOTAL + 1)},
-			{ "name": "phi2", "wave": "hl" + "." * (D_PHI2 - 1) + "h" + "." * (D_TOTAL-D_PHI2-1) + "l"},
-			{ "name": "CPU_A_nOE", "wave": w_CPU_A_nOE}
-		]}
-	))
\ No newline at end of file
+def parse_list(s):
+	"""1,2,3 or start:stop:step (stop included)"""
+	ret = []
+	for part in s.split(","):
+		if ":" in part:
+			a = [float(x) for x in part.split(":")]
+			start, stop, step = a[0], a[1], a[2] if len(a) > 2 else 1
+			n = int(math.floor((stop - start) / step + 1e-9)) + 1
+			ret += [start + i * step for i in range(n)]
+		else:
+			ret.append(float(part))
+	return ret
+
+def sweep(args):
+	import numpy as np
+
+	axes = {
+		"CPU_speed": parse_list(args.cpu),
+		"FB_speed": parse_list(args.fb),
+		"T_ADS": parse_list(args.ads),
+		"T_DHR": parse_list(args.dhr),
+		"T_DSR": parse_list(args.dsr),
+		"T_PCS": parse_list(args.pcs),
+		"T_MDS": parse_list(args.mds)
+	}
+	grid = dict(zip(axes, [g.ravel() for g in np.meshgrid(*axes.values(), indexing="ij")]))
+
+	d = divisions(*grid.values(), np=np)
+	FB_period = 1000 / grid["FB_speed"]
+
+	# the cycle must be a whole, even number of slices so both phases are equal
+	# (the VHDL takes C_DIV_TOTAL / 2 for phi2), and no constraint may be
+	# short of time
+	integral = np.abs(d["TOTAL"] - np.round(d["TOTAL"])) < 1e-9
+	even = integral & (np.round(d["TOTAL"]) % 2 == 0)
+	margins = slacks(d, FB_period, grid["T_ADS"], grid["T_DHR"], grid["T_DSR"], grid["T_PCS"], grid["T_MDS"], np=np)
+	margin = np.stack([margins[k] for k in CONSTRAINTS])
+	tightest = np.argmin(margin, axis=0)
+	slack = np.min(margin, axis=0)
+	legal = even & (slack >= 0)
+
+	if args.output:
+		os.makedirs(args.output, exist_ok=True)
+
+	print(f"{'CPU':>6} {'FB':>6} {'ADS':>5} {'DHR':>5} {'DSR':>5} {'PCS':>5} {'MDS':>5}  {'TOTAL':>5} {'slack ns':>9} {'on':>4}  result")
+	for i in range(len(legal)):
+		point = {k: grid[k][i] for k in grid}
+		point["slack"] = slack[i]
+		point["tightest"] = CONSTRAINTS[tightest[i]]
+		if not integral[i]:
+			result = "cycle not a whole number of slices"
+		elif not even[i]:
+			result = "odd number of slices"
+		elif not legal[i]:
+			result = f"T_{point['tightest']} short by {-slack[i]:.2f} ns"
+		else:
+			result = "legal"
+		if legal[i] or args.all:
+			print(f"{point['CPU_speed']:6g} {point['FB_speed']:6g} {point['T_ADS']:5g} {point['T_DHR']:5g} "
+				f"{point['T_DSR']:5g} {point['T_PCS']:5g} {point['T_MDS']:5g}  {d['TOTAL'][i]:5.4g} {slack[i]:9.2f} {point['tightest']:>4}  {result}")
+
+		if legal[i] and args.output:
+			di = {k: int(round(d[k][i])) for k in d}
+			name = "tim_cpu_mux_{:g}_{:g}_{:g}_{:g}_{:g}_{:g}_{:g}".format(*[point[k] for k in axes])
+			name = name.replace(".", "p").replace("-", "m")
+			with open(os.path.join(args.output, name + "_pack.vhd"), "w") as f:
+				f.write(vhdl_package(name + "_pack", point, di))
+			with open(os.path.join(args.output, name + ".json"), "w") as f:
+				lab_dict = {k: di[k] for k in ["ADS", "1DHR", "2DHR", "MDS", "DSR"]}
+				f.write(json.dumps(wavedrom(di["TOTAL"], di["PHI2"], lab_dict)))
+
+	print(f"{int(np.count_nonzero(legal))} of {len(legal)} combinations legal")
+	return 0 if np.any(legal) else 1
+
+def single():
+
+	d = divisions(CPU_speed, FB_speed, T_ADS, T_DHR, T_DSR, T_PCS, T_MDS)
+
+	D_TOTAL = checkint(d["TOTAL"], "D_TOTAL not divisible by 2")
+	D_PHI1  = 0
+	D_PHI2  = int(d["PHI2"])
+
+	lab_dict = {
+		"ADS": int(d["ADS"]),
+		"1DHR": int(d["1DHR"]),
+		"2DHR": int(d["2DHR"]),
+		"MDS": int(d["MDS"]),
+		"DSR": int(d["DSR"])
+	}
+
+	#################################### Show results ############################
+
+	print("==================== SPECIFIED VALUES =================================")
+
+
+	print(f"CPU_speed       :{CPU_speed:12.10g} MHz");
+	print(f"FB_speed        :{FB_speed:12.10g} MHz");
+
+	print(f"T_ADS           :{T_ADS:12.10g}ns")
+	print(f"T_DHR           :{T_DHR:12.10g}ns")
+	print(f"T_DSR           :{T_DSR:12.10g}ns")
+	print(f"T_PCS           :{T_PCS:12.10g}ns")
+	print(f"T_MDS           :{T_MDS:12.10g}ns")
+
+	print("==================== CALCULATED VALUES =================================")
+
+	print(json.dumps(wavedrom(D_TOTAL, D_PHI2, lab_dict)))
+
+	return 0
+
+def main():
+	parser = argparse.ArgumentParser(description="CPU multiplexer time slices")
+	parser.add_argument("--sweep", action="store_true", help="check every combination of the values below")
+	parser.add_argument("--cpu", default=str(CPU_speed), help="CPU clocks in MHz, list or start:stop:step")
+	parser.add_argument("--fb", default=str(FB_speed), help="Fishbone clocks in MHz")
+	parser.add_argument("--ads", default=str(T_ADS), help="T_ADS values in ns")
+	parser.add_argument("--dhr", default=str(T_DHR), help="T_DHR values in ns")
+	parser.add_argument("--dsr", default=str(T_DSR), help="T_DSR values in ns")
+	parser.add_argument("--pcs", default=str(T_PCS), help="T_PCS values in ns")
+	parser.add_argument("--mds", default=str(T_MDS), help="T_MDS values in ns")
+	parser.add_argument("-a", "--all", action="store_true", help="list illegal combinations too")
+	parser.add_argument("-o", "--output", help="write a VHDL package and WaveDrom file for each legal combination here")
+	args = parser.parse_args()
+
+	if args.sweep:
+		return sweep(args)
+	else:
+		return single()
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,4 +1,8 @@
-from vunit import VUnit
+import sys
+sys.path.insert(0, "../../../../simulation_shared/python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import sources, prebuilt, mailbox, cputrace
 
 GOWIN = "C:/Gowin/Gowin_V1.9.12_x64/IDE/simlib/gw2a"
 
@@ -6,42 +10,37 @@ def encode(tb_cfg):
     return ", ".join(["%s:%s" % (key, str(tb_cfg[key])) for key in tb_cfg])
 
 # Create VUnit instance by parsing command line arguments
-vu = VUnit.from_argv()
+cli = VUnitCLI()
+prebuilt.add_arguments(cli)
+cputrace.add_arguments(cli)
+args = cli.parse_args()
+vu = VUnit.from_args(args)
+
+# Shared libraries are seeded from the prebuilt cache on a cold start
+prebuilt.seed(vu, args)
 
 # Create library 'lib'
 lib = vu.add_library("lib")
 
-lib.add_source_files(GOWIN + "/prim_sim.vhd")
+sources.add_gowin(lib, GOWIN)
+
+sources.add_groups(lib, "fishbone", "video", "peripherals", "sim_models", "c20k_video")
 
 # Add all files ending in .vhd in current working directory to library
 lib.add_source_files("./*.vhd")
 lib.add_source_files("../../board/*.vhd")
-lib.add_source_files("../../../shared/c20k_peripheral_mux_ctl.vhd")
 lib.add_source_files("../../../shared/fb_SYS_c20k.vhd")
-lib.add_source_files("../../../../library/bbc/*.vhd")
-lib.add_source_files("../../../../library/simulation/hct574.vhd")
-lib.add_source_files("../../../../library/simulation/ac245.vhd")
-lib.add_source_files("../../../../library/simulation/cy74FCT2543.vhd")
-lib.add_source_files("../../../../library/simulation/ls74245.vhd")
-lib.add_source_files("../../../../library/common.vhd")
-lib.add_source_files("../../../../library/fishbone/fishbone_pack.vhd")
-lib.add_source_files("../../../../simulation_shared/fb_tester_pack.vhd")
-
 
 lib.add_source_files("../../../shared/version.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/C20k816only.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/gowin_dpb/hdmi_blockram.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/gowin_rpll/pll_27_360.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/gowin_rpll/pll_360_384_128.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/gowin_rpll/pll_hdmi.vhd") 
-lib.add_source_files("../../../boards/C20k816only/src/gowin_sdpb/linebuffer.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/board_config_pack.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/gowin_rpll/pll_pal_sc.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/fb_c20k_mem_cpu_65816.vhd")
-lib.add_source_files("../../../shared/ws2812_pack.vhd")
-lib.add_source_files("../../../shared/ws2812.vhd")
-lib.add_source_files("../../../shared/fb_ws2812.vhd")
-lib.add_source_files("../../../shared/fb_P20K_MEM.vhd")
+lib.add_source_files("../../../boards/C20K816only/src/C20K816only.vhd")
+lib.add_source_files("../../../boards/C20K816only/src/gowin_dpb/hdmi_blockram.vhd")
+lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_27_360.vhd")
+lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_360_384_128.vhd")
+lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_hdmi.vhd") 
+lib.add_source_files("../../../boards/C20K816only/src/gowin_sdpb/linebuffer.vhd")
+lib.add_source_files("../../../boards/C20K816only/src/board_config_pack.vhd")
+lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_pal_sc.vhd")
+lib.add_source_files("../../../boards/C20K816only/src/fb_C20K_mem_cpu_65816.vhd")
 
 lib.add_source_files("../../../shared/1bitvid/dac1_oser.vhd")
 lib.add_source_files("../../../shared/1bitvid/dac1_oserx2.vhd")
@@ -54,79 +53,32 @@ lib.add_source_files("../../../../shared/fb_CPU_pack.vhd")
 lib.add_source_files("../../../../shared/fb_CPU_con_burst.vhd")
 lib.add_source_files("../../../../shared/log2phys.vhd")
 lib.add_source_files("../../../../shared/address_decode.vhd")
-lib.add_source_files("../../../../shared/fb_i2c.vhd")
 lib.add_source_files("../../../../mk3/shared/fb_MEM.vhd")
 lib.add_source_files("../../../../shared/fb_memctl.vhd")
 
 lib.add_source_files("../../../../shared/address_decode_chipset.vhd")
 lib.add_source_files("../../../../chipset/fb_chipset_pack.vhd")
+lib.add_source_files("../../../../chipset/fb_chipset_perf.vhd")
 lib.add_source_files("../../../../chipset/fb_chipset.vhd")
-lib.add_source_files("../../../../chipset/dac_1bit.vhd")
-lib.add_source_files("../../../../shared/fb_spi.vhd")
-
-lib.add_source_files("../../../../chipset/dac_1bit.vhd")
-lib.add_source_files("../../../../shared/i2s.vhd")
-
-lib.add_source_files("../../../../library/bbc/bbc_slow_cyc.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_syscon.vhd")
 
-lib.add_source_files("../../../../library/fishbone/fishbone_pack.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_intcon_one_to_many.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_null.vhd")
-
-lib.add_source_files("../../../../library/clockreg.vhd")
-lib.add_source_files("../../../../library/common.vhd")
 lib.add_source_files("../../../../shared/fb_SYS_pack.vhd")
 lib.add_source_files("../../../../shared/fb_VERSION.vhd")
 lib.add_source_files("../../../../shared/fb_config.vhd")
 
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/m6522.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/sn76489.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/serialula.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/acia6850.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_intcon_pack.vhd")
-lib.add_source_files("../../../../shared/fb_uart.vhd")
-
-lib.add_source_files("../../../../library/uart_tx.vhd")
-lib.add_source_files("../../../../library/uart_rx.vhd")
-
-lib.add_source_files("../../../../library/3rdparty/hdmi_alexey_spirkov/encoder.vhd")
-lib.add_source_files("../../../../library/3rdparty/hdmi_alexey_spirkov/hdmi.vhd")
-lib.add_source_files("../../../../library/3rdparty/hdmi_alexey_spirkov/hdmidataencoder.v")
-lib.add_source_files("../../../../library/3rdparty/hdmi_alexey_spirkov/hdmidelay.vhd")
-lib.add_source_files("../../../shared/hdmi//hdmi_out_gowin_2A.vhd")
-
-lib.add_source_files("../../../shared/hdmi/dvi_synchro.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/mc6845.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_crtc.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/vidproc_model_bc.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/saa5050.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/saa5050_rom_dual_port_dom.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_vidproc.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_ram.vhd")
-lib.add_source_files("../../../shared/hdmi/HDMI_pack.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_enabled.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_ctl.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_seq_ctl.vhd")
-lib.add_source_files("../../../shared/hdmi/sprites/sprites_pack.vhd")
-lib.add_source_files("../../../shared/hdmi/sprites/fb_sprites.vhd")
-lib.add_source_files("../../../shared/hdmi/sprites/sprites.vhd")
-lib.add_source_files("../../../shared/hdmi/sprites/sprite_int.vhd")
-lib.add_source_files("../../../shared/hdmi/vidmem_sequencer.vhd")
-lib.add_source_files("../../../shared/hdmi/vid15tohdmi.vhd")
-
-lib.add_source_files("../../../../library/simulation/ram_tb.vhd")
-lib.add_source_files("../../../../library/simulation/rom_tb.vhd")
-
 #need a separate lib for 816 files - they clash with gowin prim sims
 lib816 = vu.add_library("lib816")
-lib816.add_source_files("../../../../library/simulation/real65816_tb.vhd")
-lib816.add_source_files("../../../../library/3rdparty/P65C816/*.vhd")
-
+sources.add_groups(lib816, "p65c816")
 
 fmf = vu.add_library("fmf")
 
-fmf.add_source_files("../../../../library/3rdparty/fmf/*.vhd")
+sources.add_groups(fmf, "fmf")
+
+# what the test code wrote to the mailbox, after every test
+check = mailbox.attach(lib.test_bench("test_tb"))
+# where the 65816 spent its cycles, by function of the test MOS's symbols
+if args.trace:
+    cputrace.attach(lib.test_bench("test_tb"), also=check,
+        syms=cputrace.symbols_for("../../../asm/C20KTestMOS/build/C20KTestMOS-write60xxxx.rom"))
 
 vu.set_sim_option("disable_ieee_warnings",1)
 
@@ -141,6 +93,5 @@ with  open(sim_path + "version_strings.vec", "w") as text_file:
         )
     )
 
-
 # Run vunit function
 vu.main()
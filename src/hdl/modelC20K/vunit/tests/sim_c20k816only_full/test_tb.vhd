@@ -12,6 +12,7 @@ library work;
 use work.fishbone.all;
 use work.common.all;
 use work.fb_tester_pack.all;
+use work.sim_fastsim_pack.all;
 
 library fmf;
 
@@ -19,14 +20,16 @@ library work;
 
 entity test_tb is
    generic (
-      runner_cfg : string
+      runner_cfg     : string;
+      G_MOSROMFILE   : string := "../../../../../asm/C20KTestMOS/build/C20KTestMOS-write60xxxx.rom";
+      G_TRACE        : string := "";          -- trace the 65816's instructions to this file (see blitsim.cputrace)
+      G_FAST_SIM     : boolean := false;      -- serializers and their clocks at pixel rate (see blitsim.fastsim)
+      G_FULL_DOMAINS : string := ""           -- fast-sim domains kept at full fidelity, "hdmi,dac,chroma"
       );
 end test_tb;
 
 architecture rtl of test_tb is
 
-   constant G_MOSROMFILE : string := "../../../../../asm/C20KTestMOS/build/C20KTestMOS-write60xxxx.rom";
-
    constant BOARD_CLOCKSPEED : natural := 27;
 
    constant BOARD_CLOCK_PER : time := (1000000/BOARD_CLOCKSPEED) * 1 ps;
@@ -112,7 +115,14 @@ architecture rtl of test_tb is
    signal i_cpu_MX         : std_logic;
    signal i_cpu_E          : std_logic;
 
+   -- the test code's mailbox on the SYS port (see sim_fb_mailbox)
+   signal i_mbox_active    : std_logic;
+   signal i_mbox_done      : std_logic;
+   signal i_mbox_failed    : std_logic;
+
 begin
+   fastsim_mode <= fastsim_flags(G_FAST_SIM, G_FULL_DOMAINS);
+
    p_brd_clk:process
    begin
       r_brd_clk <= '1';
@@ -141,7 +151,10 @@ begin
 
          if run("look") then
 
-            wait for 1200 us;
+            -- until the test code ends the test in the mailbox or the time is up
+            wait until i_mbox_done = '1' for 1200 us;
+            check(i_mbox_failed = '0', "the test code failed a test, see mailbox.txt");
+            check(i_mbox_active = '0' or i_mbox_done = '1', "the test code did not end the test in time");
 
          end if;
 
@@ -260,6 +273,23 @@ begin
 
 );
 
+--===========================================================
+-- test code mailbox, ends the test when the code says so
+--===========================================================
+
+   e_mbox:entity work.sim_fb_mailbox
+   generic map (
+      G_FILE               => output_path(runner_cfg) & "mailbox.txt"
+   )
+   port map (
+      fb_syscon_i          => << signal .test_tb.e_dut.i_fb_syscon : fb_syscon_t >>,
+      fb_c2p_i             => << signal .test_tb.e_dut.i_c2p_sys : fb_con_o_per_i_t >>,
+      fb_p2c_i             => << signal .test_tb.e_dut.i_p2c_sys : fb_con_i_per_o_t >>,
+      active_o             => i_mbox_active,
+      done_o               => i_mbox_done,
+      failed_o             => i_mbox_failed
+   );
+
 --===========================================================
 -- board sim
 --===========================================================
@@ -362,4 +392,22 @@ begin
 
    );
 
+--===========================================================
+-- 65816 instruction trace
+--===========================================================
+
+   g_trace:if G_TRACE /= "" generate
+      e_trace:entity work.sim_cpu_trace
+      generic map (
+         G_FILE               => output_path(runner_cfg) & G_TRACE
+      )
+      port map (
+         clk_i                => << signal .test_tb.e_brd_memcpu.e_U38.i_cpu_clk : std_logic >>,
+         clken_i              => i_cpu_RDY,
+         sync_i               => << signal .test_tb.e_brd_memcpu.e_U38.i_sync : std_logic >>,
+         A_i                  => << signal .test_tb.e_brd_memcpu.e_U38.i_cpu_A : std_logic_vector(23 downto 0) >>,
+         D_i                  => << signal .test_tb.e_brd_memcpu.e_U38.i_cpu_D_in : std_logic_vector(7 downto 0) >>
+      );
+   end generate;
+
 end rtl;
@@ -1,4 +1,8 @@
-from vunit import VUnit
+import sys
+sys.path.insert(0, "../../../../simulation_shared/python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import sources, prebuilt, mailbox
 
 GOWIN = "C:/Gowin/Gowin_V1.9.11_x64/IDE/simlib/gw2a"
 
@@ -6,71 +10,60 @@ def encode(tb_cfg):
     return ", ".join(["%s:%s" % (key, str(tb_cfg[key])) for key in tb_cfg])
 
 # Create VUnit instance by parsing command line arguments
-vu = VUnit.from_argv()
+cli = VUnitCLI()
+prebuilt.add_arguments(cli)
+args = cli.parse_args()
+vu = VUnit.from_args(args)
+
+# Shared libraries are seeded from the prebuilt cache on a cold start
+prebuilt.seed(vu, args)
 
 # Create library 'lib'
 lib = vu.add_library("lib")
 
-#lib.add_source_files(GOWIN + "/prim_sim.vhd")
+sources.add_gowin(lib, GOWIN)
+
+sources.add_groups(lib, "fishbone", "cpu", "video", "peripherals", "sim_models", "c20k_video")
 
 # Add all files ending in .vhd in current working directory to library
 lib.add_source_files("./*.vhd")
 lib.add_source_files("../../board/*.vhd")
-lib.add_source_files("../../../shared/c20k_peripheral_mux_ctl.vhd")
 lib.add_source_files("../../../shared/fb_SYS_c20k.vhd")
-lib.add_source_files("../../../../library/bbc/*.vhd")
-lib.add_source_files("../../../../library/simulation/hct574.vhd")
-lib.add_source_files("../../../../library/simulation/ac245.vhd")
-lib.add_source_files("../../../../library/simulation/cy74FCT2543.vhd")
-lib.add_source_files("../../../../library/simulation/ls74245.vhd")
-lib.add_source_files("../../../../library/simulation/real65816_tb.vhd")
-lib.add_source_files("../../../../library/common.vhd")
-lib.add_source_files("../../../../library/fishbone/fishbone_pack.vhd")
-lib.add_source_files("../../../../simulation_shared/fb_tester_pack.vhd")
-
-lib.add_source_files("../../../boards/C20kFirstLight816/src/address_decode_C20KFirstLight.vhd")
-lib.add_source_files("../../../boards/C20kFirstLight816/src/board_config_pack.vhd")
-lib.add_source_files("../../../boards/C20kFirstLight816/src/C20KFirstLight816.vhd")
-lib.add_source_files("../../../boards/C20kFirstLight816/src/fb_CPU_log2phys_C20KFirstLight.vhd")
-lib.add_source_files("../../../boards/C20kFirstLight816/src/fb_c20k_mem_cpu_65816.vhd")
-lib.add_source_files("../../../boards/C20kFirstLight816/src/fb_P20K_MEM.vhd")
-lib.add_source_files("../../../shared/ws2812_pack.vhd")
-lib.add_source_files("../../../shared/ws2812.vhd")
-lib.add_source_files("../../../shared/fb_ws2812.vhd")
+
+lib.add_source_files("../../../boards/C20KFirstLight816/src/address_decode_C20KFirstLight.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/board_config_pack.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/C20KFirstLight816.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/fb_CPU_log2phys_C20KFirstLight.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/fb_C20K_mem_cpu_65816.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/gowin_dpb/hdmi_blockram.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/gowin_rpll/pll_27_48.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/gowin_rpll/pll_48_128.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/gowin_rpll/pll_hdmi.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/gowin_rpll/pll_pal_sc.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/gowin_rpll/pll_rgb_dac.vhd")
+lib.add_source_files("../../../boards/C20KFirstLight816/src/gowin_sdpb/linebuffer.vhd")
+lib.add_source_files("../../../shared/1bitvid/dac1_oser.vhd")
+lib.add_source_files("../../../shared/1bitvid/dac1_oserx2.vhd")
+lib.add_source_files("../../../shared/1bitvid/dossy_chroma.vhd")
 
 lib.add_source_files("../../../../shared/fb_CPU_pack.vhd")
 lib.add_source_files("../../../../shared/fb_CPU_t65.vhd")
 
 lib.add_source_files("../../../../shared/fb_CPU_con_burst.vhd")
+lib.add_source_files("../../../../library/fishbone/fb_inferred_mem.vhd")
 
-lib.add_source_files("../../../../library/bbc/bbc_slow_cyc.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_syscon.vhd")
-
-lib.add_source_files("../../../../library/fishbone/fishbone_pack.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_intcon_one_to_many.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_null.vhd")
-
-lib.add_source_files("../../../../library/clockreg.vhd")
-lib.add_source_files("../../../../library/common.vhd")
 lib.add_source_files("../../../../shared/fb_SYS_pack.vhd")
-lib.add_source_files("../../../../shared/fb_SYS_VIA_blocker.vhd")
-
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/m6522.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/sn76489.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_intcon_pack.vhd")
-lib.add_source_files("../../../../shared/fb_uart.vhd")
-
-lib.add_source_files("../../../../library/uart_tx.vhd")
-lib.add_source_files("../../../../library/uart_rx.vhd")
 
-lib.add_source_files("../../../../library/simulation/ram_tb.vhd")
-lib.add_source_files("../../../../library/simulation/rom_tb.vhd")
-lib.add_source_files("../../../../library/3rdparty/P65C816/*.vhd")
+fmf = vu.add_library("fmf")
 
+sources.add_groups(fmf, "fmf")
 
-fmf = vu.add_library("fmf")
+# the 65816 core in its own library, its ALU clashes with the Gowin primitives
+lib816 = vu.add_library("lib816")
+sources.add_groups(lib816, "p65c816")
 
-fmf.add_source_files("../../../../library/3rdparty/fmf/*.vhd")
+# what the test code wrote to the mailbox, after every test
+mailbox.attach(lib.test_bench("test_tb"))
 
 vu.set_sim_option("disable_ieee_warnings",1)
 
@@ -113,6 +113,11 @@ architecture rtl of test_tb is
    signal i_cpu_MX         : std_logic;
    signal i_cpu_E          : std_logic;
 
+   -- the test code's mailbox on the SYS port (see sim_fb_mailbox)
+   signal i_mbox_active    : std_logic;
+   signal i_mbox_done      : std_logic;
+   signal i_mbox_failed    : std_logic;
+
 begin
    p_brd_clk:process
    begin
@@ -142,7 +147,10 @@ begin
 
          if run("look") then
 
-            wait for 100 us;
+            -- until the test code ends the test in the mailbox or the time is up
+            wait until i_mbox_done = '1' for 100 us;
+            check(i_mbox_failed = '0', "the test code failed a test, see mailbox.txt");
+            check(i_mbox_active = '0' or i_mbox_done = '1', "the test code did not end the test in time");
 
          end if;
 
@@ -262,6 +270,23 @@ begin
 
 );
 
+--===========================================================
+-- test code mailbox, ends the test when the code says so
+--===========================================================
+
+   e_mbox:entity work.sim_fb_mailbox
+   generic map (
+      G_FILE               => output_path(runner_cfg) & "mailbox.txt"
+   )
+   port map (
+      fb_syscon_i          => << signal .test_tb.e_dut.i_fb_syscon : fb_syscon_t >>,
+      fb_c2p_i             => << signal .test_tb.e_dut.i_c2p_sys : fb_con_o_per_i_t >>,
+      fb_p2c_i             => << signal .test_tb.e_dut.i_p2c_sys : fb_con_i_per_o_t >>,
+      active_o             => i_mbox_active,
+      done_o               => i_mbox_done,
+      failed_o             => i_mbox_failed
+   );
+
 --===========================================================
 -- board sim
 --===========================================================
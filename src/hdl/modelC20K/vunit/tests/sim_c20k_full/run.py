@@ -1,149 +1,207 @@
-from vunit import VUnit
+import sys
+sys.path.insert(0, "../../../../simulation_shared/python")
+
+from pathlib import Path
+
+from vunit import VUnit, VUnitCLI
+from blitsim import sources, prebuilt, snapshot, fbmon, matrix, waves, frames, fastsim, simasm, mailbox, perf, cputrace
 
 GOWIN = "C:/Gowin/Gowin_V1.9.12_x64/IDE/simlib/gw2a"
+MOSROM = "../../../doc/AndyC/setuproms.zip/MOS120.M"
+TESTMOS_DIR = "../../../asm/C20KTestMOS"
+# made in its own directory, with the includes and Makefile.defs of C20KTestMOS
+TESTMOS = simasm.Rom(TESTMOS_DIR + "/build/C20KTestMOS-write60xxxx.rom",
+    directory=TESTMOS_DIR + "/C20KTestMOS-write60xxxx", goal="all",
+    extra=[TESTMOS_DIR + "/includes", TESTMOS_DIR + "/Makefile.defs"])
 
 def encode(tb_cfg):
     return ", ".join(["%s:%s" % (key, str(tb_cfg[key])) for key in tb_cfg])
 
 # Create VUnit instance by parsing command line arguments
-vu = VUnit.from_argv()
-
-# Create library 'lib'
-lib = vu.add_library("lib")
-
-lib.add_source_files(GOWIN + "/prim_sim.vhd")
-
-# Add all files ending in .vhd in current working directory to library
-lib.add_source_files("./*.vhd")
-lib.add_source_files("../../board/*.vhd")
-lib.add_source_files("../../../shared/c20k_peripheral_mux_ctl.vhd")
-lib.add_source_files("../../../shared/fb_SYS_c20k.vhd")
-lib.add_source_files("../../../../library/bbc/*.vhd")
-lib.add_source_files("../../../../library/simulation/hct574.vhd")
-lib.add_source_files("../../../../library/simulation/ac245.vhd")
-lib.add_source_files("../../../../library/simulation/cy74FCT2543.vhd")
-lib.add_source_files("../../../../library/simulation/ls74245.vhd")
-lib.add_source_files("../../../../library/common.vhd")
-lib.add_source_files("../../../../library/fishbone/fishbone_pack.vhd")
-lib.add_source_files("../../../../simulation_shared/fb_tester_pack.vhd")
-
-lib.add_source_files("../../../shared/version.vhd")
-lib.add_source_files("../../../boards/C20k/src/C20K.vhd") 
-lib.add_source_files("../../../boards/C20k/src/gowin_dpb/hdmi_blockram.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/gowin_rpll/pll_27_360.vhd")
-lib.add_source_files("../../../boards/C20k816only/src/gowin_rpll/pll_360_384_128.vhd")
-lib.add_source_files("../../../boards/C20k/src/gowin_rpll/pll_hdmi.vhd") 
-lib.add_source_files("../../../boards/C20k/src/gowin_sdpb/linebuffer.vhd")
-lib.add_source_files("../../../boards/C20k/src/board_config_pack.vhd")
-lib.add_source_files("../../../boards/C20k/src/gowin_rpll/pll_pal_sc.vhd")
-lib.add_source_files("../../../boards/C20k/src/fb_CPU_t65only.vhd")
-lib.add_source_files("../../../shared/ws2812_pack.vhd")
-lib.add_source_files("../../../shared/ws2812.vhd")
-lib.add_source_files("../../../shared/fb_ws2812.vhd")
-lib.add_source_files("../../../shared/fb_P20K_MEM.vhd")
-
-lib.add_source_files("../../../shared/1bitvid/dac1_oser.vhd")
-lib.add_source_files("../../../shared/1bitvid/dac1_oserx2.vhd")
-lib.add_source_files("../../../shared/1bitvid/dac1_oserx1.vhd")
-lib.add_source_files("../../../shared/1bitvid/dossy_chroma.vhd")
-
-lib.add_source_files("../../../../shared/firmware_info_pack.vhd")
-lib.add_source_files("../../../../shared/fb_CPU_pack.vhd")
-lib.add_source_files("../../../../shared/fb_CPU_t65.vhd")
-
-lib.add_source_files("../../../../shared/fb_cpu_log2phys.vhd")
-lib.add_source_files("../../../../shared/fb_CPU_con_burst.vhd")
-lib.add_source_files("../../../../shared/log2phys.vhd")
-lib.add_source_files("../../../../shared/address_decode.vhd")
-lib.add_source_files("../../../../shared/fb_i2c.vhd")
-lib.add_source_files("../../../../mk3/shared/fb_MEM.vhd")
-lib.add_source_files("../../../../shared/fb_memctl.vhd")
-
-lib.add_source_files("../../../../shared/address_decode_chipset.vhd")
-lib.add_source_files("../../../../chipset/fb_chipset_pack.vhd")
-lib.add_source_files("../../../../chipset/fb_chipset.vhd")
-lib.add_source_files("../../../../chipset/blit_types.vhd")
-lib.add_source_files("../../../../chipset/blit_int.vhd")
-lib.add_source_files("../../../../chipset/blit_addr.vhd")
-lib.add_source_files("../../../../chipset/aeris.vhd")
-lib.add_source_files("../../../../chipset/dmac_int_sound.vhd")
-lib.add_source_files("../../../../chipset/dmac_int_sound_cha.vhd")
-lib.add_source_files("../../../../chipset/dac_1bit.vhd")
-lib.add_source_files("../../../../chipset/dmac_int_dma.vhd")
-lib.add_source_files("../../../../chipset/dmac_int_dma_cha.vhd")
-lib.add_source_files("../../../../shared/fb_spi.vhd")
-
-lib.add_source_files("../../../../chipset/dac_1bit.vhd")
-lib.add_source_files("../../../../shared/i2s.vhd")
-
-lib.add_source_files("../../../../library/bbc/bbc_slow_cyc.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_syscon.vhd")
-
-lib.add_source_files("../../../../library/fishbone/fishbone_pack.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_intcon_many_to_one.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_intcon_one_to_many.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_arbiter_prior.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_arbiter_roundrobin.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_intcon_shared.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_null.vhd")
-
-lib.add_source_files("../../../../library/clockreg.vhd")
-lib.add_source_files("../../../../library/common.vhd")
-lib.add_source_files("../../../../library/3rdparty/T6502/T65.vhd")
-lib.add_source_files("../../../../library/3rdparty/T6502/T65_MCode.vhd")
-lib.add_source_files("../../../../library/3rdparty/T6502/T65_ALU.vhd")
-lib.add_source_files("../../../../library/3rdparty/T6502/T65_Pack.vhd")
-lib.add_source_files("../../../../shared/fb_SYS_pack.vhd")
-lib.add_source_files("../../../../shared/fb_VERSION.vhd")
-lib.add_source_files("../../../../shared/fb_config.vhd")
-
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/m6522.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/sn76489.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/serialula.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/acia6850.vhd")
-lib.add_source_files("../../../../library/fishbone/fb_intcon_pack.vhd")
-lib.add_source_files("../../../../shared/fb_uart.vhd")
-
-lib.add_source_files("../../../../library/uart_tx.vhd")
-lib.add_source_files("../../../../library/uart_rx.vhd")
-
-lib.add_source_files("../../../../library/3rdparty/hdmi_alexey_spirkov/encoder.vhd")
-lib.add_source_files("../../../../library/3rdparty/hdmi_alexey_spirkov/hdmi.vhd")
-lib.add_source_files("../../../../library/3rdparty/hdmi_alexey_spirkov/hdmidataencoder.v")
-lib.add_source_files("../../../../library/3rdparty/hdmi_alexey_spirkov/hdmidelay.vhd")
-lib.add_source_files("../../../shared/hdmi//hdmi_out_gowin_2A.vhd")
-
-lib.add_source_files("../../../shared/hdmi/dvi_synchro.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/mc6845.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_crtc.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/vidproc_model_bc.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/saa5050.vhd")
-lib.add_source_files("../../../../library/3rdparty/MikeStirling/saa5050_rom_dual_port_dom.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_vidproc.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_ram.vhd")
-lib.add_source_files("../../../shared/hdmi/HDMI_pack.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_enabled.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_ctl.vhd")
-lib.add_source_files("../../../shared/hdmi/fb_HDMI_seq_ctl.vhd")
-lib.add_source_files("../../../shared/hdmi/sprites/sprites_pack.vhd")
-lib.add_source_files("../../../shared/hdmi/sprites/fb_sprites.vhd")
-lib.add_source_files("../../../shared/hdmi/sprites/sprites.vhd")
-lib.add_source_files("../../../shared/hdmi/sprites/sprite_int.vhd")
-lib.add_source_files("../../../shared/hdmi/vidmem_sequencer.vhd")
-lib.add_source_files("../../../shared/hdmi/vid15tohdmi.vhd")
-
-lib.add_source_files("../../../../library/simulation/ram_tb.vhd")
-lib.add_source_files("../../../../library/simulation/rom_tb.vhd")
+cli = VUnitCLI()
+prebuilt.add_arguments(cli)
+snapshot.add_arguments(cli)
+fbmon.add_arguments(cli)
+matrix.add_arguments(cli)
+waves.add_arguments(cli)
+frames.add_arguments(cli)
+fastsim.add_arguments(cli)
+simasm.add_arguments(cli)
+cputrace.add_arguments(cli)
+perf.add_arguments(cli)
+args = cli.parse_args()
+vu = VUnit.from_args(args)
+
+# Shared libraries are seeded from the prebuilt cache on a cold start
+prebuilt.seed(vu, args)
+
+def add_c20k(lib):
+    """The C20K board, T65 only"""
+    sources.add_gowin(lib, GOWIN)
+
+    sources.add_groups(lib, "fishbone", "cpu", "video", "peripherals", "sim_models", "chipset", "c20k_video")
+
+    # Add all files ending in .vhd in current working directory to library
+    lib.add_source_files("./*.vhd")
+    lib.add_source_files("../../board/*.vhd")
+    lib.add_source_files("../../../shared/fb_SYS_c20k.vhd")
+
+    lib.add_source_files("../../../shared/version.vhd")
+    lib.add_source_files("../../../boards/C20K/src/C20K.vhd")
+    lib.add_source_files("../../../boards/C20K/src/gowin_dpb/hdmi_blockram.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_27_360.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_360_384_128.vhd")
+    lib.add_source_files("../../../boards/C20K/src/gowin_rpll/pll_hdmi.vhd")
+    lib.add_source_files("../../../boards/C20K/src/gowin_sdpb/linebuffer.vhd")
+    # with the chipset's performance counters, unless --no-perf
+    lib.add_source_file(perf.board_config(args, "../../../boards/C20K/src/board_config_pack.vhd",
+        Path(args.output_path) / "board_c20k"))
+    lib.add_source_files("../../../boards/C20K/src/gowin_rpll/pll_pal_sc.vhd")
+    lib.add_source_files("../../../boards/C20K/src/fb_CPU_t65only.vhd")
+
+    lib.add_source_files("../../../shared/1bitvid/dac1_oser.vhd")
+    lib.add_source_files("../../../shared/1bitvid/dac1_oserx2.vhd")
+    lib.add_source_files("../../../shared/1bitvid/dac1_oserx1.vhd")
+    lib.add_source_files("../../../shared/1bitvid/dossy_chroma.vhd")
+
+    lib.add_source_files("../../../../shared/firmware_info_pack.vhd")
+    lib.add_source_files("../../../../shared/fb_CPU_pack.vhd")
+    lib.add_source_files("../../../../shared/fb_CPU_t65.vhd")
+
+    lib.add_source_files("../../../../shared/fb_CPU_log2phys.vhd")
+    lib.add_source_files("../../../../shared/fb_CPU_con_burst.vhd")
+    lib.add_source_files("../../../../shared/log2phys.vhd")
+    lib.add_source_files("../../../../shared/address_decode.vhd")
+    lib.add_source_files("../../../../mk3/shared/fb_MEM.vhd")
+    lib.add_source_files("../../../../shared/fb_memctl.vhd")
+
+    lib.add_source_files("../../../../shared/fb_SYS_pack.vhd")
+    lib.add_source_files("../../../../shared/fb_VERSION.vhd")
+    lib.add_source_files("../../../../shared/fb_config.vhd")
+
+def add_c20k816only(lib):
+    """The C20K816only board, hard 65816 from lib816, with the sim_c20k816only_full test_tb"""
+    sources.add_gowin(lib, GOWIN)
+
+    sources.add_groups(lib, "fishbone", "video", "peripherals", "sim_models", "c20k_video")
+
+    lib.add_source_files("../sim_c20k816only_full/*.vhd")
+    lib.add_source_files("../../board/*.vhd")
+    lib.add_source_files("../../../shared/fb_SYS_c20k.vhd")
+
+    lib.add_source_files("../../../shared/version.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/C20K816only.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/gowin_dpb/hdmi_blockram.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_27_360.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_360_384_128.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_hdmi.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/gowin_sdpb/linebuffer.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/board_config_pack.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/gowin_rpll/pll_pal_sc.vhd")
+    lib.add_source_files("../../../boards/C20K816only/src/fb_C20K_mem_cpu_65816.vhd")
+
+    lib.add_source_files("../../../shared/1bitvid/dac1_oser.vhd")
+    lib.add_source_files("../../../shared/1bitvid/dac1_oserx2.vhd")
+    lib.add_source_files("../../../shared/1bitvid/dac1_oserx1.vhd")
+    lib.add_source_files("../../../shared/1bitvid/dossy_chroma.vhd")
+
+    lib.add_source_files("../../../../shared/firmware_info_pack.vhd")
+    lib.add_source_files("../../../../shared/fb_CPU_pack.vhd")
+
+    lib.add_source_files("../../../../shared/fb_CPU_con_burst.vhd")
+    lib.add_source_files("../../../../shared/log2phys.vhd")
+    lib.add_source_files("../../../../shared/address_decode.vhd")
+    lib.add_source_files("../../../../mk3/shared/fb_MEM.vhd")
+    lib.add_source_files("../../../../shared/fb_memctl.vhd")
+
+    lib.add_source_files("../../../../shared/address_decode_chipset.vhd")
+    lib.add_source_files("../../../../chipset/fb_chipset_pack.vhd")
+    lib.add_source_files("../../../../chipset/fb_chipset_perf.vhd")
+    lib.add_source_files("../../../../chipset/fb_chipset.vhd")
+
+    lib.add_source_files("../../../../shared/fb_SYS_pack.vhd")
+    lib.add_source_files("../../../../shared/fb_VERSION.vhd")
+    lib.add_source_files("../../../../shared/fb_config.vhd")
+
+    # Make a phoney version .vec file
+    if vu.get_simulator_name() is not None:
+        sim_path = Path(args.output_path) / vu.get_simulator_name()
+        sim_path.mkdir(parents=True, exist_ok=True)
+        with open(sim_path / "version_strings.vec", "w") as text_file:
+            text_file.write(
+                "\n".join(
+                    [format(ord(c), "08b") for c in "DOM\r\0IS\r\0ACE\r\0"]
+                )
+            )
+
+# board variants, each in its own library as they have their own board_config_pack
+# and each carries one CPU: name -> (library, how to add its files, cpu)
+BOARDS = {
+    "c20k": ("lib", add_c20k, "t65"),
+    "c20k816only": ("lib_c20k816only", add_c20k816only, "p65c816"),
+}
+
+# the ROM axis, more can be given with --rom NAME=PATH, the test MOS is made if it is stale
+images = matrix.rom_images(args, mos120=MOSROM, **simasm.roms(args, testmos=TESTMOS))
+if not images:
+    sys.exit("run.py: no ROM images found, give one with --rom NAME=PATH")
+m = matrix.Matrix(args, rom=matrix.roms(images))
+# the symbols of the images that have them, for --trace's profiles
+syms = cputrace.rom_symbols(images)
 
 fmf = vu.add_library("fmf")
+sources.add_groups(fmf, "fmf")
 
-fmf.add_source_files("../../../../library/3rdparty/fmf/*.vhd")
-
+#need a separate lib for 816 files - they clash with gowin prim sims
 lib816 = vu.add_library("lib816")
-lib816.add_source_files("../../../../library/3rdparty/P65C816/*.vhd")
-lib816.add_source_files("../../../../library/simulation/real65816_tb.vhd")
-
-vu.set_sim_option("disable_ieee_warnings",1)
+sources.add_groups(lib816, "p65c816")
+
+for board, (name, add_files, cpu) in BOARDS.items():
+    if not m.selected(board=board, cpu=cpu):
+        continue
+    lib = vu.add_library(name)
+    add_files(lib)
+    tb = lib.test_bench("test_tb")
+    waves.attach(vu, tb, args)
+
+    if board == "c20k":
+        names = dict(
+            con={0: "chipset", 1: "cpu"},
+            per={0: "version", 1: "sys", 2: "chipram", 3: "memctl", 4: "chipset",
+                5: "hdmi", 6: "xflash", 7: "preboot", 8: "uart", 9: "config"})
+        if args.fbmon:
+            fbmon.attach(tb, names=names)
+        # what the test code wrote to the mailbox, with the fbmon summary
+        check = mailbox.attach(tb,
+            also=(lambda output_path: fbmon.post_check(output_path, names=names)) if args.fbmon else None)
+        # the chipset's performance counters, bytes per clock of each DMA unit
+        if not args.no_perf:
+            check = perf.attach(tb, also=check)
+        # where the T65 spent its cycles, by function of the ROM's symbols
+        if args.trace:
+            check = cputrace.attach(tb, syms=syms, also=check)
+        # the HDMI pixels, checked against --golden after those
+        check = frames.attach(tb, args, also=check)
+
+        # start "look" from a boot snapshot, the first run (or --snapshot) takes one
+        def add_look(test, name, point, generics, attributes):
+            snap = snapshot.Snapshot("sim_c20k_full-" + point["rom"], images[point["rom"]], vu.get_source_files())
+            if not snapshot.add_config(test, snap, args, name=name, generics=generics, attributes=attributes,
+                    also=check):
+                test.add_config(name=name, generics=generics, attributes=attributes)
+
+        m.add_configs(tb.test("look"), add_look, board=board, cpu=cpu)
+    else:
+        check = mailbox.attach(tb)
+        if args.trace:
+            cputrace.attach(tb, syms=syms, also=check)
+        m.add_configs(tb.test("look"), board=board, cpu=cpu)
+
+    # --fast-sim, the domains each test needs at full fidelity are in its test bench
+    fastsim.apply(tb, args, lib.get_source_file("*test_tb.vhd").name)
+
+# --axis can leave out every board
+vu.set_sim_option("disable_ieee_warnings", 1, allow_empty=True)
 
 # Run vunit function
 vu.main()
@@ -12,6 +12,10 @@ library work;
 use work.fishbone.all;
 use work.common.all;
 use work.fb_tester_pack.all;
+use work.sim_bench_pack.all;
+use work.board_config_pack.all;
+use work.fb_chipset_pack.all;
+use work.sim_fastsim_pack.all;
 
 library fmf;
 
@@ -19,15 +23,23 @@ library work;
 
 entity test_tb is
    generic (
-      runner_cfg : string
+      runner_cfg     : string;
+      G_MOSROMFILE   : string := "../../../../../doc/AndyC/setuproms.zip/MOS120.M";
+      --G_MOSROMFILE   : string := "../../../../../asm/C20KFirstLight/build/C20KTestMOS-sound.rom";
+      G_RAMFILE      : string := "";          -- preload for the 2M RAM, a boot snapshot (see blitsim.snapshot)
+      G_BOOT_US      : natural := 1200;       -- how long to run the "look" test for, unless the test code ends it
+      G_SNAPSHOT     : boolean := false;      -- dump the 2M RAM to ram.bin and the registers to state.txt at the end of "look"
+      G_FBMON        : string := "";          -- log the intcon's transactions to this file (see blitsim.fbmon)
+      G_TRACE        : string := "";          -- trace the T65's instructions to this file (see blitsim.cputrace)
+      G_FRAMES       : string := "";          -- capture the HDMI frames to this file (see blitsim.frames)
+      G_FRAME_COUNT  : natural := 0;          -- stop capturing after this many frames, 0 for all
+      G_FAST_SIM     : boolean := false;      -- serializers and their clocks at pixel rate (see blitsim.fastsim)
+      G_FULL_DOMAINS : string := ""           -- fast-sim domains kept at full fidelity, "hdmi,dac,chroma"
       );
 end test_tb;
 
 architecture rtl of test_tb is
 
-   constant G_MOSROMFILE : string := "C:/Users/domin/OneDrive/Documents/Programming/HostFS/roms65/MOS120.M";
-   --constant G_MOSROMFILE : string := "../../../../../asm/C20KFirstLight/build/C20KTestMOS-sound.rom";
-
    constant BOARD_CLOCKSPEED : natural := 27;
 
    constant BOARD_CLOCK_PER : time := (1000000/BOARD_CLOCKSPEED) * 1 ps;
@@ -100,7 +112,16 @@ architecture rtl of test_tb is
    signal i_mem_nOE        : std_logic;
    signal i_mem_nWE        : std_logic;
 
+   signal r_ram_dump       : std_logic := '0';
+
+   -- the test code's mailbox on the SYS port (see sim_fb_mailbox)
+   signal i_mbox_active    : std_logic;
+   signal i_mbox_done      : std_logic;
+   signal i_mbox_failed    : std_logic;
+
 begin
+   fastsim_mode <= fastsim_flags(G_FAST_SIM, G_FULL_DOMAINS);
+
    p_brd_clk:process
    begin
       r_brd_clk <= '1';
@@ -129,7 +150,15 @@ begin
 
          if run("look") then
 
-            wait for 1200 us;
+            -- until the test code ends the test in the mailbox or the time is up
+            wait until i_mbox_done = '1' for G_BOOT_US * 1 us;
+            check(i_mbox_failed = '0', "the test code failed a test, see mailbox.txt");
+            check(i_mbox_active = '0' or i_mbox_done = '1', "the test code did not end the test in time");
+
+            if G_SNAPSHOT then
+               r_ram_dump <= '1';
+               wait for 1 us;
+            end if;
 
          end if;
 
@@ -137,6 +166,7 @@ begin
 
       wait for 3 us;
 
+      sim_bench_time(output_path(runner_cfg));
       test_runner_cleanup(runner); -- Simulation ends here
    end process;
 
@@ -248,6 +278,120 @@ begin
 
 );
 
+--===========================================================
+-- fishbone monitor
+--===========================================================
+
+   g_fbmon:if G_FBMON /= "" generate
+      e_fbmon:entity work.sim_fb_monitor
+      generic map (
+         G_FILE               => output_path(runner_cfg) & G_FBMON,
+         G_CONTROLLER_COUNT   => CONTROLLER_COUNT,
+         G_PERIPHERAL_COUNT   => PERIPHERAL_COUNT
+      )
+      port map (
+         fb_syscon_i          => << signal .test_tb.e_dut.i_fb_syscon : fb_syscon_t >>,
+         fb_con_c2p_i         => << signal .test_tb.e_dut.i_con_c2p_intcon : fb_con_o_per_i_arr(CONTROLLER_COUNT-1 downto 0) >>,
+         fb_con_p2c_i         => << signal .test_tb.e_dut.i_con_p2c_intcon : fb_con_i_per_o_arr(CONTROLLER_COUNT-1 downto 0) >>,
+         peripheral_sel_i     => << signal .test_tb.e_dut.i_intcon_peripheral_sel : fb_arr_unsigned(CONTROLLER_COUNT-1 downto 0)(numbits(PERIPHERAL_COUNT)-1 downto 0) >>
+      );
+   end generate;
+
+--===========================================================
+-- T65 instruction trace
+--===========================================================
+
+   g_trace:if G_TRACE /= "" generate
+      e_trace:entity work.sim_cpu_trace
+      generic map (
+         G_FILE               => output_path(runner_cfg) & G_TRACE
+      )
+      port map (
+         clk_i                => << signal .test_tb.e_dut.i_fb_syscon : fb_syscon_t >>.clk,
+         clken_i              => << signal .test_tb.e_dut.e_fb_cpu_t65only.e_t65.r_t65_clken_h : std_logic >>,
+         sync_i               => << signal .test_tb.e_dut.e_fb_cpu_t65only.e_t65.i_t65_SYNC : std_logic >>,
+         A_i                  => << signal .test_tb.e_dut.e_fb_cpu_t65only.e_t65.i_t65_A : std_logic_vector(23 downto 0) >>,
+         D_i                  => << signal .test_tb.e_dut.e_fb_cpu_t65only.e_t65.i_t65_D_in : std_logic_vector(7 downto 0) >>
+      );
+   end generate;
+
+--===========================================================
+-- HDMI frame capture, the retimed pixels before the encoder
+--===========================================================
+
+   g_frames:if G_FRAMES /= "" generate
+      e_frames:entity work.sim_video_sink
+      generic map (
+         G_FILE               => output_path(runner_cfg) & G_FRAMES,
+         G_MAX_FRAMES         => G_FRAME_COUNT
+      )
+      port map (
+         clk_i                => << signal .test_tb.e_dut.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_clk_hdmi_pixel : std_logic >>,
+         R_i                  => << signal .test_tb.e_dut.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_R_DVI : std_logic_vector(7 downto 0) >>,
+         G_i                  => << signal .test_tb.e_dut.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_G_DVI : std_logic_vector(7 downto 0) >>,
+         B_i                  => << signal .test_tb.e_dut.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_B_DVI : std_logic_vector(7 downto 0) >>,
+         blank_i              => << signal .test_tb.e_dut.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_blank_DVI : std_logic >>,
+         vsync_i              => << signal .test_tb.e_dut.G_HDMI.e_fb_HDMI.e_vid15tohdmi.i_vsync_DVI : std_logic >>
+      );
+   end generate;
+
+--===========================================================
+-- test code mailbox, ends the test when the code says so
+--===========================================================
+
+   e_mbox:entity work.sim_fb_mailbox
+   generic map (
+      G_FILE               => output_path(runner_cfg) & "mailbox.txt"
+   )
+   port map (
+      fb_syscon_i          => << signal .test_tb.e_dut.i_fb_syscon : fb_syscon_t >>,
+      fb_c2p_i             => << signal .test_tb.e_dut.i_c2p_sys : fb_con_o_per_i_t >>,
+      fb_p2c_i             => << signal .test_tb.e_dut.i_p2c_sys : fb_con_i_per_o_t >>,
+      active_o             => i_mbox_active,
+      done_o               => i_mbox_done,
+      failed_o             => i_mbox_failed
+   );
+
+--===========================================================
+-- chipset performance counters, sampled to perf.txt when the
+-- board_config_pack has them
+--===========================================================
+
+   g_perf:if G_INCL_CS_PERF generate
+      e_perf:entity work.sim_chipset_perf
+      generic map (
+         G_FILE               => output_path(runner_cfg) & "perf.txt"
+      )
+      port map (
+         fb_syscon_i          => << signal .test_tb.e_dut.i_fb_syscon : fb_syscon_t >>,
+         ctr_i                => << signal .test_tb.e_dut.GCHIPSET.e_chipset.GPERF.b_perf.e_fb_perf.r_ctr : perf_ctr_arr(0 to PERF_COUNT-1) >>,
+         flush_i              => i_mbox_done
+      );
+   end generate;
+
+--===========================================================
+-- boot snapshot, the registers a warm start puts back, to
+-- state.txt when the RAM is dumped
+--===========================================================
+
+   g_snap_state:if G_SNAPSHOT generate
+      p_state:process
+      alias a_turbo_lo is << signal .test_tb.e_dut.e_memctl.r_turbo_lo : std_logic_vector(7 downto 0) >>;
+      alias a_sysvia_ier is << signal .test_tb.e_dut.e_fb_sys.e_sys_via.r_ier : std_logic_vector(6 downto 0) >>;
+      file state_file : text;
+      variable l : line;
+      begin
+         wait until r_ram_dump = '1';
+         file_open(state_file, output_path(runner_cfg) & "state.txt", write_mode);
+         write(l, string'("turbo_lo ") & to_hstring(a_turbo_lo));
+         writeline(state_file, l);
+         write(l, string'("sysvia_ier ") & to_hstring('0' & a_sysvia_ier));
+         writeline(state_file, l);
+         file_close(state_file);
+         wait;
+      end process;
+   end generate;
+
 --===========================================================
 -- board sim
 --===========================================================
@@ -349,7 +493,8 @@ begin
    e_blit_ram_2048: entity work.ram_tb 
    generic map (
       size        => 2*1024*1024,
-      dump_filename => "c:/temp/ram_dump_blit_dip40_poc-blitram.bin",
+      dump_filename => output_path(runner_cfg) & "ram.bin",
+      romfile => G_RAMFILE,
       tco => 10 ns,
       taa => 10 ns,
       toh => 2 ns,      
@@ -367,7 +512,7 @@ begin
       nOE         => i_MEM_nOE,
       nWE         => i_MEM_nWE,
       
-      tst_dump    => '0'
+      tst_dump    => r_ram_dump
 
    );
 
@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+
+# Run every VUnit run.py under this directory as one parallel regression, see
+# simulation_shared/python/blitsim/regress.py
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "simulation_shared" / "python"))
+
+from blitsim import regress
+
+sys.exit(regress.main())
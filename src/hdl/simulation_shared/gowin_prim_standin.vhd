@@ -0,0 +1,956 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2026 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+
+-- Company: 				Dossytronics
+-- Engineer: 				Dominic Beesley
+--
+-- Create Date:    		18/10/2026
+-- Design Name:
+-- Module Name:    		work.rPLL, CLKDIV, OSER10, DPB, SDPB, DFFE, MUX2, OBUF, ELVDS_OBUF
+-- Project Name:
+-- Target Devices:
+-- Tool versions:
+-- Description: 			Behavioural stand-ins for the Gowin GW2A primitives used by the C20K boards
+-- Dependencies:
+--
+-- Revision:
+-- Additional Comments:
+--
+-- For simulation only, blitsim.sources.gowin_prims() picks this file when the
+-- vendor's simlib prim_sim.vhd is not installed. The entities have the names,
+-- generics and ports of the component declarations in the gowin_rpll,
+-- gowin_dpb and gowin_sdpb wrappers, hdmi_out_gowin_2a, vid15tohdmi, the
+-- 1bitvid DACs and the board tops so they bind in their place. Only what
+-- those use is modelled:
+--
+-- rPLL		CLKOUT = CLKIN * (FBDIV_SEL+1) / (IDIV_SEL+1), CLKOUTD = CLKOUT /
+--				DYN_SDIV_SEL and CLKOUTD3 = CLKOUT / 3. CLKIN's period is measured
+--				from its first two rising edges, FCLKIN's is used if they are
+--				within 1% of each other, after that the outputs are
+--				made by one process that wakes once per half period of CLKOUT,
+--				the edge times are worked out from the start so they do not
+--				drift with rounding. CLKOUTP is CLKOUT, phase and duty (PSDA,
+--				DUTYDA, the DLY_STEPs) are not modelled nor are the dynamic
+--				dividers. LOCK goes high 64 CLKOUT periods after the start.
+-- CLKDIV	DIV_MODE "2", "3.5", "4", "5" or "8", counted on both edges of
+--				HCLKIN from the first rising edge after RESETN.
+-- OSER10	D0..D9 taken on a rising edge of PCLK and sent D0 first, one bit on
+--				each edge of FCLK.
+-- DPB		Dual port block RAM, BIT_WIDTH 1, 2, 4, 8 or 16 on each port
+--				with byte enables in AD(1 downto 0) for 16, WRITE_MODE normal,
+--				write through or read before write, READ_MODE bypass or
+--				pipelined by OCE, BLK_SEL and SYNC/ASYNC reset of the outputs.
+-- SDPB		As DPB with port A write only and port B read only, up to 32
+--				bits with byte enables in AD(3 downto 0).
+--
+-- rPLL, CLKDIV and OSER10 instances in one of the fast-sim domains run at
+-- pixel rate when the test bench turns the profile on, see sim_fastsim_pack.
+--
+-- The RAMs keep their 16K bits as 1024 naturals of 16 bits each and the
+-- INIT_RAM_xx generics are loaded into them. An X or U written is stored as 0.
+--
+----------------------------------------------------------------------------------
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+package gowin_prim_standin_pack is
+
+	-- a block RAM's 16K bits, 16 bits in each
+	type t_ram is array(natural range <>) of natural;
+	constant RAM_CHUNKS : natural := 1024;
+
+	function ram_init(init : bit_vector) return t_ram;
+	function ram_get(ram : t_ram; b : natural; w : natural) return std_logic_vector;
+	procedure ram_set(ram : inout t_ram; b : natural; w : natural; d : std_logic_vector);
+	procedure ram_access(
+		ram	: inout t_ram;
+		w		: natural;
+		wmode	: bit_vector;
+		we		: std_logic;
+		ad		: std_logic_vector(13 downto 0);
+		di		: std_logic_vector;
+		q		: inout std_logic_vector
+		);
+
+	function clkdiv_edges(mode : string) return natural;
+	function str_real(s : string) return real;
+
+end gowin_prim_standin_pack;
+
+package body gowin_prim_standin_pack is
+
+	function ram_init(init : bit_vector) return t_ram is
+		alias a : bit_vector(init'length-1 downto 0) is init;
+		variable r : t_ram(0 to RAM_CHUNKS-1) := (others => 0);
+	begin
+		for i in 0 to a'length-1 loop
+			if a(i) = '1' and i < 16 * RAM_CHUNKS then
+				r(i / 16) := r(i / 16) + 2**(i mod 16);
+			end if;
+		end loop;
+		return r;
+	end function;
+
+	-- the word of w bits at bit b, 32 bit words are two chunks
+	function ram_get(ram : t_ram; b : natural; w : natural) return std_logic_vector is
+	begin
+		if w > 16 then
+			return ram_get(ram, b + 16, w - 16) & ram_get(ram, b, 16);
+		end if;
+		return std_logic_vector(to_unsigned((ram(b / 16) / 2**(b mod 16)) mod 2**w, w));
+	end function;
+
+	procedure ram_set(ram : inout t_ram; b : natural; w : natural; d : std_logic_vector) is
+		alias a : std_logic_vector(d'length-1 downto 0) is d;
+		variable v_old : natural;
+	begin
+		if w > 16 then
+			ram_set(ram, b, 16, a(15 downto 0));
+			ram_set(ram, b + 16, w - 16, a(w-1 downto 16));
+			return;
+		end if;
+		v_old := (ram(b / 16) / 2**(b mod 16)) mod 2**w;
+		ram(b / 16) := ram(b / 16) + (to_integer(to_01(unsigned(a(w-1 downto 0)))) - v_old) * 2**(b mod 16);
+	end procedure;
+
+	-- one enabled clock of a port, q is the port's output latch
+	procedure ram_access(
+		ram	: inout t_ram;
+		w		: natural;
+		wmode	: bit_vector;
+		we		: std_logic;
+		ad		: std_logic_vector(13 downto 0);
+		di		: std_logic_vector;
+		q		: inout std_logic_vector
+		) is
+		alias a_di : std_logic_vector(di'length-1 downto 0) is di;
+		variable v_lsb : natural;
+		variable v_b : natural;
+		variable v_old : std_logic_vector(w-1 downto 0);
+		variable v_new : std_logic_vector(w-1 downto 0);
+	begin
+		case w is
+			when 1 => v_lsb := 0;
+			when 2 => v_lsb := 1;
+			when 4 => v_lsb := 2;
+			when 8 => v_lsb := 3;
+			when 16 => v_lsb := 4;
+			when 32 => v_lsb := 5;
+			when others =>
+				report "gowin stand-in: BIT_WIDTH " & integer'image(w) & " not modelled" severity failure;
+		end case;
+		v_b := to_integer(to_01(unsigned(ad(13 downto v_lsb)))) * w;
+		v_old := ram_get(ram, v_b, w);
+		if we = '1' then
+			v_new := a_di(w-1 downto 0);
+			-- 16 and 32 bit words have a byte enable for each byte in the bottom of the address
+			if w >= 16 then
+				for i in 0 to w/8-1 loop
+					if ad(i) /= '1' then
+						v_new(8*i+7 downto 8*i) := v_old(8*i+7 downto 8*i);
+					end if;
+				end loop;
+			end if;
+			ram_set(ram, v_b, w, v_new);
+			if wmode = "01" then
+				q(w-1 downto 0) := v_new;
+			elsif wmode = "10" then
+				q(w-1 downto 0) := v_old;
+			end if;
+		else
+			q(w-1 downto 0) := v_old;
+		end if;
+	end procedure;
+
+	-- HCLKIN edges in one period of CLKOUT
+	function clkdiv_edges(mode : string) return natural is
+	begin
+		if mode = "2" then
+			return 4;
+		elsif mode = "3.5" then
+			return 7;
+		elsif mode = "4" then
+			return 8;
+		elsif mode = "5" then
+			return 10;
+		elsif mode = "8" then
+			return 16;
+		end if;
+		report "gowin stand-in: CLKDIV DIV_MODE " & mode & " not modelled" severity failure;
+		return 4;
+	end function;
+
+	-- a frequency generic such as "17.734"
+	function str_real(s : string) return real is
+		variable r : real := 0.0;
+		variable f : real := 0.0;
+	begin
+		for i in s'range loop
+			if s(i) = '.' then
+				f := 1.0;
+			elsif s(i) >= '0' and s(i) <= '9' then
+				if f = 0.0 then
+					r := r * 10.0 + real(character'pos(s(i)) - character'pos('0'));
+				else
+					f := f / 10.0;
+					r := r + f * real(character'pos(s(i)) - character'pos('0'));
+				end if;
+			end if;
+		end loop;
+		return r;
+	end function;
+
+end gowin_prim_standin_pack;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+library work;
+use work.gowin_prim_standin_pack.all;
+use work.sim_fastsim_pack.all;
+
+entity rPLL is
+	generic (
+		FCLKIN				: string := "100.0";
+		DEVICE				: string := "GW2A-18";
+		DYN_IDIV_SEL		: string := "false";
+		IDIV_SEL				: integer := 0;
+		DYN_FBDIV_SEL		: string := "false";
+		FBDIV_SEL			: integer := 0;
+		DYN_ODIV_SEL		: string := "false";
+		ODIV_SEL				: integer := 8;
+		PSDA_SEL				: string := "0000";
+		DYN_DA_EN			: string := "false";
+		DUTYDA_SEL			: string := "1000";
+		CLKOUT_FT_DIR		: bit := '1';
+		CLKOUTP_FT_DIR		: bit := '1';
+		CLKOUT_DLY_STEP	: integer := 0;
+		CLKOUTP_DLY_STEP	: integer := 0;
+		CLKOUTD3_SRC		: string := "CLKOUT";
+		CLKFB_SEL			: string := "internal";
+		CLKOUT_BYPASS		: string := "false";
+		CLKOUTP_BYPASS		: string := "false";
+		CLKOUTD_BYPASS		: string := "false";
+		CLKOUTD_SRC			: string := "CLKOUT";
+		DYN_SDIV_SEL		: integer := 2
+	);
+	port (
+		CLKOUT				: out std_logic;
+		LOCK					: out std_logic;
+		CLKOUTP				: out std_logic;
+		CLKOUTD				: out std_logic;
+		CLKOUTD3				: out std_logic;
+		RESET					: in std_logic;
+		RESET_P				: in std_logic;
+		CLKIN					: in std_logic;
+		CLKFB					: in std_logic;
+		FBDSEL				: in std_logic_vector(5 downto 0);
+		IDSEL					: in std_logic_vector(5 downto 0);
+		ODSEL					: in std_logic_vector(5 downto 0);
+		PSDA					: in std_logic_vector(3 downto 0);
+		DUTYDA				: in std_logic_vector(3 downto 0);
+		FDLY					: in std_logic_vector(3 downto 0)
+	);
+end rPLL;
+
+architecture behavioural of rPLL is
+
+	constant LOCK_HALVES	: natural := 128;
+	constant PARK_HALVES	: natural := 16;			-- fast-sim: half periods before the outputs stop
+	constant REBASE		: natural := 1000000;	-- half periods before the start time is moved on
+	constant PATH			: string := rPLL'path_name;
+
+begin
+
+	assert DYN_IDIV_SEL = "false" and DYN_FBDIV_SEL = "false" and DYN_ODIV_SEL = "false"
+		report "gowin stand-in: rPLL dynamic dividers not modelled" severity failure;
+
+	g_bypass:if CLKOUT_BYPASS = "true" generate
+		CLKOUT <= CLKIN;
+		CLKOUTP <= CLKIN;
+		CLKOUTD <= CLKIN;
+		CLKOUTD3 <= CLKIN;
+		LOCK <= '1';
+	end generate;
+
+	g_pll:if CLKOUT_BYPASS /= "true" generate
+		p_clk:process
+		variable v_fast : boolean;
+		variable v_t0 : time;
+		variable v_in : real;			-- CLKIN's period in ps
+		variable v_nom : real;
+		variable v_half : real;			-- half a CLKOUT period in ps
+		variable v_n : natural;			-- half periods since v_t0
+		variable v_lock : natural;
+		variable v_d : natural;
+		variable v_d3 : natural;
+		variable v_o : std_logic;
+		variable v_od : std_logic;
+		variable v_od3 : std_logic;
+		begin
+			-- fastsim_mode is driven by the test bench a delta in
+			wait for 0 ns;
+			v_fast := fastsim_fast(fastsim_mode, PATH);
+			loop
+				CLKOUT <= '0';
+				CLKOUTP <= '0';
+				CLKOUTD <= '0';
+				CLKOUTD3 <= '0';
+				LOCK <= '0';
+				if RESET = '1' or RESET_P = '1' then
+					wait until RESET = '0' and RESET_P = '0';
+				end if;
+
+				-- CLKIN's period as measured, or FCLKIN's if they are near enough
+				wait until rising_edge(CLKIN);
+				v_t0 := now;
+				wait until rising_edge(CLKIN);
+				v_in := real((now - v_t0) / 1 ps);
+				if str_real(FCLKIN) > 0.0 then
+					v_nom := 1.0e6 / str_real(FCLKIN);
+					if abs(v_in - v_nom) < v_nom / 100.0 then
+						v_in := v_nom;
+					end if;
+				end if;
+				v_half := v_in * real(IDIV_SEL + 1) / real(FBDIV_SEL + 1) / 2.0;
+
+				v_t0 := now;
+				v_n := 0;
+				v_lock := 0;
+				v_d := 0;
+				v_d3 := 0;
+				v_o := '0';
+				v_od := '0';
+				v_od3 := '0';
+				loop
+					v_o := not v_o;
+					CLKOUT <= v_o;
+					CLKOUTP <= v_o;
+					if v_d = 0 then
+						v_od := not v_od;
+						CLKOUTD <= v_od;
+					end if;
+					v_d := (v_d + 1) mod DYN_SDIV_SEL;
+					if v_d3 = 0 then
+						v_od3 := not v_od3;
+						CLKOUTD3 <= v_od3;
+					end if;
+					v_d3 := (v_d3 + 1) mod 3;
+					if v_lock < LOCK_HALVES then
+						v_lock := v_lock + 1;
+						if v_lock = LOCK_HALVES then
+							LOCK <= '1';
+						end if;
+					end if;
+
+					-- fast-sim: enough edges for what this feeds to measure, then stop
+					if v_fast and v_lock = PARK_HALVES then
+						CLKOUT <= '0';
+						CLKOUTP <= '0';
+						CLKOUTD <= '0';
+						CLKOUTD3 <= '0';
+						LOCK <= '1';
+						wait until RESET = '1' or RESET_P = '1';
+						exit;
+					end if;
+
+					v_n := v_n + 1;
+					if v_n = REBASE then
+						v_t0 := v_t0 + real(v_n) * v_half * 1 ps;
+						v_n := 0;
+					end if;
+					wait until RESET = '1' or RESET_P = '1' for v_t0 + real(v_n) * v_half * 1 ps - now;
+					exit when RESET = '1' or RESET_P = '1';
+				end loop;
+			end loop;
+		end process;
+	end generate;
+
+end behavioural;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+library work;
+use work.gowin_prim_standin_pack.all;
+use work.sim_fastsim_pack.all;
+
+entity CLKDIV is
+	generic (
+		DIV_MODE				: string := "2";
+		GSREN					: string := "false"
+	);
+	port (
+		CLKOUT				: out std_logic;
+		HCLKIN				: in std_logic;
+		RESETN				: in std_logic;
+		CALIB					: in std_logic
+	);
+end CLKDIV;
+
+architecture behavioural of CLKDIV is
+
+	constant EDGES		: natural := clkdiv_edges(DIV_MODE);
+	constant MEASURE	: natural := 4;			-- fast-sim: HCLKIN periods measured
+	constant REBASE	: natural := 100000;		-- fast-sim: periods before the start time is moved on
+	constant PATH		: string := CLKDIV'path_name;
+
+begin
+
+	p_div:process
+	variable v_fast : boolean;
+	variable v_t0 : time;
+	variable v_half : real;			-- half an HCLKIN period in ps
+	variable v_k : natural;			-- CLKOUT periods since v_t0
+	variable v_n : natural;
+	begin
+		wait for 0 ns;
+		v_fast := fastsim_fast(fastsim_mode, PATH);
+		loop
+			CLKOUT <= '0';
+			if RESETN /= '1' then
+				wait until RESETN = '1';
+			end if;
+			wait until rising_edge(HCLKIN) or RESETN /= '1';
+
+			if not v_fast then
+				-- count both edges of HCLKIN
+				v_n := 0;
+				while RESETN = '1' loop
+					if v_n = 0 then
+						CLKOUT <= '1';
+					elsif v_n = EDGES / 2 then
+						CLKOUT <= '0';
+					end if;
+					v_n := (v_n + 1) mod EDGES;
+					wait on HCLKIN, RESETN;
+				end loop;
+			else
+				-- fast-sim: measure HCLKIN then make CLKOUT without it
+				v_t0 := now;
+				for i in 1 to MEASURE loop
+					wait until rising_edge(HCLKIN) or RESETN /= '1';
+				end loop;
+				v_half := real((now - v_t0) / 1 ps) / real(2 * MEASURE);
+				v_t0 := now;
+				v_k := 0;
+				while RESETN = '1' loop
+					CLKOUT <= '1';
+					wait until RESETN /= '1' for v_t0 + real(v_k * EDGES + EDGES / 2) * v_half * 1 ps - now;
+					exit when RESETN /= '1';
+					CLKOUT <= '0';
+					v_k := v_k + 1;
+					if v_k = REBASE then
+						v_t0 := v_t0 + real(v_k * EDGES) * v_half * 1 ps;
+						v_k := 0;
+					end if;
+					wait until RESETN /= '1' for v_t0 + real(v_k * EDGES) * v_half * 1 ps - now;
+				end loop;
+			end if;
+		end loop;
+	end process;
+
+end behavioural;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+library work;
+use work.sim_fastsim_pack.all;
+
+entity OSER10 is
+	generic (
+		GSREN					: string := "false";
+		LSREN					: string := "true"
+	);
+	port (
+		Q						: out std_logic;
+		D0						: in std_logic;
+		D1						: in std_logic;
+		D2						: in std_logic;
+		D3						: in std_logic;
+		D4						: in std_logic;
+		D5						: in std_logic;
+		D6						: in std_logic;
+		D7						: in std_logic;
+		D8						: in std_logic;
+		D9						: in std_logic;
+		FCLK					: in std_logic;
+		PCLK					: in std_logic;
+		RESET					: in std_logic
+	);
+end OSER10;
+
+architecture behavioural of OSER10 is
+
+	constant PATH : string := OSER10'path_name;
+
+begin
+
+	-- when PCLK comes a delta after FCLK, as it does from a CLKDIV, the FCLK
+	-- edge with it sends D9 of the last word and D0 goes on the next one
+	p_ser:process
+	variable v_d : std_logic_vector(9 downto 0) := (others => '0');
+	variable v_n : natural range 0 to 10 := 10;
+	begin
+		Q <= '0';
+		wait for 0 ns;
+		if fastsim_fast(fastsim_mode, PATH) then
+			-- fast-sim: D0 for the whole of each PCLK, FCLK is not looked at
+			loop
+				wait until rising_edge(PCLK) or (RESET = '1' and LSREN = "true");
+				if RESET = '1' and LSREN = "true" then
+					Q <= '0';
+				else
+					Q <= D0;
+				end if;
+			end loop;
+		end if;
+
+		loop
+			if RESET = '1' and LSREN = "true" then
+				Q <= '0';
+				v_n := 10;
+			else
+				if rising_edge(PCLK) then
+					v_d := D9 & D8 & D7 & D6 & D5 & D4 & D3 & D2 & D1 & D0;
+					v_n := 0;
+				end if;
+				if FCLK'event and v_n < 10 then
+					Q <= v_d(v_n);
+					v_n := v_n + 1;
+				end if;
+			end if;
+			wait on FCLK, PCLK, RESET;
+		end loop;
+	end process;
+
+end behavioural;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+library work;
+use work.gowin_prim_standin_pack.all;
+
+entity DPB is
+	generic (
+		READ_MODE0			: bit := '0';
+		READ_MODE1			: bit := '0';
+		WRITE_MODE0			: bit_vector := "00";
+		WRITE_MODE1			: bit_vector := "00";
+		BIT_WIDTH_0			: integer := 16;
+		BIT_WIDTH_1			: integer := 16;
+		BLK_SEL_0			: bit_vector := "000";
+		BLK_SEL_1			: bit_vector := "000";
+		RESET_MODE			: string := "SYNC";
+		INIT_RAM_00		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_01		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_02		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_03		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_04		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_05		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_06		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_07		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_08		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_09		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0A		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0B		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0C		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0D		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0E		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0F		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_10		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_11		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_12		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_13		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_14		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_15		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_16		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_17		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_18		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_19		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1A		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1B		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1C		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1D		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1E		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1F		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_20		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_21		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_22		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_23		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_24		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_25		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_26		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_27		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_28		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_29		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2A		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2B		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2C		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2D		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2E		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2F		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_30		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_31		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_32		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_33		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_34		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_35		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_36		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_37		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_38		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_39		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3A		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3B		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3C		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3D		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3E		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3F		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000"
+	);
+	port (
+		DOA					: out std_logic_vector(15 downto 0);
+		DOB					: out std_logic_vector(15 downto 0);
+		CLKA					: in std_logic;
+		OCEA					: in std_logic;
+		CEA					: in std_logic;
+		RESETA				: in std_logic;
+		WREA					: in std_logic;
+		CLKB					: in std_logic;
+		OCEB					: in std_logic;
+		CEB					: in std_logic;
+		RESETB				: in std_logic;
+		WREB					: in std_logic;
+		BLKSELA				: in std_logic_vector(2 downto 0);
+		BLKSELB				: in std_logic_vector(2 downto 0);
+		ADA					: in std_logic_vector(13 downto 0);
+		DIA					: in std_logic_vector(15 downto 0);
+		ADB					: in std_logic_vector(13 downto 0);
+		DIB					: in std_logic_vector(15 downto 0)
+	);
+end DPB;
+
+architecture behavioural of DPB is
+
+	constant INIT : bit_vector :=
+		INIT_RAM_3F & INIT_RAM_3E & INIT_RAM_3D & INIT_RAM_3C & INIT_RAM_3B & INIT_RAM_3A & INIT_RAM_39 & INIT_RAM_38 &
+		INIT_RAM_37 & INIT_RAM_36 & INIT_RAM_35 & INIT_RAM_34 & INIT_RAM_33 & INIT_RAM_32 & INIT_RAM_31 & INIT_RAM_30 &
+		INIT_RAM_2F & INIT_RAM_2E & INIT_RAM_2D & INIT_RAM_2C & INIT_RAM_2B & INIT_RAM_2A & INIT_RAM_29 & INIT_RAM_28 &
+		INIT_RAM_27 & INIT_RAM_26 & INIT_RAM_25 & INIT_RAM_24 & INIT_RAM_23 & INIT_RAM_22 & INIT_RAM_21 & INIT_RAM_20 &
+		INIT_RAM_1F & INIT_RAM_1E & INIT_RAM_1D & INIT_RAM_1C & INIT_RAM_1B & INIT_RAM_1A & INIT_RAM_19 & INIT_RAM_18 &
+		INIT_RAM_17 & INIT_RAM_16 & INIT_RAM_15 & INIT_RAM_14 & INIT_RAM_13 & INIT_RAM_12 & INIT_RAM_11 & INIT_RAM_10 &
+		INIT_RAM_0F & INIT_RAM_0E & INIT_RAM_0D & INIT_RAM_0C & INIT_RAM_0B & INIT_RAM_0A & INIT_RAM_09 & INIT_RAM_08 &
+		INIT_RAM_07 & INIT_RAM_06 & INIT_RAM_05 & INIT_RAM_04 & INIT_RAM_03 & INIT_RAM_02 & INIT_RAM_01 & INIT_RAM_00;
+
+begin
+
+	-- one process for both ports so the storage can be a variable
+	p_ram:process(CLKA, CLKB, RESETA, RESETB)
+	variable v_ram : t_ram(0 to RAM_CHUNKS-1) := ram_init(INIT);
+	variable v_qa : std_logic_vector(15 downto 0) := (others => '0');		-- output latches
+	variable v_qb : std_logic_vector(15 downto 0) := (others => '0');
+	variable v_pa : std_logic_vector(15 downto 0) := (others => '0');		-- pipeline registers
+	variable v_pb : std_logic_vector(15 downto 0) := (others => '0');
+	begin
+		if RESETA = '1' and RESET_MODE = "ASYNC" then
+			v_qa := (others => '0');
+			v_pa := (others => '0');
+		elsif rising_edge(CLKA) then
+			if RESETA = '1' then
+				v_qa := (others => '0');
+				v_pa := (others => '0');
+			else
+				if OCEA = '1' then
+					v_pa := v_qa;
+				end if;
+				if CEA = '1' and to_bitvector(BLKSELA) = BLK_SEL_0 then
+					ram_access(v_ram, BIT_WIDTH_0, WRITE_MODE0, WREA, ADA, DIA, v_qa);
+				end if;
+			end if;
+		end if;
+
+		if RESETB = '1' and RESET_MODE = "ASYNC" then
+			v_qb := (others => '0');
+			v_pb := (others => '0');
+		elsif rising_edge(CLKB) then
+			if RESETB = '1' then
+				v_qb := (others => '0');
+				v_pb := (others => '0');
+			else
+				if OCEB = '1' then
+					v_pb := v_qb;
+				end if;
+				if CEB = '1' and to_bitvector(BLKSELB) = BLK_SEL_1 then
+					ram_access(v_ram, BIT_WIDTH_1, WRITE_MODE1, WREB, ADB, DIB, v_qb);
+				end if;
+			end if;
+		end if;
+
+		if READ_MODE0 = '1' then
+			DOA <= v_pa;
+		else
+			DOA <= v_qa;
+		end if;
+		if READ_MODE1 = '1' then
+			DOB <= v_pb;
+		else
+			DOB <= v_qb;
+		end if;
+	end process;
+
+end behavioural;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+library work;
+use work.gowin_prim_standin_pack.all;
+
+entity SDPB is
+	generic (
+		READ_MODE			: bit := '0';
+		BIT_WIDTH_0			: integer := 16;
+		BIT_WIDTH_1			: integer := 16;
+		BLK_SEL_0			: bit_vector := "000";
+		BLK_SEL_1			: bit_vector := "000";
+		RESET_MODE			: string := "SYNC";
+		INIT_RAM_00		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_01		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_02		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_03		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_04		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_05		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_06		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_07		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_08		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_09		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0A		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0B		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0C		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0D		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0E		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_0F		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_10		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_11		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_12		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_13		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_14		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_15		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_16		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_17		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_18		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_19		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1A		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1B		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1C		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1D		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1E		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_1F		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_20		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_21		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_22		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_23		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_24		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_25		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_26		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_27		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_28		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_29		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2A		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2B		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2C		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2D		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2E		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_2F		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_30		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_31		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_32		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_33		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_34		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_35		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_36		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_37		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_38		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_39		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3A		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3B		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3C		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3D		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3E		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000";
+		INIT_RAM_3F		: bit_vector := X"0000000000000000000000000000000000000000000000000000000000000000"
+	);
+	port (
+		DO						: out std_logic_vector(31 downto 0);
+		CLKA					: in std_logic;
+		CEA					: in std_logic;
+		RESETA				: in std_logic;
+		CLKB					: in std_logic;
+		CEB					: in std_logic;
+		RESETB				: in std_logic;
+		OCE					: in std_logic;
+		BLKSELA				: in std_logic_vector(2 downto 0);
+		BLKSELB				: in std_logic_vector(2 downto 0);
+		ADA					: in std_logic_vector(13 downto 0);
+		DI						: in std_logic_vector(31 downto 0);
+		ADB					: in std_logic_vector(13 downto 0)
+	);
+end SDPB;
+
+architecture behavioural of SDPB is
+
+	constant INIT : bit_vector :=
+		INIT_RAM_3F & INIT_RAM_3E & INIT_RAM_3D & INIT_RAM_3C & INIT_RAM_3B & INIT_RAM_3A & INIT_RAM_39 & INIT_RAM_38 &
+		INIT_RAM_37 & INIT_RAM_36 & INIT_RAM_35 & INIT_RAM_34 & INIT_RAM_33 & INIT_RAM_32 & INIT_RAM_31 & INIT_RAM_30 &
+		INIT_RAM_2F & INIT_RAM_2E & INIT_RAM_2D & INIT_RAM_2C & INIT_RAM_2B & INIT_RAM_2A & INIT_RAM_29 & INIT_RAM_28 &
+		INIT_RAM_27 & INIT_RAM_26 & INIT_RAM_25 & INIT_RAM_24 & INIT_RAM_23 & INIT_RAM_22 & INIT_RAM_21 & INIT_RAM_20 &
+		INIT_RAM_1F & INIT_RAM_1E & INIT_RAM_1D & INIT_RAM_1C & INIT_RAM_1B & INIT_RAM_1A & INIT_RAM_19 & INIT_RAM_18 &
+		INIT_RAM_17 & INIT_RAM_16 & INIT_RAM_15 & INIT_RAM_14 & INIT_RAM_13 & INIT_RAM_12 & INIT_RAM_11 & INIT_RAM_10 &
+		INIT_RAM_0F & INIT_RAM_0E & INIT_RAM_0D & INIT_RAM_0C & INIT_RAM_0B & INIT_RAM_0A & INIT_RAM_09 & INIT_RAM_08 &
+		INIT_RAM_07 & INIT_RAM_06 & INIT_RAM_05 & INIT_RAM_04 & INIT_RAM_03 & INIT_RAM_02 & INIT_RAM_01 & INIT_RAM_00;
+
+begin
+
+	p_ram:process(CLKA, CLKB, RESETB)
+	variable v_ram : t_ram(0 to RAM_CHUNKS-1) := ram_init(INIT);
+	variable v_q : std_logic_vector(31 downto 0) := (others => '0');
+	variable v_p : std_logic_vector(31 downto 0) := (others => '0');
+	begin
+		if rising_edge(CLKA) then
+			if CEA = '1' and to_bitvector(BLKSELA) = BLK_SEL_0 then
+				ram_access(v_ram, BIT_WIDTH_0, "00", '1', ADA, DI, v_q);
+			end if;
+		end if;
+
+		if RESETB = '1' and RESET_MODE = "ASYNC" then
+			v_q := (others => '0');
+			v_p := (others => '0');
+		elsif rising_edge(CLKB) then
+			if RESETB = '1' then
+				v_q := (others => '0');
+				v_p := (others => '0');
+			else
+				if OCE = '1' then
+					v_p := v_q;
+				end if;
+				if CEB = '1' and to_bitvector(BLKSELB) = BLK_SEL_1 then
+					ram_access(v_ram, BIT_WIDTH_1, "00", '0', ADB, DI, v_q);
+				end if;
+			end if;
+		end if;
+
+		if READ_MODE = '1' then
+			DO <= v_p;
+		else
+			DO <= v_q;
+		end if;
+	end process;
+
+end behavioural;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+entity DFFE is
+	generic (
+		INIT					: bit := '0'
+	);
+	port (
+		Q						: out std_logic;
+		D						: in std_logic;
+		CLK					: in std_logic;
+		CE						: in std_logic
+	);
+end DFFE;
+
+architecture behavioural of DFFE is
+	signal r_q : std_logic := to_stdulogic(INIT);
+begin
+	Q <= r_q;
+	p_q:process(CLK)
+	begin
+		if rising_edge(CLK) and CE = '1' then
+			r_q <= D;
+		end if;
+	end process;
+end behavioural;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+entity MUX2 is
+	port (
+		O						: out std_logic;
+		I0						: in std_logic;
+		I1						: in std_logic;
+		S0						: in std_logic
+	);
+end MUX2;
+
+architecture behavioural of MUX2 is
+begin
+	O <= I1 when S0 = '1' else I0;
+end behavioural;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+entity OBUF is
+	port (
+		O						: out std_logic;
+		I						: in std_logic
+	);
+end OBUF;
+
+architecture behavioural of OBUF is
+begin
+	O <= I;
+end behavioural;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+entity ELVDS_OBUF is
+	port (
+		I						: in std_logic;
+		O						: out std_logic;
+		OB						: out std_logic
+	);
+end ELVDS_OBUF;
+
+architecture behavioural of ELVDS_OBUF is
+begin
+	O <= I;
+	OB <= not I;
+end behavioural;
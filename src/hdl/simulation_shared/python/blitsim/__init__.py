@@ -0,0 +1,34 @@
+"""
+Python helpers shared by the VUnit run.py scripts and the simulation tools.
+
+run.py scripts are run from their own directory and put this directory on
+sys.path with a relative path, in the same way they refer to VHDL sources.
+"""
+
+import os
+from pathlib import Path
+
+# generated files that are only worth keeping between runs (prebuilt libraries,
+# converted ROM images...) go here, CI can point it at a persistent directory
+CACHE = Path(os.environ.get("BLITSIM_PREBUILT", Path(__file__).resolve().parents[2] / "vunit" / "prebuilt_out"))
+
+
+def test_names(test_output):
+    """Output folder to full test name, from VUnit's mapping file in a test_output directory."""
+    mapping = Path(test_output) / "test_name_to_path_mapping.txt"
+    if not mapping.exists():
+        return {}
+    ret = {}
+    for line in mapping.read_text().splitlines():
+        folder, _, name = line.partition(" ")
+        ret[folder] = name
+    return ret
+
+
+def test_files(vunit_out, log):
+    """(test name, path) of log in the output path of each test under vunit_out that wrote one."""
+    test_output = Path(vunit_out) / "test_output"
+    for folder, name in test_names(test_output).items():
+        f = test_output / folder / log
+        if f.exists():
+            yield name, f
@@ -0,0 +1,547 @@
+"""
+Assembler and instruction level simulator for the Aeris (chipset/aeris.vhd).
+
+The assembler takes the mnemonics in doc/chipset.md, one instruction per line
+with ; comments and "label:" definitions:
+
+    start:  WAIT    100, 0              ; raster line 100, horizontal tick 0
+            MOVE16I $FE00, 12, $20      ; CRTC R12 = $20
+            MOVEC   C0, 8
+    loop:   WAITH
+            MOVE    $FE21, $07
+            DSZ     C0
+            BRANCH  loop
+            HALT                        ; illegal op, idle until next vsync
+
+WAIT and SKIP take an optional raster line mask and tick mask after the line
+and tick (all ones by default). Hardware registers are written as FRED, JIM or
+SHEILA addresses ($FCxx, $FDxx, $FExx) or as 24 bit $FEFbxx addresses for the
+other banks. Numbers may be $hex, 0x hex, %binary or decimal and operands may
+be expressions using labels. DB inserts bytes, e.g. for data read with PLAY.
+
+The simulator steps the program frame by frame the way the RTL state machine
+does: each bus cycle takes cycle_ns, WAIT and WAITH advance time to the first
+horizontal tick (1/32 of a line) where the masked counters match, and a vsync
+restarts the program at the points aeris.vhd checks for one. The result is the
+list of hardware register writes with the frame, raster line and tick that
+each happened on, which is what a bench driving the RTL should see.
+
+Where chipset.md and aeris.vhd differ the model follows the RTL: bank 3 is
+$FEF3xx as in the RTL, not $FFFFxx. MOVE16I writes register h then h+1, as
+documented, and MOVE16 and PLAY16 write h twice.
+
+run.py scripts use add_config() to run a program on
+simulation_shared/vunit/fb_dmac_aeris, the bench logs the writes the RTL
+makes and they are compared in order with the model's.
+"""
+
+import argparse
+import ast
+import re
+import sys
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from blitsim import romimage
+
+LINE_NS = 64000             # PAL line
+TICKS = 32                  # horizontal ticks per line, 500kHz
+TICK_NS = LINE_NS // TICKS
+LINES = 312                 # lines per (non interlaced) PAL frame
+
+# bytes in an instruction, by the top two bits of the op code (see decode state)
+LENGTH = {0: 4, 1: 3, 2: 2, 3: 1}
+
+Write = namedtuple("Write", "time frame line tick addr data")
+
+
+class AsmError(Exception):
+    pass
+
+
+#==============================================================================
+# A S S E M B L E R
+#==============================================================================
+
+def _value(expr, labels):
+    """Evaluate an operand, numbers and + - * / << >> & | ~ on labels only."""
+    expr = re.sub(r"\$([0-9A-Fa-f]+)", r"0x\1", expr.strip())
+    expr = re.sub(r"%([01]+)", r"0b\1", expr)
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError:
+        raise AsmError(f"bad expression {expr!r}")
+
+    def ev(n):
+        if isinstance(n, ast.Expression):
+            return ev(n.body)
+        if isinstance(n, ast.Constant) and isinstance(n.value, int):
+            return n.value
+        if isinstance(n, ast.Name):
+            if n.id not in labels:
+                raise AsmError(f"undefined label {n.id}")
+            return labels[n.id]
+        if isinstance(n, ast.UnaryOp) and isinstance(n.op, (ast.USub, ast.UAdd, ast.Invert)):
+            v = ev(n.operand)
+            return -v if isinstance(n.op, ast.USub) else ~v if isinstance(n.op, ast.Invert) else v
+        if isinstance(n, ast.BinOp):
+            ops = {ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b,
+                   ast.Mult: lambda a, b: a * b, ast.FloorDiv: lambda a, b: a // b,
+                   ast.Div: lambda a, b: a // b, ast.LShift: lambda a, b: a << b,
+                   ast.RShift: lambda a, b: a >> b, ast.BitAnd: lambda a, b: a & b,
+                   ast.BitOr: lambda a, b: a | b}
+            if type(n.op) in ops:
+                return ops[type(n.op)](ev(n.left), ev(n.right))
+        raise AsmError(f"bad expression {expr!r}")
+    return ev(tree)
+
+
+def _reg(name, kind):
+    m = re.fullmatch(kind + r"([0-7])", name.strip(), re.IGNORECASE)
+    if not m:
+        raise AsmError(f"expected {kind}0..{kind}7 not {name!r}")
+    return int(m.group(1))
+
+
+def hw_bank(addr):
+    """Split a hardware register address into (bank, register), see i_move_A."""
+    if addr >> 8 in (0xFC, 0xFD, 0xFE):
+        return (addr >> 8) - 0xFC, addr & 0xFF
+    if addr >> 8 in (0xFFFC, 0xFFFD, 0xFFFE):
+        return (addr >> 8) - 0xFFFC, addr & 0xFF
+    if addr >> 12 == 0xFEF and (addr >> 8) & 0xF > 2:
+        return (addr >> 8) & 0xF, addr & 0xFF
+    raise AsmError(f"${addr:X} is not a hardware register the Aeris can write")
+
+
+def hw_address(bank, reg):
+    """The 24 bit address a move in bank writes to (i_move_A)."""
+    if bank < 3:
+        return 0xFFFC00 + (bank << 8) + reg
+    return 0xFEF000 + (bank << 8) + reg
+
+
+def _wait_bytes(op, args, labels):
+    if len(args) not in (2, 4):
+        raise AsmError("expected line, tick[, line mask, tick mask]")
+    v, h = _value(args[0], labels), _value(args[1], labels)
+    m = _value(args[2], labels) if len(args) > 2 else 0x1FF
+    n = _value(args[3], labels) if len(args) > 2 else 0x1F
+    if not (0 <= v < 512 and 0 <= h < 32 and 0 <= m < 512 and 0 <= n < 32):
+        raise AsmError("line/mask must be 0..511, tick/mask 0..31")
+    return [op | m >> 5, (m & 0x1F) << 3 | n >> 2, (n & 3) << 6 | v >> 3, (v & 7) << 5 | h]
+
+
+def _rel(target, pc_next):
+    d = (target - pc_next) & 0xFFFF
+    return [d >> 8, d & 0xFF]
+
+
+def _byte(v, signed=False):
+    if not (-128 if signed else 0) <= v < (128 if signed else 256):
+        raise AsmError(f"{v} does not fit in a byte")
+    return v & 0xFF
+
+
+def _encode(mn, args, pc, labels):
+    """Bytes for one instruction at pc, labels may be incomplete in pass one."""
+    def n(k):
+        if len(args) != k:
+            raise AsmError(f"{mn} takes {k} operand(s)")
+
+    if mn in ("WAIT", "SKIP"):
+        return _wait_bytes(0x00 if mn == "WAIT" else 0x10, args, labels)
+    if mn in ("MOVE16I", "MOVE16"):
+        n(3)
+        b, r = hw_bank(_value(args[0], labels))
+        return [(0x20 if mn == "MOVE16I" else 0x30) | b, r,
+                _byte(_value(args[1], labels)), _byte(_value(args[2], labels))]
+    if mn == "MOVE":
+        n(2)
+        b, r = hw_bank(_value(args[0], labels))
+        return [0x40 | b, r, _byte(_value(args[1], labels))]
+    if mn == "BRANCH":
+        n(1)
+        return [0x50] + _rel(_value(args[0], labels), pc + 3)
+    if mn == "BRANCHL":
+        n(2)
+        return [0x58 | _reg(args[0], "P")] + _rel(_value(args[1], labels), pc + 3)
+    if mn == "MOVEP":
+        n(2)
+        return [0x70 | _reg(args[0], "P")] + _rel(_value(args[1], labels), pc + 3)
+    if mn == "MOVEC":
+        n(2)
+        return [0x80 | _reg(args[0], "C"), _byte(_value(args[1], labels))]
+    if mn in ("PLAY", "PLAY16"):
+        n(2)
+        count = _value(args[1], labels)
+        if not 1 <= count <= 256:
+            raise AsmError("PLAY count must be 1..256")
+        return [(0x90 if mn == "PLAY" else 0x98) | _reg(args[0], "P"), count & 0xFF]
+    if mn == "ADDC":
+        n(2)
+        return [0xA0 | _reg(args[0], "C"), _value(args[1], labels) & 0xFF]
+    if mn == "ADDP":
+        n(2)
+        return [0xA8 | _reg(args[0], "P"), _byte(_value(args[1], labels), signed=True)]
+    if mn in ("MOVECC", "MOVEPP"):
+        n(2)
+        k = "C" if mn == "MOVECC" else "P"
+        return [0xB0 | (mn == "MOVEPP"), _reg(args[0], k) << 4 | _reg(args[1], k)]
+    if mn in ("SYNC", "UNSYNC", "WAITH", "HALT"):
+        n(0)
+        return [{"SYNC": 0xC1, "UNSYNC": 0xC0, "WAITH": 0xF0, "HALT": 0xFF}[mn]]
+    if mn == "RET":
+        n(1)
+        return [0xD0 | _reg(args[0], "P")]
+    if mn == "DSZ":
+        n(1)
+        return [0xE0 | _reg(args[0], "C")]
+    if mn == "DB":
+        return [_byte(_value(a, labels) & 0xFF) for a in args]
+    raise AsmError(f"unknown instruction {mn}")
+
+
+def _split(line):
+    line = line.split(";", 1)[0].strip()
+    label = None
+    m = re.match(r"([A-Za-z_]\w*):\s*(.*)$", line)
+    if m:
+        label, line = m.group(1), m.group(2)
+    if not line:
+        return label, None, []
+    parts = line.split(None, 1)
+    args = [a.strip() for a in parts[1].split(",")] if len(parts) > 1 else []
+    return label, parts[0].upper(), args
+
+
+def assemble(text, base=0):
+    """
+    Assemble program text to be loaded at base (only the low 16 bits matter,
+    all branches are PC relative). Returns (bytes, labels, listing).
+    """
+    lines = [_split(l) for l in text.splitlines()]
+
+    # pass one sizes everything with unknown labels as the current pc
+    labels = {}
+    pc = base & 0xFFFF
+    for num, (label, mn, args) in enumerate(lines, 1):
+        if label:
+            if label in labels:
+                raise AsmError(f"line {num}: {label} defined twice")
+            labels[label] = pc
+        if mn:
+            known = dict(labels)
+            try:
+                pc += len(_encode(mn, args, pc, _Default(known, pc)))
+            except AsmError as e:
+                raise AsmError(f"line {num}: {e}")
+
+    out = bytearray()
+    listing = []
+    pc = base & 0xFFFF
+    for num, (label, mn, args) in enumerate(lines, 1):
+        if not mn:
+            continue
+        try:
+            code = _encode(mn, args, pc, labels)
+        except AsmError as e:
+            raise AsmError(f"line {num}: {e}")
+        listing.append((pc, bytes(code), text.splitlines()[num - 1].rstrip()))
+        out += bytes(code)
+        pc = (pc + len(code)) & 0xFFFF
+    return bytes(out), labels, listing
+
+
+class _Default(dict):
+    """Labels in pass one, forward references read as pc so that sizes are right."""
+
+    def __init__(self, known, pc):
+        super().__init__(known)
+        self.pc = pc
+
+    def __contains__(self, k):
+        return True
+
+    def __getitem__(self, k):
+        return dict.get(self, k, self.pc)
+
+
+#==============================================================================
+# S I M U L A T O R
+#==============================================================================
+
+@lru_cache(maxsize=None)
+def _next_match(m, v, n, h, lines):
+    """
+    For each horizontal tick of a frame, the first tick at or after it where
+    (raster & m) >= v and (tick & n) >= h, or -1 if there isn't one.
+    """
+    p = np.arange(lines * TICKS)
+    cond = ((p // TICKS) & m >= v) & ((p % TICKS) & n >= h)
+    idx = np.where(cond, p, len(p))
+    nxt = np.minimum.accumulate(idx[::-1])[::-1]
+    return np.where(nxt == len(p), -1, nxt)
+
+
+def _wait_args(op, a0, a1, a2):
+    return ((op & 0xF) << 5 | a0 >> 3, a1 << 3 & 0x1F8 | a2 >> 5,
+            (a0 & 7) << 2 | a1 >> 6, a2 & 0x1F)
+
+
+class _Vsync(Exception):
+    pass
+
+
+class Aeris(object):
+    """
+    Runs an Aeris program held in mem, a bytes like 64K bank image, from base.
+
+    cycle_ns is the time for one program fetch or register write: about 125ns
+    in chip RAM and 500 to 1000ns in SYS memory when sharing with the CPU.
+    """
+
+    def __init__(self, mem, base=0, cycle_ns=125, lines=LINES):
+        if cycle_ns <= 0:
+            raise ValueError("cycle_ns must be positive")
+        self.mem = bytes(mem).ljust(0x10000, b"\xff")
+        self.base = base & 0xFFFF
+        self.cycle_ns = cycle_ns
+        self.lines = lines
+        self.frame_ns = lines * LINE_NS
+        self.counters = [0] * 8
+        self.pointers = [0] * 8
+        self.halt = 0
+        self.writes = []
+        self.time = 0
+
+    @classmethod
+    def from_source(cls, text, base=0, **kwargs):
+        code = assemble(text, base)[0]
+        mem = bytearray(0x10000)
+        for i, b in enumerate(code):
+            mem[(base + i) & 0xFFFF] = b
+        return cls(mem, base, **kwargs)
+
+    def position(self, t=None):
+        """(frame, raster line, horizontal tick) at time t."""
+        t = self.time if t is None else t
+        return (int(t // self.frame_ns), int(t % self.frame_ns // LINE_NS),
+                int(t % LINE_NS // TICK_NS))
+
+    def _vsync_due(self):
+        return self.time >= self.frame_end
+
+    def _fetch(self):
+        d = self.mem[self.pc]
+        self.pc = (self.pc + 1) & 0xFFFF
+        self.time += self.cycle_ns
+        return d
+
+    def _write(self, bank, reg, data):
+        frame, line, tick = self.position()
+        self.writes.append(Write(self.time, frame, line, tick, hw_address(bank, reg), data))
+        self.time += self.cycle_ns
+
+    def _wait(self, m, v, n, h):
+        start = self.time - self.time % self.frame_ns
+        p = int((self.time - start) // TICK_NS)
+        nxt = _next_match(m, v, n, h, self.lines)[p] if p < self.lines * TICKS else -1
+        if nxt < 0:
+            self.time = self.frame_end
+            raise _Vsync()
+        if nxt != p:
+            self.time = start + nxt * TICK_NS
+
+    def _match(self, m, v, n, h):
+        _, line, tick = self.position()
+        return (line & m) >= v and (tick & n) >= h
+
+    def _op_fetch(self):
+        op = self._fetch()
+        # the RTL restarts on a pending vsync when an op code fetch completes
+        if self._vsync_due():
+            raise _Vsync()
+        return op
+
+    def _play(self, p, count, wide):
+        # the pointer and PC are swapped for the duration of the play
+        self.pointers[p], self.pc = self.pc, self.pointers[p]
+        for i in range(count or 256):
+            bank = self._fetch() & 0xF
+            if wide:
+                reg = self._fetch()
+                d1, d2 = self._fetch(), self._fetch()
+                self._write(bank, reg, d1)
+                self._write(bank, reg, d2)
+            else:
+                reg, d = self._fetch(), self._fetch()
+                self._write(bank, reg, d)
+            if self._vsync_due():
+                break
+        self.pointers[p], self.pc = self.pc, self.pointers[p]
+
+    def _step(self, skip):
+        """Execute one instruction, returns True if the next one is to be skipped."""
+        op = self._op_fetch()
+        args = [self._fetch() for i in range(LENGTH[op >> 6] - 1)]
+        a0, a1, a2 = ([0, 0, 0] + args)[-3:]
+        if skip:
+            return False
+        hi, lo = op >> 4, op & 0xF
+        rel = ((a1 << 8 | a2) + self.pc) & 0xFFFF
+        if hi == 0x0:
+            self._wait(*_wait_args(op, a0, a1, a2))
+        elif hi == 0x1:
+            return self._match(*_wait_args(op, a0, a1, a2))
+        elif hi in (0x2, 0x3):
+            self._write(lo, a0, a1)
+            self._write(lo, (a0 + 1) & 0xFF if hi == 0x2 else a0, a2)
+        elif hi == 0x4:
+            self._write(lo, a1, a2)
+        elif hi == 0x5:
+            if op & 8:
+                self.pointers[op & 7] = self.pc
+            self.pc = rel
+        elif hi == 0x7:
+            self.pointers[op & 7] = rel
+        elif hi == 0x8:
+            self.counters[op & 7] = a2
+        elif hi == 0x9:
+            self._play(op & 7, a2, op & 8)
+        elif hi == 0xA:
+            if op & 8:
+                self.pointers[op & 7] = (self.pointers[op & 7] + a2 - (a2 & 0x80) * 2) & 0xFFFF
+            else:
+                self.counters[op & 7] = (self.counters[op & 7] + a2) & 0xFF
+        elif op >> 3 == 0x16:
+            regs = self.pointers if op & 1 else self.counters
+            regs[a2 >> 4 & 7] = regs[a2 & 7]
+        elif op >> 3 == 0x18:
+            self.halt = op & 1
+        elif hi == 0xD:
+            self.pc = self.pointers[op & 7]
+        elif hi == 0xE:
+            c = self.counters[op & 7]
+            self.counters[op & 7] = (c - 1) & 0xFF
+            return c == 1
+        elif op == 0xF0:
+            # next hsync after the op code fetch
+            self.time = (self.time // LINE_NS + 1) * LINE_NS
+            if self._vsync_due():
+                self.time = self.frame_end
+                raise _Vsync()
+        else:
+            # unknown instruction trap, idle until the next vsync
+            self.time = self.frame_end
+            raise _Vsync()
+        return False
+
+    def run(self, frames=1, max_steps=None):
+        """Run from the first vsync for frames frames, returns the writes."""
+        self.time = 0
+        self.writes = []
+        steps = 0
+        for frame in range(frames):
+            self.frame_end = (frame + 1) * self.frame_ns
+            self.time = max(self.time, frame * self.frame_ns)
+            self.pc = self.base
+            self.halt = 0
+            skip = False
+            try:
+                while True:
+                    skip = self._step(skip)
+                    steps += 1
+                    if max_steps is not None and steps >= max_steps:
+                        return self.writes
+            except _Vsync:
+                pass
+        return self.writes
+
+
+def format_writes(writes):
+    """One line per write, frame line tick address data, for diffing against a bench."""
+    return "".join(f"{w.frame} {w.line:3d} {w.tick:2d} {w.addr:06X} {w.data:02X}\n" for w in writes)
+
+
+def load_writes(file_name):
+    """(address, data) of each write in a bench log, a line of hex address and data each."""
+    out = []
+    for line in Path(file_name).read_text().splitlines():
+        fields = line.split()
+        if len(fields) == 2:
+            out.append((int(fields[0], 16), int(fields[1], 16)))
+    return out
+
+
+def compare(got, writes, file=sys.stdout):
+    """Compare the (address, data) writes from a bench with the model's, print the first difference."""
+    expect = [(w.addr, w.data) for w in writes]
+    for i, (g, e) in enumerate(zip(got, expect)):
+        if g != e:
+            print(f"write {i}: got {g[0]:06X} {g[1]:02X}, expected {e[0]:06X} {e[1]:02X}", file=file)
+            return False
+    if len(got) != len(expect):
+        print(f"{len(got)} writes, expected {len(expect)}", file=file)
+        return False
+    return True
+
+
+def add_config(test, name, text, frames=1, image="program.bitvec", writes="writes.txt"):
+    """
+    Add a VUnit configuration to test that runs the program text from address
+    0 for frames frames. The assembled image is written to the test's output
+    path before it runs and the writes logged there afterwards are compared
+    with the model's.
+    """
+    code = assemble(text)[0]
+    expect = Aeris.from_source(text).run(frames)
+
+    def pre_config(output_path):
+        Path(output_path, image).write_text(romimage.convert(code, 0x10000, 0xFF))
+        return True
+
+    def post_check(output_path):
+        sys.stdout.write(format_writes(expect))
+        return compare(load_writes(Path(output_path) / writes), expect)
+
+    test.add_config(name=name, generics=dict(G_FRAMES=frames), pre_config=pre_config, post_check=post_check)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assemble and simulate an Aeris program")
+    parser.add_argument("source", help="program source")
+    parser.add_argument("-o", "--output", help="write the assembled program here")
+    parser.add_argument("--base", type=lambda x: int(x, 0), default=0, help="load address")
+    parser.add_argument("-l", "--listing", action="store_true", help="print a listing")
+    parser.add_argument("-r", "--run", type=int, metavar="FRAMES", help="simulate this many frames")
+    parser.add_argument("--cycle-ns", type=float, default=125, help="time for each fetch or write")
+    parser.add_argument("--trace", help="write the register writes here instead of stdout")
+    args = parser.parse_args(argv)
+
+    text = Path(args.source).read_text()
+    try:
+        code, labels, listing = assemble(text, args.base)
+    except AsmError as e:
+        print(f"{args.source}: {e}", file=sys.stderr)
+        return 1
+    if args.output:
+        Path(args.output).write_bytes(code)
+    if args.listing:
+        for pc, b, src in listing:
+            print(f"{pc:04X}  {b.hex(' ').upper():<12}  {src}")
+    if args.run:
+        sim = Aeris.from_source(text, args.base, cycle_ns=args.cycle_ns)
+        trace = format_writes(sim.run(args.run))
+        if args.trace:
+            Path(args.trace).write_text(trace)
+        else:
+            sys.stdout.write(trace)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""
+Simulator throughput benchmarks with a history to catch benches getting slower.
+
+Each reference bench is run from cold in its own output directory, one test at
+a time, and for each test the runner records:
+  compile_s   the bench's cold compile, less the time run.py takes to start
+              and find it has nothing to do, with an empty prebuilt cache
+              (see prebuilt.py) so that the shared libraries are compiled too
+  elab_s      the test's elaboration alone (VUnit --elaborate)
+  run_s       the test's elaboration and simulation
+  sim_us      the simulated time, written to simtime.txt by sim_bench_time()
+              from ../../sim_bench_pack.vhd just before test_runner_cleanup
+  us_per_s    simulated us per wall clock second of simulation,
+              sim_us / (run_s - elab_s)
+
+The results are appended to a JSON history and compared with the median of
+the last few runs on the same host and simulator. A test whose us_per_s drops,
+or whose compile or elaboration grows, by more than --threshold fails the run,
+so that a fast clock added to a shared file shows up at once rather than as
+every bench slowly taking longer.
+
+    python benchmark.py                     (from src/hdl)
+    python benchmark.py -b "*fb_spi" --threshold 0.1
+    python benchmark.py --show
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from fnmatch import fnmatch
+from pathlib import Path
+
+from blitsim import sources, test_files
+
+# bench directory under src/hdl: (the tests to run, options for its run.py)
+REFERENCE = {
+    "modelC20K/vunit/tests/sim_c20k_full":
+        (["lib.test_tb.*look"], ["--cold", "--axis", "rom=mos120"]),
+    "mk3/simulation/vunit/model_bc/general_tb/mk3_model_bc":
+        (["lib.sim_t65_model_bc_tb.*"], ["--axis", "cpu=t65", "--axis", "sys=bbc"]),
+    "simulation_shared/vunit/fb_spi":
+        (["lib.test_tb.*"], []),
+}
+
+METRICS = ("compile_s", "elab_s", "us_per_s")
+SLOWER = {"compile_s": 1, "elab_s": 1, "us_per_s": -1}    # which way is worse
+MIN_CHANGE = {"compile_s": 1.0, "elab_s": 0.5, "us_per_s": 0}  # xunit times are to 0.1s
+
+UNITS = {"fs": 1e-9, "ps": 1e-6, "ns": 1e-3, "us": 1.0, "ms": 1e3, "sec": 1e6, "s": 1e6, "min": 6e7, "hr": 3.6e9}
+
+
+def parse_time(text):
+    """A VHDL time'image as us, None if it is not one."""
+    m = re.match(r"\s*([-+0-9.eE]+)\s*([a-z]+)", text.lower())
+    if not m or m.group(2) not in UNITS:
+        return None
+    return float(m.group(1)) * UNITS[m.group(2)]
+
+
+def simulator_name():
+    simulator = os.environ.get("VUNIT_SIMULATOR")
+    if simulator is None:
+        from vunit.sim_if.factory import SIMULATOR_FACTORY
+        sim_class = SIMULATOR_FACTORY.select_simulator()
+        simulator = sim_class.name if sim_class else None
+    return simulator
+
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=sources.ROOT,
+            capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_py(bench_dir, log, *args, env=None):
+    """Run a bench's run.py, with env on top of ours, return (returncode, wall seconds)."""
+    start = time.monotonic()
+    with open(log, "a") as f:
+        f.write(f"\n$ run.py {' '.join(args)}\n")
+        f.flush()
+        ret = subprocess.run([sys.executable, "run.py"] + list(args), cwd=bench_dir,
+            stdout=f, stderr=subprocess.STDOUT, env=dict(os.environ, **(env or {})))
+    return ret.returncode, time.monotonic() - start
+
+
+def xunit_times(file_name):
+    """Test name to (time, passed) from a VUnit xunit report."""
+    ret = {}
+    if not Path(file_name).exists():
+        return ret
+    for tc in ET.parse(file_name).getroot().iter("testcase"):
+        name = ".".join(x for x in (tc.get("classname"), tc.get("name")) if x)
+        ok = all(tc.find(k) is None for k in ("failure", "error", "skipped"))
+        ret[name] = (float(tc.get("time", 0)), ok)
+    return ret
+
+
+def sim_times(vunit_out):
+    """Test name to simulated us from each test's simtime.txt."""
+    ret = {}
+    for name, f in test_files(vunit_out, "simtime.txt"):
+        us = parse_time(f.read_text())
+        if us is not None:
+            ret[name] = us
+    return ret
+
+
+def bench(name, tests, opts, out_dir, repeat=1, vunit_args=()):
+    """Benchmark one bench, returns a list of result dicts, one per test."""
+    bench_dir = sources.ROOT / name
+    work = out_dir / name.replace("/", "__")
+    work.mkdir(parents=True, exist_ok=True)
+    log = work / "benchmark.log"
+    log.write_text("")
+    vunit_out = str(work / "vunit_out")
+    opts = list(opts) + list(vunit_args)
+
+    # --clean empties vunit_out before prebuilt.seed fills it again from the
+    # cache, so the cold compile is given a cache of its own that is empty
+    with tempfile.TemporaryDirectory(dir=work) as empty:
+        rc, cold = run_py(bench_dir, log, "-o", vunit_out, "--clean", "--compile", *opts,
+            env=dict(BLITSIM_PREBUILT=str(Path(empty).resolve())))
+    if rc:
+        return [dict(bench=name, test=None, error=f"compile failed, see {log}")]
+    _, warm = run_py(bench_dir, log, "-o", vunit_out, "--compile", *opts)
+
+    run_py(bench_dir, log, "-o", vunit_out, "--elaborate", "-p", "1",
+        "--xunit-xml", str(work / "elab.xml"), *opts, *tests)
+    elab = xunit_times(work / "elab.xml")
+
+    # the fastest of repeat runs, one at a time so the tests do not share the host
+    runs = {}
+    for i in range(repeat):
+        run_py(bench_dir, log, "-o", vunit_out, "-p", "1",
+            "--xunit-xml", str(work / "run.xml"), *opts, *tests)
+        for test, (t, ok) in xunit_times(work / "run.xml").items():
+            if test not in runs or (ok and t < runs[test][0]):
+                runs[test] = (t, ok)
+    sim = sim_times(vunit_out)
+
+    ret = []
+    for test, (t, ok) in sorted(runs.items()):
+        r = dict(bench=name, test=test, passed=ok, compile_s=round(max(0.0, cold - warm), 2),
+            startup_s=round(warm, 2), elab_s=elab.get(test, (None,))[0], run_s=t,
+            sim_us=sim.get(test), us_per_s=None)
+        if r["sim_us"] is not None:
+            r["us_per_s"] = round(r["sim_us"] / max(0.1, t - (r["elab_s"] or 0)), 3)
+        ret.append(r)
+    if not ret:
+        ret.append(dict(bench=name, test=None, error=f"no tests ran, see {log}"))
+    return ret
+
+
+def load(history):
+    if not Path(history).exists():
+        return []
+    with open(history) as f:
+        return json.load(f)
+
+
+def save(history, runs):
+    Path(history).parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(str(history) + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(runs, f, indent=1)
+    tmp.replace(history)
+
+
+def baseline(runs, host, simulator, depth):
+    """(bench, test) to the median of each metric over the last depth matching runs."""
+    values = {}
+    for run in [r for r in runs if r["host"] == host and r["simulator"] == simulator][-depth:]:
+        for r in run["results"]:
+            if not r.get("passed"):
+                continue
+            for m in METRICS:
+                if r.get(m) is not None:
+                    values.setdefault((r["bench"], r["test"]), {}).setdefault(m, []).append(r[m])
+    return {k: {m: statistics.median(v) for m, v in d.items()} for k, d in values.items()}
+
+
+def check(results, base, threshold):
+    """Mark each result with the metrics that got worse than threshold, True if none did."""
+    ok = True
+    for r in results:
+        r["worse"] = []
+        b = base.get((r["bench"], r.get("test")), {})
+        for m in METRICS:
+            if r.get(m) is None or m not in b or not b[m]:
+                continue
+            change = (r[m] - b[m]) / b[m] * SLOWER[m]
+            if change > threshold and abs(r[m] - b[m]) > MIN_CHANGE[m]:
+                r["worse"].append(m)
+        if r.get("error") or not r.get("passed", False) or r["worse"]:
+            ok = False
+    return ok
+
+
+def fmt(v, spec):
+    return format(v, spec) if v is not None else "-".rjust(int(spec.split(".")[0]))
+
+
+def print_table(results, base, file=sys.stdout):
+    w = max([len(r.get("test") or r["bench"]) for r in results] + [4])
+    print(f"\n{'test':<{w}}  {'compile':>8}  {'elab':>6}  {'run':>7}  {'sim us':>10}  "
+        f"{'us/s':>9}  {'base us/s':>9}  result", file=file)
+    print("-" * (w + 72), file=file)
+    for r in results:
+        if r.get("error"):
+            print(f"{r['bench']:<{w}}  {r['error']}", file=file)
+            continue
+        b = base.get((r["bench"], r["test"]), {})
+        result = "FAIL" if not r["passed"] else ("SLOWER " + ",".join(r["worse"]) if r["worse"] else "ok")
+        print(f"{r['test']:<{w}}  {fmt(r['compile_s'], '8.1f')}  {fmt(r['elab_s'], '6.1f')}  "
+            f"{fmt(r['run_s'], '7.1f')}  {fmt(r['sim_us'], '10.1f')}  {fmt(r['us_per_s'], '9.2f')}  "
+            f"{fmt(b.get('us_per_s'), '9.2f')}  {result}", file=file)
+
+
+def show(runs, file=sys.stdout):
+    """us_per_s of each test over the history, oldest first."""
+    tests = {}
+    for run in runs:
+        for r in run["results"]:
+            if r.get("test"):
+                tests.setdefault((run["host"], run["simulator"], r["test"]), []).append(
+                    (run["time"][:16], run.get("git") or "", r.get("us_per_s")))
+    for (host, simulator, test), points in sorted(tests.items()):
+        print(f"\n{test} ({simulator} on {host})", file=file)
+        for when, rev, v in points:
+            print(f"  {when}  {rev:<20} {fmt(v, '9.2f')}", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0],
+        epilog="Arguments after -- are passed to every run.py")
+    parser.add_argument("-o", "--output-path", default="benchmark_out",
+        help="Where each bench's vunit_out and logs go")
+    parser.add_argument("-b", "--bench", action="append",
+        help="Only the reference benches whose path under src/hdl matches this glob, may be repeated")
+    parser.add_argument("--history", help="JSON history to compare with and append to, "
+        "default history.json in the output path")
+    parser.add_argument("--threshold", type=float, default=0.2,
+        help="Fail when a metric is this fraction worse than the baseline")
+    parser.add_argument("--depth", type=int, default=5, help="Runs in the baseline median")
+    parser.add_argument("--repeat", type=int, default=1, help="Run each test this many times, keep the fastest")
+    parser.add_argument("--no-record", action="store_true", help="Compare but do not add to the history")
+    parser.add_argument("--show", action="store_true", help="Print the history and stop")
+    argv = sys.argv[1:] if argv is None else argv
+    vunit_args = []
+    if "--" in argv:
+        vunit_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    args = parser.parse_args(argv)
+
+    out_dir = Path(args.output_path).resolve()
+    history = Path(args.history) if args.history else out_dir / "history.json"
+    runs = load(history)
+    if args.show:
+        show(runs)
+        return 0
+
+    simulator = simulator_name()
+    if simulator is None:
+        print("benchmark: no simulator found", file=sys.stderr)
+        return 1
+    host = platform.node()
+
+    results = []
+    for name, (tests, opts) in REFERENCE.items():
+        if args.bench and not any(fnmatch(name, p) for p in args.bench):
+            continue
+        print(f"benchmark: {name}")
+        results += bench(name, tests, opts, out_dir, args.repeat, vunit_args)
+
+    base = baseline(runs, host, simulator, args.depth)
+    ok = check(results, base, args.threshold)
+    print_table(results, base)
+
+    if not args.no_record:
+        runs.append(dict(time=datetime.now().isoformat(timespec="seconds"), host=host,
+            simulator=simulator, git=git_rev(), results=results))
+        save(history, runs)
+        print(f"\nAdded to {history}")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
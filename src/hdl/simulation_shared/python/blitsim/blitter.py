@@ -0,0 +1,450 @@
+"""
+NumPy golden model of the blitter (chipset/blit_int.vhd and blit_addr.vhd).
+
+A Blit holds the register settings for one blit and run() applies it to a
+memory image the way the RTL does: channel A is read once per 1, 2, 4 or 8
+D cycles depending on the mode, shifted, masked with the first/last masks and
+exploded to the pixel format, channel B is shifted within each pixel lane,
+FUNCGEN combines A, B and C and the result is written to D, C is saved to E
+and D/C addresses follow the linear or 6845 character cell layout with the
+optional D min/max wrap. The collision flag is cleared by any non zero D.
+
+Addresses are worked out for the whole blit in one go and, unless a channel
+reads back something written earlier in the same blit, the data are too. An
+overlapping blit is stepped one D cycle at a time in the RTL's A-C-B-E-D
+order so that it sees its own writes. Line mode (BLTCON bit 3) is not
+modelled: random_blit() never sets it and run() refuses a blit that does.
+
+run.py scripts use add_config() to give each random seed its own VUnit
+configuration of simulation_shared/vunit/fb_dmac_blit, the bench dumps its
+ram_tb at the end of the blit and the dump is compared with this model.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from blitsim import romimage
+
+# new ABI register offsets, see the A_N_* constants in blit_int.vhd
+A_N_BLTCON = 0x200
+A_N_FUNCGEN = 0x201
+A_N_MASK_FIRST = 0x202
+A_N_MASK_LAST = 0x203
+A_N_WIDTH = 0x204
+A_N_HEIGHT = 0x205
+A_N_SHIFT_A = 0x206
+A_N_STRIDE_A = 0x208
+A_N_STRIDE_B = 0x20A
+A_N_STRIDE_C = 0x20C
+A_N_ADDR_A = 0x210
+A_N_DATA_A = 0x213
+A_N_ADDR_B = 0x214
+A_N_DATA_B = 0x217
+A_N_ADDR_C = 0x218
+A_N_DATA_C = 0x21B
+A_N_ADDR_E = 0x21C
+A_N_ADDR_D_MIN = 0x220
+A_N_ADDR_D_MAX = 0x224
+A_N_STRIDE_D = 0x228
+A_N_SHIFT_B = 0x22A
+A_N_ADDR_D = 0x22C
+
+# G_STRIDE_HIGH in blit_int.vhd, strides are signed 12 bit
+STRIDE_BITS = 12
+
+# slots within a D cycle, in the order the RTL accesses the channels
+SLOT_A, SLOT_C, SLOT_B, SLOT_E, SLOT_D = range(5)
+
+
+class Blit(object):
+    """Register settings for one blit, names follow the signals in blit_int.vhd."""
+
+    FIELDS = {
+        "cell": 0, "mode": 0, "line": 0, "collision": 0, "wrap": 0,
+        "exec_a": 0, "exec_b": 0, "exec_c": 0, "exec_d": 1, "exec_e": 0, "cell_b": 0,
+        "funcgen": 0xCA, "width": 0, "height": 0, "shift_a": 0, "shift_b": 0,
+        "mask_first": 0xFF, "mask_last": 0xFF,
+        "data_a": 0xFF, "data_b": 0, "data_c": 0,
+        "addr_a": 0, "addr_b": 0, "addr_c": 0, "addr_d": 0, "addr_e": 0,
+        "stride_a": 0, "stride_b": 0, "stride_c": 0, "stride_d": 0,
+        "addr_d_min": 0, "addr_d_max": 0,
+    }
+
+    def __init__(self, **kwargs):
+        for k, v in self.FIELDS.items():
+            setattr(self, k, v)
+        for k, v in kwargs.items():
+            if k not in self.FIELDS:
+                raise TypeError(f"unknown blitter register {k}")
+            setattr(self, k, int(v))
+
+    def __repr__(self):
+        return "Blit(" + ", ".join(f"{k}={getattr(self, k):#x}" for k in self.FIELDS) + ")"
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    @property
+    def rows(self):
+        return self.height + 1
+
+    @property
+    def cols(self):
+        return self.width + 1
+
+    def registers(self):
+        """
+        (address, byte) writes that set up and start the blit on the new ABI.
+
+        The C address and stride writes also set D and SHIFT_A also sets B so
+        those are written first, the BLTCON write with the act bit goes last.
+        """
+        def le(a, v, n):
+            return [(a + i, (v >> (8 * i)) & 0xFF) for i in range(n)]
+
+        exec_bits = (self.exec_a | self.exec_b << 1 | self.exec_c << 2 | self.exec_d << 3
+            | self.exec_e << 4 | self.cell_b << 5)
+        act_bits = (0x80 | self.cell << 6 | self.mode << 4 | self.line << 3
+            | self.collision << 2 | self.wrap << 1)
+        return ([(A_N_BLTCON, exec_bits), (A_N_FUNCGEN, self.funcgen),
+            (A_N_MASK_FIRST, self.mask_first), (A_N_MASK_LAST, self.mask_last),
+            (A_N_WIDTH, self.width), (A_N_HEIGHT, self.height),
+            (A_N_SHIFT_A, self.shift_a), (A_N_SHIFT_B, self.shift_b)]
+            + le(A_N_STRIDE_A, self.stride_a, 2) + le(A_N_STRIDE_B, self.stride_b, 2)
+            + le(A_N_STRIDE_C, self.stride_c, 2) + le(A_N_STRIDE_D, self.stride_d, 2)
+            + le(A_N_ADDR_A, self.addr_a, 3) + [(A_N_DATA_A, self.data_a)]
+            + le(A_N_ADDR_B, self.addr_b, 3) + [(A_N_DATA_B, self.data_b)]
+            + le(A_N_ADDR_C, self.addr_c, 3) + [(A_N_DATA_C, self.data_c)]
+            + le(A_N_ADDR_D, self.addr_d, 3) + le(A_N_ADDR_E, self.addr_e, 3)
+            + le(A_N_ADDR_D_MIN, self.addr_d_min, 3) + le(A_N_ADDR_D_MAX, self.addr_d_max, 3)
+            + [(A_N_BLTCON, act_bits)])
+
+
+def _stride(v):
+    v &= (1 << STRIDE_BITS) - 1
+    return v - (1 << STRIDE_BITS) if v >> (STRIDE_BITS - 1) else v
+
+
+def walk(start, rows, cols, stride, cell=False, wrap=None):
+    """
+    Addresses, shape (rows, cols), of a channel stepping left to right and top
+    to bottom as blit_addr does: +1 or +8 (cell) along a row and the SPR_WRAP
+    step at the end of each row. Only the low 16 bits are stepped, wrap is a
+    (min, max) pair applied after every step like the RTL's cklim state.
+    """
+    bank = start & ~0xFFFF
+    a = start & 0xFFFF
+    stride = _stride(stride)
+    if wrap is None:
+        y = np.arange(rows, dtype=np.int64)[:, None]
+        x = np.arange(cols, dtype=np.int64)[None, :]
+        if cell:
+            line = (a & 7) + y
+            addr = (a & ~7) + (line >> 3) * stride + (line & 7) + 8 * x
+        else:
+            addr = a + y * stride + x
+        return bank | (addr & 0xFFFF)
+
+    lo, hi = wrap[0] & 0xFFFF, wrap[1] & 0xFFFF
+    w = cols - 1
+    out = np.empty(rows * cols, dtype=np.int64)
+    for i in range(rows * cols):
+        out[i] = a
+        if (i + 1) % cols:
+            a += 8 if cell else 1
+        elif not cell:
+            a += stride - w
+        elif a & 7 == 7:
+            a += stride - 8 * w - 7
+        else:
+            a += 1 - 8 * w
+        a &= 0xFFFF
+        if a >= hi:
+            a = (a - hi + lo) & 0xFFFF
+        elif a < lo:
+            a = (hi + a - lo) & 0xFFFF
+    return bank | out.reshape(rows, cols)
+
+
+def shift(prev, cur, n, lane=8):
+    """Shift cur right by n within each lane of bits, filling from prev (p_b_shift)."""
+    prev = np.asarray(prev, dtype=np.int64)
+    cur = np.asarray(cur, dtype=np.int64)
+    m = (1 << lane) - 1
+    ret = np.zeros_like(cur)
+    for i in range(0, 8, lane):
+        v = ((prev >> i & m) << lane | (cur >> i & m)) >> n
+        ret |= (v & m) << i
+    return ret
+
+
+def explode(a, x, mode):
+    """The A mask bits for D column x, repeated for each pixel of the mode (p_cha_A_explode)."""
+    bits = 8 >> mode
+    rep = sum(1 << i for i in range(0, 8, bits))
+    offs = (np.asarray(x) & ((1 << mode) - 1)) * bits
+    return (((np.asarray(a, dtype=np.int64) << offs) & 0xFF) >> (8 - bits)) * rep
+
+
+def funcgen(fg, a, b, c):
+    """Minterm function generator, bit mt of fg selects A,B,C = mt(2),mt(1),mt(0)."""
+    a, b, c = (np.asarray(v, dtype=np.int64) for v in (a, b, c))
+    d = np.zeros(np.broadcast(a, b, c).shape, dtype=np.int64)
+    for mt in range(8):
+        if fg >> mt & 1:
+            d |= ((a if mt & 4 else ~a) & (b if mt & 2 else ~b) & (c if mt & 1 else ~c))
+    return d & 0xFF
+
+
+class Plan(object):
+    """Addresses and access times of every channel for one blit."""
+
+    def __init__(self, blit):
+        b = blit
+        if b.line:
+            raise ValueError("line mode blits are outside the model")
+        rows, cols = b.rows, b.cols
+        self.group = 1 << b.mode
+        self.a_cols = (b.width >> b.mode) + 1
+        wrap = (b.addr_d_min, b.addr_d_max) if b.wrap else None
+
+        self.a = walk(b.addr_a, rows, self.a_cols, b.stride_a)
+        self.b = walk(b.addr_b, rows, cols, b.stride_b, b.cell_b)
+        self.c = walk(b.addr_c, rows, cols, b.stride_c, b.cell, wrap)
+        self.d = walk(b.addr_d, rows, cols, b.stride_d, b.cell, wrap)
+        self.e = (b.addr_e & ~0xFFFF) | ((b.addr_e + np.arange(rows * cols)) & 0xFFFF)
+        self.e = self.e.reshape(rows, cols)
+
+        # time of each access counted in slots, 5 to a D cycle
+        t = 5 * np.arange(rows * cols).reshape(rows, cols)
+        self.t_a = t[:, ::self.group]
+        self.t = t
+
+
+def _hazard(blit, plan, size):
+    """True if any read in the blit sees a byte written earlier in the same blit."""
+    b = blit
+    writes = [(plan.d, plan.t + SLOT_D) if b.exec_d else None,
+              (plan.e, plan.t + SLOT_E) if b.exec_e else None]
+    writes = [w for w in writes if w is not None]
+    reads = [(plan.a, plan.t_a + SLOT_A) if b.exec_a else None,
+             (plan.b, plan.t + SLOT_B) if b.exec_b else None,
+             (plan.c, plan.t + SLOT_C) if b.exec_c else None]
+    reads = [r for r in reads if r is not None]
+    if not writes or not reads:
+        return False
+    first = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+    for addr, t in writes:
+        np.minimum.at(first, addr.ravel() % size, t.ravel())
+    return any(np.any(t.ravel() > first[addr.ravel() % size]) for addr, t in reads)
+
+
+def _masked(blit, prev, cur, j, a_cols):
+    m = shift(prev & 0x7F, cur, blit.shift_a)
+    m = np.where(j == 0, m & blit.mask_first, m)
+    return np.where(j == a_cols - 1, m & blit.mask_last, m)
+
+
+def _run_vector(mem, blit, plan):
+    b = blit
+    size = len(mem)
+    rows, cols = b.rows, b.cols
+    x = np.arange(cols)
+
+    if b.exec_a:
+        a = mem[plan.a % size].astype(np.int64)
+        prev = np.concatenate(([b.data_a], a.ravel()[:-1])).reshape(a.shape)
+    else:
+        a = prev = np.full((rows, plan.a_cols), b.data_a, dtype=np.int64)
+    j = np.arange(plan.a_cols)
+    a = _masked(b, prev, a, j, plan.a_cols)[:, x >> b.mode]
+
+    if b.exec_b:
+        bb = mem[plan.b % size].astype(np.int64)
+        prev = np.concatenate(([b.data_b], bb.ravel()[:-1])).reshape(bb.shape)
+    else:
+        bb = prev = np.full((rows, cols), b.data_b, dtype=np.int64)
+    bb = shift(prev, bb, b.shift_b & ((8 >> b.mode) - 1), 8 >> b.mode)
+
+    c = mem[plan.c % size].astype(np.int64) if b.exec_c else np.full((rows, cols), b.data_c, dtype=np.int64)
+
+    d = funcgen(b.funcgen, explode(a, x, b.mode), bb, c)
+
+    # writes in time order, the last write to an address wins
+    addr, data = [], []
+    if b.exec_e:
+        addr.append(plan.e.ravel() % size)
+        data.append(c.ravel())
+    if b.exec_d:
+        addr.append(plan.d.ravel() % size)
+        data.append(d.ravel())
+    if addr:
+        addr = np.stack(addr, axis=1).ravel()
+        data = np.stack(data, axis=1).ravel()
+        last = len(addr) - 1 - np.unique(addr[::-1], return_index=True)[1]
+        mem[addr[last]] = data[last]
+    return bool(np.any(d))
+
+
+def _run_step(mem, blit, plan):
+    b = blit
+    size = len(mem)
+    prev_a = cur_a = b.data_a
+    prev_b = cur_b = b.data_b
+    c = b.data_c
+    lanes = 8 >> b.mode
+    any_d = False
+    for y in range(b.rows):
+        for x in range(b.cols):
+            j = x >> b.mode
+            if x % plan.group == 0:
+                if b.exec_a:
+                    prev_a, cur_a = cur_a, int(mem[plan.a[y, j] % size])
+                a = int(_masked(b, prev_a, cur_a, j, plan.a_cols))
+            if b.exec_c:
+                c = int(mem[plan.c[y, x] % size])
+            if b.exec_b:
+                prev_b, cur_b = cur_b, int(mem[plan.b[y, x] % size])
+            if b.exec_e:
+                mem[plan.e[y, x] % size] = c
+            d = int(funcgen(b.funcgen, explode(a, x, b.mode),
+                shift(prev_b, cur_b, b.shift_b & (lanes - 1), lanes), c))
+            if b.exec_d:
+                mem[plan.d[y, x] % size] = d
+            any_d = any_d or d != 0
+    return any_d
+
+
+def run(mem, blit):
+    """
+    Apply blit to mem, a uint8 array indexed by address modulo its length,
+    in place. Returns the BLTCON collision bit as read back after the blit.
+    """
+    plan = Plan(blit)
+    if _hazard(blit, plan, len(mem)):
+        any_d = _run_step(mem, blit, plan)
+    else:
+        any_d = _run_vector(mem, blit, plan)
+    return int(bool(blit.collision) and not any_d)
+
+
+def random_blit(rng, size=0x10000):
+    """
+    A random but well formed blit for a size byte memory: each channel gets
+    its own quarter of memory so the blit never reads its own writes, except
+    C and D which share the destination as they would when plotting. Line
+    mode is never set, the model has no line drawing to check it against.
+    """
+    q = size // 4
+    mode = int(rng.integers(4))
+    cell = int(rng.integers(2))
+    width = int(rng.integers(1 << mode, 16))
+    height = int(rng.integers(0, 16))
+    b = Blit(
+        mode=mode, cell=cell, cell_b=int(rng.integers(2)), line=0,
+        collision=1, wrap=int(rng.integers(2)),
+        exec_a=int(rng.integers(2)), exec_b=int(rng.integers(2)), exec_c=int(rng.integers(2)),
+        exec_d=1, exec_e=int(rng.integers(2)),
+        funcgen=int(rng.integers(256)), width=width, height=height,
+        shift_a=int(rng.integers(8)), shift_b=int(rng.integers(8)),
+        mask_first=int(rng.integers(256)), mask_last=int(rng.integers(256)),
+        data_a=int(rng.integers(256)), data_b=int(rng.integers(256)), data_c=int(rng.integers(256)),
+    )
+    # 640 bytes is a row of character cells in a 20K screen mode
+    b.stride_a = (width >> mode) + 1 + int(rng.integers(0, 8))
+    b.stride_b = 640 if b.cell_b else width + 1 + int(rng.integers(0, 8))
+    b.stride_c = b.stride_d = 640 if cell else width + 1 + int(rng.integers(0, 8))
+    b.addr_a = int(rng.integers(0, q // 2))
+    b.addr_b = q + int(rng.integers(0, q // 2))
+    b.addr_c = b.addr_d = 2 * q + int(rng.integers(0, q // 2))
+    b.addr_e = 3 * q + int(rng.integers(0, q // 2))
+    # a window around the destination that some blits will run off the end of
+    b.addr_d_min = b.addr_c - int(rng.integers(0, 64))
+    b.addr_d_max = b.addr_c + int(rng.integers(q // 8, q // 2))
+    return b
+
+
+def random_config(seed, size=0x10000):
+    """A random blit and the memory image it starts from, both from seed."""
+    rng = np.random.default_rng(seed)
+    blit = random_blit(rng, size)
+    before = rng.integers(0, 256, size, dtype=np.uint8)
+    return blit, before
+
+
+def expected(blit, before):
+    """Memory after the blit and the collision bit, before is left alone."""
+    mem = np.array(before, dtype=np.uint8)
+    collision = run(mem, blit)
+    return mem, collision
+
+
+def compare(dump, expect, limit=16, file=sys.stdout):
+    """Compare a ram_tb dump with the expected image, print the first differences."""
+    got = np.fromfile(dump, dtype=np.uint8) if not isinstance(dump, np.ndarray) else dump
+    if len(got) != len(expect):
+        print(f"dump is {len(got)} bytes, expected {len(expect)}", file=file)
+        return False
+    bad = np.flatnonzero(got != expect)
+    for a in bad[:limit]:
+        print(f"  {a:06X}: got {got[a]:02X} expected {expect[a]:02X}", file=file)
+    if len(bad):
+        print(f"{len(bad)} bytes differ", file=file)
+    return len(bad) == 0
+
+
+def write_registers(file_name, blit):
+    """The register writes as text lines of hex address and data, read by the bench."""
+    Path(file_name).write_text("".join(f"{a:04X} {d:02X}\n" for a, d in blit.registers()))
+
+
+def add_config(test, name, blit, before, regs="regs.txt", image="before.bitvec", dump="dump.bin"):
+    """
+    Add a VUnit configuration for one blit to test. The register writes and
+    starting image are written to the test's output path before it runs and
+    the ram_tb dump found there afterwards is compared with the model.
+    """
+    expect, collision = expected(blit, before)
+
+    def pre_config(output_path):
+        write_registers(Path(output_path) / regs, blit)
+        Path(output_path, image).write_text(romimage.convert(bytes(before)))
+        Path(output_path, "blit.json").write_text(json.dumps(blit.to_dict(), indent=1))
+        return True
+
+    def post_check(output_path):
+        print(blit)
+        return compare(Path(output_path) / dump, expect)
+
+    test.add_config(name=name, generics=dict(G_COLLISION=collision),
+        pre_config=pre_config, post_check=post_check)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Blitter golden model")
+    parser.add_argument("seed", type=int, help="random configuration to show")
+    parser.add_argument("--size", type=lambda x: int(x, 0), default=0x10000, help="memory size")
+    parser.add_argument("--dump", help="compare this ram_tb dump with the model")
+    args = parser.parse_args(argv)
+
+    blit, before = random_config(args.seed, args.size)
+    print(blit)
+    for a, d in blit.registers():
+        print(f"  {a:04X} {d:02X}")
+    expect, collision = expected(blit, before)
+    print(f"collision {collision}, {np.count_nonzero(expect != before)} bytes changed")
+    if args.dump:
+        return 0 if compare(args.dump, expect) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+Constrained random cycles for shared/fb_CPU_con_burst.vhd, which turns a CPU
+wrapper's multi byte cycle into byte wide fishbone cycles, and the scoreboard
+that ../vunit/fb_cpu_con_burst_4wide's burst_random_tb checks it against.
+
+A Stream is a list of Cycles as the wrappers make them: the byte lanes asked
+for, all four (arm2 words), one lane anywhere (arm2 bytes, the 8 bit CPUs),
+pairs (680x0 UDS/LDS, 80188) or now and then any mix, little or big endian,
+reads with or without instruction fetch and writes whose lanes' D_wr_stb come
+a few clocks late. Addresses are word aligned about half the time and now
+and then at the top of the 24 bit space so that the burst wraps. Between
+cycles cyc is low for one clock (back to back bursts) or longer. The stream
+also has a pattern of stall_i for the bench's sim_fb_per_mem, a seed is
+unstalled, lightly or heavily stalled.
+
+expect() runs the stream against a model of sim_fb_per_mem: each lane
+becomes one fishbone access, at A for the first lane in endian order and one
+up for each one after, and a read lane's byte is what the memory held at that
+address. The bench checks every fishbone access it sees, in order, with the
+accesses from expect() and every cycle's ack_lane_o, rdy_o and D_rd_o with
+the cycle's lanes and read bytes, stopping at the first difference.
+
+run.py gives each seed a VUnit configuration with add_config(), run them in
+parallel with -p. A seed that fails is added to failing_seeds.txt next to
+run.py by keep_failures(), with the number of cycles its stream had, and
+run.py adds a configuration for every seed in that file to every run after,
+replaying the same stream whatever --cycles is, until it is taken out:
+
+    python run.py --seeds 200 -p 8
+    python -m blitsim.burst 17 --show 20
+    python -m blitsim.burst 0 --coverage 200
+"""
+
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+LANES = 4
+MEM_SIZE = 256
+
+FAILING_SEEDS = "failing_seeds.txt"
+COUNT = 500                             # cycles in a stream unless given
+
+# lane masks and their weights: all four, one lane, a pair, three, any
+LANE_MASKS = [
+    ([0xF], 35),
+    ([0x1, 0x2, 0x4, 0x8], 30),
+    ([0x3, 0x6, 0xC], 20),
+    ([0x7, 0xE], 5),
+    (list(range(1, 16)), 10),
+]
+
+# (chance of a stall run starting, longest stall run) for each stall profile
+STALLS = {"none": (0.0, 0), "light": (0.1, 3), "heavy": (0.5, 12)}
+
+
+def initial_memory(size=MEM_SIZE):
+    """sim_fb_per_mem's contents after its init loop."""
+    return np.array([(i % 255) ^ 0xFF for i in range(size)], np.uint8)
+
+
+class Cycle(object):
+    """One wrapper cycle, d and stb (D_wr_stb delay in clocks from cyc) are per lane."""
+
+    def __init__(self, be, we, fetch, lanes, a, d, stb, gap):
+        self.be = be
+        self.we = we
+        self.fetch = fetch
+        self.lanes = lanes
+        self.a = a
+        self.d = d
+        self.stb = stb
+        self.gap = gap
+
+    def order(self):
+        """The lanes asked for in the order they go out, highest first for big endian."""
+        lanes = [i for i in range(LANES) if self.lanes >> i & 1]
+        return lanes[::-1] if self.be else lanes
+
+    def __repr__(self):
+        lanes = "".join("x" if self.lanes >> i & 1 else "." for i in reversed(range(LANES)))
+        what = "write " + " ".join(f"{self.d[i]:02X}+{self.stb[i]}" for i in self.order()) if self.we \
+            else "fetch" if self.fetch else "read"
+        return f"{'BE' if self.be else 'LE'} {self.a:06X} {lanes} gap {self.gap} {what}"
+
+
+class Stream(object):
+    """The cycles and stall pattern of one seed."""
+
+    def __init__(self, seed, cycles, stalls, stall_profile):
+        self.seed = seed
+        self.cycles = cycles
+        self.stalls = stalls
+        self.stall_profile = stall_profile
+
+    def generics(self):
+        return dict(G_MEM_SIZE=MEM_SIZE)
+
+    def __repr__(self):
+        return f"seed {self.seed}: {len(self.cycles)} cycles, {self.stall_profile} stalls"
+
+
+def _pick(rng, choices):
+    """One of a list of (values, weight), then one of its values."""
+    weights = np.array([w for _, w in choices], float)
+    values = choices[rng.choice(len(choices), p=weights / weights.sum())][0]
+    return int(values[rng.integers(len(values))])
+
+
+def random_stream(seed, count=COUNT):
+    """count random cycles and a stall pattern from seed."""
+    rng = np.random.default_rng(seed)
+    # a seed leans one way so that some seeds are nearly all writes, or big endian
+    write_chance = rng.choice([0.2, 0.5, 0.8])
+    be_chance = rng.choice([0.0, 0.5, 1.0])
+    late_chance = rng.choice([0.0, 0.3, 0.7])
+    cycles = []
+    for _ in range(count):
+        we = int(rng.random() < write_chance)
+        lanes = _pick(rng, LANE_MASKS)
+        r = rng.random()
+        if r < 0.5:
+            a = int(rng.integers(0, 1 << 22)) << 2
+        elif r < 0.9:
+            a = int(rng.integers(0, 1 << 24))
+        else:
+            a = 0xFFFFFC + int(rng.integers(0, 4))
+        stb = [0] * LANES
+        if we:
+            stb = [int(rng.integers(1, 7)) if rng.random() < late_chance else 0 for _ in range(LANES)]
+        r = rng.random()
+        gap = 1 if r < 0.4 else int(rng.integers(2, 5)) if r < 0.8 else int(rng.integers(5, 21))
+        cycles.append(Cycle(int(rng.random() < be_chance), we, int(not we and rng.random() < 0.3),
+            lanes, a, [int(x) for x in rng.integers(0, 256, LANES)], stb, gap))
+
+    profile = ["none", "light", "heavy"][seed % 3]
+    chance, longest = STALLS[profile]
+    stalls = []
+    if longest:
+        # (clocks free, clocks stalled), the bench goes round them again when it gets to the end
+        for _ in range(256):
+            stalls.append((int(rng.geometric(chance)) - 1, int(rng.integers(1, longest + 1))))
+    return Stream(seed, cycles, stalls, profile)
+
+
+def expect(stream, size=MEM_SIZE):
+    """
+    (bus, reads): bus is every fishbone access as (we, fetch, address, data),
+    reads the bytes each cycle should return in D_rd_o as a 32 bit value,
+    lanes not asked for are 0.
+    """
+    mem = initial_memory(size)
+    bus = []
+    reads = []
+    for c in stream.cycles:
+        rd = 0
+        for k, lane in enumerate(c.order()):
+            a = (c.a + k) & 0xFFFFFF
+            if c.we:
+                mem[a % size] = c.d[lane]
+                bus.append((1, 0, a, c.d[lane]))
+            else:
+                rd |= int(mem[a % size]) << (8 * lane)
+                bus.append((0, c.fetch, a, int(mem[a % size])))
+        reads.append(rd)
+    return bus, reads
+
+
+def write_files(output_path, stream):
+    """cycles.txt, bus.txt and stall.txt for the bench."""
+    bus, reads = expect(stream)
+    with open(Path(output_path) / "cycles.txt", "w") as f:
+        for c, rd in zip(stream.cycles, reads):
+            d = sum(c.d[i] << (8 * i) for i in range(LANES))
+            f.write(f"{c.be} {c.we} {c.fetch} {c.gap} {' '.join(str(s) for s in c.stb)} "
+                f"{c.lanes:X} {c.a:06X} {d:08X} {rd:08X}\n")
+    with open(Path(output_path) / "bus.txt", "w") as f:
+        for we, fetch, a, d in bus:
+            f.write(f"{we} {fetch} {a:06X} {d:02X}\n")
+    with open(Path(output_path) / "stall.txt", "w") as f:
+        for free, stalled in stream.stalls:
+            f.write(f"{free} {stalled}\n")
+
+
+def coverage(streams):
+    """Counts of the things the cycles are meant to cover, over some streams."""
+    bins = Counter()
+    for s in streams:
+        bins[f"stalls {s.stall_profile}"] += 1
+        for c in s.cycles:
+            width = bin(c.lanes).count("1")
+            bins[f"{'write' if c.we else 'fetch' if c.fetch else 'read'} {'BE' if c.be else 'LE'} "
+                f"{width} lane{'s' if width > 1 else ''}"] += 1
+            bins[f"A mod 4 = {c.a % 4}"] += 1
+            if c.a + width - 1 > 0xFFFFFF:
+                bins["wraps past FFFFFF"] += 1
+            if c.gap == 1:
+                bins["back to back"] += 1
+            if c.we and any(c.stb[i] for i in c.order()):
+                bins["late D_wr_stb"] += 1
+            if c.lanes not in (0x1, 0x2, 0x4, 0x8, 0x3, 0x6, 0xC, 0x7, 0xE, 0xF):
+                bins["lanes with a gap"] += 1
+    return bins
+
+
+def add_config(test, name, stream):
+    """
+    Add a VUnit configuration for one stream to test, its files are written
+    to the test's output path before it runs.
+    """
+    def pre_config(output_path):
+        write_files(output_path, stream)
+        return True
+
+    test.add_config(name=name, generics=stream.generics(), pre_config=pre_config)
+
+
+def kept_seeds(directory="."):
+    """
+    The (seed, count) pairs in directory's failing_seeds.txt, a line of seed
+    and cycle count each. A line with only a seed is a stream of
+    random_stream()'s default count.
+    """
+    path = Path(directory) / FAILING_SEEDS
+    if not path.exists():
+        return []
+    kept = []
+    for line in path.read_text().splitlines():
+        fields = [int(x) for x in line.split("#")[0].split()]
+        if fields:
+            kept.append((fields[0], fields[1] if len(fields) > 1 else COUNT))
+    return kept
+
+
+def keep_failures(results, seeds, directory="."):
+    """
+    A VUnit post_run: add the seed and count of every failed configuration to
+    directory's failing_seeds.txt. seeds maps configuration names to (seed,
+    count) pairs.
+    """
+    failed = []
+    for name, test in results.get_report().tests.items():
+        parts = name.split(".")
+        if test.status == "failed" and len(parts) > 2 and parts[2] in seeds:
+            failed.append(seeds[parts[2]])
+    kept = kept_seeds(directory)
+    new = [s for s in sorted(set(failed)) if s not in kept]
+    if new:
+        with open(Path(directory) / FAILING_SEEDS, "a") as f:
+            for seed, count in new:
+                f.write(f"{seed} {count}\n")
+        print(f"burst: seeds {', '.join(str(seed) for seed, _ in new)} failed, kept in {FAILING_SEEDS}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Random fb_cpu_con_burst cycles and what they should do")
+    parser.add_argument("seed", type=int, nargs="?", default=0)
+    parser.add_argument("--count", type=int, default=COUNT, help="cycles in a stream")
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="print the first N cycles")
+    parser.add_argument("--coverage", type=int, metavar="SEEDS",
+        help="count what SEEDS streams from seed cover")
+    parser.add_argument("--files", metavar="DIR", help="write the bench's files to DIR")
+    args = parser.parse_args(argv)
+
+    if args.coverage:
+        bins = coverage(random_stream(s, args.count) for s in range(args.seed, args.seed + args.coverage))
+        for k in sorted(bins):
+            print(f"{k:30} {bins[k]:8}")
+        return 0
+    stream = random_stream(args.seed, args.count)
+    print(stream)
+    bus, reads = expect(stream)
+    for c, rd in list(zip(stream.cycles, reads))[:args.show]:
+        print(f"  {c!r}{'' if c.we else f' -> {rd:08X}'}")
+    print(f"{len(bus)} fishbone accesses")
+    if args.files:
+        Path(args.files).mkdir(parents=True, exist_ok=True)
+        write_files(args.files, stream)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""
+Flat profiles of the CPU instruction traces written by ../sim_cpu_trace.vhd.
+
+The trace has a record per instruction: the address and opcode it was fetched
+from, the CPU cycles it took and the clocks of the CPU's clock those took,
+with the clocks the CPU was held for by a slow SYS cycle or a DMA. The trace
+is read a block of records at a time and folded into counts per address, so a
+trace of any length is profiled in memory that only grows with the number of
+different addresses the code ran from.
+
+The addresses are put to functions with the symbol files the sim_asm and ROM
+Makefiles make alongside the ROM: the .sy2 VICE labels of ld65 -Ln ("al ADDR
+.name") or the .sym.noi scripts/perl/getsymbols.pl makes of them ("DEF name
+ADDR"), an address belongs to the nearest symbol at or below it. The .sy2 is
+used when there are both: it marks ca65's cheap locals (@name), which are
+left out as they are not functions, where the .sym.noi has them as _name
+like any other symbol. The symbols of a 16 bit
+build are matched against the bottom 16 bits of the address. Addresses below
+every symbol, or without symbols, are put together by 256 byte page.
+
+The C20K benches trace the T65 or the 65816 with --trace, each test's profile
+is kept in cputrace.txt and cputrace.json next to its trace:
+
+    check = cputrace.attach(tb, syms=cputrace.rom_symbols(images), also=check)
+
+    python -m blitsim.cputrace vunit_out/test_output/<test>/cputrace.bin --syms rom.sy2
+    python -m blitsim.cputrace cputrace.bin --syms rom.sym.noi --by cycles --top 40
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from blitsim import frames
+
+MAGIC = b"CPUT"
+HEADER = np.dtype([("magic", "S4"), ("version", "u1"), ("pad", "u1"), ("pad1", "u1"),
+    ("pad2", "u1"), ("period_ps", "<u4"), ("pad3", "<u4")])
+# address (24 bit) and opcode, clocks (24 bit) and cycles
+RECORD = np.dtype([("addr_op", "<u4"), ("clocks_cycles", "<u4")])
+
+# the .sy2 first, the .sym.noi made from it loses which names are cheap locals
+SYMBOL_SUFFIXES = (".sy2", ".sym.noi")
+TOP = 20
+
+
+def read_header(f):
+    h = np.frombuffer(f.read(HEADER.itemsize), HEADER)
+    if len(h) != 1 or h["magic"][0] != MAGIC:
+        raise ValueError("not a sim_cpu_trace trace")
+    return h[0]
+
+
+def records(file_name, block=1 << 20):
+    """Yield (header, block of records) for the trace, block records at a time."""
+    with open(file_name, "rb") as f:
+        header = read_header(f)
+        while True:
+            data = f.read(block * RECORD.itemsize)
+            if not data:
+                break
+            # a trace cut short by the simulator stopping can end part way through a record
+            n = len(data) // RECORD.itemsize
+            yield header, np.frombuffer(data[:n * RECORD.itemsize], RECORD)
+
+
+def read_symbols(path):
+    """Address to name for a .sym.noi or .sy2, the first name given for an address."""
+    ret = {}
+    with open(path, errors="replace") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 3 and fields[0] == "DEF":
+                name, addr = fields[1], fields[2]
+            elif len(fields) >= 3 and fields[0] == "al" and fields[2].startswith("."):
+                addr, name = fields[1], fields[2][1:]
+                # cheap locals, not functions
+                if name.startswith("@"):
+                    continue
+            else:
+                continue
+            try:
+                ret.setdefault(int(addr, 16), name)
+            except ValueError:
+                continue
+    return ret
+
+
+def symbols_for(rom):
+    """The symbol file made alongside a ROM image, None if there is none."""
+    rom = Path(rom)
+    for suffix in SYMBOL_SUFFIXES:
+        path = rom.with_suffix(suffix)
+        if path.exists():
+            return path
+    return None
+
+
+def rom_symbols(images):
+    """ROM name to symbol file for the images of a matrix that have one."""
+    ret = {}
+    for name, rom in images.items():
+        path = symbols_for(rom)
+        if path is not None:
+            ret[name] = path
+    return ret
+
+
+def _page(addr):
+    return f"${addr >> 8:04X}xx"
+
+
+class Symbols(object):
+    """Sorted symbols, for putting addresses to the symbol at or below them."""
+
+    def __init__(self, table=None):
+        table = table or {}
+        self.addrs = np.array(sorted(table), dtype=np.int64)
+        self.names = [table[a] for a in self.addrs.tolist()]
+        self.mask = 0xFFFF if not len(self.addrs) or self.addrs[-1] <= 0xFFFF else 0xFFFFFF
+
+    @classmethod
+    def read(cls, paths):
+        table = {}
+        for path in paths:
+            for addr, name in read_symbols(path).items():
+                table.setdefault(addr, name)
+        return cls(table)
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, addrs):
+        """Index of the symbol of each address, -1 for those below every symbol."""
+        return np.searchsorted(self.addrs, np.asarray(addrs, dtype=np.int64) & self.mask, side="right") - 1
+
+    def name(self, addr):
+        """name+offset for an address."""
+        i = int(self.index([addr])[0])
+        if i < 0:
+            return _page(addr)
+        off = (addr & self.mask) - int(self.addrs[i])
+        return f"{self.names[i]}+{off:#x}" if off else self.names[i]
+
+
+class Profile(object):
+    """Counts per address of a trace, clocks are those of the CPU's clock input."""
+
+    def __init__(self, period_ps):
+        self.period_ps = period_ps
+        self.addr = np.zeros(0, np.int64)
+        self.opcode = np.zeros(0, np.int64)
+        self.count = np.zeros(0, np.int64)
+        self.cycles = np.zeros(0, np.int64)
+        self.clocks = np.zeros(0, np.int64)
+
+    def add(self, r):
+        """Fold a block of records into the counts."""
+        if not len(r):
+            return
+        addr_op = r["addr_op"].astype(np.int64)
+        clocks_cycles = r["clocks_cycles"].astype(np.int64)
+        addr = np.concatenate([self.addr, addr_op & 0xFFFFFF])
+        opcode = np.concatenate([self.opcode, addr_op >> 24])
+        count = np.concatenate([self.count, np.ones(len(r), np.int64)])
+        cycles = np.concatenate([self.cycles, clocks_cycles >> 24])
+        clocks = np.concatenate([self.clocks, clocks_cycles & 0xFFFFFF])
+
+        self.addr, first, inverse = np.unique(addr, return_index=True, return_inverse=True)
+        self.opcode = opcode[first]
+        # summed as integers by address, a weighted bincount would be float
+        order = np.argsort(inverse, kind="stable")
+        starts = np.searchsorted(inverse[order], np.arange(len(self.addr)))
+        self.count = np.add.reduceat(count[order], starts)
+        self.cycles = np.add.reduceat(cycles[order], starts)
+        self.clocks = np.add.reduceat(clocks[order], starts)
+
+    @property
+    def instructions(self):
+        return int(self.count.sum())
+
+    @property
+    def total_cycles(self):
+        return int(self.cycles.sum())
+
+    @property
+    def total_clocks(self):
+        return int(self.clocks.sum())
+
+    def us(self, clocks):
+        return clocks * self.period_ps / 1e6
+
+    def functions(self, symbols, by="clocks"):
+        """A dict per function, or page without a symbol, most by first."""
+        index = symbols.index(self.addr)
+        groups = {}
+        for i, a, n, cy, cl in zip(index.tolist(), self.addr.tolist(), self.count.tolist(),
+                self.cycles.tolist(), self.clocks.tolist()):
+            name = symbols.names[i] if i >= 0 else _page(a)
+            g = groups.setdefault(name, dict(name=name, instructions=0, cycles=0, clocks=0, addresses=0))
+            g["instructions"] += n
+            g["cycles"] += cy
+            g["clocks"] += cl
+            g["addresses"] += 1
+        return self._ranked(groups.values(), by)
+
+    def addresses(self, symbols, by="clocks", top=TOP):
+        """A dict per address, most by first."""
+        key = self.clocks if by == "clocks" else self.cycles
+        order = np.argsort(-key, kind="stable")[:top]
+        rows = [dict(addr=int(self.addr[i]), opcode=int(self.opcode[i]),
+            symbol=symbols.name(int(self.addr[i])),
+            instructions=int(self.count[i]), cycles=int(self.cycles[i]), clocks=int(self.clocks[i]))
+            for i in order]
+        return self._ranked(rows, by)
+
+    def _ranked(self, rows, by):
+        total_cycles, total_clocks = self.total_cycles, self.total_clocks
+        rows = sorted(rows, key=lambda g: g[by], reverse=True)
+        for g in rows:
+            g["cycles_pct"] = 100 * g["cycles"] / total_cycles if total_cycles else 0.0
+            g["clocks_pct"] = 100 * g["clocks"] / total_clocks if total_clocks else 0.0
+            g["clocks_per_cycle"] = g["clocks"] / g["cycles"] if g["cycles"] else 0.0
+        return rows
+
+    def summary(self, symbols, by="clocks"):
+        """A line for the test."""
+        if not self.instructions:
+            return "no instructions"
+        top = self.functions(symbols, by)[:3]
+        return (f"{self.instructions} instructions, {self.total_cycles} cycles, "
+            f"{self.us(self.total_clocks):.1f} us, top " + ", ".join(
+                f"{g['name']} {g[by + '_pct']:.1f}%" for g in top))
+
+    def as_dict(self, symbols, by="clocks", top=TOP):
+        return dict(clock_ps=self.period_ps, instructions=self.instructions,
+            cycles=self.total_cycles, clocks=self.total_clocks, by=by,
+            functions=self.functions(symbols, by)[:top],
+            addresses=self.addresses(symbols, by, top))
+
+    def report(self, symbols, by="clocks", top=TOP, file=sys.stdout):
+        n, cycles, clocks = self.instructions, self.total_cycles, self.total_clocks
+        print(f"{n} instructions, {cycles} cycles, {clocks} clocks ({self.us(clocks):.1f} us), "
+            f"{cycles / n if n else 0:.2f} cycles and {clocks / cycles if cycles else 0:.2f} clocks per cycle",
+            file=file)
+        if not n:
+            return
+        functions = self.functions(symbols, by)
+        width = max(12, *(len(g["name"]) for g in functions[:top]))
+        print(f"\n{'function':{width}} {'clocks%':>7} {'cycles%':>7} {'clocks':>12} {'cycles':>11}"
+            f" {'instrs':>10} {'clk/cyc':>7}", file=file)
+        for g in functions[:top]:
+            print(f"{g['name']:{width}} {g['clocks_pct']:7.2f} {g['cycles_pct']:7.2f} {g['clocks']:12}"
+                f" {g['cycles']:11} {g['instructions']:10} {g['clocks_per_cycle']:7.2f}", file=file)
+        if len(functions) > top:
+            print(f"... and {len(functions) - top} more", file=file)
+
+        rows = self.addresses(symbols, by, top)
+        width = max(12, *(len(g["symbol"]) for g in rows))
+        print(f"\n{'address':8} {'op':2} {'symbol':{width}} {'clocks%':>7} {'cycles%':>7} {'clocks':>12}"
+            f" {'cycles':>11} {'instrs':>10}", file=file)
+        for g in rows:
+            print(f"{g['addr']:06X}   {g['opcode']:02X} {g['symbol']:{width}} {g['clocks_pct']:7.2f}"
+                f" {g['cycles_pct']:7.2f} {g['clocks']:12} {g['cycles']:11} {g['instructions']:10}", file=file)
+
+
+def profile(file_name, block=1 << 20):
+    p = None
+    for header, r in records(file_name, block):
+        if p is None:
+            p = Profile(int(header["period_ps"]))
+        p.add(r)
+    if p is None:
+        with open(file_name, "rb") as f:
+            p = Profile(int(read_header(f)["period_ps"]))
+    return p
+
+
+def add_arguments(cli):
+    """Add the trace option to a VUnitCLI."""
+    cli.parser.add_argument("--trace", action="store_true",
+        help="Trace the CPU's instructions to cputrace.bin and profile them after each test")
+
+
+def _symbols(output_path, syms):
+    """The Symbols for a test, syms is a symbol file or ROM name to symbol file."""
+    if not syms:
+        return Symbols()
+    if not isinstance(syms, dict):
+        return Symbols.read([syms])
+    # a matrix configuration is named by its values, the ROM's name among them
+    parts = frames.test_name(output_path).split(".")
+    for name, path in syms.items():
+        if name in parts:
+            return Symbols.read([path])
+    return Symbols()
+
+
+def post_check(output_path, log="cputrace.bin", syms=None, also=None):
+    """
+    Profile a test's trace into cputrace.txt and cputrace.json next to it and
+    print a line for it, for use in a post_check. Never fails a test, also is
+    another post_check to run as well.
+    """
+    ok = also(output_path) if also else True
+    path = Path(output_path) / log
+    if not path.exists():
+        print(f"cputrace: no {path}")
+        return ok
+    p = profile(path)
+    symbols = _symbols(output_path, syms)
+    with open(path.with_suffix(".txt"), "w") as f:
+        p.report(symbols, file=f)
+    with open(path.with_suffix(".json"), "w") as f:
+        json.dump(p.as_dict(symbols), f, indent=1)
+    print(f"cputrace: {p.summary(symbols)}")
+    return ok
+
+
+def attach(tb, log="cputrace.bin", syms=None, also=None):
+    """
+    Turn on the bench's trace through its G_TRACE generic and profile it after
+    every test, with also as another post_check. syms is the symbol file for
+    the addresses, or ROM name to symbol file for a bench with a rom axis (see
+    rom_symbols). The bench's post_check is returned so that a later check
+    can run it first.
+    """
+    tb.set_generic("G_TRACE", log)
+    check = lambda output_path: post_check(output_path, log, syms, also)
+    tb.set_post_check(check)
+    return check
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile a sim_cpu_trace instruction trace by function and address")
+    parser.add_argument("trace", help="trace written by sim_cpu_trace")
+    parser.add_argument("--syms", action="append", default=[],
+        help="a .sym.noi or .sy2 to name the addresses with, more than one are merged")
+    parser.add_argument("--by", choices=("clocks", "cycles"), default="clocks",
+        help="rank by the clocks taken, with waits for the bus, or by CPU cycles")
+    parser.add_argument("--top", type=int, default=TOP, help="functions and addresses to show")
+    parser.add_argument("--block", type=int, default=1 << 20, help="records read at a time")
+    parser.add_argument("--json", action="store_true", help="print the profile as JSON")
+    args = parser.parse_args(argv)
+
+    p = profile(args.trace, args.block)
+    symbols = Symbols.read(args.syms)
+    if args.json:
+        json.dump(p.as_dict(symbols, args.by, args.top), sys.stdout, indent=1)
+        print()
+    else:
+        p.report(symbols, args.by, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+"""
+HDL dependency resolution for the run.py scripts: the files a top level
+entity needs, found by following its references through the tree instead of
+listing them by hand.
+
+The tree under src/hdl is indexed once, each file's design units (entities,
+packages, contexts, configurations, Verilog modules), the units it refers
+to (use and context clauses, entity and component instantiations,
+architectures and package bodies of units declared elsewhere) and its
+boolean package constants. The index is kept as JSON in the prebuilt cache
+and brought up to date at each use: a file whose mtime and size have not
+changed is not read, one whose content hash has not changed is not parsed
+again.
+
+resolve() starts from the top's files and adds the file declaring every unit
+they refer to. An instance inside "if <condition> generate" is only followed
+when the condition can be true with the boolean constants of the packages
+picked, so fb_CPU's wrappers for CPUs that the board_config_pack leaves out
+are not compiled. Where more than one file declares a unit the one given in
+files wins, then one in the language of the file that refers to it, then one
+under the first of prefer that has one, then the one nearest the file that
+refers to it; ties are an error that names the files. Units in other
+libraries (ieee, vunit_lib, lib816...) are left to the run.py, as are
+components that nothing in the tree declares, such as the Gowin and Altera
+primitives.
+
+getdeps.pl reads a Quartus project's file list for make, qsf_files() reads
+the same list so that a bench can prefer the files its board is built from,
+and --make prints the result in getdeps.pl's format:
+
+    lib = vu.add_library("lib")
+    deps.add_dependencies(lib, "sim_t65_model_bc_tb", files=["../sim_t65_model_bc_tb.vhd"],
+        prefer=deps.qsf_files(BOARD + "/mk3_16_model_bc.qsf") + [BOARD])
+
+    python -m blitsim.deps sim_t65_model_bc_tb --qsf mk3/boards/cpu-16-model-bc/mk3_16_model_bc.qsf
+    python -m blitsim.deps sim_t65_model_bc_tb --qsf ... --why shared/fb_CPU_t65.vhd
+    python -m blitsim.deps sim_t65_model_bc_tb --qsf ... --make Makefile.simdeps
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from . import CACHE
+
+ROOT = Path(__file__).resolve().parents[3]
+
+INDEX = "hdl_index.json"
+INDEX_VERSION = 1
+
+SUFFIXES = (".vhd", ".vhdl", ".v")
+
+# directories that only hold build output
+SKIP_DIRS = {"vunit_out", "prebuilt_out", "db", "incremental_db", "impl", ".git"}
+
+# libraries that are never in the tree
+EXTERNAL = {"ieee", "std", "vunit_lib", "osvvm", "altera", "altera_mf", "lpm", "unisim", "gw2a", "gw1n"}
+
+_COMMENT = re.compile(r"--[^\n]*")
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_LINE_COMMENT_V = re.compile(r"//[^\n]*")
+
+_DEFINE = re.compile(r"^\s*(entity|package|context|configuration)\s+(\w+)\s+is\b", re.M)
+_ARCH = re.compile(r"^\s*architecture\s+\w+\s+of\s+(\w+)\s+is\b", re.M)
+_BODY = re.compile(r"^\s*package\s+body\s+(\w+)\s+is\b", re.M)
+_CONFIG_OF = re.compile(r"^\s*configuration\s+\w+\s+of\s+(\w+)\s+is\b", re.M)
+_USE = re.compile(r"\buse\s+(\w+)\s*\.\s*(\w+)\b")
+_CONTEXT_REF = re.compile(r"^\s*context\s+(\w+)\s*\.\s*(\w+)\s*;", re.M)
+_INSTANCE = re.compile(
+    r"\b(\w+)\s*:\s*(?:entity\s+(\w+)\s*\.\s*(\w+)(?:\s*\(\s*\w+\s*\))?|configuration\s+(\w+)\s*\.\s*(\w+)"
+    r"|component\s+(\w+)|(\w+))\s+(?:generic|port)\s+map\b")
+_IF_GENERATE = re.compile(r"\b\w+\s*:\s*if\s+(.+?)\s+generate\b", re.S)
+_OTHER_GENERATE = re.compile(r"\b\w+\s*:\s*(?:for|case)\b.+?\bgenerate\b", re.S)
+_ELSE_GENERATE = re.compile(r"\b(?:elsif\b.+?|else)\s+generate\b", re.S)
+_END_GENERATE = re.compile(r"\bend\s+generate\b")
+_CONSTANT = re.compile(r"\bconstant\s+(\w+)\s*:\s*boolean\s*:=\s*(true|false)\s*;")
+_MODULE = re.compile(r"^\s*module\s+(\w+)", re.M)
+
+
+def parse_vhdl(text):
+    """The design units a VHDL file declares and refers to."""
+    text = _COMMENT.sub("", text).lower()
+    units = [[kind, name] for kind, name in _DEFINE.findall(text)]
+    declared = {name for _, name in units}
+    refs = []
+    for lib, name in _USE.findall(text) + _CONTEXT_REF.findall(text):
+        refs.append([lib, name, []])
+    # architectures, bodies and configurations of units declared in another file
+    for pattern in (_ARCH, _BODY, _CONFIG_OF):
+        for name in pattern.findall(text):
+            if name not in declared:
+                refs.append(["work", name, []])
+
+    # the generate blocks around each instance, innermost last
+    events = [(m.start(), "if", " ".join(m.group(1).split())) for m in _IF_GENERATE.finditer(text)]
+    events += [(m.start(), "other", None) for m in _OTHER_GENERATE.finditer(text)]
+    events += [(m.start(), "else", None) for m in _ELSE_GENERATE.finditer(text)]
+    events += [(m.start(), "end", None) for m in _END_GENERATE.finditer(text)]
+    events += [(m.start(), "inst", m) for m in _INSTANCE.finditer(text)]
+    stack = []
+    for _, kind, what in sorted(events, key=lambda e: e[0]):
+        if kind == "if":
+            stack.append(what)
+        elif kind == "other":
+            stack.append(None)
+        elif kind == "else":
+            # the other branch of an if generate, nothing is known about it
+            if stack:
+                stack[-1] = None
+        elif kind == "end":
+            if stack:
+                stack.pop()
+        else:
+            m = what
+            conds = [c for c in stack if c]
+            if m.group(2):
+                refs.append([m.group(2), m.group(3), conds])
+            elif m.group(4):
+                refs.append([m.group(4), m.group(5), conds])
+            else:
+                refs.append([None, m.group(6) or m.group(7), conds])
+    constants = {k: v == "true" for k, v in _CONSTANT.findall(text)}
+    return dict(units=units, refs=refs, constants=constants)
+
+
+def parse_verilog(text):
+    """The modules a Verilog file declares, their instances are not followed."""
+    text = _LINE_COMMENT_V.sub("", _BLOCK_COMMENT.sub("", text)).lower()
+    return dict(units=[["module", m] for m in _MODULE.findall(text)], refs=[], constants={})
+
+
+def parse(path):
+    text = Path(path).read_text(errors="replace")
+    return parse_verilog(text) if Path(path).suffix == ".v" else parse_vhdl(text)
+
+
+class Index(object):
+    """The design units of every HDL file under root, kept up to date on disk."""
+
+    def __init__(self, root=ROOT, file_name=None):
+        self.root = Path(root).resolve()
+        self.file_name = Path(file_name) if file_name else CACHE / INDEX
+        self.files = {}
+        self.parsed = 0
+        self.hashed = 0
+        self._load()
+        self.update()
+
+    def _load(self):
+        try:
+            data = json.loads(self.file_name.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("root") == str(self.root):
+            self.files = data["files"]
+
+    def save(self):
+        self.file_name.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.file_name.with_name(self.file_name.name + ".%d" % os.getpid())
+        tmp.write_text(json.dumps(dict(version=INDEX_VERSION, root=str(self.root), files=self.files)))
+        os.replace(tmp, self.file_name)
+
+    def _walk(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for f in filenames:
+                if f.lower().endswith(SUFFIXES):
+                    yield Path(dirpath) / f
+
+    def update(self):
+        """Re-read the files that have changed since the index was saved, True if any had."""
+        changed = False
+        seen = set()
+        for path in self._walk():
+            rel = path.relative_to(self.root).as_posix()
+            seen.add(rel)
+            st = path.stat()
+            entry = self.files.get(rel)
+            if entry and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                continue
+            digest = hashlib.sha1(path.read_bytes()).hexdigest()
+            self.hashed += 1
+            if not entry or entry["sha1"] != digest:
+                entry = dict(sha1=digest, **parse(path))
+                self.parsed += 1
+            entry.update(mtime=st.st_mtime_ns, size=st.st_size)
+            self.files[rel] = entry
+            changed = True
+        for rel in set(self.files) - seen:
+            del self.files[rel]
+            changed = True
+        if changed:
+            self.save()
+        self._declared = {}
+        for rel, entry in self.files.items():
+            for _, name in entry["units"]:
+                self._declared.setdefault(name, []).append(rel)
+        return changed
+
+    def declared(self, name):
+        """The files declaring a unit, relative to root."""
+        return self._declared.get(name.lower(), [])
+
+    def rel(self, path):
+        """path relative to root, path is from the current directory or else from root."""
+        path = Path(path)
+        if not path.is_absolute() and not path.exists():
+            path = self.root / path
+        return path.resolve().relative_to(self.root).as_posix()
+
+
+def _condition(expr, constants):
+    """A generate condition with the constants known, None if it cannot be worked out."""
+    tokens = re.findall(r"\w+|/=|[()=]", expr)
+    py = []
+    for t in tokens:
+        if t in ("and", "or", "not", "(", ")"):
+            py.append(t)
+        elif t in ("true", "false"):
+            py.append(t.capitalize())
+        elif t == "=":
+            py.append("==")
+        elif t == "/=":
+            py.append("!=")
+        elif t in constants:
+            py.append(str(constants[t]))
+        else:
+            return None
+    try:
+        return bool(eval(" ".join(py), {"__builtins__": {}}))
+    except SyntaxError:
+        return None
+
+
+class Resolution(object):
+    """The files a top needs, why each is there and what could not be found."""
+
+    def __init__(self, root):
+        self.root = root
+        self.files = []
+        self.why = {}
+        self.missing = {}
+        self.external = set()
+        self.skipped = {}
+
+    def paths(self):
+        return [self.root / f for f in self.files]
+
+    def chain(self, rel):
+        """How a file came to be needed, from the top down."""
+        ret = []
+        while rel in self.why:
+            ret.append(rel)
+            rel = self.why[rel][0]
+        return ret[::-1]
+
+
+def _distance(a, b):
+    """Directories between two files through their common parent."""
+    pa, pb = Path(a).parent.parts, Path(b).parent.parts
+    n = 0
+    while n < min(len(pa), len(pb)) and pa[n] == pb[n]:
+        n += 1
+    return len(pa) + len(pb) - 2 * n
+
+
+def qsf_files(qsf, names=("VHDL_FILE", "VERILOG_FILE", "QIP_FILE")):
+    """
+    The source files a Quartus project lists, as getdeps.pl finds them. A .qip
+    stands for the .vhd beside it, files that are not there (version.vhd
+    before a build) are left out.
+    """
+    qsf = Path(qsf)
+    rex = re.compile(r"^\s*set_global_assignment\s+-name\s+(%s)\s+(\S+)" % "|".join(names))
+    ret = []
+    for line in qsf.read_text(errors="replace").splitlines():
+        m = rex.match(line)
+        if not m:
+            continue
+        path = qsf.parent / m.group(2).strip('"')
+        if m.group(1) == "QIP_FILE":
+            path = path.with_suffix(".vhd")
+        if path.exists():
+            ret.append(path)
+    return ret
+
+
+def resolve(top, files=(), prefer=(), index=None):
+    """
+    The files needed by the entity top, declared in one of files or found in
+    the tree, as a Resolution. files are always compiled, prefer are
+    directories or files to take a unit from when it is declared more than
+    once, both as paths from the current directory.
+    """
+    index = index or Index()
+    given = [index.rel(f) for f in files]
+    prefer = [index.rel(p) for p in prefer]
+
+    def pick(name, by, ambiguous):
+        found = [f for f in given if name in (n for _, n in index.files[f]["units"])]
+        if not found:
+            found = index.declared(name)
+        if len(found) <= 1:
+            return found[0] if found else None
+        # a VHDL and a Verilog version of the same thing, take the one in the language of by
+        same = [f for f in found if (Path(f).suffix == ".v") == (Path(by).suffix == ".v")]
+        found = same or found
+        if len(found) == 1:
+            return found[0]
+        for p in prefer:
+            # p is a directory or a file
+            under = [f for f in found if (f + "/").startswith(p.rstrip("/") + "/")]
+            if len(under) == 1:
+                return under[0]
+            if under:
+                found = under
+                break
+        best = min(_distance(f, by) for f in found)
+        nearest = [f for f in found if _distance(f, by) == best]
+        if len(nearest) > 1:
+            ambiguous.setdefault(name, (by, sorted(nearest)))
+            return None
+        return nearest[0]
+
+    start = pick(top.lower(), given[0] if given else ".", {})
+    if start is None:
+        raise ValueError("no entity %s in %s or under %s" % (top, ", ".join(given), index.root))
+
+    constants = {}
+    previous = None
+    # the constants decide which generates are followed, and the packages picked decide
+    # the constants, so go round until the set of files stops changing
+    for _ in range(8):
+        res = Resolution(index.root)
+        ambiguous = {}
+        needed = list(dict.fromkeys([start] + given))
+        done = set()
+        while needed:
+            f = needed.pop(0)
+            if f in done:
+                continue
+            done.add(f)
+            res.files.append(f)
+            own = {n for _, n in index.files[f]["units"]}
+            for lib, name, conds in index.files[f]["refs"]:
+                if lib is not None and lib != "work":
+                    if lib not in EXTERNAL:
+                        res.external.add("%s.%s" % (lib, name))
+                    continue
+                if name in own or name in EXTERNAL:
+                    continue
+                if any(_condition(c, constants) is False for c in conds):
+                    res.skipped.setdefault(name, f)
+                    continue
+                target = pick(name, f, ambiguous)
+                if target is None:
+                    if name not in ambiguous:
+                        res.missing.setdefault(name, f)
+                elif target not in done:
+                    res.why.setdefault(target, (f, name))
+                    needed.append(target)
+        new = {}
+        for f in res.files:
+            new.update(index.files[f]["constants"])
+        if new == constants and res.files == previous:
+            break
+        constants = new
+        previous = res.files
+    if ambiguous:
+        raise ValueError("units declared in more than one file, pass one of them in files or prefer:\n"
+            + "\n".join("  %s (needed by %s): %s" % (name, by, ", ".join(found))
+                for name, (by, found) in sorted(ambiguous.items())))
+    # an instance left out under one generate may be followed under another
+    declared = {n for f in res.files for _, n in index.files[f]["units"]}
+    res.skipped = {k: v for k, v in res.skipped.items() if k not in declared}
+    return res
+
+
+def add_dependencies(lib, top, files=(), prefer=(), index=None, quiet=False):
+    """
+    Add the files the entity top needs to a VUnit library, see resolve(), and
+    return the Resolution.
+    """
+    res = resolve(top, files, prefer, index)
+    for f in res.paths():
+        lib.add_source_file(str(f))
+    if res.missing and not quiet:
+        print("deps: %s has no declaration in the tree: %s" % (top, ", ".join(sorted(res.missing))))
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the HDL files an entity needs")
+    parser.add_argument("top", help="top level entity")
+    parser.add_argument("--file", action="append", default=[], metavar="FILE",
+        help="a file of the bench, its units win over any others")
+    parser.add_argument("--prefer", action="append", default=[], metavar="DIR",
+        help="where a unit declared more than once is looked for first")
+    parser.add_argument("--qsf", action="append", default=[], metavar="FILE",
+        help="prefer the files a Quartus project uses")
+    parser.add_argument("--root", default=str(ROOT), help="tree to index, src/hdl by default")
+    parser.add_argument("--index", help="where the index is kept")
+    parser.add_argument("--why", metavar="FILE", help="show what needs FILE")
+    parser.add_argument("--make", metavar="TARGET", help="print TARGET: files, as getdeps.pl does")
+    args = parser.parse_args(argv)
+
+    index = Index(args.root, args.index)
+    print(f"deps: {len(index.files)} files indexed, {index.hashed} hashed, {index.parsed} parsed",
+        file=sys.stderr)
+    prefer = [f for q in args.qsf for f in qsf_files(q)] + args.prefer
+    res = resolve(args.top, args.file, prefer, index)
+    if args.why:
+        rel = index.rel(args.why)
+        if rel not in res.files:
+            print(f"{rel} is not needed")
+            return 1
+        for f in res.chain(rel):
+            print(f"  {res.why[f][0]} -> {res.why[f][1]} in {f}")
+        return 0
+    if args.make:
+        print(f"{args.make}: {' '.join(str(p) for p in res.paths())}")
+        return 0
+    for f in res.files:
+        print(f)
+    for name, by in sorted(res.missing.items()):
+        print(f"missing: {name} (from {by})")
+    for name, by in sorted(res.skipped.items()):
+        print(f"left out: {name} (generate in {by})")
+    for name in sorted(res.external):
+        print(f"other library: {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+The fast-sim profile of the C20K full system benches, see
+../../sim_fastsim_pack.vhd. With --fast-sim the Gowin stand-ins of the HDMI
+serializers, the video and chroma DACs and their 270, 360 and 266 MHz clocks
+run at the pixel clocks instead. Everything from the pixel clocks down (the
+HDMI encoder, the DAC sample logic, the 128 MHz bus and the CPU) is as before,
+so CPU and memory tests run the same in a fraction of the events.
+
+A test keeps the domains it needs at full fidelity with VUnit attributes in
+its run() block in the test bench:
+
+    if run("hdmi_eye") then
+        -- vunit: .full_hdmi
+
+and --full DOMAIN keeps a domain at full fidelity for every test. The test
+bench needs the generics G_FAST_SIM and G_FULL_DOMAINS and drives
+sim_fastsim_pack's fastsim_mode from them. The profile only acts on the
+stand-ins (sources.add_gowin), with the vendor's prim_sim.vhd the generics
+are set but nothing changes.
+
+    python run.py --fast-sim -p 4
+    python run.py --fast-sim --full dac
+"""
+
+import re
+from pathlib import Path
+
+DOMAINS = ("hdmi", "dac", "chroma")
+
+_RE_RUN = re.compile(r'\brun\s*\(\s*"([^"]+)"\s*\)', re.IGNORECASE)
+_RE_FULL = re.compile(r"--\s*vunit:\s*\.full_(\w+)", re.IGNORECASE)
+
+
+def add_arguments(cli):
+    """Add the fast-sim options to a VUnitCLI."""
+    cli.parser.add_argument("--fast-sim", action="store_true",
+        help="Run the HDMI, DAC and chroma serializers and their clocks at pixel rate")
+    cli.parser.add_argument("--full", action="append", default=[], choices=DOMAINS,
+        help="With --fast-sim, keep this domain at full fidelity in every test")
+
+
+def declared(path):
+    """The domains each test in a test bench asks for with .full_<domain> attributes."""
+    tests = {}
+    test = None
+    for n, line in enumerate(Path(path).read_text().splitlines(), 1):
+        m = _RE_RUN.search(line)
+        if m:
+            test = m.group(1)
+            tests.setdefault(test, [])
+        for domain in _RE_FULL.findall(line):
+            if domain.lower() not in DOMAINS:
+                raise ValueError(f"{path}:{n}: no fast-sim domain {domain}, "
+                    f"there are {', '.join(DOMAINS)}")
+            if test is not None:
+                tests[test].append(domain.lower())
+    return tests
+
+
+def apply(tb, args, path):
+    """
+    With --fast-sim, set the generics of every configuration of each test in
+    tb, whose source is path, so that only the domains it declared and those
+    given with --full run at full fidelity.
+    """
+    if not args.fast_sim:
+        return
+    for name, domains in declared(path).items():
+        full = [d for d in DOMAINS if d in domains or d in args.full]
+        test = tb.test(name)
+        test.set_generic("G_FAST_SIM", True)
+        if full:
+            test.set_generic("G_FULL_DOMAINS", ",".join(full))
@@ -0,0 +1,282 @@
+"""
+Transaction level model of fb_intcon_shared with fb_arbiter_prior or
+fb_arbiter_roundrobin, for contention studies without the RTL.
+
+Each controller works through a trace of transactions. A transaction is
+(think, peripheral, accept, service):
+  think    clocks the controller waits after its previous cycle ends
+  accept   clocks the peripheral holds stall for
+  service  clocks from the peripheral taking the address to its ack
+
+The model steps from grant to grant rather than clock by clock. Clocks are
+counted as sim_fb_monitor counts them, so a transaction's start, its wait
+(start to the intcon granting it) and its latency (start to ack) match the
+monitor's log. The model is worked out from the RTL for the unregistered
+peripheral side (G_REGISTER_PERIPHERAL_C2P false) with or without
+G_REGISTER_CONTROLLER_P2C:
+
+  - the intcon grants from idle in the clock a request is seen, to the lowest
+    numbered request (prior) or the next request after the previous grant
+    (roundrobin)
+  - a granted cycle takes accept + service + 2 clocks to reach the
+    controller's ack, one more with G_REGISTER_CONTROLLER_P2C
+  - the controller drops cyc on its ack and the intcon is idle again one clock
+    later, so the next grant is 2 clocks after the ack
+  - the roundrobin arbiter updates its previous grant in the clock after a
+    grant, from the requests seen then
+
+The arbiter sees cyc, so a controller is requesting from the start of its
+cycle until its ack. The ../vunit/fb_intcon_arb bench runs the same traces
+through the RTL and checks the two agree (--seeds there).
+
+Synthetic controllers never run out of transactions, the run stops granting
+at --clocks. Recorded traces are replayed to their end. Either way the
+statistics only count the transactions that start while every controller
+still has transactions to make, as once one runs out the others see less
+contention than they would.
+
+    python -m blitsim.fbarb --controllers 4 --clocks 10000000
+    python -m blitsim.fbarb --fbmon fbmon.bin
+"""
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from blitsim import fbmon
+
+Transaction = namedtuple("Transaction", "think per accept service")
+
+ARBITERS = ("prior", "roundrobin")
+PERCENTILES = (50, 90, 99, 99.9)
+LOG = np.dtype([("con", "u1"), ("start", "<i8"), ("wait", "<i4"), ("latency", "<i4")])
+
+
+def prior(reqs, prev):
+    return min(reqs)
+
+
+def roundrobin(reqs, prev):
+    higher = [r for r in reqs if r > prev]
+    return min(higher) if higher else min(reqs)
+
+
+def run(traces, arbiter="prior", register_p2c=False, clocks=None):
+    """
+    Run a list of traces, one per controller, and return a structured array of
+    (con, start, wait, latency) per transaction in the order they were granted.
+    With clocks nothing is granted from that clock on, so traces can be
+    endless.
+    """
+    rr = arbiter == "roundrobin"
+    arb = roundrobin if rr else prior
+    ack_extra = 2 + (1 if register_p2c else 0)
+    n = len(traces)
+    its = [iter(t) for t in traces]
+    cur = [None] * n            # transaction each controller is requesting
+    start = [0] * n             # clock its request is seen
+    for i in range(n):
+        cur[i] = next(its[i], None)
+        if cur[i] is not None:
+            start[i] = cur[i].think
+    pending = {i for i in range(n) if cur[i] is not None}
+    prev = n - 1                # reset value, all ones, is past every controller
+    free = 0                    # first clock a grant can happen
+    out = []
+    while pending:
+        g_t = max(free, min(start[i] for i in pending))
+        if clocks is not None and g_t >= clocks:
+            break
+        reqs = [i for i in pending if start[i] <= g_t]
+        g = reqs[0] if len(reqs) == 1 else arb(reqs, prev)
+        if rr:
+            prev = roundrobin([i for i in pending if start[i] <= g_t + 1], prev)
+        t = cur[g]
+        ack = g_t + t.accept + t.service + ack_extra
+        out.append((g, start[g], g_t - start[g], ack - start[g]))
+        free = ack + 2
+        cur[g] = next(its[g], None)
+        if cur[g] is None:
+            pending.discard(g)
+        else:
+            start[g] = free + cur[g].think
+    return np.array(out, LOG)
+
+
+def synthetic(rng, count, think=8, pers=(0, 1, 2), accept=(0, 0, 1), service=(1, 4, 8)):
+    """A random trace, think is the mean gap, pers/accept/service are picked from."""
+    ix = rng.integers(0, len(pers), count)
+    return [Transaction(int(t), pers[i], accept[i], service[i])
+        for t, i in zip(rng.geometric(1 / (think + 1), count) - 1, ix)]
+
+
+def endless(rng, think=8, chunk=4096, **kwargs):
+    """synthetic() transactions without end, made chunk at a time."""
+    while True:
+        yield from synthetic(rng, chunk, think, **kwargs)
+
+
+def window(log, traces, clocks=None):
+    """
+    The clock up to which every controller had transactions to make, clocks
+    or the end of the last transaction of the first trace to run out. Traces
+    without a length never run out.
+    """
+    end = clocks if clocks is not None else np.inf
+    for c, trace in enumerate(traces):
+        if not hasattr(trace, "__len__"):
+            continue
+        m = log[log["con"] == c]
+        if len(m) == len(trace):
+            end = min(end, int((m["start"] + m["latency"]).max()) if len(m) else 0)
+    return end
+
+
+def random_traces(seed, controllers=3, count=200):
+    """A mix of controllers with different appetites, as used by the RTL cross check."""
+    rng = np.random.default_rng(seed)
+    return [synthetic(rng, count, think=int(rng.integers(0, 16)),
+        accept=tuple(int(x) for x in rng.integers(0, 3, 3)),
+        service=tuple(int(x) for x in rng.integers(0, 10, 3)))
+        for _ in range(controllers)]
+
+
+def read_log(file_name):
+    """The whole of a sim_fb_monitor log as one array, for the short logs of the cross check."""
+    blocks = [r for _, r in fbmon.records(file_name)]
+    return np.concatenate(blocks) if blocks else np.zeros(0, fbmon.RECORD)
+
+
+def from_fbmon(file_name, register_p2c=False):
+    """Traces recorded by sim_fb_monitor, the peripheral times are the logged service times."""
+    ack_extra = 2 + (1 if register_p2c else 0)
+    r = read_log(file_name)
+    r = r[np.argsort(r["start"], kind="stable")]
+    t0 = int(r["start"].min()) if len(r) else 0
+    traces = []
+    for c in range(int(r["con"].max()) + 1 if len(r) else 0):
+        m = r[r["con"] == c]
+        end = t0
+        trace = []
+        for s, w, lat, p in zip(m["start"].astype(np.int64), m["wait"], m["latency"], m["per"]):
+            trace.append(Transaction(max(0, int(s) - end), int(p), 0, max(0, int(lat) - int(w) - ack_extra)))
+            end = int(s) + int(lat) + 2
+        traces.append(trace)
+    return traces
+
+
+def write_traces(path, traces):
+    """Write a trace per controller as m<n>.txt for the RTL bench: think, then the
+    address, peripheral in bits 23-16, accept in 15-8 and service in 7-0."""
+    for i, trace in enumerate(traces):
+        with open(Path(path) / f"m{i}.txt", "w") as f:
+            for t in trace:
+                f.write(f"{t.think} {t.per:02X}{t.accept:02X}{t.service:02X}\n")
+
+
+def summary(log, controllers, file=sys.stdout, names=None, until=None):
+    """Grant wait per controller, of the transactions that start before until if given."""
+    names = names or {}
+    print(f"{'':12} {'count':>8} {'busy%':>6} " + " ".join(f"{'p%g' % p:>6}" for p in PERCENTILES)
+        + f" {'worst':>6} {'mean':>6}", file=file)
+    if until is not None and len(log):
+        t0 = log["start"].min()
+        log = log[log["start"] < until]
+        span = max(1, int(until - t0))
+    else:
+        span = max(1, int((log["start"] + log["latency"]).max() - log["start"].min())) if len(log) else 1
+    for c in range(controllers):
+        w = log["wait"][log["con"] == c]
+        if not len(w):
+            continue
+        busy = 100 * (log["latency"][log["con"] == c] - w).sum() / span
+        print(f"{names.get(c, str(c)):12} {len(w):8} {busy:6.1f} "
+            + " ".join(f"{np.percentile(w, p):6.1f}" for p in PERCENTILES)
+            + f" {w.max():6} {w.mean():6.2f}", file=file)
+
+
+def compare(model, rtl, file=sys.stdout, limit=10):
+    """Compare the model's log with the monitor's per controller, True if they agree."""
+    ok = True
+    t0m = model["start"].min() if len(model) else 0
+    t0r = int(rtl["start"].min()) if len(rtl) else 0
+    for c in sorted(set(model["con"]) | set(rtl["con"])):
+        m = model[model["con"] == c]
+        r = rtl[rtl["con"] == c]
+        if len(m) != len(r):
+            print(f"controller {c}: model {len(m)} transactions, RTL {len(r)}", file=file)
+            ok = False
+            continue
+        r = r[np.argsort(r["start"], kind="stable")]
+        bad = np.flatnonzero((m["start"] - t0m != r["start"].astype(np.int64) - t0r)
+            | (m["wait"] != r["wait"]) | (m["latency"] != r["latency"]))
+        for i in bad[:limit]:
+            print(f"controller {c} #{i}: model start {m['start'][i] - t0m} wait {m['wait'][i]} "
+                f"latency {m['latency'][i]}, RTL start {int(r['start'][i]) - t0r} "
+                f"wait {r['wait'][i]} latency {r['latency'][i]}", file=file)
+        ok = ok and not len(bad)
+    return ok
+
+
+def add_config(test, name, traces, arbiter="prior", register_p2c=False, log="fbmon.bin"):
+    """
+    Add a VUnit configuration to the fb_intcon_arb bench that runs traces
+    through the RTL and compares the monitor's log with the model.
+    """
+    expect = run(traces, arbiter, register_p2c)
+
+    def pre_config(output_path):
+        write_traces(output_path, traces)
+        return True
+
+    def post_check(output_path):
+        ok = compare(expect, read_log(Path(output_path) / log))
+        summary(expect, len(traces), until=window(expect, traces))
+        return ok
+
+    test.add_config(name=name, generics=dict(G_CONTROLLERS=len(traces),
+        G_ROUND_ROBIN=arbiter == "roundrobin", G_REGISTER_CONTROLLER_P2C=register_p2c),
+        pre_config=pre_config, post_check=post_check)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transaction level model of the Fishbone shared intcon")
+    parser.add_argument("--arbiter", choices=ARBITERS + ("both",), default="both")
+    parser.add_argument("--controllers", type=int, default=4, help="synthetic controllers")
+    parser.add_argument("--clocks", type=float, default=1e6, help="clocks to run synthetic traces for")
+    parser.add_argument("--think", type=int, nargs="*", default=[2, 8, 16, 32],
+        help="mean think time of each synthetic controller, repeated as needed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fbmon", help="replay the traces recorded in a sim_fb_monitor log instead")
+    parser.add_argument("--register-p2c", action="store_true", help="model G_REGISTER_CONTROLLER_P2C")
+    args = parser.parse_args(argv)
+
+    clocks = None
+    if args.fbmon:
+        make_traces = lambda: from_fbmon(args.fbmon, args.register_p2c)
+    else:
+        clocks = int(args.clocks)
+        # each controller has its own stream so that a change to one leaves the others
+        make_traces = lambda: [endless(np.random.default_rng([args.seed, i]), args.think[i % len(args.think)])
+            for i in range(args.controllers)]
+
+    for arbiter in ARBITERS if args.arbiter == "both" else (args.arbiter,):
+        traces = make_traces()
+        t = time.perf_counter()
+        log = run(traces, arbiter, args.register_p2c, clocks)
+        t = time.perf_counter() - t
+        end = int((log["start"] + log["latency"]).max()) if len(log) else 0
+        until = window(log, traces, clocks)
+        print(f"\n{arbiter}: {len(log)} transactions, {end} clocks in {t:.2f}s "
+            f"({end / max(t, 1e-9) / 1e6:.1f}M clocks/s)")
+        print(f"grant wait, clocks from request to grant, up to clock {until} while every controller is active")
+        summary(log, len(traces), until=until)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Read and summarise the Fishbone transaction logs written by sim_fb_monitor.
+
+The log is read a block of records at a time so a log of any length is
+summarised in a fixed amount of memory. For each controller and peripheral
+the summary gives the transaction count, the share of reads and writes, the
+bandwidth over the logged time and the latency from the start of a cycle to
+its ack, as a histogram and as percentiles. For each controller it also gives
+the arbitration wait, the clocks from the start of a cycle until the intcon
+accepts the address.
+
+A bench instantiates sim_fb_monitor on the intcon's controller ports with
+G_FILE set from a generic, and run.py turns it on with:
+
+    fbmon.attach(lib.test_bench("test_tb"))
+
+    python -m blitsim.fbmon vunit_out/test_output/<test>/fbmon.bin
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"FBMN"
+HEADER = np.dtype([("magic", "S4"), ("version", "u1"), ("controllers", "u1"),
+    ("peripherals", "u1"), ("pad", "u1"), ("period_ps", "<u4"), ("pad2", "<u4")])
+RECORD = np.dtype([("con", "u1"), ("per", "u1"), ("flags", "u1"), ("data", "u1"),
+    ("addr", "<u4"), ("start", "<u4"), ("wait", "<u2"), ("latency", "<u2")])
+FLAG_WE = 1
+
+BINS = 1024                 # latencies of BINS-1 clocks and over share the last bin
+PERCENTILES = (50, 90, 99, 100)
+
+
+def read_header(f):
+    h = np.frombuffer(f.read(HEADER.itemsize), HEADER)
+    if len(h) != 1 or h["magic"][0] != MAGIC:
+        raise ValueError("not a sim_fb_monitor log")
+    return h[0]
+
+
+def records(file_name, block=1 << 16):
+    """Yield (header, block of records) for the log, block records at a time."""
+    with open(file_name, "rb") as f:
+        header = read_header(f)
+        while True:
+            data = f.read(block * RECORD.itemsize)
+            if not data:
+                break
+            # a log cut short by the simulator stopping can end part way through a record
+            n = len(data) // RECORD.itemsize
+            yield header, np.frombuffer(data[:n * RECORD.itemsize], RECORD)
+
+
+class Histogram:
+    """Counts of clock values, those past the last bin are counted in it."""
+
+    def __init__(self, bins=BINS):
+        self.counts = np.zeros(bins, np.int64)
+        self.max = 0
+        self.sum = 0
+
+    def add(self, values):
+        if len(values):
+            self.counts += np.bincount(np.minimum(values, len(self.counts) - 1), minlength=len(self.counts))
+            self.max = max(self.max, int(values.max()))
+            self.sum += int(values.sum(dtype=np.int64))
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def mean(self):
+        return self.sum / max(1, self.total)
+
+    def percentile(self, p):
+        if p >= 100:
+            return self.max
+        c = np.cumsum(self.counts)
+        return int(np.searchsorted(c, c[-1] * p / 100))
+
+
+class Stats:
+    """Running per controller and per peripheral figures for one log."""
+
+    def __init__(self, controllers, peripherals, period_ps):
+        self.period_ps = period_ps
+        self.first = None
+        self.last = 0
+        self.con = [self._new() for _ in range(controllers)]
+        self.per = [self._new() for _ in range(peripherals)]
+
+    @staticmethod
+    def _new():
+        return dict(reads=0, writes=0, busy=0, latency=Histogram(), wait=Histogram())
+
+    def add(self, r):
+        if not len(r):
+            return
+        start = r["start"].astype(np.int64)
+        end = start + r["latency"]
+        self.first = int(start.min()) if self.first is None else min(self.first, int(start.min()))
+        self.last = max(self.last, int(end.max()))
+        we = (r["flags"] & FLAG_WE) != 0
+        for key, table in (("con", self.con), ("per", self.per)):
+            ix = r[key]
+            for i in np.unique(ix):
+                if i >= len(table):
+                    continue
+                m = ix == i
+                s = table[i]
+                s["writes"] += int(np.count_nonzero(we & m))
+                s["reads"] += int(np.count_nonzero(~we & m))
+                s["busy"] += int((r["latency"][m].astype(np.int64) - r["wait"][m]).sum())
+                s["latency"].add(r["latency"][m])
+                s["wait"].add(r["wait"][m])
+
+    def span_s(self):
+        return 0 if self.first is None else (self.last - self.first) * self.period_ps * 1e-12
+
+    def report(self, names=None, file=sys.stdout):
+        names = names or {}
+        span = self.span_s()
+        print(f"{self.last - (self.first or 0)} clocks of {self.period_ps} ps, {span * 1e6:.1f} us", file=file)
+        head = f"{'':12} {'count':>8} {'rd':>7} {'wr':>7} {'MB/s':>7} {'busy%':>6}  " + \
+            " ".join(f"{'p%d' % p:>5}" for p in PERCENTILES) + f" {'mean':>6}"
+        for title, table, key in (("controller", self.con, "con"), ("peripheral", self.per, "per")):
+            print(f"\n{title} latency (clocks from start to ack)", file=file)
+            print(head, file=file)
+            for i, s in enumerate(table):
+                n = s["reads"] + s["writes"]
+                if not n:
+                    continue
+                mbs = n / span / 1e6 if span else 0
+                busy = 100 * s["busy"] / max(1, self.last - (self.first or 0))
+                print(f"{names.get(key, {}).get(i, str(i)):12} {n:8} {s['reads']:7} {s['writes']:7} "
+                    f"{mbs:7.2f} {busy:6.1f}  "
+                    + " ".join(f"{s['latency'].percentile(p):5}" for p in PERCENTILES)
+                    + f" {s['latency'].mean():6.1f}", file=file)
+        print("\narbitration wait (clocks from start to address accepted)", file=file)
+        print(f"{'':12} " + " ".join(f"{'p%d' % p:>5}" for p in PERCENTILES) + f" {'mean':>6}", file=file)
+        for i, s in enumerate(self.con):
+            if s["wait"].total:
+                print(f"{names.get('con', {}).get(i, str(i)):12} "
+                    + " ".join(f"{s['wait'].percentile(p):5}" for p in PERCENTILES)
+                    + f" {s['wait'].mean():6.1f}", file=file)
+
+    def histograms(self, key="con"):
+        """Latency histograms as a (count, bins) array, row per controller or peripheral."""
+        table = self.con if key == "con" else self.per
+        return np.stack([s["latency"].counts for s in table])
+
+
+def summarise(file_name, block=1 << 16):
+    stats = None
+    for header, r in records(file_name, block):
+        if stats is None:
+            stats = Stats(header["controllers"], header["peripherals"], int(header["period_ps"]))
+        stats.add(r)
+    if stats is None:
+        with open(file_name, "rb") as f:
+            header = read_header(f)
+        stats = Stats(header["controllers"], header["peripherals"], int(header["period_ps"]))
+    return stats
+
+
+def add_arguments(cli):
+    """Add the monitor option to a VUnitCLI."""
+    cli.parser.add_argument("--fbmon", action="store_true",
+        help="Log Fishbone transactions to fbmon.bin and print a summary after each test")
+
+
+def post_check(output_path, log="fbmon.bin", names=None):
+    """Summarise a test's log into fbmon.txt next to it, for use in a post_check."""
+    path = Path(output_path) / log
+    if not path.exists():
+        print(f"fbmon: no {path}")
+        return True
+    stats = summarise(path)
+    with open(path.with_suffix(".txt"), "w") as f:
+        stats.report(names, file=f)
+    stats.report(names)
+    return True
+
+
+def attach(tb, log="fbmon.bin", names=None):
+    """
+    Turn on the bench's monitor through its G_FBMON generic and summarise the log
+    after every test. A configuration added later with its own post_check must
+    call post_check itself.
+    """
+    tb.set_generic("G_FBMON", log)
+    tb.set_post_check(lambda output_path: post_check(output_path, log, names))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise a sim_fb_monitor Fishbone transaction log")
+    parser.add_argument("log", help="log written by sim_fb_monitor")
+    parser.add_argument("--block", type=int, default=1 << 16, help="records read at a time")
+    parser.add_argument("--con", nargs="*", default=[], help="names of the controllers in order")
+    parser.add_argument("--per", nargs="*", default=[], help="names of the peripherals in order")
+    args = parser.parse_args(argv)
+
+    names = dict(con=dict(enumerate(args.con)), per=dict(enumerate(args.per)))
+    summarise(args.log, args.block).report(names)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
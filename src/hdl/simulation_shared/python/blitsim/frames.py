@@ -0,0 +1,216 @@
+"""
+Video frames captured by ../sim_video_sink.vhd, compared with golden frames.
+
+The sink writes a fixed size record per frame so the capture is opened as a
+memory mapped NumPy array and a frame is only read from disk when it is looked
+at. Each frame is compared with a golden frame kept as a .npy file: a pixel
+is bad when any component differs by more than the tolerance, and a frame
+fails when more than max_bad pixels are bad. For each failing frame a PNG is
+written of the golden frame, the captured frame and the bad pixels side by
+side.
+
+A run.py turns on capture with frames.add_arguments(cli) and
+frames.attach(tb, args), then:
+
+    python run.py --frames 3 --golden golden            compare with golden/<test>/
+    python run.py --frames 3 --golden golden --update-golden
+
+    python -m blitsim.frames frames.bin --png out
+    python -m blitsim.frames frames.bin --golden golden/lib.test_tb.look --tolerance 16
+"""
+
+import argparse
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from blitsim import test_names
+
+MAGIC = b"VFRM"
+HEADER = np.dtype([("magic", "S4"), ("version", "u1"), ("bpp", "u1"), ("pad", "<u2"),
+    ("width", "<u2"), ("height", "<u2"), ("pad2", "<u4")])
+
+
+def record(width, height):
+    """The dtype of one frame."""
+    return np.dtype([("index", "<u4"), ("time_us", "<u4"), ("lines", "<u2"), ("line_width", "<u2"),
+        ("pad", "<u4"), ("rgb", "u1", (height, width, 3))])
+
+
+def load(file_name):
+    """The frames in a capture as a read only memory mapped array of records."""
+    with open(file_name, "rb") as f:
+        h = np.frombuffer(f.read(HEADER.itemsize), HEADER)
+    if len(h) != 1 or h["magic"][0] != MAGIC:
+        raise ValueError(f"{file_name} is not a sim_video_sink capture")
+    rec = record(int(h["width"][0]), int(h["height"][0]))
+    # a capture cut short by the simulator stopping can end part way through a frame
+    count = (Path(file_name).stat().st_size - HEADER.itemsize) // rec.itemsize
+    if count == 0:
+        return np.zeros(0, rec)
+    return np.memmap(file_name, rec, "r", HEADER.itemsize, (count,))
+
+
+def image(frame):
+    """A frame's pixels cropped to the lines and width seen, height x width x 3."""
+    return np.asarray(frame["rgb"][:max(1, int(frame["lines"])), :max(1, int(frame["line_width"]))])
+
+
+def compare(got, golden, tolerance=0, max_bad=0):
+    """
+    (ok, bad, worst): bad is a boolean mask of the pixels differing by more
+    than tolerance. A frame of a different size from the golden one fails
+    outright, its mask covering both.
+    """
+    if got.shape != golden.shape:
+        h = max(got.shape[0], golden.shape[0])
+        w = max(got.shape[1], golden.shape[1])
+        return False, np.ones((h, w), bool), 255
+    diff = np.abs(got.astype(np.int16) - golden.astype(np.int16)).max(axis=2)
+    bad = diff > tolerance
+    return int(bad.sum()) <= max_bad, bad, int(diff.max()) if diff.size else 0
+
+
+def diff_image(got, golden, bad):
+    """Golden, captured and the bad pixels (magenta on a dimmed capture) side by side."""
+    h, w = bad.shape
+
+    def pad(a):
+        ret = np.zeros((h, w, 3), np.uint8)
+        ret[:a.shape[0], :a.shape[1]] = a
+        return ret
+    marked = pad(got) // 4
+    marked[bad] = (255, 0, 255)
+    gap = np.full((h, 4, 3), 64, np.uint8)
+    return np.concatenate([pad(golden), gap, pad(got), gap, marked], axis=1)
+
+
+def write_png(file_name, rgb):
+    """Write an 8 bit RGB array as a PNG."""
+    rgb = np.ascontiguousarray(rgb, np.uint8)
+    h, w, _ = rgb.shape
+    raw = b"".join(b"\0" + rgb[y].tobytes() for y in range(h))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    with open(file_name, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def check(file_name, golden_dir, diff_dir, tolerance=0, max_bad=0, update=False, file=sys.stdout):
+    """
+    Compare every frame of a capture with golden_dir/frame<n>.npy, writing
+    diff images for the failures to diff_dir. With update the golden frames are
+    written from the capture instead. True if every frame matched.
+    """
+    frames = load(file_name)
+    golden_dir = Path(golden_dir)
+    if update:
+        golden_dir.mkdir(parents=True, exist_ok=True)
+        for f in frames:
+            np.save(golden_dir / f"frame{int(f['index'])}.npy", image(f))
+        print(f"frames: {len(frames)} golden frames written to {golden_dir}", file=file)
+        return True
+    if not len(frames):
+        print(f"frames: no complete frames in {file_name}", file=file)
+        return False
+    ok = True
+    for f in frames:
+        n = int(f["index"])
+        g = golden_dir / f"frame{n}.npy"
+        if not g.exists():
+            print(f"frames: frame {n} has no golden frame {g}", file=file)
+            ok = False
+            continue
+        got = image(f)
+        golden = np.load(g)
+        same, bad, worst = compare(got, golden, tolerance, max_bad)
+        print(f"frames: frame {n} at {int(f['time_us'])}us {got.shape[1]}x{got.shape[0]}: "
+            f"{int(bad.sum())} bad pixels, worst difference {worst}{'' if same else ' FAIL'}", file=file)
+        if not same:
+            ok = False
+            Path(diff_dir).mkdir(parents=True, exist_ok=True)
+            write_png(Path(diff_dir) / f"frame{n}.png", diff_image(got, golden, bad))
+    return ok
+
+
+def add_arguments(cli):
+    """Add the frame capture options to a VUnitCLI."""
+    cli.parser.add_argument("--frames", type=int, default=0, metavar="N",
+        help="Capture the first N video frames of each test to frames.bin")
+    cli.parser.add_argument("--golden", metavar="DIR",
+        help="Compare the captured frames with the golden frames in DIR/<test>")
+    cli.parser.add_argument("--update-golden", action="store_true",
+        help="Write the captured frames to --golden instead of comparing")
+    cli.parser.add_argument("--frame-tolerance", type=int, default=0,
+        help="Largest difference in a component that is not a bad pixel")
+    cli.parser.add_argument("--frame-max-bad", type=int, default=0,
+        help="Bad pixels a frame may have and still match")
+
+
+def test_name(output_path):
+    """The full name of the test whose output path this is, from VUnit's mapping file."""
+    path = Path(output_path)
+    return test_names(path.parent).get(path.name, path.name)
+
+
+def attach(tb, args, log="frames.bin", also=None):
+    """
+    Turn on the bench's frame capture through its G_FRAMES and G_FRAME_COUNT
+    generics and, with --golden, compare after every test with the golden
+    frames in a directory named after the test. also is another post_check to
+    run as well, a bench can only have one. Returns the bench's post_check,
+    also when there is no comparison, for configurations with their own.
+    """
+    if not args.frames:
+        return also
+    tb.set_generic("G_FRAMES", log)
+    tb.set_generic("G_FRAME_COUNT", args.frames)
+    if not args.golden:
+        return also
+    golden = Path(args.golden).resolve()
+
+    def post_check(output_path):
+        ok = also(output_path) if also else True
+        path = Path(output_path) / log
+        if not path.exists():
+            print(f"frames: no {path}")
+            return False
+        return check(path, golden / test_name(output_path), Path(output_path) / "frames_diff",
+            args.frame_tolerance, args.frame_max_bad, args.update_golden) and ok
+
+    tb.set_post_check(post_check)
+    return post_check
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look at or check the frames captured by sim_video_sink")
+    parser.add_argument("capture", help="file written by sim_video_sink")
+    parser.add_argument("--png", metavar="DIR", help="write each frame as DIR/frame<n>.png")
+    parser.add_argument("--golden", metavar="DIR", help="compare with DIR/frame<n>.npy")
+    parser.add_argument("--update", action="store_true", help="write the frames to --golden instead")
+    parser.add_argument("--diff", metavar="DIR", default="frames_diff", help="where the diff images go")
+    parser.add_argument("--tolerance", type=int, default=0)
+    parser.add_argument("--max-bad", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    frames = load(args.capture)
+    if args.golden:
+        return 0 if check(args.capture, args.golden, args.diff, args.tolerance, args.max_bad, args.update) else 1
+    for f in frames:
+        print(f"frame {int(f['index']):4} at {int(f['time_us']):8}us  "
+            f"{int(f['line_width'])}x{int(f['lines'])}")
+        if args.png:
+            Path(args.png).mkdir(parents=True, exist_ok=True)
+            write_png(Path(args.png) / f"frame{int(f['index'])}.png", image(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Vectorized model of shared/log2phys.vhd, the logical to physical CPU address
+map, and the vector tables that ../vunit/fb_cpu_log2phys's
+log2phys_table_tb checks the RTL against.
+
+The map only ever changes address bits 8 and up, so for each setting of the
+inputs the whole of bank FF is described by 256 physical pages. The model
+works those out with NumPy for every setting at once: the paged ROM and MOS
+banks that p_romadd and p_mosadd register, then p_A0's regions (paged ROM,
+JIM, MOS with its NOICE shadow, auto-hazel and 65816 window, the turbo low
+RAM). Each page also has its throttle_act_o. Every bank but FF should pass
+through unchanged.
+
+The important inputs are swept exhaustively: the ROM number, swram enable,
+map 0/1, MOS RAM, SWMOS shadow, NOICE shadow, preboot, system type, whether
+the current ROM is auto-hazel and whether the window is on. That is 12288
+settings. The rest (the ROM's upper nibble, JIM page, turbo mask, throttle
+and hazel maps, window address, the low byte used and a bank to check
+passes through) are random from the seed, so a run with another seed covers
+different values.
+
+Each setting is one line of hex in the vector file: 128 bits of inputs then
+512 entries of 17 bits, the physical page and throttle_act_o for each page
+fetched as an instruction and then again as data after an instruction fetch
+from a paged ROM. The bench reads a line at a time and checks all 512 entries
+in a loop without waiting for clocks, so the whole table runs in a minute or
+two. Mismatches are written to mismatches.txt and decoded by post_check.
+
+    python -m blitsim.log2phys --variant c20k --show 1234
+    python -m blitsim.log2phys --variant mk3 --vectors vectors.txt
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+SYS_BBC, SYS_ELK, SYS_MODEL_BC = range(3)
+SYS_NAMES = ("BBC", "ELK", "MODEL_BC")
+
+# generics of each build, (G_MK3, G_C20K)
+VARIANTS = {"mk2": (False, False), "mk3": (True, False), "c20k": (False, True)}
+
+# G_PRE_BOOT_BANK's default, x"FC" & "11"
+PRE_BOOT_BANK = 0x3F3
+
+CONFIG_BITS = 128
+ENTRY_BITS = 17
+PAGES = 256
+LINE_BITS = CONFIG_BITS + 2 * PAGES * ENTRY_BITS
+
+# the inputs, as (name, width) from the left of each line
+FIELDS = (
+    ("rompg", 8), ("jim_page", 16), ("turbo_lo_mask", 8), ("rom_throttle_map", 16),
+    ("rom_autohazel_map", 16), ("window", 13), ("window_en", 1), ("sys_type", 2),
+    ("swram_enable", 1), ("map0n1", 1), ("mosram", 1), ("throttle_mos", 1), ("throttle_all", 1),
+    ("jim_en", 1), ("swmos_shadow", 1), ("noice", 1), ("preboot", 1), ("pad", 7),
+    ("lo", 8), ("other_a", 24),
+)
+
+# the inputs swept exhaustively and how many values each takes
+SWEPT = (
+    ("rom", 16), ("swram_enable", 2), ("map0n1", 2), ("mosram", 2), ("swmos_shadow", 2),
+    ("noice", 2), ("preboot", 2), ("sys_type", 3), ("hazel", 2), ("window_en", 2),
+)
+
+
+def incl_preboot(board_config_pack):
+    """G_INCL_PREBOOT from a board_config_pack.vhd."""
+    m = re.search(r"G_INCL_PREBOOT\s*:\s*boolean\s*:=\s*(true|false)", Path(board_config_pack).read_text(), re.I)
+    if not m:
+        raise ValueError(f"no G_INCL_PREBOOT in {board_config_pack}")
+    return m.group(1).lower() == "true"
+
+
+def settings(seed=0, sample=0):
+    """
+    Every combination of the swept inputs with the rest random from seed, as
+    a dict of arrays. With sample only that many, picked at random. Settings
+    without the window come first, the bench has to reset to turn it off.
+    """
+    rng = np.random.default_rng(seed)
+    grid = np.indices([n for _, n in SWEPT]).reshape(len(SWEPT), -1)
+    s = {name: grid[i] for i, (name, _) in enumerate(SWEPT)}
+    n = grid.shape[1]
+    cfg = {
+        "rompg": (rng.integers(0, 16, n) << 4) | s["rom"],
+        "jim_page": rng.integers(0, 0x10000, n),
+        "turbo_lo_mask": rng.integers(0, 0x100, n),
+        "rom_throttle_map": rng.integers(0, 0x10000, n),
+        "window": rng.integers(0, 0x2000, n),
+        "throttle_mos": rng.integers(0, 2, n),
+        "throttle_all": rng.integers(0, 2, n),
+        "jim_en": rng.integers(0, 2, n),
+        "pad": np.zeros(n, np.int64),
+        "lo": rng.integers(0, 0x100, n),
+        "other_a": (rng.integers(0, 0xFF, n) << 16) | rng.integers(0, 0x10000, n),
+    }
+    # the current ROM's hazel bit is swept, the others are random
+    hazel = rng.integers(0, 0x10000, n) & ~(1 << s["rom"])
+    cfg["rom_autohazel_map"] = hazel | (s["hazel"] << s["rom"])
+    for name in ("swram_enable", "map0n1", "mosram", "swmos_shadow", "noice", "preboot", "sys_type", "window_en"):
+        cfg[name] = s[name]
+    cfg = {k: np.asarray(v, np.int64) for k, v in cfg.items()}
+    order = np.arange(n)
+    if sample:
+        order = np.sort(rng.choice(n, min(sample, n), replace=False))
+    order = order[np.argsort(cfg["window_en"][order], kind="stable")]
+    return {k: v[order] for k, v in cfg.items()}
+
+
+def expected(cfg, mk3=False, c20k=False, preboot=True):
+    """
+    (pages, throttle), each settings x 2 x 256: the physical address bits 23..8
+    and throttle_act_o for every page of bank FF, fetched as an instruction
+    and then as data after an instruction fetch from a paged ROM.
+    """
+    rompg = cfg["rompg"][:, None]
+    nib = rompg & 0xF
+    b0, b2, b3 = nib & 1, (nib >> 2) & 1, (nib >> 3) & 1
+    en = (cfg["swram_enable"][:, None] == 1) | c20k
+    map0 = cfg["map0n1"][:, None] == 1
+    sys_type = cfg["sys_type"][:, None]
+
+    # p_romadd
+    bank = np.where(b0 == 1, 0x9, 0x7) << 6
+    rom0 = np.where((nib == 0xE) & (mk3 or c20k), 0x7C,
+        np.where(c20k | (b2 == 0) | (b3 == 1), bank | (0b111 << 3) | (nib >> 1), 0x3FE))
+    rom1 = np.where((nib == 0xE) & mk3, 0x7D,
+        np.where((b2 == 0) | (b3 == 1) | (sys_type != SYS_ELK), bank | (0b110 << 3) | (nib >> 1), 0x3FE))
+    pagrom = np.where(en, np.where(map0, rom0, rom1), 0x3FE)
+    rom_throttle = np.where(en, (cfg["rom_throttle_map"][:, None] >> nib) & 1, 0)
+    rom_hazel = (cfg["rom_autohazel_map"][:, None] >> nib) & 1
+
+    # p_mosadd
+    noice = cfg["noice"][:, None] == 1
+    mosrom = np.where(en, np.select(
+        [(cfg["preboot"][:, None] == 1) & preboot,
+         noice,
+         (cfg["swmos_shadow"][:, None] == 1) | (cfg["mosram"][:, None] == 1),
+         ~map0,
+         np.full_like(map0, c20k)],
+        [PRE_BOOT_BANK,
+         np.where(map0, 0x27F, 0x277),
+         np.where(map0, 0x1FC, 0x1F4),
+         0x274,
+         0x27C],
+        0x3FF), 0x3FF)
+
+    win_en = cfg["window_en"][:, None] == 1
+    win_l = cfg["window"][:, None]
+    win_h = (win_l + 1) & 0x1FFF
+
+    p = np.arange(PAGES)[None, :]
+    rom_acc = (p >> 6) == 0b10
+    jim = p == 0xFD
+    mos = ((p >> 6) == 0b11) & (p != 0xFC) & (p != 0xFD) & (p != 0xFE)
+    turbo = (p < 0x80) & (((cfg["turbo_lo_mask"][:, None] >> ((p >> 4) & 7)) & 1) == 1)
+    jim_en = cfg["jim_en"][:, None] == 1
+
+    pages = np.empty((len(rompg), 2, PAGES), np.int64)
+    throttle = np.empty((len(rompg), 2, PAGES), np.int64)
+    for fetch, hazel in ((0, 0), (1, rom_hazel)):
+        shadow = noice & ((p & 0x30) == 0)
+        hz = (hazel == 1) & ((p & 0x20) == 0) & ~shadow
+        wl = win_en & (((p >> 3) & 7) == 4) & ~shadow & ~hz
+        wh = win_en & (((p >> 3) & 7) == 5) & ~shadow & ~hz
+        plain = ~shadow & ~hz & ~wl & ~wh
+        mos_page = np.select(
+            [shadow, hz, wl, wh],
+            [0x7E80 | (p & 0xF), 0x00C0 | (p & 0x1F), (win_l << 3) | (p & 7), (win_h << 3) | (p & 7)],
+            (mosrom << 6) | (p & 0x3F))
+        pages[:, fetch] = np.select(
+            [rom_acc, jim, mos, turbo],
+            [(pagrom << 6) | (p & 0x3F), np.where(jim_en, cfg["jim_page"][:, None], 0xFF00 | p), mos_page, p],
+            0xFF00 | p)
+        if fetch == 0:
+            throttle_rom = np.where(rom_acc, rom_throttle, np.where(mos & plain, cfg["throttle_mos"][:, None], 0))
+            throttle[:, 0] = throttle_rom | cfg["throttle_all"][:, None]
+        else:
+            # latched by the instruction fetch from the paged ROM
+            throttle[:, 1] = rom_throttle | cfg["throttle_all"][:, None]
+    return pages, throttle
+
+
+def encode(cfg, pages, throttle):
+    """The vector file's lines for the settings, as hex."""
+    n = len(cfg["rompg"])
+    bits = np.zeros((n, LINE_BITS), np.uint8)
+    pos = 0
+    for name, width in FIELDS:
+        shifts = np.arange(width - 1, -1, -1)
+        bits[:, pos:pos + width] = (cfg[name][:, None] >> shifts) & 1
+        pos += width
+    entry = (((pages.reshape(n, -1, 1) << 1) | throttle.reshape(n, -1, 1)) >> np.arange(ENTRY_BITS - 1, -1, -1)) & 1
+    bits[:, CONFIG_BITS:] = entry.reshape(n, -1)
+    packed = np.packbits(bits, axis=1)
+    return [row.tobytes().hex().upper() for row in packed]
+
+
+def write_vectors(file_name, cfg, pages, throttle, chunk=1024):
+    n = len(cfg["rompg"])
+    with open(file_name, "w") as f:
+        for i in range(0, n, chunk):
+            part = {k: v[i:i + chunk] for k, v in cfg.items()}
+            f.write("".join(line + "\n" for line in encode(part, pages[i:i + chunk], throttle[i:i + chunk])))
+
+
+def describe(cfg, i):
+    """One setting's inputs as text."""
+    flags = [name for name in ("swram_enable", "map0n1", "mosram", "swmos_shadow", "noice", "preboot",
+        "throttle_mos", "throttle_all", "jim_en") if cfg[name][i]]
+    win = f" window {cfg['window'][i]:04X}" if cfg["window_en"][i] else ""
+    return (f"ROMPG {cfg['rompg'][i]:02X} {SYS_NAMES[cfg['sys_type'][i]]} {' '.join(flags)}{win} "
+        f"JIM {cfg['jim_page'][i]:04X} turbo {cfg['turbo_lo_mask'][i]:02X} "
+        f"throttle map {cfg['rom_throttle_map'][i]:04X} hazel map {cfg['rom_autohazel_map'][i]:04X}")
+
+
+def report(mismatches, cfg, pages, throttle, limit=16, file=sys.stdout):
+    """Decode the bench's mismatches.txt, True if there were none."""
+    lines = Path(mismatches).read_text().split("\n") if Path(mismatches).exists() else []
+    lines = [x.split() for x in lines if x.strip()]
+    for words in lines[:limit]:
+        i, fetch, page = int(words[0]), int(words[1]), int(words[2])
+        got_a, got_t = int(words[3], 16), words[4]
+        lo = cfg["lo"][i]
+        if fetch == 2:
+            print(f"  setting {i}: {cfg['other_a'][i]:06X} became {got_a:06X}", file=file)
+        else:
+            print(f"  setting {i}: FF{page:02X}{lo:02X} as {'data' if fetch else 'instruction'} "
+                f"became {got_a:06X} throttle {got_t}, expected {pages[i, fetch, page]:04X}{lo:02X} "
+                f"throttle {throttle[i, fetch, page]}", file=file)
+        print(f"    {describe(cfg, i)}", file=file)
+    if lines:
+        print(f"log2phys: {len(lines)} mismatches", file=file)
+    return not lines
+
+
+def add_configs(tb, board_config_pack, seed=0, sample=0, variants=VARIANTS):
+    """
+    Add a configuration of tb for each variant. Its vector table is written to
+    the test's output path before it runs and the mismatches are decoded after.
+    """
+    preboot = incl_preboot(board_config_pack)
+    for name in variants:
+        mk3, c20k = VARIANTS[name]
+
+        def pre_config(output_path, mk3=mk3, c20k=c20k):
+            cfg = settings(seed, sample)
+            pages, throttle = expected(cfg, mk3, c20k, preboot)
+            write_vectors(Path(output_path) / "vectors.txt", cfg, pages, throttle)
+            return True
+
+        def post_check(output_path, mk3=mk3, c20k=c20k):
+            cfg = settings(seed, sample)
+            pages, throttle = expected(cfg, mk3, c20k, preboot)
+            return report(Path(output_path) / "mismatches.txt", cfg, pages, throttle)
+
+        tb.add_config(name=name, generics=dict(G_MK3=mk3, G_C20K=c20k),
+            pre_config=pre_config, post_check=post_check)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="log2phys address map model")
+    parser.add_argument("--variant", choices=list(VARIANTS), default="c20k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample", type=int, default=0, help="only this many settings")
+    parser.add_argument("--no-preboot", action="store_true", help="as a build without G_INCL_PREBOOT")
+    parser.add_argument("--show", type=int, action="append", default=[], metavar="N",
+        help="print setting N's inputs and map")
+    parser.add_argument("--vectors", metavar="FILE", help="write the vector table")
+    args = parser.parse_args(argv)
+
+    mk3, c20k = VARIANTS[args.variant]
+    cfg = settings(args.seed, args.sample)
+    pages, throttle = expected(cfg, mk3, c20k, not args.no_preboot)
+    print(f"{len(cfg['rompg'])} settings, {pages.size} pages")
+    for i in args.show:
+        print(describe(cfg, i))
+        for fetch in (0, 1):
+            print(" data:" if fetch else " instruction:")
+            for row in range(0, PAGES, 8):
+                print("  " + " ".join(f"FF{p:02X}>{pages[i, fetch, p]:04X}{'t' if throttle[i, fetch, p] else ' '}"
+                    for p in range(row, row + 8)))
+    if args.vectors:
+        write_vectors(args.vectors, cfg, pages, throttle)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Read what test code wrote to ../sim_fb_mailbox.vhd, the simulation mailbox
+that ends a test when the code writes its end code.
+
+The mailbox logs a line per write to mailbox.txt in the test's output path:
+the text the code prints, the checkpoints it reaches, the values and the lap
+counts of clocks it gives and the tests it passes or fails. read() turns the
+log into a Mailbox, post_check() writes it next to the log as mailbox.json
+and prints a line for the test. A run.py collects them with:
+
+    mailbox.attach(lib.test_bench("test_tb"))
+
+    python -m blitsim.mailbox vunit_out/test_output/<test>/mailbox.txt
+    python -m blitsim.mailbox vunit_out                   a line per test
+
+The addresses of the registers for ca65 are in
+modelC20K/asm/C20KTestMOS/includes/p20k.inc.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from blitsim import test_files
+
+
+class Mailbox(object):
+    """The contents of a mailbox log, clocks are those of the bus the mailbox is on."""
+
+    def __init__(self):
+        self.clock_ps = 0
+        self.text = []          # (clock, line)
+        self.checkpoints = []   # (clock, n)
+        self.values = []        # (clock, id, value)
+        self.laps = []          # (clock, id, clocks)
+        self.results = []       # (clock, n, passed)
+        self.end = None         # (clock, passed), None if the code did not end the test
+
+    @property
+    def used(self):
+        return bool(self.text or self.checkpoints or self.values or self.laps or self.results or self.end)
+
+    @property
+    def passed(self):
+        """False if a test failed or the end code was a fail, True otherwise."""
+        return all(p for _, _, p in self.results) and (self.end is None or self.end[1])
+
+    def us(self, clock):
+        return clock * self.clock_ps / 1e6
+
+    def summary(self):
+        """A line for the test."""
+        if not self.used:
+            return "not used"
+        if self.end is None:
+            state = "no end code"
+        else:
+            state = f"{'passed' if self.end[1] else 'FAILED'} at {self.us(self.end[0]):.1f} us"
+        failed = [n for _, n, p in self.results if not p]
+        parts = [state, f"{len(self.results)} tests"]
+        if failed:
+            parts.append("failed " + ", ".join(str(n) for n in failed))
+        if self.checkpoints:
+            parts.append(f"last checkpoint {self.checkpoints[-1][1]}")
+        return ", ".join(parts)
+
+    def as_dict(self):
+        return dict(clock_ps=self.clock_ps, passed=self.passed,
+            end=None if self.end is None else dict(clock=self.end[0], passed=self.end[1]),
+            text=[dict(clock=c, line=t) for c, t in self.text],
+            checkpoints=[dict(clock=c, n=n) for c, n in self.checkpoints],
+            values=[dict(clock=c, id=i, value=v) for c, i, v in self.values],
+            laps=[dict(clock=c, id=i, clocks=n) for c, i, n in self.laps],
+            results=[dict(clock=c, n=n, passed=p) for c, n, p in self.results])
+
+    def report(self, file=sys.stdout):
+        """Everything in the order it was written."""
+        events = ([(c, f"print {t}") for c, t in self.text]
+            + [(c, f"checkpoint {n}") for c, n in self.checkpoints]
+            + [(c, f"value {i} = {v:#010x} ({v})") for c, i, v in self.values]
+            + [(c, f"lap {i} {n} clocks ({self.us(n):.3f} us)") for c, i, n in self.laps]
+            + [(c, f"test {n} {'passed' if p else 'FAILED'}") for c, n, p in self.results])
+        if self.end is not None:
+            events.append((self.end[0], f"end {'passed' if self.end[1] else 'FAILED'}"))
+        for c, what in sorted(events, key=lambda e: e[0]):
+            print(f"{self.us(c):12.3f} us  {what}", file=file)
+        print(self.summary(), file=file)
+
+
+def read(path):
+    """The Mailbox of a log written by sim_fb_mailbox."""
+    m = Mailbox()
+    with open(path, errors="replace") as f:
+        for line in f:
+            kind, _, rest = line.rstrip("\n").partition(" ")
+            if kind == "clock_ps":
+                m.clock_ps = int(rest)
+                continue
+            clock, _, rest = rest.partition(" ")
+            clock = int(clock)
+            if kind == "print":
+                m.text.append((clock, rest))
+            elif kind == "checkpoint":
+                m.checkpoints.append((clock, int(rest)))
+            elif kind == "value":
+                i, v = rest.split()
+                m.values.append((clock, int(i), int(v, 16)))
+            elif kind == "lap":
+                i, n = rest.split()
+                m.laps.append((clock, int(i), int(n)))
+            elif kind in ("pass", "fail"):
+                m.results.append((clock, int(rest), kind == "pass"))
+            elif kind == "end":
+                m.end = (clock, rest == "pass")
+    return m
+
+
+def post_check(output_path, log="mailbox.txt", also=None):
+    """
+    Write a test's mailbox to mailbox.json next to its log and print a line for
+    it, for use in a post_check. Fails the test if the code failed a test,
+    also is another post_check to run as well.
+    """
+    ok = also(output_path) if also else True
+    path = Path(output_path) / log
+    if not path.exists():
+        return ok
+    m = read(path)
+    with open(path.with_suffix(".json"), "w") as f:
+        json.dump(m.as_dict(), f, indent=1)
+    if m.used:
+        print(f"mailbox: {m.summary()}")
+    return m.passed and ok
+
+
+def attach(tb, log="mailbox.txt", also=None):
+    """
+    Collect the mailbox after every test, with also as another post_check.
+    Returns the combined check, to pass on as the next attach's also.
+    """
+    check = lambda output_path: post_check(output_path, log, also)
+    tb.set_post_check(check)
+    return check
+
+
+def collect(vunit_out, log="mailbox.txt"):
+    """Test name to Mailbox for every test under vunit_out that has a log."""
+    return {name: read(f) for name, f in test_files(vunit_out, log)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show what test code wrote to sim_fb_mailbox")
+    parser.add_argument("path", help="a mailbox.txt, or a vunit_out for a line per test")
+    parser.add_argument("--json", action="store_true", help="print the contents as JSON")
+    args = parser.parse_args(argv)
+
+    path = Path(args.path)
+    if path.is_dir():
+        found = collect(path)
+        if not found:
+            print(f"mailbox: no logs under {path}", file=sys.stderr)
+            return 1
+        if args.json:
+            json.dump({name: m.as_dict() for name, m in found.items()}, sys.stdout, indent=1)
+            print()
+        else:
+            width = max(len(name) for name in found)
+            for name, m in sorted(found.items()):
+                print(f"{name:{width}}  {m.summary()}")
+        return 0 if all(m.passed for m in found.values()) else 1
+
+    m = read(path)
+    if args.json:
+        json.dump(m.as_dict(), sys.stdout, indent=1)
+        print()
+    else:
+        m.report()
+    return 0 if m.passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Configuration matrices for the full system benches.
+
+A matrix is a set of named axes, each a dict of value names to the generics
+that value sets. Every combination of values becomes a VUnit configuration of
+a test, named by its values joined with "." and tagged .<axis>_<value> for
+each of them, so a run can take any slice of the matrix with VUnit's attribute
+filters and run it in parallel:
+
+    python run.py --with-attributes .cpu_t65 --with-attributes .rom_mos120 -p 4
+
+Axes that do not vary within a test bench (a board, and the CPU that board
+carries) are given as tags only. A value can be left out of a run before
+anything is made for it (ROM images, snapshots) with --axis:
+
+    python run.py --axis rom=testmos -p 4
+
+ROM images outside the tree are given with --rom NAME=PATH, which adds to or
+replaces the bench's own list.
+
+    images = matrix.rom_images(args, mos120=MOSROM)
+    m = matrix.Matrix(args, rom=matrix.roms(images))
+    m.add_configs(tb.test("look"), board="c20k", cpu="t65")
+"""
+
+import itertools
+import sys
+from pathlib import Path
+
+from blitsim import romimage
+
+
+def add_arguments(cli):
+    """Add the matrix options to a VUnitCLI."""
+    cli.parser.add_argument("--axis", action="append", default=[], metavar="AXIS=VALUE[,VALUE]",
+        help="Only make configurations with these values on an axis of the matrix")
+    cli.parser.add_argument("--rom", action="append", default=[], metavar="NAME=PATH",
+        help="Add a ROM image to the matrix's rom axis, or replace one of the same name")
+
+
+def _pairs(items, what):
+    ret = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep or not name or not value:
+            raise ValueError(f"{what} {item!r} should be NAME=VALUE")
+        ret[name] = value
+    return ret
+
+
+def rom_images(args, **images):
+    """
+    ROM images by name with the --rom options applied, less any left out by
+    --axis rom=... or not there. A missing image is dropped with a message so
+    that a bench still runs the points it can.
+    """
+    images.update(_pairs(args.rom, "--rom"))
+    keep = {k: v.split(",") for k, v in _pairs(args.axis, "--axis").items()}.get("rom")
+    ret = {}
+    for name, path in images.items():
+        if keep is not None and name not in keep:
+            continue
+        if Path(path).is_file():
+            ret[name] = Path(path)
+        else:
+            print(f"matrix: rom {name} ({path}) not found, left out", file=sys.stderr)
+    return ret
+
+
+def roms(images, generic="G_MOSROMFILE"):
+    """A rom axis setting generic to the preloaded copy of each image."""
+    return {name: {generic: romimage.preload(path)} for name, path in images.items()}
+
+
+class Matrix:
+    """The axes of a bench's configurations, narrowed by --axis."""
+
+    def __init__(self, args, **axes):
+        self.keep = {k: v.split(",") for k, v in _pairs(args.axis, "--axis").items()}
+        self.axes = {}
+        for axis, values in axes.items():
+            if axis in self.keep:
+                values = {k: v for k, v in values.items() if k in self.keep[axis]}
+            # an axis with nothing left (no ROM images built) leaves the
+            # bench's own default rather than emptying the matrix
+            if values:
+                self.axes[axis] = values
+
+    def points(self):
+        """Yield (names, generics) for every combination, names by axis."""
+        axes = list(self.axes)
+        for combo in itertools.product(*(self.axes[a].items() for a in axes)):
+            names = {a: name for a, (name, _) in zip(axes, combo)}
+            generics = {}
+            for _, g in combo:
+                generics.update(g)
+            yield names, generics
+
+    def selected(self, **tags):
+        """False if --axis leaves out one of the given fixed values."""
+        return all(v in self.keep.get(a, [v]) for a, v in tags.items())
+
+    def add_configs(self, test, add=None, **tags):
+        """
+        Add a configuration to test for each point of the matrix, tagged with
+        its values and the fixed tags. add(test, name, names, generics,
+        attributes) adds one instead of test.add_config, for benches with
+        their own configuration helpers (see snapshot.add_config), names has
+        the point's value on each axis.
+        """
+        if not self.selected(**tags):
+            return 0
+        if not self.axes:
+            # nothing varies, the test runs as it is, with the tags
+            for a, v in tags.items():
+                test.set_attribute(f".{a}_{v}", None)
+            return 0
+        count = 0
+        for names, generics in self.points():
+            attributes = {f".{a}_{v}": None for a, v in {**tags, **names}.items()}
+            name = ".".join(names.values())
+            if add is None:
+                test.add_config(name=name, generics=generics, attributes=attributes)
+            else:
+                add(test, name, names, generics, attributes)
+            count += 1
+        return count
@@ -0,0 +1,426 @@
+"""
+NumPy model of the Paula sound DMAC (chipset/dmac_int_sound.vhd and
+dmac_int_sound_cha.vhd) checked against the I2S and 1 bit DAC streams that
+../sim_audio_sink.vhd captures.
+
+A Program holds the four channels' registers and the sample memory. Each
+channel is modelled the way the RTL plays it: on the first sound clock after
+it is started it fetches sample 0, then every period + 1 sound clocks the
+fetched sample starts playing, scaled by floor(sample * vol / 64), and the
+next one is fetched. A repeating channel plays samples 0 to len then goes
+round repoff to len, one that doesn't plays 0 to len - 1 and holds the last
+one. The channels are summed to the 10 bit mix as step functions, so a whole
+second of audio is a few hundred thousand steps and checks in well under a
+second.
+
+The I2S capture is checked frame by frame: each frame should hold 32 times
+the mix a sound clock and a half before it started, give or take a sound
+clock for where the channels' clocks fell. Each DAC window's count of ones
+should be the mix's average over the window, give or take two plus what the
+steps within a sound clock of the window could move it. Both are also
+compared as magnitude spectra, which catches a wrong pitch or volume even
+when the time check has been loosened.
+
+run.py scripts use add_config() to give each random seed its own VUnit
+configuration of simulation_shared/vunit/fb_dmac_sound:
+
+    python -m blitsim.paula 3                          show seed 3's program
+    python -m blitsim.paula 3 --check vunit_out/.../   check a test's captures again
+    python -m blitsim.paula --summary i2s.bin          level and pitch of any capture
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from blitsim import romimage
+
+CHANNELS = 4
+MEM_SIZE = 0x10000
+
+# channel register offsets, see the A_* constants in dmac_int_sound_cha.vhd
+A_ADDR = 1
+A_PERIOD = 4
+A_LEN = 6
+A_STATUS = 8
+A_VOL = 9
+A_REPOFF = 10
+A_CHA_SEL = 0xF
+
+# test_tb's clocks in ps, the fishbone clock is 128MHz
+FB_CLK_PS = 1000000 // 128
+SND_CLK_PS = 281936
+
+# from a rising edge of the sound clock to the fishbone clock the channels
+# act on, through the toggle synchroniser, and to snd_dat_o after p_vol and
+# p_snd_add
+ACT_PS = 7 * FB_CLK_PS
+DAT_PS = 9 * FB_CLK_PS
+
+I2S_MAGIC = b"I2SS"
+I2S_HEADER = np.dtype([("magic", "S4"), ("version", "u1"), ("pad", "u1", 3), ("pad2", "<u4", 2)])
+I2S_RECORD = np.dtype([("time_ns", "<u4"), ("left", "<i2"), ("right", "<i2")])
+DAC_MAGIC = b"DAC1"
+DAC_HEADER = np.dtype([("magic", "S4"), ("version", "u1"), ("pad", "u1", 3),
+    ("window", "<u4"), ("clock_ps", "<u4"), ("start_ns", "<u4")])
+
+
+class Channel(object):
+    """One channel's registers, names follow the signals in dmac_int_sound_cha.vhd."""
+
+    FIELDS = {"addr": 0, "period": 0, "length": 0, "vol": 63, "repeat": 0, "repoff": 0, "act": 1}
+
+    def __init__(self, **kwargs):
+        for k, v in self.FIELDS.items():
+            setattr(self, k, v)
+        for k, v in kwargs.items():
+            if k not in self.FIELDS:
+                raise TypeError(f"Channel has no field {k}")
+            setattr(self, k, v)
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.FIELDS}
+
+    def __repr__(self):
+        return (f"addr={self.addr:06X} period={self.period} len={self.length} vol={self.vol} "
+            f"{'repeat from ' + str(self.repoff) if self.repeat else 'once'}{'' if self.act else ' off'}")
+
+    def registers(self, index):
+        """(address, data) writes that set the channel up, the status write that starts it last."""
+        return [
+            (A_CHA_SEL, index),
+            (A_ADDR, (self.addr >> 16) & 0xFF), (A_ADDR + 1, (self.addr >> 8) & 0xFF),
+            (A_ADDR + 2, self.addr & 0xFF),
+            (A_PERIOD, self.period >> 8), (A_PERIOD + 1, self.period & 0xFF),
+            (A_LEN, self.length >> 8), (A_LEN + 1, self.length & 0xFF),
+            (A_VOL, self.vol << 2),
+            (A_REPOFF, self.repoff >> 8), (A_REPOFF + 1, self.repoff & 0xFF),
+            (A_STATUS, (self.act << 7) | self.repeat),
+        ]
+
+    def played(self, count):
+        """The sample offsets of the first count samples played, fewer for a channel that stops."""
+        m = np.arange(count, dtype=np.int64)
+        if not self.repeat:
+            return m[:self.length]
+        if self.repoff > self.length:
+            raise ValueError("repoff past len is not modelled")
+        loop = self.length - self.repoff + 1
+        return np.where(m <= self.length, m, self.repoff + (m - self.length - 1) % loop)
+
+
+class Steps(object):
+    """A step function: value[i] from times[i] (ps) until times[i + 1], 0 before times[0]."""
+
+    def __init__(self, times, values):
+        self.times = np.asarray(times, np.int64)
+        self.values = np.asarray(values, np.int64)
+
+    def _index(self, t):
+        # index into values with a 0 in front for before the first step
+        return np.searchsorted(self.times, t, "right")
+
+    def at(self, t):
+        return np.concatenate([[0], self.values])[self._index(t)]
+
+    def span(self, a, b):
+        """The lowest and highest value over each window [a, b]."""
+        v = np.concatenate([[0], self.values, [0]])
+        i0 = self._index(a)
+        i1 = self._index(b) + 1
+        idx = np.empty(2 * len(i0), np.int64)
+        idx[0::2] = i0
+        idx[1::2] = i1
+        # reduceat over [i0, i1) at the even positions, the odd ones are thrown away
+        idx = np.minimum(idx, len(v) - 1)
+        lo = np.minimum.reduceat(v, idx)[0::2]
+        hi = np.maximum.reduceat(v, idx)[0::2]
+        return lo, hi
+
+    def integral(self, t):
+        """The integral from 0 to each t, in value * ps."""
+        v = np.concatenate([[0], self.values])
+        edges = np.concatenate([[0], self.times])
+        area = np.concatenate([[0], np.cumsum(v[:-1] * np.diff(edges))])
+        i = self._index(t)
+        return area[i] + v[i] * (np.asarray(t, np.int64) - edges[i])
+
+    def jumps(self, t):
+        """The total size of the steps up to each t."""
+        v = np.concatenate([[0], self.values])
+        total = np.concatenate([[0], np.cumsum(np.abs(np.diff(v)))])
+        return total[self._index(t)]
+
+
+class Program(object):
+    """Registers for every channel and the sample memory they play from."""
+
+    def __init__(self, channels, mem, snd_clk_ps=SND_CLK_PS):
+        self.channels = channels
+        self.mem = mem
+        self.snd_clk_ps = snd_clk_ps
+
+    def __repr__(self):
+        return "\n".join(f"  channel {c}: {ch}" for c, ch in enumerate(self.channels))
+
+    def to_dict(self):
+        return {"snd_clk_ps": self.snd_clk_ps, "channels": [c.to_dict() for c in self.channels]}
+
+    def registers(self):
+        return [w for c, ch in enumerate(self.channels) for w in ch.registers(c)]
+
+    def status_writes(self):
+        """The index in registers() of each channel's status write."""
+        ret = []
+        n = 0
+        for c, ch in enumerate(self.channels):
+            n += len(ch.registers(c))
+            ret.append(n - 1)
+        return ret
+
+    def generics(self):
+        return dict(G_SND_CLK_PS=self.snd_clk_ps)
+
+    def channel(self, c, start_ps, end_ps):
+        """Channel c's output as Steps, started by a status write that finished at start_ps."""
+        ch = self.channels[c]
+        if not ch.act:
+            return Steps([], [])
+        t = self.snd_clk_ps
+        # the sound clock rises at t/2 + k*t, the first tick with act set fetches sample 0
+        k0 = (start_ps - t // 2 - ACT_PS) // t + 1
+        step = ch.period + 1
+        count = max(0, (end_ps - t // 2 - k0 * t) // (step * t))
+        offs = ch.played(count)
+        j = np.arange(1, len(offs) + 1, dtype=np.int64)
+        times = t // 2 + (k0 + j * step) * t + DAT_PS
+        data = self.mem[(ch.addr + offs) % len(self.mem)].astype(np.int8).astype(np.int64)
+        return Steps(times, (data * ch.vol) >> 6)
+
+    def mix(self, starts_ps, end_ps):
+        """The 10 bit mix, snd_dat_o, as Steps up to end_ps."""
+        chans = [self.channel(c, s, end_ps) for c, s in enumerate(starts_ps)]
+        times = np.unique(np.concatenate([c.times for c in chans] + [np.zeros(0, np.int64)]))
+        values = np.zeros(len(times), np.int64)
+        for c in chans:
+            values += c.at(times)
+        return Steps(times, values)
+
+
+def random_program(seed):
+    """Four channels playing random waveforms at random pitches and volumes, from seed."""
+    rng = np.random.default_rng(seed)
+    mem = np.zeros(MEM_SIZE, np.uint8)
+    channels = []
+    for c in range(CHANNELS):
+        n = int(rng.integers(16, 257))
+        x = np.arange(n) * int(rng.integers(1, 8)) / n
+        amp = int(rng.integers(16, 128))
+        kind = int(rng.integers(4))
+        if kind == 0:
+            wave = np.sin(2 * np.pi * x)
+        elif kind == 1:
+            wave = np.where(x % 1 < 0.5, 1.0, -1.0)
+        elif kind == 2:
+            wave = 2 * (x % 1) - 1
+        else:
+            wave = rng.uniform(-1, 1, n)
+        addr = c * (MEM_SIZE // CHANNELS) + int(rng.integers(0, 0x1000))
+        mem[addr:addr + n] = np.clip(np.round(wave * amp), -128, 127).astype(np.int8).view(np.uint8)
+        repeat = int(rng.random() < 0.8)
+        channels.append(Channel(
+            addr=addr, period=int(rng.integers(80, 700)), vol=int(rng.integers(0, 64)),
+            repeat=repeat, length=n - 1 if repeat else n,
+            repoff=int(rng.integers(0, n)) if rng.random() < 0.3 else 0,
+            act=int(rng.random() < 0.9)))
+    return Program(channels, mem)
+
+
+def load_i2s(file_name):
+    """The frames of an I2S capture as an array of (time_ns, left, right)."""
+    raw = Path(file_name).read_bytes()
+    h = np.frombuffer(raw[:I2S_HEADER.itemsize], I2S_HEADER)
+    if len(h) != 1 or h["magic"][0] != I2S_MAGIC:
+        raise ValueError(f"{file_name} is not a sim_audio_sink I2S capture")
+    body = raw[I2S_HEADER.itemsize:]
+    return np.frombuffer(body[:len(body) // I2S_RECORD.itemsize * I2S_RECORD.itemsize], I2S_RECORD)
+
+
+def load_dac(file_name):
+    """(header, counts) of a DAC capture."""
+    raw = Path(file_name).read_bytes()
+    h = np.frombuffer(raw[:DAC_HEADER.itemsize], DAC_HEADER)
+    if len(h) != 1 or h["magic"][0] != DAC_MAGIC:
+        raise ValueError(f"{file_name} is not a sim_audio_sink DAC capture")
+    body = raw[DAC_HEADER.itemsize:]
+    return h[0], np.frombuffer(body[:len(body) // 2 * 2], "<u2").astype(np.int64)
+
+
+def spectrum(x):
+    """Magnitude spectrum of x with its mean taken off, through a Hann window."""
+    x = np.asarray(x, float)
+    return np.abs(np.fft.rfft((x - x.mean()) * np.hanning(len(x))))
+
+
+def compare_spectra(got, expect, rate):
+    """(relative error, peak frequency got, peak frequency expected) of two equally sampled signals."""
+    g = spectrum(got)
+    e = spectrum(expect)
+    norm = np.linalg.norm(e)
+    err = np.linalg.norm(g - e) / norm if norm else float(np.linalg.norm(g) > 0)
+    hz = rate / len(got)
+    return err, int(np.argmax(g)) * hz, int(np.argmax(e)) * hz
+
+
+def _report(name, bad, times, got, lo, hi, limit, file):
+    for i in np.flatnonzero(bad)[:limit]:
+        print(f"  {name} at {times[i] / 1e6:10.3f}us: got {got[i]}, expected {lo[i]}"
+            f"{'' if lo[i] == hi[i] else '..' + str(hi[i])}", file=file)
+
+
+def check_i2s(mix, frames, snd_clk_ps, spectrum_tolerance=0.1, limit=8, file=sys.stdout):
+    """Check the left and right words of each I2S frame against the mix. True if they match."""
+    if len(frames) < 2:
+        print("paula: no I2S frames captured", file=file)
+        return False
+    t = frames["time_ns"].astype(np.int64) * 1000 - (3 * snd_clk_ps) // 2
+    lo, hi = mix.span(t - snd_clk_ps, t + snd_clk_ps)
+    bad = 0
+    for side in ("left", "right"):
+        got = frames[side].astype(np.int64)
+        wrong = (got % 32 != 0) | (got >> 5 < lo) | (got >> 5 > hi)
+        _report(f"I2S {side}", wrong, t, got >> 5, lo, hi, limit, file)
+        bad += int(wrong.sum())
+    rate = 1e12 / (32 * snd_clk_ps)
+    err, fg, fe = compare_spectra(frames["left"].astype(np.int64) >> 5, mix.at(t), rate)
+    print(f"paula: I2S {len(frames)} frames, {bad} words off, spectrum error {err:.4f}, "
+        f"peak {fg:.0f}Hz expected {fe:.0f}Hz", file=file)
+    return bad == 0 and err <= spectrum_tolerance
+
+
+def check_dac(mix, header, counts, snd_clk_ps, spectrum_tolerance=0.1, limit=8, file=sys.stdout):
+    """Check each DAC window's count of ones against the mix's average. True if they match."""
+    if len(counts) < 2:
+        print("paula: no DAC windows captured", file=file)
+        return False
+    w = int(header["window"])
+    span = w * int(header["clock_ps"])
+    a = int(header["start_ns"]) * 1000 + np.arange(len(counts), dtype=np.int64) * span
+    b = a + span
+    expect = w / 2 + (mix.integral(b) - mix.integral(a)) / (span / w) / 2048
+    slack = 2 + (mix.jumps(b + snd_clk_ps) - mix.jumps(a - snd_clk_ps)) * (snd_clk_ps / (span / w)) / 2048
+    bad = np.abs(counts - expect) > slack
+    _report("DAC", bad, a, counts, np.floor(expect - slack).astype(np.int64),
+        np.ceil(expect + slack).astype(np.int64), limit, file)
+    err, fg, fe = compare_spectra(counts, expect, 1e12 / span)
+    print(f"paula: DAC {len(counts)} windows of {w} clocks, {int(bad.sum())} off, spectrum error "
+        f"{err:.4f}, peak {fg:.0f}Hz expected {fe:.0f}Hz", file=file)
+    return not bad.any() and err <= spectrum_tolerance
+
+
+def starts(program, writes_file):
+    """Each channel's start time in ps, from the bench's log of when each write finished."""
+    writes = [int(x) * 1000 for x in Path(writes_file).read_text().split()]
+    return [writes[i] for i in program.status_writes()]
+
+
+def check(output_path, program, spectrum_tolerance=0.1, file=sys.stdout):
+    """Check the captures in a test's output path against the program. True if both match."""
+    path = Path(output_path)
+    t0 = time.perf_counter()
+    frames = load_i2s(path / "i2s.bin")
+    header, counts = load_dac(path / "dac.bin")
+    end = max(int(frames["time_ns"][-1]) if len(frames) else 0,
+        int(header["start_ns"]) + len(counts) * int(header["window"]) * int(header["clock_ps"]) // 1000)
+    mix = program.mix(starts(program, path / "writes.txt"), end * 1000)
+    ok = check_i2s(mix, frames, program.snd_clk_ps, spectrum_tolerance, file=file)
+    ok = check_dac(mix, header, counts, program.snd_clk_ps, spectrum_tolerance, file=file) and ok
+    print(f"paula: {end / 1e9:.3f}s of audio checked in {time.perf_counter() - t0:.3f}s", file=file)
+    return ok
+
+
+def write_registers(file_name, program):
+    """The register writes as text lines of hex address and data, read by the bench."""
+    Path(file_name).write_text("".join(f"{a:04X} {d:02X}\n" for a, d in program.registers()))
+
+
+def add_config(test, name, program, run_us=None, spectrum_tolerance=0.1):
+    """
+    Add a VUnit configuration for one program to test. The register writes
+    and sample memory are written to the test's output path before it runs and
+    the captures found there afterwards are checked against the model.
+    """
+    generics = program.generics()
+    if run_us:
+        generics["G_RUN_US"] = run_us
+
+    def pre_config(output_path):
+        write_registers(Path(output_path) / "regs.txt", program)
+        Path(output_path, "samples.bitvec").write_text(romimage.convert(program.mem.tobytes()))
+        Path(output_path, "program.json").write_text(json.dumps(program.to_dict(), indent=1))
+        return True
+
+    def post_check(output_path):
+        print(program)
+        return check(output_path, program, spectrum_tolerance)
+
+    test.add_config(name=name, generics=generics, pre_config=pre_config, post_check=post_check)
+
+
+def summary(file_name, file=sys.stdout):
+    """Print the level and loudest frequency of an I2S or DAC capture from any bench."""
+    with open(file_name, "rb") as f:
+        magic = f.read(4)
+    if magic == I2S_MAGIC:
+        frames = load_i2s(file_name)
+        if len(frames) < 2:
+            print(f"{file_name}: {len(frames)} frames", file=file)
+            return
+        t = frames["time_ns"].astype(np.int64)
+        rate = 1e9 / np.median(np.diff(t))
+        for side in ("left", "right"):
+            x = frames[side].astype(np.int64)
+            peak = int(np.argmax(spectrum(x))) * rate / len(x)
+            print(f"{file_name} {side}: {len(x)} frames at {rate:.0f}Hz from {t[0] / 1e3:.1f}us, "
+                f"min {x.min()} max {x.max()} rms {np.sqrt(np.mean((x - x.mean()) ** 2)):.1f}, "
+                f"peak {peak:.0f}Hz", file=file)
+    else:
+        header, counts = load_dac(file_name)
+        w = int(header["window"])
+        x = counts * 2048 / w - 1024 if len(counts) else counts
+        rate = 1e12 / (w * int(header["clock_ps"]))
+        peak = int(np.argmax(spectrum(x))) * rate / len(x) if len(x) > 1 else 0
+        print(f"{file_name}: {len(x)} windows of {w} clocks at {rate:.0f}Hz, as 11 bit samples "
+            f"min {x.min() if len(x) else 0:.0f} max {x.max() if len(x) else 0:.0f}, "
+            f"peak {peak:.0f}Hz", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paula sound DMAC model and capture checker")
+    parser.add_argument("seed", type=int, nargs="?", help="random program to show")
+    parser.add_argument("--check", metavar="DIR",
+        help="check the i2s.bin, dac.bin and writes.txt in a test's output path against the seed")
+    parser.add_argument("--spectrum-tolerance", type=float, default=0.1)
+    parser.add_argument("--summary", metavar="CAPTURE", action="append", default=[],
+        help="print the level and peak frequency of a capture, may be repeated")
+    args = parser.parse_args(argv)
+
+    for s in args.summary:
+        summary(s)
+    if args.seed is None:
+        return 0
+    program = random_program(args.seed)
+    print(program)
+    if args.check:
+        return 0 if check(args.check, program, args.spectrum_tolerance) else 1
+    for a, d in program.registers():
+        print(f"  {a:04X} {d:02X}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
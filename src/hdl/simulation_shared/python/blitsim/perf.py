@@ -0,0 +1,246 @@
+"""
+Summaries of the chipset's performance counters, chipset/fb_chipset_perf.vhd,
+as sampled by ../sim_chipset_perf.vhd to perf.txt in a test's output path.
+
+For each DMA unit (the DMAC's channels, Paula, the blitter and Aeris) the
+counters give the clocks it had a cycle open, the clocks its address was
+stalled and waiting for ack, and the bytes it moved, all and to SYS (FF xxxx).
+The summary gives bytes per active clock to chip RAM and to SYS separately,
+which is what to look at when choosing where to put a blitter's or sound
+channel's data, the share of the run each unit had the bus and the bytes
+moved by each Paula and blitter channel and the blitter's collision hits.
+
+The code under test may clear the counters (write bit 7 of CTL), the totals
+carry on over a clear, those since the last clear are the final sample as
+logged. A clear loses the counts since the sample before it, up to the
+bench's G_PERIOD clocks.
+
+The counters are only in a build whose board_config_pack sets G_INCL_CS_PERF,
+which no hardware board does, so a bench compiles a copy of its board's with
+them on unless --no-perf is given:
+
+    lib.add_source_file(perf.board_config(args, BOARD + "/board_config_pack.vhd", out_dir))
+    perf.attach(lib.test_bench("test_tb"), also=check)
+
+    python -m blitsim.perf vunit_out/test_output/<test>/perf.txt
+    python -m blitsim.perf --since-clear vunit_out/test_output/<test>/perf.txt
+    python -m blitsim.perf vunit_out                     a line per test
+
+The register layout is in chipset/fb_chipset_pack.vhd and doc/chipset.md.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from blitsim import sources, test_files
+
+# as fb_chipset_pack
+UNITS = ["dma0", "dma1", "snd", "blit", "aeris"]
+UNIT_CTRS = ["active", "stall", "wait", "cycles", "sys_active", "sys_cycles"]
+EVENTS = ([f"snd{i}_bytes" for i in range(4)]
+    + [f"blit_{c}_bytes" for c in "abcde"]
+    + ["blit_collisions"])
+NAMES = [f"{u}_{c}" for u in UNITS for c in UNIT_CTRS] + EVENTS
+
+
+def _ratio(n, d):
+    return n / d if d else 0.0
+
+
+class Perf(object):
+    """The samples of a perf log, clocks are those of the chipset's bus."""
+
+    def __init__(self):
+        self.clock_ps = 0
+        self.clocks = 0         # clock of the last sample
+        self.samples = 0
+        self.clears = 0
+        self.total = [0] * len(NAMES)
+        self.final = [0] * len(NAMES)
+
+    def add(self, clock, values):
+        """Add a sample, a counter that went down means they were cleared."""
+        if any(v < p for v, p in zip(values, self.final)):
+            self.clears += 1
+            self.total = [t + v for t, v in zip(self.total, values)]
+        else:
+            self.total = [t + v - p for t, v, p in zip(self.total, values, self.final)]
+        self.final = list(values)
+        self.clocks = clock
+        self.samples += 1
+
+    @property
+    def used(self):
+        return any(self.total)
+
+    def counters(self, since_clear=False):
+        """Counter name to count."""
+        return dict(zip(NAMES, self.final if since_clear else self.total))
+
+    def units(self, since_clear=False):
+        """Unit name to a dict of its counters and rates, for the units that did anything."""
+        c = self.counters(since_clear)
+        ret = {}
+        for u in UNITS:
+            v = {k: c[f"{u}_{k}"] for k in UNIT_CTRS}
+            if not v["active"]:
+                continue
+            chip_active = v["active"] - v["sys_active"]
+            chip_cycles = v["cycles"] - v["sys_cycles"]
+            v.update(
+                bytes_per_clock=_ratio(v["cycles"], v["active"]),
+                chip_bytes_per_clock=_ratio(chip_cycles, chip_active),
+                sys_bytes_per_clock=_ratio(v["sys_cycles"], v["sys_active"]),
+                stall_pct=100 * _ratio(v["stall"], v["active"]),
+                wait_pct=100 * _ratio(v["wait"], v["active"]),
+                sys_pct=100 * _ratio(v["sys_cycles"], v["cycles"]),
+                bus_pct=100 * _ratio(v["active"], self.clocks))
+            ret[u] = v
+        return ret
+
+    def summary(self, since_clear=False):
+        """A line for the test."""
+        if not self.used:
+            return "no chipset DMA"
+        parts = [f"{u} {v['cycles']} bytes {v['bytes_per_clock']:.3f}/clk"
+            for u, v in self.units(since_clear).items()]
+        c = self.counters(since_clear)
+        if c["blit_collisions"]:
+            parts.append(f"{c['blit_collisions']} collisions")
+        return ", ".join(parts)
+
+    def as_dict(self, since_clear=False):
+        c = self.counters(since_clear)
+        return dict(clock_ps=self.clock_ps, clocks=self.clocks, clears=self.clears,
+            since_clear=since_clear, units=self.units(since_clear),
+            snd_bytes=[c[f"snd{i}_bytes"] for i in range(4)],
+            blit_bytes={ch: c[f"blit_{ch}_bytes"] for ch in "abcde"},
+            blit_collisions=c["blit_collisions"])
+
+    def report(self, since_clear=False, file=sys.stdout):
+        us = self.clocks * self.clock_ps / 1e6
+        what = "since the last clear" if since_clear else f"{self.clears} clears"
+        print(f"{self.clocks} clocks ({us:.1f} us), {self.samples} samples, {what}", file=file)
+        units = self.units(since_clear)
+        if not units:
+            print("no chipset DMA", file=file)
+            return
+        print(f"{'unit':6} {'bytes':>9} {'bus%':>6} {'B/clk':>6} {'chip':>6} {'sys':>6}"
+            f" {'stall%':>7} {'wait%':>6} {'sys%':>6}", file=file)
+        for u, v in units.items():
+            print(f"{u:6} {v['cycles']:9} {v['bus_pct']:6.1f} {v['bytes_per_clock']:6.3f}"
+                f" {v['chip_bytes_per_clock']:6.3f} {v['sys_bytes_per_clock']:6.3f}"
+                f" {v['stall_pct']:7.1f} {v['wait_pct']:6.1f} {v['sys_pct']:6.1f}", file=file)
+        c = self.counters(since_clear)
+        snd = [c[f"snd{i}_bytes"] for i in range(4)]
+        if any(snd):
+            print("snd channel bytes " + " ".join(str(n) for n in snd), file=file)
+        blit = [c[f"blit_{ch}_bytes"] for ch in "abcde"]
+        if any(blit):
+            print("blit channel bytes " + " ".join(f"{ch.upper()}={n}" for ch, n in zip("abcde", blit))
+                + f", {c['blit_collisions']} collision hits", file=file)
+
+
+def read(path):
+    """The Perf of a log written by sim_chipset_perf, a sample at a time."""
+    p = Perf()
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == "clock_ps":
+                p.clock_ps = int(fields[1])
+            elif fields[0] == "count":
+                if int(fields[1]) != len(NAMES):
+                    raise ValueError(f"{path}: {fields[1]} counters, expected {len(NAMES)}")
+            else:
+                p.add(int(fields[0]), [int(v, 16) for v in fields[1:]])
+    return p
+
+
+def post_check(output_path, log="perf.txt", also=None):
+    """
+    Write a test's counters to perf.json next to its log and print a line for
+    them, for use in a post_check. Never fails a test, also is another
+    post_check to run as well.
+    """
+    ok = also(output_path) if also else True
+    path = Path(output_path) / log
+    if not path.exists():
+        return ok
+    p = read(path)
+    with open(path.with_suffix(".json"), "w") as f:
+        json.dump(p.as_dict(), f, indent=1)
+    if p.used:
+        print(f"perf: {p.summary()}")
+    return ok
+
+
+def add_arguments(cli):
+    """Add the performance counter option to a VUnitCLI."""
+    cli.parser.add_argument("--no-perf", action="store_true",
+        help="Build the board as the hardware has it, without the chipset performance counters")
+
+
+def board_config(args, path, out_dir):
+    """
+    The board_config_pack to compile, a copy of the one at path with
+    G_INCL_CS_PERF on, or the board's own with --no-perf.
+    """
+    if args.no_perf:
+        return path
+    return sources.board_config(path, out_dir, G_INCL_CS_PERF=True)
+
+
+def attach(tb, log="perf.txt", also=None):
+    """
+    Summarise the counters after every test, with also as another post_check.
+    Returns it chained with also, for whatever attaches after.
+    """
+    check = lambda output_path: post_check(output_path, log, also)
+    tb.set_post_check(check)
+    return check
+
+
+def collect(vunit_out, log="perf.txt"):
+    """Test name to Perf for every test under vunit_out that has a log."""
+    return {name: read(f) for name, f in test_files(vunit_out, log)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise the chipset performance counters logged by sim_chipset_perf")
+    parser.add_argument("path", help="a perf.txt, or a vunit_out for a line per test")
+    parser.add_argument("--since-clear", action="store_true",
+        help="the counts since the test code last cleared the counters, rather than the totals")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    path = Path(args.path)
+    if path.is_dir():
+        found = collect(path)
+        if not found:
+            print(f"perf: no logs under {path}", file=sys.stderr)
+            return 1
+        if args.json:
+            json.dump({name: p.as_dict(args.since_clear) for name, p in found.items()}, sys.stdout, indent=1)
+            print()
+        else:
+            width = max(len(name) for name in found)
+            for name, p in sorted(found.items()):
+                print(f"{name:{width}}  {p.summary(args.since_clear)}")
+        return 0
+
+    p = read(path)
+    if args.json:
+        json.dump(p.as_dict(args.since_clear), sys.stdout, indent=1)
+        print()
+    else:
+        p.report(args.since_clear)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Content hashed, precompiled copies of the shared VUnit libraries.
+
+Every source under src/hdl uses "work" to refer to its neighbours so the shared
+groups cannot be split into separate VHDL libraries without editing every file.
+Instead the groups from sources.py are compiled once, into a snapshot of the
+"lib", "fmf" and "lib816" library directories that is keyed on a hash of their
+contents, and a bench starting with an empty vunit_out is seeded from that
+snapshot. VUnit finds its own .vunit_hash files already in place and only
+compiles the board specific files.
+
+The cache lives in simulation_shared/vunit/prebuilt_out unless BLITSIM_PREBUILT
+names another directory, which CI should point somewhere that persists between
+jobs. A snapshot can be built by hand with:
+
+    python -m blitsim.prebuilt --compile -o <dir>
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from vunit import VUnit
+from vunit.about import version as vunit_version
+
+from blitsim import CACHE, sources
+
+LIBRARIES = {
+    "lib": ["fishbone", "cpu", "video", "peripherals", "sim_models"],
+    "fmf": ["fmf"],
+    "lib816": ["p65c816"],
+}
+
+
+def add_arguments(cli):
+    """Add the prebuilt options to a VUnitCLI."""
+    cli.parser.add_argument("--no-prebuilt", action="store_true",
+        help="Do not seed vunit_out from the prebuilt shared libraries")
+
+
+def key(simulator):
+    """Hash of everything that affects the compiled snapshot."""
+    h = hashlib.sha1()
+    h.update(simulator.encode())
+    h.update(vunit_version().encode())
+    h.update(os.environ.get("VUNIT_VHDL_STANDARD", "").encode())
+    for name in sorted(LIBRARIES):
+        h.update(name.encode())
+        for f in sources.files(*LIBRARIES[name]):
+            # VUnit keys its hash files on the absolute path too
+            h.update(str(f).encode())
+            h.update(f.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def snapshot(simulator):
+    """Where the snapshot for the current sources lives in the cache."""
+    return CACHE / "libraries" / simulator / key(simulator)
+
+
+def build(simulator, path):
+    """Compile a snapshot into path, safe against other jobs doing the same."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=path.name + ".", dir=path.parent))
+    env = dict(os.environ, VUNIT_SIMULATOR=simulator)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "blitsim.prebuilt", "--compile", "-o", str(tmp)],
+            cwd=Path(__file__).resolve().parents[1], env=env, check=True)
+        try:
+            tmp.rename(path)
+        except OSError:
+            # another job finished the same snapshot first
+            pass
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def seed(vu, args):
+    """Copy prebuilt libraries into a bench's output path where missing."""
+    simulator = vu.get_simulator_name()
+    if getattr(args, "no_prebuilt", False) or simulator is None:
+        return
+    if args.list or args.files or args.export_json:
+        return
+
+    dest = Path(args.output_path) / simulator / "libraries"
+    missing = [name for name in LIBRARIES if not (dest / name).exists()]
+    if not missing:
+        return
+
+    path = snapshot(simulator)
+    if not path.exists():
+        print(f"Building prebuilt libraries {path}")
+        build(simulator, path)
+
+    for name in missing:
+        shutil.copytree(path / simulator / "libraries" / name, dest / name)
+
+
+def main():
+    vu = VUnit.from_argv()
+    for name, groups in LIBRARIES.items():
+        sources.add_groups(vu.add_library(name), *groups)
+    vu.main()
+
+
+if __name__ == "__main__":
+    main()
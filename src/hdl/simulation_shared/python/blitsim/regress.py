@@ -0,0 +1,211 @@
+"""
+Run every VUnit bench in the tree as one regression.
+
+Each run.py is still its own VUnit process, started from its own directory as
+the scripts expect. The runner lists the tests in every bench first and then
+shares one pool of -p threads between the benches: a bench is started with a
+-p in proportion to its share of the test cases and only when that many
+threads are free, so a 32 core host runs all the single test benches side by
+side while the larger ones get the spare threads. The xunit reports are merged
+into one file with the bench path as the test suite name.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from threading import Condition
+
+from blitsim import prebuilt, sources
+
+
+class Bench(object):
+
+    def __init__(self, run_py):
+        self.run_py = run_py
+        self.dir = run_py.parent
+        self.name = self.dir.relative_to(sources.ROOT).as_posix()
+        self.tests = []
+        self.threads = 1
+        self.returncode = None
+        self.wall = 0.0
+        self.results = None
+
+    def cases(self):
+        return [] if self.results is None else list(self.results.iter("testcase"))
+
+
+def find_benches(patterns=None):
+    """All run.py scripts under src/hdl, optionally filtered by fnmatch patterns."""
+    ret = []
+    for run_py in sorted(sources.ROOT.rglob("run.py")):
+        if "vunit_out" in run_py.parts:
+            continue
+        bench = Bench(run_py)
+        if patterns and not any(fnmatch(bench.name, p) for p in patterns):
+            continue
+        ret.append(bench)
+    return ret
+
+
+def list_tests(bench, out_dir, vunit_args):
+    json_file = out_dir / (bench.name.replace("/", "__") + ".json")
+    ret = subprocess.run(
+        [sys.executable, "run.py", "--export-json", str(json_file)] + vunit_args,
+        cwd=bench.dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if ret.returncode != 0 or not json_file.exists():
+        return []
+    with open(json_file) as f:
+        return [t["name"] for t in json.load(f)["tests"]]
+
+
+def share_threads(benches, threads):
+    total = sum(max(1, len(b.tests)) for b in benches)
+    for b in benches:
+        n = max(1, len(b.tests))
+        b.threads = max(1, min(n, threads, round(threads * n / total)))
+
+
+class Pool(object):
+    """Counts out -p threads to the bench processes."""
+
+    def __init__(self, threads):
+        self.free = threads
+        self.cond = Condition()
+
+    def take(self, n):
+        with self.cond:
+            self.cond.wait_for(lambda: self.free >= n)
+            self.free -= n
+
+    def give(self, n):
+        with self.cond:
+            self.free += n
+            self.cond.notify_all()
+
+
+def run_bench(bench, pool, out_dir, vunit_args, verbose):
+    xunit = out_dir / (bench.name.replace("/", "__") + ".xml")
+    log = out_dir / (bench.name.replace("/", "__") + ".log")
+    pool.take(bench.threads)
+    try:
+        start = time.monotonic()
+        with open(log, "w") as f:
+            ret = subprocess.run(
+                [sys.executable, "run.py", "-p", str(bench.threads), "--xunit-xml", str(xunit)] + vunit_args,
+                cwd=bench.dir, stdout=None if verbose else f, stderr=subprocess.STDOUT)
+        bench.wall = time.monotonic() - start
+        bench.returncode = ret.returncode
+    finally:
+        pool.give(bench.threads)
+    if xunit.exists():
+        bench.results = ET.parse(xunit).getroot()
+    return bench
+
+
+def passed(tc):
+    return all(tc.find(k) is None for k in ("failure", "error", "skipped"))
+
+
+def merge_xunit(benches, file_name):
+    root = ET.Element("testsuites")
+    for b in benches:
+        suite = ET.SubElement(root, "testsuite", name=b.name, time=f"{b.wall:.3f}")
+        cases = b.cases()
+        if not cases:
+            # a bench that dies before VUnit reports (e.g. a missing source) still counts
+            tc = ET.Element("testcase", classname=b.name, name="run.py")
+            ET.SubElement(tc, "error", message=f"run.py exited with {b.returncode} and no report")
+            cases = [tc]
+        for tc in cases:
+            suite.append(tc)
+        suite.attrib["tests"] = str(len(cases))
+        suite.attrib["failures"] = str(sum(1 for tc in cases if tc.find("failure") is not None))
+        suite.attrib["errors"] = str(sum(1 for tc in cases if tc.find("error") is not None))
+        suite.attrib["skipped"] = str(sum(1 for tc in cases if tc.find("skipped") is not None))
+    ET.ElementTree(root).write(file_name, encoding="utf-8", xml_declaration=True)
+
+
+def print_table(benches, wall):
+    w = max([len(b.name) for b in benches] + [5])
+    print()
+    print(f"{'bench':<{w}}  {'-p':>3}  {'tests':>5}  {'pass':>5}  {'wall s':>9}  result")
+    print("-" * (w + 42))
+    for b in sorted(benches, key=lambda b: -b.wall):
+        cases = b.cases()
+        result = "pass" if b.returncode == 0 else "FAIL"
+        print(f"{b.name:<{w}}  {b.threads:>3}  {len(cases):>5}  {sum(map(passed, cases)):>5}  {b.wall:>9.1f}  {result}")
+    print("-" * (w + 42))
+    print(f"{'total':<{w}}  {'':>3}  {'':>5}  {'':>5}  {wall:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0],
+        epilog="Arguments after -- are passed to every run.py")
+    parser.add_argument("-p", "--num-threads", type=int, default=os.cpu_count(),
+        help="Total simulation threads shared between the benches")
+    parser.add_argument("-o", "--output-path", default="regress_out",
+        help="Where the logs and merged xunit report go")
+    parser.add_argument("-b", "--bench", action="append",
+        help="Only run benches whose path under src/hdl matches this glob, may be repeated")
+    parser.add_argument("--list", action="store_true", help="List the benches and their tests")
+    parser.add_argument("--no-prebuilt", action="store_true",
+        help="Do not build the prebuilt shared libraries before starting the benches")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the output of every run.py")
+    argv = sys.argv[1:] if argv is None else argv
+    vunit_args = []
+    if "--" in argv:
+        vunit_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+    args = parser.parse_args(argv)
+
+    out_dir = Path(args.output_path).resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    benches = find_benches(args.bench)
+    with ThreadPoolExecutor(max_workers=args.num_threads) as ex:
+        for b, tests in zip(benches, ex.map(lambda b: list_tests(b, out_dir, vunit_args), benches)):
+            b.tests = tests
+
+    if args.list:
+        for b in benches:
+            print(b.name)
+            for t in b.tests:
+                print("    " + t)
+        return 0
+
+    # build the shared libraries once rather than in every bench at the same time
+    simulator = os.environ.get("VUNIT_SIMULATOR")
+    if simulator is None:
+        from vunit.sim_if.factory import SIMULATOR_FACTORY
+        sim_class = SIMULATOR_FACTORY.select_simulator()
+        simulator = sim_class.name if sim_class else None
+    if simulator is not None and not args.no_prebuilt:
+        path = prebuilt.snapshot(simulator)
+        if not path.exists():
+            prebuilt.build(simulator, path)
+
+    share_threads(benches, args.num_threads)
+    pool = Pool(args.num_threads)
+    start = time.monotonic()
+    # the biggest benches first so they are not left waiting for threads at the end
+    order = sorted(benches, key=lambda b: -b.threads)
+    with ThreadPoolExecutor(max_workers=len(benches) or 1) as ex:
+        list(ex.map(lambda b: run_bench(b, pool, out_dir, vunit_args, args.verbose), order))
+    wall = time.monotonic() - start
+
+    merge_xunit(benches, out_dir / "xunit.xml")
+    print_table(benches, wall)
+    print(f"\nLogs and xunit.xml in {out_dir}")
+
+    return 0 if all(b.returncode == 0 for b in benches) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Convert ROM/RAM images for fast preloading by ram_tb and rom_tb.
+
+ram_tb and rom_tb read a romfile ending in .bitvec as lines of 256 bit
+vectors, 32 bytes to a line with the lowest address leftmost, which takes one
+textio read per 32 bytes instead of one file read per byte. Converted images are
+kept in the cache named by a hash of the image so an unchanged ROM is only
+converted once, whichever bench asks for it.
+
+    tb.set_generic("G_MOSROMFILE", romimage.preload("path/to/mos.rom"))
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from blitsim import CACHE
+
+BYTES_PER_LINE = 32
+
+
+def convert(data, size=None, fill=0):
+    """Return a bytes image as .bitvec text, padded or truncated to size."""
+    if size is not None:
+        data = data[:size] + bytes([fill]) * max(0, size - len(data))
+    # pad the last line, the VHDL reads whole lines and stops at its size
+    data = data + bytes([fill]) * (-len(data) % BYTES_PER_LINE)
+    bits = BYTES_PER_LINE * 8
+    return "".join(
+        format(int.from_bytes(data[i:i + BYTES_PER_LINE], "big"), f"0{bits}b") + "\n"
+        for i in range(0, len(data), BYTES_PER_LINE))
+
+
+def preload(rom, size=None, fill=0):
+    """
+    Return the absolute path of a cached .bitvec copy of rom, making it if needed.
+
+    A missing rom is handed back unchanged so that listing or compiling a bench
+    whose ROM has not been built still works, the simulation reports the
+    missing file as it always has.
+    """
+    rom = Path(rom)
+    if rom.suffix == ".bitvec" or not rom.is_file():
+        if not rom.is_file():
+            print(f"romimage: {rom} not found, not converted", file=sys.stderr)
+        return str(rom.resolve())
+
+    data = rom.read_bytes()
+    h = hashlib.sha1(data)
+    h.update(f"{size}:{fill}".encode())
+    out = CACHE / "images" / (rom.stem + "-" + h.hexdigest()[:16] + ".bitvec")
+    if not out.exists():
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=out.parent, suffix=".tmp", delete=False) as f:
+            f.write(convert(data, size, fill))
+        os.replace(f.name, out)
+    return str(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a binary image to a ram_tb/rom_tb .bitvec file")
+    parser.add_argument("rom", help="binary image")
+    parser.add_argument("-o", "--output", help="write here instead of to the cache")
+    parser.add_argument("--size", type=lambda x: int(x, 0), help="pad or truncate to this many bytes")
+    parser.add_argument("--fill", type=lambda x: int(x, 0), default=0, help="byte to pad with")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        Path(args.output).write_text(convert(Path(args.rom).read_bytes(), args.size, args.fill))
+        print(args.output)
+    else:
+        print(preload(args.rom, args.size, args.fill))
+
+
+if __name__ == "__main__":
+    main()
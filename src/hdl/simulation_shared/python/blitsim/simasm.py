@@ -0,0 +1,221 @@
+"""
+Content hashed builds of the test ROMs a bench runs, from src/sim_asm and the
+other assembler directories, with their own Makefiles.
+
+A run.py names the ROM images it needs and roms() brings them up to date
+before anything is compiled. A ROM is stale when the hash of its sources has
+changed since it was last made: every file in its directory but build/, the
+files they .include or .incbin from outside it and any others the Rom is
+given (an includes directory on the assembler's -I). The hash is kept next to
+the image as <image>.srchash, so "make clean" leaves it stale too and a ROM
+made by hand is made once more to get its hash. Only stale ROMs are made:
+the stale image is deleted so that make has to make it, and make's own rules
+decide which of the files it is made from need making again. ROMs in
+different directories are made in parallel, a ROM named more than once, by
+path, is made once.
+
+A ROM that fails to make is dropped, with the end of make's output, so that a
+bench never runs an image older than its sources. Nothing is made when VUnit
+will not run a test (--list, --files, --compile, --export-json) and --no-asm
+uses the images as they are.
+
+    images = matrix.rom_images(args, **simasm.roms(args,
+        model_bc=root + "../sim_asm/test_asm_model_BC/build/model_bc.rom"))
+
+    python -m blitsim.simasm ../../sim_asm/test_asm/build/blit-bringup2-rom0.rom
+    python -m blitsim.simasm --status ../../sim_asm/*/build/*.rom
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SUFFIX = ".srchash"
+
+# .include "x", include "x", .incbin "x", INCBIN "x" in the assemblers' sources
+_RE_INCLUDE = re.compile(r'^\s*\.?(?:include|incbin|binclude)\s+"([^"]+)"', re.IGNORECASE | re.MULTILINE)
+
+# sources that are read for their includes, the rest are only hashed
+SOURCE_SUFFIXES = {".asm", ".inc", ".s", ".a"}
+
+
+def add_arguments(cli):
+    """Add the ROM build options to a VUnitCLI."""
+    cli.parser.add_argument("--no-asm", action="store_true",
+        help="Use the test ROM images as they are, without making the stale ones")
+    cli.parser.add_argument("--asm-jobs", type=int, default=os.cpu_count(), metavar="N",
+        help="Make the test ROMs of up to N directories at once")
+
+
+def _makefile_dir(image):
+    """The nearest directory above image with a Makefile."""
+    for d in Path(image).resolve().parents:
+        if (d / "Makefile").is_file():
+            return d
+    raise ValueError(f"no Makefile above {image}")
+
+
+class Rom(object):
+    """
+    A ROM image and how to make it, "make goal" in directory. The
+    directory defaults to the nearest above the image with a Makefile and the
+    goal to the image's path from there, extra are more files or directories
+    whose contents make the ROM stale.
+    """
+
+    def __init__(self, image, directory=None, goal=None, extra=()):
+        self.image = Path(image).resolve()
+        self.directory = Path(directory).resolve() if directory else _makefile_dir(self.image)
+        self.goal = goal or os.path.relpath(self.image, self.directory)
+        self.extra = [Path(p).resolve() for p in extra]
+
+    @property
+    def stamp(self):
+        return self.image.with_name(self.image.name + SUFFIX)
+
+    def _files(self):
+        """Every file the ROM is made from, as far as can be seen."""
+        found = set()
+        for root in [self.directory] + self.extra:
+            if root.is_file():
+                found.add(root)
+                continue
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if d != "build" and not d.startswith(".")]
+                found.update(Path(dirpath) / f for f in filenames
+                    if not f.startswith(".") and not f.endswith(SUFFIX))
+        # and what they include from outside those
+        todo = [f for f in found if f.suffix.lower() in SOURCE_SUFFIXES]
+        while todo:
+            f = todo.pop()
+            try:
+                text = f.read_text(errors="replace")
+            except OSError:
+                continue
+            for name in _RE_INCLUDE.findall(text):
+                for base in (f.parent, self.directory):
+                    p = (base / name).resolve()
+                    if p.is_file():
+                        if p not in found:
+                            found.add(p)
+                            if p.suffix.lower() in SOURCE_SUFFIXES:
+                                todo.append(p)
+                        break
+        return sorted(found)
+
+    def source_hash(self):
+        h = hashlib.sha1()
+        h.update(self.goal.encode())
+        for f in self._files():
+            h.update(os.path.relpath(f, self.directory).encode())
+            h.update(f.read_bytes())
+        return h.hexdigest()
+
+    def stale(self, digest=None):
+        """True if the image is missing or was not made from the sources as they are."""
+        if not self.image.is_file() or not self.stamp.is_file():
+            return True
+        return self.stamp.read_text().strip() != (digest or self.source_hash())
+
+    def __repr__(self):
+        return os.path.relpath(self.image)
+
+
+def _make(directory, roms):
+    """Make roms, all in directory, and return the ones made."""
+    digests = {r: r.source_hash() for r in roms}
+    for r in roms:
+        # a make that fails part way leaves nothing that looks up to date,
+        # and make cannot take the image as up to date
+        r.stamp.unlink(missing_ok=True)
+        r.image.unlink(missing_ok=True)
+    cmd = ["make", "-C", str(directory)] + sorted({r.goal for r in roms})
+    try:
+        p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    except OSError as e:
+        print(f"simasm: {' '.join(cmd)}: {e}", file=sys.stderr)
+        return []
+    made = []
+    for r in roms:
+        if p.returncode == 0 and r.image.is_file():
+            r.stamp.write_text(digests[r] + "\n")
+            made.append(r)
+    if p.returncode != 0 or len(made) != len(roms):
+        print(f"simasm: {' '.join(cmd)} failed:", file=sys.stderr)
+        for line in p.stdout.splitlines()[-20:]:
+            print(f"    {line}", file=sys.stderr)
+    return made
+
+
+def build(roms, jobs=None, force=False):
+    """
+    Make the stale roms, those in different directories in parallel, and
+    return the set of the paths of the images that are up to date.
+    """
+    unique = {}
+    for r in roms:
+        r = r if isinstance(r, Rom) else Rom(r)
+        unique.setdefault(r.image, r)
+    todo = {}
+    ok = set()
+    for r in unique.values():
+        if force or r.stale():
+            todo.setdefault(r.directory, []).append(r)
+        else:
+            ok.add(r.image)
+    if todo:
+        print(f"simasm: making {', '.join(repr(r) for rs in todo.values() for r in rs)}")
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            for made in pool.map(lambda d: _make(d, todo[d]), todo):
+                ok.update(r.image for r in made)
+    return ok
+
+
+def runs_tests(args):
+    """False when VUnit only lists, compiles or exports with these arguments."""
+    return not (args.list or args.files or args.compile or args.export_json)
+
+
+def roms(args, **images):
+    """
+    The images by name, each a path or a Rom, as paths once made up to date,
+    less any that failed. With --no-asm, or when no test will run, the images
+    are handed back as they are.
+    """
+    if args.no_asm or not runs_tests(args):
+        return {name: str(r.image if isinstance(r, Rom) else r) for name, r in images.items()}
+    wanted = {name: r if isinstance(r, Rom) else Rom(r) for name, r in images.items()}
+    ok = build(wanted.values(), args.asm_jobs)
+    ret = {}
+    for name, r in wanted.items():
+        if r.image in ok:
+            ret[name] = str(r.image)
+        else:
+            print(f"simasm: {name} ({r!r}) could not be made, left out", file=sys.stderr)
+    return ret
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Make the stale test ROMs")
+    parser.add_argument("image", nargs="+", help="ROM image, under a directory with a Makefile")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="directories made at once")
+    parser.add_argument("--force", action="store_true", help="make them even if they are up to date")
+    parser.add_argument("--status", action="store_true", help="only say which are stale")
+    args = parser.parse_args(argv)
+
+    wanted = [Rom(i) for i in args.image]
+    if args.status:
+        for r in wanted:
+            print(f"{'stale' if r.stale() else 'ok':6} {r!r}")
+        return 0
+    ok = build(wanted, args.jobs, args.force)
+    return 0 if len(ok) == len({r.image for r in wanted}) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Boot state snapshots for the full system benches.
+
+Most of a full system run is the MOS booting. A snapshot is taken once, by a
+cold run that boots the MOS and then dumps the bench's 2M RAM through ram_tb's
+tst_dump, along with state.txt, the few registers the bench reads at the same
+time. Later runs preload that dump through the RAM's romfile generic and start
+from a ROM whose reset vector goes to a stub that puts back those registers
+and jumps to the MOS's own reset code:
+
+    FE37, the memctl's lomem turbo map
+    FE4E, the system VIA's interrupt enables, which the MOS reads to tell a
+          BREAK from a power on
+
+so the MOS takes the same path from the restored state as it would have on a
+BREAK at the end of the cold run. Nothing else is restored: the CPU's
+registers and flags come from its reset, the MOS sets them itself, and the
+other VIA, video and memctl registers start from reset too. The BBC's own
+memory (&0000-&7FFF) is in FPGA block RAM on the C20K, which ram_tb cannot
+see, so it only comes back for the 4K blocks the turbo map keeps in chip RAM.
+The cold run's ROM has the same stub, setting FE37 to cold_turbo_lo before the
+MOS clears its memory, by default &07 for &0000-&2FFF: the MOS's and filing
+systems' workspace ends up in chip RAM and in the snapshot, the screen (from
+&3000 in any mode) stays in block RAM where the video reads it. Give 0 for a
+bench whose test code needs the low RAM in SYS, a DMA from FF xxxx say.
+
+The stub goes in a run of unused (all 00 or all FF) bytes in the ROM, at the
+offset KNOWN_STUB_AT gives for a ROM without one (MOS 1.20), or at a given
+offset; a ROM without room for it always boots from cold, and says so. A
+snapshot is keyed on the ROM, the bench's sources and the boot time so a
+change to any of them takes a new one.
+
+    snap = snapshot.Snapshot("c20k", G_MOSROMFILE, lib.get_source_files(), 1200)
+    snapshot.add_config(tb.test("look"), snap, args)
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+from blitsim import CACHE, romimage
+
+ROM_BASE = 0xC000
+ROM_SIZE = 0x4000
+RESET_VECTOR = 0xFFFC
+IO_LO, IO_HI = 0xFC00, 0xFF00           # FRED, JIM and SHEILA hide the ROM here
+TURBO_LO = 0xFE37                       # memctl lomem turbo map, a bit per 4K
+SYSVIA_IER = 0xFE4E
+COLD_TURBO_LO = 0x07                    # &0000-&2FFF, below the screen in every mode
+
+# where the stub goes in ROMs without a gap, by the sha1 of the image
+KNOWN_STUB_AT = {
+    # MOS 1.20: C2F3-C2FF, the bottom rows of the font's '~' and its glyph
+    # 127, which the VDU never draws as DEL is a control code
+    "0d9bcaf6a393c9ce2359ed700ddb53c232c2c45d": 0x2F3,
+}
+
+
+def stub(reset, turbo_lo=0, sysvia_ier=0):
+    """6502 code for the reset stub, ending with a jump to the MOS reset code."""
+    code = bytes([0xA9, turbo_lo, 0x8D]) + TURBO_LO.to_bytes(2, "little")            # LDA #turbo_lo, STA FE37
+    code += bytes([0xA9, 0x80 | sysvia_ier, 0x8D]) + SYSVIA_IER.to_bytes(2, "little")  # LDA #80+ier, STA FE4E
+    code += bytes([0x4C]) + reset.to_bytes(2, "little")                              # JMP reset
+    return code
+
+
+def find_space(rom, length):
+    """Offset of the first run of length unused bytes the CPU can execute from."""
+    for fill in (0xFF, 0x00):
+        run = 0
+        for i, b in enumerate(rom[:RESET_VECTOR - 2 - ROM_BASE]):
+            if IO_LO <= ROM_BASE + i < IO_HI or b != fill:
+                run = 0
+                continue
+            run += 1
+            if run == length:
+                return i - length + 1
+    raise ValueError(f"no {length} byte gap in the ROM for the reset stub, give one with --stub-at")
+
+
+def stub_at(rom):
+    """Offset for the stub in rom: its known place, or the first gap for it."""
+    known = KNOWN_STUB_AT.get(hashlib.sha1(rom).hexdigest())
+    return known if known is not None else find_space(rom, len(stub(0)))
+
+
+def patch_rom(rom, state, at=None):
+    """
+    Return a copy of the 16K MOS image rom with its reset vector sent to a stub
+    that restores state, a dict of turbo_lo and sysvia_ier.
+    """
+    if len(rom) != ROM_SIZE:
+        raise ValueError(f"MOS image is {len(rom)} bytes, expected {ROM_SIZE}")
+    reset = int.from_bytes(rom[RESET_VECTOR - ROM_BASE:][:2], "little")
+    code = stub(reset, state.get("turbo_lo", 0), state.get("sysvia_ier", 0))
+    if at is None:
+        at = stub_at(rom)
+    out = bytearray(rom)
+    out[at:at + len(code)] = code
+    out[RESET_VECTOR - ROM_BASE:RESET_VECTOR - ROM_BASE + 2] = (ROM_BASE + at).to_bytes(2, "little")
+    return bytes(out)
+
+
+def read_state(path):
+    """The registers in a bench's state.txt, a line of "name hex" each."""
+    state = {}
+    for line in Path(path).read_text().splitlines():
+        fields = line.split()
+        if len(fields) == 2:
+            state[fields[0]] = int(fields[1], 16)
+    return state
+
+
+class Snapshot:
+    """The boot state of one bench, kept in the cache."""
+
+    def __init__(self, name, rom, sources=(), boot_us=1200, at=None, cold_turbo_lo=COLD_TURBO_LO):
+        self.name = name
+        self.rom = Path(rom)
+        self.boot_us = boot_us
+        self.at = at
+        self.cold_turbo_lo = cold_turbo_lo
+        h = hashlib.sha1(f"{boot_us}:{at}:{cold_turbo_lo}".encode())
+        h.update(self.rom.read_bytes() if self.rom.is_file() else b"")
+        for f in sorted(str(getattr(s, "name", s)) for s in sources):
+            h.update(f.encode())
+            if Path(f).is_file():
+                h.update(Path(f).read_bytes())
+        self.key = h.hexdigest()[:16]
+        self.dir = CACHE / "snapshots"
+        self.path = self.dir / f"{name}-{self.key}.bin"
+        self.state_path = self.path.with_suffix(".state")
+
+    def unavailable(self):
+        """Why there can be no snapshot: no 16K MOS image or no room in it for the stub, else None."""
+        if not self.rom.is_file():
+            return f"{self.rom} not found"
+        if self.rom.stat().st_size != ROM_SIZE:
+            return f"{self.rom} is not a 16K MOS image"
+        if self.at is None:
+            try:
+                stub_at(self.rom.read_bytes())
+            except ValueError:
+                return f"no room in {self.rom} for the reset stub"
+        return None
+
+    def available(self):
+        return self.unavailable() is None
+
+    def exists(self):
+        return self.path.exists() and self.state_path.exists()
+
+    def rom_image(self, warm):
+        """
+        Path of the .bitvec ROM, the MOS image with the stub setting the cold
+        turbo map for the cold run, restoring the snapshot's registers for the
+        warm one.
+        """
+        if warm:
+            state = read_state(self.state_path)
+        else:
+            state = dict(turbo_lo=self.cold_turbo_lo)
+        tag = "".join(f"{state.get(k, 0):02x}" for k in ("turbo_lo", "sysvia_ier"))
+        out = self.dir / f"{self.name}-{self.key}-{'warm' if warm else 'cold'}-{tag}.rom"
+        if not out.exists():
+            self.dir.mkdir(parents=True, exist_ok=True)
+            tmp = out.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(patch_rom(self.rom.read_bytes(), state, self.at))
+            os.replace(tmp, out)
+        return romimage.preload(out)
+
+    def save(self, dump, state):
+        """Keep a ram_tb dump, without the zeros on the end, and the bench's state.txt."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for src, dst in ((Path(state).read_bytes(), self.state_path),
+                (Path(dump).read_bytes().rstrip(b"\0"), self.path)):
+            tmp = dst.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(src)
+            os.replace(tmp, dst)
+
+    def ram_image(self):
+        return romimage.preload(self.path)
+
+
+def add_arguments(cli):
+    """Add the snapshot options to a VUnitCLI."""
+    cli.parser.add_argument("--snapshot", action="store_true",
+        help="Boot from cold and keep the RAM as the boot snapshot, even if there is one")
+    cli.parser.add_argument("--cold", action="store_true",
+        help="Boot from cold, do not use or take a boot snapshot")
+    cli.parser.add_argument("--warm-us", type=int, default=200,
+        help="Microseconds to let the MOS BREAK for when starting from a snapshot")
+
+
+def add_config(test, snap, args, dump="ram.bin", state="state.txt", name="", generics=None, attributes=None,
+        also=None):
+    """
+    Add a "cold" or "warm" configuration to test, after name if given, with
+    generics and attributes on top of its own. Without a snapshot (or with
+    --snapshot) the cold configuration boots the MOS image and keeps the RAM
+    dump and state as the snapshot, otherwise the warm one starts from it.
+    The cold configuration's post_check replaces the bench's, also is the
+    bench's post_check to run as well. Returns False, saying why, if it added
+    nothing: with --cold, no ROM or no room in it for the stub.
+    """
+    why = "--cold given" if args.cold else snap.unavailable()
+    if why:
+        print(f"snapshot: skipped for {snap.name}, {why}, booting from cold", file=sys.stderr)
+        return False
+    prefix = name + "." if name else ""
+    if args.snapshot or not snap.exists():
+        def post_check(output_path):
+            ok = also(output_path) if also else True
+            snap.save(Path(output_path) / dump, Path(output_path) / state)
+            print(f"snapshot: saved {snap.path}")
+            return ok
+
+        test.add_config(name=prefix + "cold", generics=dict(generics or {},
+            G_MOSROMFILE=snap.rom_image(False), G_BOOT_US=snap.boot_us, G_SNAPSHOT=True),
+            post_check=post_check, attributes=attributes)
+    else:
+        test.add_config(name=prefix + "warm", generics=dict(generics or {},
+            G_MOSROMFILE=snap.rom_image(True), G_RAMFILE=snap.ram_image(), G_BOOT_US=args.warm_us),
+            attributes=attributes)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Make the warm start ROM of a boot snapshot")
+    parser.add_argument("rom", help="16K MOS image")
+    parser.add_argument("-o", "--output", required=True, help="patched ROM to write")
+    parser.add_argument("--state", help="the state.txt of the cold run, the registers to restore")
+    parser.add_argument("--stub-at", type=lambda x: int(x, 0), help="ROM offset for the stub, by default its known place or the first gap for it")
+    args = parser.parse_args(argv)
+
+    rom = Path(args.rom).read_bytes()
+    out = patch_rom(rom, read_state(args.state) if args.state else {}, args.stub_at)
+    Path(args.output).write_bytes(out)
+    at = int.from_bytes(out[RESET_VECTOR - ROM_BASE:][:2], "little")
+    n = len(stub(0))
+    print(f"reset stub at {at:04X}: " + " ".join(f"{b:02X}" for b in out[at - ROM_BASE:][:n]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
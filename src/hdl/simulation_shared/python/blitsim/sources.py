@@ -0,0 +1,199 @@
+"""
+Source manifest for the VUnit benches.
+
+Files are grouped by function and given relative to src/hdl. The groups that
+go into the prebuilt libraries (see prebuilt.py) must not depend on a board's
+board_config_pack, its PLLs/RAMs or the Gowin primitives so that they compile
+the same whichever bench built them. "chipset" and "c20k_video" are shared
+lists too but depend on board files and are compiled by each bench.
+
+The C20K benches add the Gowin primitives with add_gowin(): the vendor's
+prim_sim.vhd when it is installed, else the behavioural stand-ins in
+simulation_shared/gowin_prim_standin.vhd. BLITSIM_GOWIN=standin uses the
+stand-ins anyway, BLITSIM_GOWIN set to a directory looks there for
+prim_sim.vhd instead of the path the run.py gives.
+
+A bench that wants a board built with other options than the hardware, the
+chipset performance counters say, compiles a copy of the board's
+board_config_pack with those constants changed, made by board_config(), so
+the board's own file stays as the hardware build has it.
+"""
+
+import os
+import re
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[3]
+
+GOWIN_STANDIN = "simulation_shared/gowin_prim_standin.vhd"
+FASTSIM_PACK = "simulation_shared/sim_fastsim_pack.vhd"
+
+_gowin_told = set()
+
+GROUPS = {
+    "fishbone": [
+        "library/common.vhd",
+        "library/clockreg.vhd",
+        "library/fishbone/fishbone_pack.vhd",
+        "library/fishbone/fb_intcon_pack.vhd",
+        "library/fishbone/fb_syscon.vhd",
+        "library/fishbone/fb_null.vhd",
+        "library/fishbone/fb_arbiter_prior.vhd",
+        "library/fishbone/fb_arbiter_roundrobin.vhd",
+        "library/fishbone/fb_intcon_one_to_many.vhd",
+        "library/fishbone/fb_intcon_many_to_one.vhd",
+        "library/fishbone/fb_intcon_shared.vhd",
+    ],
+    "cpu": [
+        "library/3rdparty/T6502/T65_Pack.vhd",
+        "library/3rdparty/T6502/T65_ALU.vhd",
+        "library/3rdparty/T6502/T65_MCode.vhd",
+        "library/3rdparty/T6502/T65.vhd",
+    ],
+    "video": [
+        "library/3rdparty/hdmi_alexey_spirkov/encoder.vhd",
+        "library/3rdparty/hdmi_alexey_spirkov/hdmidelay.vhd",
+        "library/3rdparty/hdmi_alexey_spirkov/hdmidataencoder.v",
+        "library/3rdparty/hdmi_alexey_spirkov/hdmi.vhd",
+        "library/3rdparty/MikeStirling/mc6845.vhd",
+        "library/3rdparty/MikeStirling/vidproc_model_bc.vhd",
+        "library/3rdparty/MikeStirling/saa5050_rom_dual_port_dom.vhd",
+        "library/3rdparty/MikeStirling/saa5050.vhd",
+        "shared/fb_i2c.vhd",
+        "modelC20K/shared/hdmi/HDMI_pack.vhd",
+        "modelC20K/shared/hdmi/fb_HDMI_crtc.vhd",
+        "modelC20K/shared/hdmi/fb_HDMI_vidproc.vhd",
+        "modelC20K/shared/hdmi/fb_HDMI_ctl.vhd",
+        "modelC20K/shared/hdmi/fb_HDMI_seq_ctl.vhd",
+        "modelC20K/shared/hdmi/vidmem_sequencer.vhd",
+        "modelC20K/shared/hdmi/sprites/sprites_pack.vhd",
+        "modelC20K/shared/hdmi/sprites/sprite_int.vhd",
+        "modelC20K/shared/hdmi/sprites/sprites.vhd",
+        "modelC20K/shared/hdmi/sprites/fb_sprites.vhd",
+    ],
+    "peripherals": [
+        "library/bbc/bbc_slow_cyc.vhd",
+        "library/bbc/elk_slow_cyc.vhd",
+        "library/uart_tx.vhd",
+        "library/uart_rx.vhd",
+        "library/3rdparty/MikeStirling/m6522.vhd",
+        "library/3rdparty/MikeStirling/sn76489.vhd",
+        "library/3rdparty/MikeStirling/serialula.vhd",
+        "library/3rdparty/MikeStirling/acia6850.vhd",
+        "shared/fb_uart.vhd",
+        "shared/fb_spi.vhd",
+        "shared/i2s.vhd",
+        "chipset/dac_1bit.vhd",
+        "modelC20K/shared/ws2812_pack.vhd",
+        "modelC20K/shared/ws2812.vhd",
+        "modelC20K/shared/fb_ws2812.vhd",
+        "modelC20K/shared/c20k_peripheral_mux_ctl.vhd",
+    ],
+    "sim_models": [
+        "library/simulation/hct574.vhd",
+        "library/simulation/ac245.vhd",
+        "library/simulation/cy74FCT2543.vhd",
+        "library/simulation/ls74245.vhd",
+        "library/simulation/ram_tb.vhd",
+        "library/simulation/rom_tb.vhd",
+        "simulation_shared/fb_tester_pack.vhd",
+        "simulation_shared/sim_fb_monitor.vhd",
+        "simulation_shared/sim_fb_mailbox.vhd",
+        "simulation_shared/sim_cpu_trace.vhd",
+        "simulation_shared/sim_bench_pack.vhd",
+        "simulation_shared/sim_video_sink.vhd",
+        "simulation_shared/sim_audio_sink.vhd",
+    ],
+    "chipset": [
+        "shared/address_decode_chipset.vhd",
+        "chipset/fb_chipset_pack.vhd",
+        "chipset/blit_types.vhd",
+        "chipset/blit_addr.vhd",
+        "chipset/blit_int.vhd",
+        "chipset/aeris.vhd",
+        "chipset/dmac_int_sound_cha.vhd",
+        "chipset/dmac_int_sound.vhd",
+        "chipset/dmac_int_dma_cha.vhd",
+        "chipset/dmac_int_dma.vhd",
+        "chipset/fb_chipset_perf.vhd",
+        "chipset/fb_chipset.vhd",
+        "simulation_shared/sim_chipset_perf.vhd",
+    ],
+    "c20k_video": [
+        "modelC20K/shared/hdmi/hdmi_out_gowin_2a.vhd",
+        "modelC20K/shared/hdmi/dvi_synchro.vhd",
+        "modelC20K/shared/hdmi/fb_HDMI_ram.vhd",
+        "modelC20K/shared/hdmi/vid15tohdmi.vhd",
+        "modelC20K/shared/hdmi/fb_HDMI_enabled.vhd",
+    ],
+    "fmf": [
+        "library/3rdparty/fmf/*.vhd",
+    ],
+    "p65c816": [
+        "library/3rdparty/P65C816/*.vhd",
+        "library/simulation/real65816_tb.vhd",
+    ],
+}
+
+
+def files(*groups):
+    """Return the absolute paths of the files in the named groups, each once."""
+    ret = []
+    for g in groups:
+        for f in GROUPS[g]:
+            if "*" in f:
+                found = sorted(ROOT.glob(f))
+            else:
+                found = [ROOT / f]
+            for p in found:
+                if p not in ret:
+                    ret.append(p)
+    return ret
+
+
+def add_groups(lib, *groups):
+    """Add the files of the named groups to a VUnit library."""
+    for f in files(*groups):
+        lib.add_source_file(str(f))
+
+
+def gowin_prims(simlib):
+    """The Gowin primitives file to use, simlib is the vendor's simlib/gw2a directory."""
+    env = os.environ.get("BLITSIM_GOWIN")
+    if env != "standin":
+        vendor = Path(env or simlib) / "prim_sim.vhd"
+        if vendor.exists():
+            return vendor
+        if vendor not in _gowin_told:
+            _gowin_told.add(vendor)
+            print(f"gowin: no {vendor}, using the stand-ins")
+    return ROOT / GOWIN_STANDIN
+
+
+def add_gowin(lib, simlib):
+    """
+    Add the Gowin primitives to a VUnit library, see gowin_prims(), and the
+    fast-sim package the stand-ins and the C20K test benches use.
+    """
+    lib.add_source_file(str(ROOT / FASTSIM_PACK))
+    lib.add_source_file(str(gowin_prims(simlib)))
+
+
+def board_config(path, out_dir, **constants):
+    """
+    The path of a copy of the board_config_pack at path, in out_dir, with the
+    named constants given new values, Python bools and ints as VHDL literals.
+    The copy is only rewritten when it changes so that it is not recompiled.
+    """
+    text = Path(path).read_text()
+    for name, value in constants.items():
+        lit = ("true" if value else "false") if isinstance(value, bool) else str(value)
+        text, n = re.subn(rf"^(\s*constant\s+{name}\s*:[^:]*:=\s*)[^;]+;", rf"\g<1>{lit};", text,
+            flags=re.IGNORECASE | re.MULTILINE)
+        if n != 1:
+            raise ValueError(f"{path} has no constant {name}")
+    out = Path(out_dir) / Path(path).name
+    if not out.exists() or out.read_text() != text:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(text)
+    return str(out)
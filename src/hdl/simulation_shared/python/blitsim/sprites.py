@@ -0,0 +1,398 @@
+"""
+Random sprite setups and a reference renderer for the model C sprites
+(mk3/shared/hdmi/sprites/sprites.vhd and sprite_int.vhd).
+
+A Setup is a raster size, a memory image and a display list per sprite: each
+list entry is a control word (horizontal position, first and stop lines,
+continue, load pointer and attach bits), followed by a data pointer when the
+previous entry asked for one. Positions are picked towards the awkward places,
+the last pixels of a line (whose sprite runs on into the next line), the 9th
+position bit, lists whose entries follow each other on the next line or run off
+the end of the frame, attached pairs and overlaps.
+
+render() gives the pixel_act_o/pixel_o the RTL should put out on every pixel
+clock. What each sprite fetches on a line is worked out by stepping a model of
+sprite_int's registers and list states a line at a time, as the sequencer does
+it once per line, and then every sprite's 16 pixel runs are laid into a stream
+and merged in sprites.vhd's priority order with NumPy over the whole capture.
+
+run.py scripts use add_config() to give each random seed its own VUnit
+configuration of mk3/simulation/vunit/functionality/hdmi/sprites/general_tb's
+sprites_random_tb, which captures the sprites' output to pixels.bin:
+
+    python run.py --seeds 500 -p 8
+    python -m blitsim.sprites 12 --show
+    python -m blitsim.sprites 12 --pixels vunit_out/test_output/.../pixels.bin
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# pixels after hsync that sprites_random_tb's stand in sequencer has done every
+# sprite's fetch by, horizontal positions are kept at or past it
+FETCH_END = 16
+
+# pixel clocks from the one where the horizontal counter matches the sprite's
+# position to its first pixel on pixel_o: the serialiser load, then pixel_o's
+# register, and one more as the count starts from 0 the clock after hsync
+PIPE = 3
+
+# sprite_int list states, t_list_state
+IDLE, START, CTL, DATAPTR, DATA = "idle", "start", "ctl", "dataptr", "data"
+
+# line on which a list's first control word is fetched, see p_arm
+LIST_START_LINE = 4
+
+
+def _inc16(ptr):
+    """Pointers count in their low 16 bits only."""
+    return (ptr & 0xFF0000) | ((ptr + 1) & 0xFFFF)
+
+
+class Regs:
+    """The registers and list state of one sprite_int, as far as they affect the pixels."""
+
+    def __init__(self):
+        self.data = 0               # r_spr_data
+        self.hstart = 0
+        self.vstart = 0
+        self.vstop = 0
+        self.cont = 0
+        self.attach = 0
+        self.lat_data_ptr = 0
+        self.data_ptr = 0
+        self.lat_list_ptr = 0
+        self.listinit_ptr = 0
+        self.list_en = False
+        self.list_ptr = 0
+        self.state = IDLE
+        self.load_data_ptr = False
+        self.vert_armed = False
+        self.vert_act = False
+        self.line_armed = False
+
+    def restart(self, line, reload):
+        """p_arm on the horizontal restart after hsync, reload on the vsync line."""
+        self.line_armed = False
+        if reload:
+            self.vert_armed = False
+            self.list_ptr = self.listinit_ptr
+            self.state = START if self.list_en else IDLE
+            self.vert_act = False
+            self.load_data_ptr = True
+        elif line == self.vstart and self.vstart != 0 and self.vert_armed:
+            self.vert_act = True
+        elif line == self.vstop and self.vert_act:
+            self.vert_act = False
+            self.state = CTL if self.cont else IDLE
+        elif self.state == START and line == LIST_START_LINE:
+            self.state = CTL
+
+    def request(self):
+        """(address, register group, active) as SEQ_DATAPTR_A_o, SEQ_A_pre_o, SEQ_DATAPTR_act_o."""
+        if self.state == CTL:
+            return self.list_ptr, 1, True
+        if self.state == DATAPTR:
+            return self.list_ptr, 2, True
+        return self.data_ptr, 0, self.vert_act
+
+    def write(self, a, d, seq=True):
+        """A register write from the sequencer (seq) or the CPU."""
+        # p_arm
+        if a >> 2 == 1:
+            self.line_armed = False
+        elif a == 3:
+            self.line_armed = True
+        if a == 7:
+            self.vert_armed = True
+            if seq:
+                # NB: the data pointer is loaded as asked by the previous control word
+                self.state = DATAPTR if self.load_data_ptr else DATA
+                self.load_data_ptr = bool(d & 0x40)
+        elif a == 11 and seq:
+            self.state = DATA
+        if seq and a >> 2 in (1, 2):
+            self.list_ptr = _inc16(self.list_ptr)
+
+        # p_regs
+        if a < 4:
+            shift = 24 - 8 * a
+            self.data = (self.data & ~(0xFF << shift)) | (d << shift)
+        elif a == 4:
+            self.hstart = (self.hstart & 0x100) | d
+        elif a == 5:
+            self.vstart = (self.vstart & 0x100) | d
+        elif a == 6:
+            self.vstop = (self.vstop & 0x100) | d
+        elif a == 7:
+            self.hstart = (self.hstart & 0xFF) | (d & 1) << 8
+            self.vstart = (self.vstart & 0xFF) | (d >> 1 & 1) << 8
+            self.vstop = (self.vstop & 0xFF) | (d >> 2 & 1) << 8
+            self.cont = d >> 5 & 1
+            self.attach = d >> 7 & 1
+        elif a == 8:
+            self.lat_data_ptr = (self.lat_data_ptr & 0xFF00) | d
+        elif a == 9:
+            self.lat_data_ptr = (self.lat_data_ptr & 0xFF) | d << 8
+        elif a == 12:
+            self.lat_list_ptr = (self.lat_list_ptr & 0xFF00) | d
+        elif a == 13:
+            self.lat_list_ptr = (self.lat_list_ptr & 0xFF) | d << 8
+        elif a == 14:
+            self.listinit_ptr = d << 16 | self.lat_list_ptr
+            self.list_en = self.listinit_ptr != 0
+        if a == 10:
+            self.data_ptr = d << 16 | self.lat_data_ptr
+        elif seq and a < 4:
+            self.data_ptr = _inc16(self.data_ptr)
+
+
+class Entry:
+    """One display list entry."""
+
+    def __init__(self, hstart, vstart, vstop, cont=0, load_ptr=0, attach=0, data_ptr=None):
+        self.hstart = hstart
+        self.vstart = vstart
+        self.vstop = vstop
+        self.cont = cont
+        self.load_ptr = load_ptr        # the next entry has a data pointer
+        self.attach = attach
+        self.data_ptr = data_ptr        # this entry's data pointer, if it has one
+
+    def ctl(self):
+        return [self.hstart & 0xFF, self.vstart & 0xFF, self.vstop & 0xFF,
+            (self.hstart >> 8 & 1) | (self.vstart >> 8 & 1) << 1 | (self.vstop >> 8 & 1) << 2
+            | self.cont << 5 | self.load_ptr << 6 | self.attach << 7]
+
+    def __str__(self):
+        ptr = f" data {self.data_ptr:06X}" if self.data_ptr is not None else ""
+        return (f"h {self.hstart:3} lines {self.vstart}-{self.vstop}"
+            f"{' cont' if self.cont else ''}{' attach' if self.attach else ''}{ptr}")
+
+
+class Setup:
+    """A raster, a memory image and the display list of each sprite."""
+
+    def __init__(self, line, lines, frames, mem, lists, n_sprites=4):
+        self.line = line                # pixel clocks per line
+        self.lines = lines              # lines per frame
+        self.frames = frames            # frames captured
+        self.mem = mem                  # uint8 memory image
+        self.lists = lists              # per sprite: (list address, [Entry]) or None
+        self.n_sprites = n_sprites
+
+    def generics(self):
+        return dict(G_N_SPRITES=self.n_sprites, G_LINE=self.line, G_LINES=self.lines,
+            G_FRAMES=self.frames, G_MEM_SIZE=len(self.mem))
+
+    def cpu_writes(self):
+        """(sprite register address, data) for each list pointer, a disabled sprite's is 0."""
+        ret = []
+        for s in range(self.n_sprites):
+            ptr = self.lists[s][0] if self.lists[s] else 0
+            ret += [(s << 4 | 12, ptr & 0xFF), (s << 4 | 13, ptr >> 8 & 0xFF), (s << 4 | 14, ptr >> 16)]
+        return ret
+
+    def __str__(self):
+        ret = [f"{self.line} pixels x {self.lines} lines, {self.frames} frames"]
+        for s, lst in enumerate(self.lists):
+            if not lst:
+                ret.append(f"  sprite {s}: off")
+                continue
+            ret.append(f"  sprite {s}: list at {lst[0]:06X}")
+            ret += [f"    {e}" for e in lst[1]]
+        return "\n".join(ret)
+
+
+def _hstart(rng, line):
+    """A horizontal position, often at one of the awkward ones."""
+    last = line - 2                     # the last that matches within the line
+    edges = [p for p in (FETCH_END, FETCH_END + 1, last, last - 1, last - 15, last - 16, 255, 256)
+        if FETCH_END <= p <= last]
+    if rng.random() < 0.4:
+        return int(rng.choice(edges))
+    return int(rng.integers(FETCH_END, last + 1))
+
+
+def random_setup(seed, n_sprites=4, mem_size=4096, frames=2):
+    """A random but well formed Setup from seed."""
+    rng = np.random.default_rng(seed)
+    line = int(rng.choice([160, 320]))
+    lines = int(rng.integers(24, 49))
+
+    # pixels are transparent (0) more often than not so that sprites overlap usefully
+    pixels = rng.choice(4, mem_size * 4, p=[0.4, 0.2, 0.2, 0.2]).astype(np.uint8)
+    mem = (pixels[0::4] << 6 | pixels[1::4] << 4 | pixels[2::4] << 2 | pixels[3::4]).astype(np.uint8)
+
+    lists = []
+    list_area = mem_size // 4
+    for s in range(n_sprites):
+        if rng.random() < 0.15:
+            lists.append(None)
+            continue
+        # one attach bit for the whole list, so it stays put while a previous
+        # line's pixels run on past the next fetch
+        attach = int(rng.random() < 0.3) if s % 2 == 0 else 0
+        entries = []
+        vstart = int(rng.integers(LIST_START_LINE, lines // 2))
+        load_ptr = 1                    # the first entry always has its pointer
+        for i in range(int(rng.integers(1, 5))):
+            vstop = vstart + int(rng.integers(1, 11))
+            data_ptr = None
+            if load_ptr:
+                data_ptr = int(rng.integers(0, 256)) << 16 | int(rng.integers(list_area, mem_size))
+            load_ptr = int(rng.random() < 0.5)
+            entries.append(Entry(_hstart(rng, line), vstart, vstop, cont=1,
+                load_ptr=load_ptr, attach=attach, data_ptr=data_ptr))
+            vstart = vstop + int(rng.choice([0, 1, 2, 3, int(rng.integers(4, 10))]))
+        entries[-1].cont = 0
+        # sometimes the last one is never stopped and runs to the end of the frame
+        if rng.random() < 0.15:
+            entries[-1].vstop = 0x100 + int(rng.integers(0, 0x100))
+
+        # the list, each entry's control word then its pointer when it has one
+        addr = list_area // n_sprites * s + 0x10
+        a = addr
+        for e in entries:
+            mem[a:a + 4] = e.ctl()
+            a += 4
+            if e.data_ptr is not None:
+                mem[a:a + 4] = [e.data_ptr & 0xFF, e.data_ptr >> 8 & 0xFF, e.data_ptr >> 16, 0]
+                a += 4
+        lists.append((addr, entries))
+
+    return Setup(line, lines, frames, mem, lists, n_sprites)
+
+
+def fetches(setup):
+    """
+    The lines on which each sprite is armed: arrays of the line (counted from
+    the first vsync), the sprite, its horizontal position and its 32 data bits,
+    stepping every sprite's registers through the sequencer's fetches.
+    """
+    regs = [Regs() for _ in range(setup.n_sprites)]
+    for s, r in enumerate(regs):
+        for a, d in setup.cpu_writes():
+            if a >> 4 == s:
+                r.write(a & 0xF, d, seq=False)
+
+    size = len(setup.mem)
+    lines, sprites, hstarts, data = [], [], [], []
+    for n in range(setup.frames * setup.lines):
+        line = n % setup.lines
+        for s, r in enumerate(regs):
+            r.restart(line, line == 0)
+            for b in range(4):
+                ptr, pre, act = r.request()
+                if act:
+                    r.write(pre << 2 | b, int(setup.mem[ptr % size]))
+            if r.line_armed:
+                lines.append(n)
+                sprites.append(s)
+                hstarts.append(r.hstart)
+                data.append(r.data)
+    attach = [r.attach for r in regs]
+    return (np.array(lines, np.int64), np.array(sprites, np.int64), np.array(hstarts, np.int64),
+        np.array(data, np.uint32), attach)
+
+
+def render(setup):
+    """The byte sprites_random_tb should capture on each pixel clock, act << 4 | pixel."""
+    lines, sprites, hstarts, data, attach = fetches(setup)
+    ticks = setup.frames * setup.lines * setup.line
+
+    # each sprite's 2 bit output as a stream, 16 pixels from each load
+    px = np.zeros((setup.n_sprites, ticks + setup.line + 32), np.uint8)
+    starts = lines * setup.line + hstarts + PIPE
+    pixel = np.arange(16)
+    values = (data[:, None] >> (30 - 2 * pixel)) & 3
+    px[sprites[:, None], starts[:, None] + pixel] = values
+    px = px[:, :ticks]
+
+    # sprites.vhd's p_pix_sel_tmp, the lowest numbered sprite showing wins so
+    # go from the highest down, an attached even sprite takes its odd partner
+    out = np.zeros(ticks, np.uint8)
+    act = np.zeros(ticks, bool)
+    for s in reversed(range(setup.n_sprites)):
+        if s % 2 == 0 and attach[s]:
+            value = px[s + 1] << 2 | px[s]
+        else:
+            value = px[s]
+        show = value != 0
+        out[show] = value[show]
+        act |= show
+    return (act.astype(np.uint8) << 4 | out).astype(np.uint8)
+
+
+def compare(pixels, expect, line, limit=16, file=sys.stdout):
+    """Compare a capture with the expected one, print the first differences by line and pixel."""
+    got = np.fromfile(pixels, dtype=np.uint8) if not isinstance(pixels, np.ndarray) else pixels
+    if len(got) != len(expect):
+        print(f"capture is {len(got)} pixels, expected {len(expect)}", file=file)
+        return False
+    bad = np.flatnonzero(got != expect)
+    for k in bad[:limit]:
+        print(f"  line {k // line:3} pixel {k % line:3}: got {got[k]:02X} expected {expect[k]:02X}", file=file)
+    if len(bad):
+        print(f"{len(bad)} pixels differ on {len(np.unique(bad // line))} lines", file=file)
+    return len(bad) == 0
+
+
+def write_files(output_path, setup):
+    """mem.txt and cpu.txt as sprites_random_tb reads them, hex a line at a time."""
+    Path(output_path, "mem.txt").write_text("".join(f"{d:02X}\n" for d in setup.mem))
+    Path(output_path, "cpu.txt").write_text("".join(f"{a:02X} {d:02X}\n" for a, d in setup.cpu_writes()))
+
+
+def add_config(test, name, setup, pixels="pixels.bin"):
+    """
+    Add a VUnit configuration for one setup to test. The bench's files are
+    written to the test's output path before it runs and its capture is
+    compared with render() afterwards.
+    """
+    def pre_config(output_path):
+        write_files(output_path, setup)
+        return True
+
+    def post_check(output_path):
+        ok = compare(Path(output_path) / pixels, render(setup), setup.line)
+        if not ok:
+            print(setup)
+        return ok
+
+    test.add_config(name=name, generics=setup.generics(), pre_config=pre_config, post_check=post_check)
+
+
+def show(setup, expect, file=sys.stdout):
+    """The first frame as text, a hex digit per pixel and . for none."""
+    for y in range(setup.lines):
+        row = expect[y * setup.line:(y + 1) * setup.line]
+        text = "".join(f"{v & 0xF:X}" if v & 0x10 else "." for v in row)
+        if text.strip("."):
+            print(f"{y:3} {text}", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Random sprite setups and their expected output")
+    parser.add_argument("seed", type=int, help="random setup to show")
+    parser.add_argument("--pixels", help="compare this sprites_random_tb capture with the model")
+    parser.add_argument("--show", action="store_true", help="print the first frame")
+    args = parser.parse_args(argv)
+
+    setup = random_setup(args.seed)
+    print(setup)
+    expect = render(setup)
+    lines, sprites, _, _, _ = fetches(setup)
+    print(f"{len(lines)} sprite lines, {np.count_nonzero(expect & 0x10)} pixels shown")
+    if args.show:
+        show(setup, expect)
+    if args.pixels:
+        return 0 if compare(args.pixels, expect, setup.line) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Selective, compressed waveform capture for the VUnit benches, and a reader
+that streams the value changes back out for scripted checks.
+
+Signals are picked with hierarchical globs from the test bench down. "*" and
+"?" stay within one level and a glob ending in "/**" takes everything below
+that instance as well:
+
+    python run.py --wave "/test_tb/e_top/e_fb_cpu/*" --wave "/test_tb/e_top/e_chipset/**"
+        --wave-from 1ms --wave-to 1.2ms
+
+A run.py adds the options with waves.add_arguments(cli) and turns them on for
+a test bench with waves.attach(vu, tb, args). With Questa/ModelSim a do-file
+run after the design loads dumps just those signals, only inside the window,
+to wave.vcd.gz in each test's output path, compressed as it is written. GHDL
+can filter the signals (--read-wave-opt) but writes the whole run to
+ghdl/wave.vcd uncompressed; --compact here windows and compresses it after.
+
+The reader never holds more than a line of the file and the current value of
+each signal it is following:
+
+    for t, name, value in waves.changes("wave.vcd.gz", ["/test_tb/e_top/e_fb_cpu/*"]):
+        ...
+
+    python -m blitsim.waves wave.vcd.gz --list
+    python -m blitsim.waves ghdl/wave.vcd --from 1ms --to 1.2ms --compact wave.vcd.gz
+"""
+
+import argparse
+import gzip
+import re
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+Change = namedtuple("Change", "time name value")
+
+# VHDL time units in fs, the reader's unit of time
+UNITS = {"fs": 1, "ps": 10**3, "ns": 10**6, "us": 10**9, "ms": 10**12, "s": 10**15, "sec": 10**15}
+
+
+def parse_time(text):
+    """A time such as "1.2ms" or "300 ns" in fs."""
+    m = re.fullmatch(r"\s*([0-9.]+)\s*([a-z]+)\s*", text.lower())
+    if not m or m.group(2) not in UNITS:
+        raise ValueError(f"{text!r} is not a time, e.g. 1.2ms")
+    return round(float(m.group(1)) * UNITS[m.group(2)])
+
+
+def _vhdl_time(fs):
+    """fs as a time literal in the largest unit that keeps it whole."""
+    for unit in ("ms", "us", "ns", "ps"):
+        if fs % UNITS[unit] == 0:
+            return f"{fs // UNITS[unit]} {unit}"
+    return f"{fs} fs"
+
+
+def glob_re(pattern):
+    """A compiled regex for a hierarchical glob."""
+    ret = ""
+    for part in re.split(r"(\*\*|\*|\?)", pattern):
+        ret += {"**": ".*", "*": "[^/]*", "?": "[^/]"}.get(part, re.escape(part))
+    return re.compile(ret + "$")
+
+
+def check_globs(globs):
+    for g in globs:
+        if not g.startswith("/"):
+            raise ValueError(f"--wave {g!r} should start at the test bench, /test_tb/...")
+        if "**" in g and not g.endswith("/**"):
+            raise ValueError(f"--wave {g!r}: ** can only end a glob")
+
+
+def add_arguments(cli):
+    """Add the wave options to a VUnitCLI."""
+    cli.parser.add_argument("--wave", action="append", default=[], metavar="GLOB",
+        help="Dump the signals matching this hierarchical glob, may be repeated")
+    cli.parser.add_argument("--wave-from", type=parse_time, metavar="TIME",
+        help="Start dumping at this time, e.g. 1ms")
+    cli.parser.add_argument("--wave-to", type=parse_time, metavar="TIME",
+        help="Stop dumping at this time")
+
+
+def modelsim_do(tb_name, globs, start=None, end=None, file_name="wave.vcd.gz"):
+    """The do-file that dumps globs to the test's output path, found from runner_cfg."""
+    lines = [
+        "# written by blitsim.waves",
+        f"set cfg [examine -radix ascii /{tb_name}/runner_cfg]",
+        # VUnit doubles the : and , in a value
+        "if {[regexp {output path : ((?:[^,]|,,)*)} $cfg -> out]} {",
+        "    set out [string map {:: : ,, ,} $out]",
+        "} else {",
+        "    set out .",
+        "}",
+        f"vcd file [file join $out {file_name}]",
+    ]
+    for g in globs:
+        lines.append(f"vcd add -r {g[:-1]}" if g.endswith("/**") else f"vcd add {g}")
+    if start:
+        lines += ["vcd off", f"when -label wave_from {{$now = {_vhdl_time(start)}}} {{vcd on}}"]
+    if end:
+        lines.append(f"when -label wave_to {{$now = {_vhdl_time(end)}}} {{vcd off; vcd flush}}")
+    return "\n".join(lines) + "\n"
+
+
+def ghdl_opt(globs):
+    """A GHDL wave option file for globs."""
+    return "$ version 1.1\n" + "".join(g + "\n" for g in globs)
+
+
+def attach(vu, tb, args):
+    """
+    Dump the --wave signals of every test of tb. Returns the file each test's
+    waves end up in, relative to its output path, or None.
+    """
+    if not args.wave:
+        return None
+    check_globs(args.wave)
+    sim = vu.get_simulator_name()
+    out = Path(args.output_path) / "waves"
+    out.mkdir(parents=True, exist_ok=True)
+    if sim == "modelsim":
+        do = out / f"{tb.name}.do"
+        do.write_text(modelsim_do(tb.name, args.wave, args.wave_from, args.wave_to))
+        tb.set_sim_option("modelsim.init_files.after_load", [str(do.resolve())], overwrite=False)
+        return "wave.vcd.gz"
+    if sim == "ghdl":
+        opt = out / f"{tb.name}.opt"
+        opt.write_text(ghdl_opt(args.wave))
+        tb.set_sim_option("ghdl.sim_flags", [f"--read-wave-opt={opt.resolve()}"], overwrite=False)
+        # VUnit reads this when it starts the simulator and writes ghdl/wave.vcd per test
+        args.gtkwave_fmt = "vcd"
+        if args.wave_from or args.wave_to:
+            print("waves: GHDL dumps the whole run, window it with python -m blitsim.waves --compact")
+        return "ghdl/wave.vcd"
+    print(f"waves: no selective dump for {sim}, --wave ignored")
+    return None
+
+
+def _open(file_name):
+    with open(file_name, "rb") as f:
+        gz = f.read(2) == b"\x1f\x8b"
+    return gzip.open(file_name, "rt") if gz else open(file_name)
+
+
+class Reader:
+    """
+    A VCD file's header, and its value changes read lazily. Names are the
+    scopes and signal joined with "/" from the top, as the globs are.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.header = []            # the header lines, as read
+        self.names = {}             # id code to the names sharing it
+        self.timescale = 1          # fs per tick
+        with _open(file_name) as f:
+            self._read_header(f)
+
+    def _read_header(self, f):
+        scope = []
+        text = ""
+        for line in f:
+            self.header.append(line)
+            text += line
+            if "$end" not in line:
+                continue
+            words = text.split()
+            text = ""
+            if not words:
+                continue
+            if words[0] == "$scope":
+                scope.append(words[2])
+            elif words[0] == "$upscope":
+                scope.pop()
+            elif words[0] == "$var":
+                # $var type size id name [range] $end
+                name = "/" + "/".join(scope + [words[4]])
+                self.names.setdefault(words[3], []).append(name)
+            elif words[0] == "$timescale":
+                m = re.match(r"(\d+)\s*([a-z]+)", " ".join(words[1:-1]))
+                if m:
+                    self.timescale = int(m.group(1)) * UNITS[m.group(2)]
+            elif words[0] == "$enddefinitions":
+                return
+
+    def select(self, globs=None):
+        """The id codes to follow for globs, all of them for None."""
+        if not globs:
+            return set(self.names)
+        res = [glob_re(g) for g in globs]
+        return {i for i, names in self.names.items() if any(r.match(n) for n in names for r in res)}
+
+    def raw(self, ids=None):
+        """Yield (time in fs, id, value) for every change, from the start of the file."""
+        scale = self.timescale
+        t = 0
+        with _open(self.file_name) as f:
+            for line in f:
+                if line.startswith("$enddefinitions"):
+                    break
+            for line in f:
+                c = line[:1]
+                if c == "#":
+                    t = int(line[1:]) * scale
+                elif c in "bBrR":
+                    value, _, i = line[1:].strip().partition(" ")
+                    if ids is None or i in ids:
+                        yield t, i, value
+                elif c == "$" or c == "" or c == "\n":
+                    # $dumpvars/$dumpon/$end, some writers put changes on the same line
+                    for word in line.split():
+                        if word[0] not in "$bBrR" and (ids is None or word[1:] in ids):
+                            yield t, word[1:], word[0]
+                else:
+                    i = line[1:].strip()
+                    if ids is None or i in ids:
+                        yield t, i, c
+
+
+def changes(file_name, globs=None, start=None, end=None):
+    """
+    Yield a Change (time in fs, name, value) per signal change matching globs,
+    between start and end. Each signal's value at start comes first, at start.
+    A vector's value is its binary digits.
+    """
+    r = Reader(file_name)
+    ids = r.select(globs)
+    res = [glob_re(g) for g in globs] if globs else None
+    names = {i: [n for n in r.names[i] if res is None or any(x.match(n) for x in res)] for i in ids}
+    held = {} if start else None
+    for t, i, value in r.raw(ids):
+        if end is not None and t >= end:
+            break
+        if held is not None:
+            if t < start:
+                held[i] = value
+                continue
+            for hi, hv in held.items():
+                for n in names[hi]:
+                    yield Change(start, n, hv)
+            held = None
+        for n in names[i]:
+            yield Change(t, n, value)
+    if held:
+        for hi, hv in held.items():
+            for n in names[hi]:
+                yield Change(start, n, hv)
+
+
+def compact(src, dst, globs=None, start=None, end=None):
+    """Copy the window and signals of src to dst, gzipped if dst ends .gz."""
+    r = Reader(src)
+    ids = r.select(globs)
+    out = gzip.open(dst, "wt") if str(dst).endswith(".gz") else open(dst, "w")
+    count = 0
+    with out:
+        for line in r.header:
+            words = line.split()
+            # drop the declarations of the signals not kept
+            if words[:1] == ["$var"] and len(words) > 3 and words[3] not in ids:
+                continue
+            out.write(line)
+        held = {} if start else None
+        last = None
+        for t, i, value in r.raw(ids):
+            if end is not None and t >= end:
+                break
+            if held is not None:
+                if t < start:
+                    held[i] = value
+                    continue
+                out.write(f"#{start // r.timescale}\n$dumpvars\n")
+                for hi, hv in held.items():
+                    out.write(f"b{hv} {hi}\n" if len(hv) > 1 else f"{hv}{hi}\n")
+                out.write("$end\n")
+                last = start
+                held = None
+            if t != last:
+                out.write(f"#{t // r.timescale}\n")
+                last = t
+            out.write(f"b{value} {i}\n" if len(value) > 1 else f"{value}{i}\n")
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read the value changes in a VCD, plain or gzipped")
+    parser.add_argument("wave", help="VCD file, .vcd or .vcd.gz")
+    parser.add_argument("-s", "--signal", action="append", metavar="GLOB",
+        help="Only the signals matching this glob, may be repeated")
+    parser.add_argument("--from", dest="start", type=parse_time, metavar="TIME")
+    parser.add_argument("--to", dest="end", type=parse_time, metavar="TIME")
+    parser.add_argument("--list", action="store_true", help="List the signals and their change counts")
+    parser.add_argument("--compact", metavar="OUT", help="Write the window and signals to OUT instead")
+    args = parser.parse_args(argv)
+
+    if args.compact:
+        n = compact(args.wave, args.compact, args.signal, args.start, args.end)
+        print(f"{n} changes written to {args.compact}")
+        return 0
+    if args.list:
+        counts = {}
+        for c in changes(args.wave, args.signal, args.start, args.end):
+            counts[c.name] = counts.get(c.name, 0) + 1
+        for name, n in sorted(counts.items()):
+            print(f"{n:10}  {name}")
+        return 0
+    for c in changes(args.wave, args.signal, args.start, args.end):
+        print(f"{c.time / 1e6:14.3f} ns  {c.name}  {c.value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2026 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+
+
+-- Company: 				Dossytronics
+-- Engineer: 				Dominic Beesley
+--
+-- Create Date:    		18/10/2026
+-- Design Name:
+-- Module Name:    		work.sim_audio_sink
+-- Project Name:
+-- Target Devices:
+-- Tool versions:
+-- Description: 			Captures the I2S and 1 bit DAC sound outputs for blitsim.paula
+-- Dependencies:
+--
+-- Revision:
+-- Additional Comments:
+--
+-- The I2S side decodes the stream from shared/i2s.vhd: bits are taken on the
+-- rising edge of bck_i, MSB first, a word is the 16 bits sent while ws_i is
+-- steady, low for the left channel then high for the right. Its file starts
+-- with a 16 byte header:
+--		"I2SS", version (1), 0, 0, 0, 0 (32 bit), 0 (32 bit)
+-- followed by an 8 byte record per frame, written once the right word is in:
+--		time in ns that the left word started (32 bit), left (16 bit), right (16 bit)
+--
+-- The DAC side counts the ones in the bitstream over windows of G_DAC_WINDOW
+-- clocks, which is the sample density a low pass filter would give back. Its
+-- file starts with a 16 byte header, written once the clock period is known:
+--		"DAC1", version (1), 0, 0, 0, window in clocks (32 bit),
+--		clock period in ps (32 bit), time in ns of the first window (32 bit)
+-- followed by the count of ones in each window (16 bit). X or U bits count as
+-- zeros and are reported once.
+--
+-- Everything is little endian. Times are from the start of simulation, so a
+-- capture can be up to 2.1s long, and G_DAC_WINDOW should be less than 65536. With G_I2S_FILE or G_DAC_FILE = "" that side does nothing.
+----------------------------------------------------------------------------------
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+entity sim_audio_sink is
+generic (
+		G_I2S_FILE				: string := "";
+		G_DAC_FILE				: string := "";
+		G_DAC_WINDOW			: positive := 2048
+	);
+port (
+		i2s_bck_i				: in	std_logic := '0';
+		i2s_ws_i					: in	std_logic := '0';
+		i2s_dat_i				: in	std_logic := '0';
+
+		dac_clk_i				: in	std_logic := '0';
+		dac_i						: in	std_logic := '0'
+	);
+
+end sim_audio_sink;
+
+architecture rtl of sim_audio_sink is
+
+	type char_file_t is file of character;
+
+	-- n as bytes, little endian
+	procedure put(file f : char_file_t; n : natural; bytes : natural) is
+	variable v : unsigned(31 downto 0);
+	begin
+		v := to_unsigned(n, 32);
+		for i in 0 to bytes-1 loop
+			write(f, character'val(to_integer(v(i*8+7 downto i*8))));
+		end loop;
+	end procedure;
+
+	procedure put_magic(file f : char_file_t; m : string) is
+	begin
+		for i in m'range loop
+			write(f, m(i));
+		end loop;
+		put(f, 1, 1);
+		put(f, 0, 3);
+	end procedure;
+
+begin
+
+	g_i2s:if G_I2S_FILE /= "" generate
+
+		p_i2s:process
+		file i2s_file : char_file_t;
+		variable v_ws		: std_logic := 'U';
+		variable v_bits	: std_logic_vector(15 downto 0);
+		variable v_n		: natural := 0;
+		variable v_left	: std_logic_vector(15 downto 0);
+		variable v_have_l	: boolean := false;
+		variable v_time	: natural := 0;
+		begin
+
+			file_open(i2s_file, G_I2S_FILE, write_mode);
+			put_magic(i2s_file, "I2SS");
+			put(i2s_file, 0, 4);
+			put(i2s_file, 0, 4);
+
+			loop
+				wait until rising_edge(i2s_bck_i);
+
+				if to_x01(i2s_ws_i) /= v_ws then
+					-- the word sent while ws was v_ws is complete
+					if v_n = 16 and not is_x(v_bits) then
+						if v_ws = '0' then
+							v_left := v_bits;
+							v_have_l := true;
+						elsif v_have_l then
+							put(i2s_file, v_time, 4);
+							put(i2s_file, to_integer(unsigned(v_left)), 2);
+							put(i2s_file, to_integer(unsigned(v_bits)), 2);
+							v_have_l := false;
+						end if;
+					else
+						v_have_l := false;
+					end if;
+					v_ws := to_x01(i2s_ws_i);
+					v_n := 0;
+					if v_ws = '0' then
+						v_time := now / 1 ns;
+					end if;
+				end if;
+
+				v_bits := v_bits(14 downto 0) & to_x01(i2s_dat_i);
+				if v_n < 16 then
+					v_n := v_n + 1;
+				end if;
+			end loop;
+
+		end process;
+
+	end generate;
+
+	g_dac:if G_DAC_FILE /= "" generate
+
+		p_dac:process
+		file dac_file : char_file_t;
+		variable v_t0		: time;
+		variable v_count	: natural;
+		variable v_warned	: boolean := false;
+		begin
+
+			-- two edges give the clock period, the first window starts at the second
+			wait until rising_edge(dac_clk_i);
+			v_t0 := now;
+			wait until rising_edge(dac_clk_i);
+
+			file_open(dac_file, G_DAC_FILE, write_mode);
+			put_magic(dac_file, "DAC1");
+			put(dac_file, G_DAC_WINDOW, 4);
+			put(dac_file, (now - v_t0) / 1 ps, 4);
+			put(dac_file, now / 1 ns, 4);
+
+			loop
+				v_count := 0;
+				for i in 1 to G_DAC_WINDOW loop
+					if dac_i = '1' then
+						v_count := v_count + 1;
+					elsif dac_i /= '0' and not v_warned then
+						report "sim_audio_sink: DAC bitstream is " & std_logic'image(dac_i) severity warning;
+						v_warned := true;
+					end if;
+					wait until rising_edge(dac_clk_i);
+				end loop;
+				put(dac_file, v_count, 2);
+			end loop;
+
+		end process;
+
+	end generate;
+
+end rtl;
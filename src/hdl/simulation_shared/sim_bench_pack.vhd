@@ -0,0 +1,69 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2026 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+-- Company:          Dossytronics
+-- Engineer:         Dominic Beesley
+--
+-- Create Date:      18/10/2026
+-- Design Name:
+-- Module Name:      sim_bench_pack
+-- Project Name:
+-- Target Devices:
+-- Tool versions:
+-- Description:      Simulator throughput benchmark support
+-- Dependencies:
+--
+-- Revision:
+-- Additional Comments:
+--                   A bench calls sim_bench_time(output_path(runner_cfg)) just
+--                   before test_runner_cleanup, it writes the simulated time to
+--                   simtime.txt in the test's output path for blitsim.benchmark
+--                   to work out simulated us per wall clock second
+--
+----------------------------------------------------------------------------------
+
+library std;
+use std.textio.all;
+
+package sim_bench_pack is
+
+	constant SIM_BENCH_FILE : string := "simtime.txt";
+
+	procedure sim_bench_time(path : string);
+
+end package;
+
+package body sim_bench_pack is
+
+	procedure sim_bench_time(path : string) is
+	file f : text;
+	variable l : line;
+	begin
+		file_open(f, path & SIM_BENCH_FILE, write_mode);
+		-- as a time literal, now / 1 ps would overflow a 32 bit integer after 2 ms
+		write(l, time'image(now));
+		writeline(f, l);
+		file_close(f);
+	end procedure;
+
+end package body;
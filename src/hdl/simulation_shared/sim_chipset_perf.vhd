@@ -0,0 +1,124 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2021 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+
+-- Company: 				Dossytronics
+-- Engineer: 				Dominic Beesley
+-- 
+-- Create Date:    		18/10/2026
+-- Design Name: 
+-- Module Name:    		work.sim_chipset_perf
+-- Project Name: 
+-- Target Devices: 
+-- Tool versions: 
+-- Description: 			Simulation only sampler of the chipset's performance
+--								counters to a log file
+-- Dependencies: 
+--
+-- Revision: 
+-- Additional Comments: 
+--
+-- The counters of chipset/fb_chipset_perf.vhd are sampled every G_PERIOD
+-- clocks, and when flush_i goes high, a line is logged when any of them has
+-- changed since the last:
+--		clock_ps <clock period in ps>
+--		count <number of counters>
+--		<clock> <counter 0> <counter 1> ...
+-- clocks are counted from the first clock edge, the counters are in hex.
+-- The counters may be cleared by the code under test, see blitsim.perf for
+-- how that is handled.
+----------------------------------------------------------------------------------
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library std;
+use std.textio.all;
+
+library work;
+use work.fishbone.all;
+use work.fb_chipset_pack.all;
+
+entity sim_chipset_perf is
+generic (
+		G_FILE					: string;
+		G_PERIOD					: positive := 10000
+	);
+port (
+
+		fb_syscon_i				: in	fb_syscon_t;
+
+		ctr_i						: in	perf_ctr_arr(0 to PERF_COUNT-1);
+
+		flush_i					: in	std_logic := '0'
+	);
+
+end sim_chipset_perf;
+
+architecture rtl of sim_chipset_perf is
+begin
+
+	p_log:process
+	file log_file : text;
+	variable l			: line;
+	variable v_clk		: natural := 0;
+	variable v_t0		: time;
+	variable v_next	: natural;
+	variable v_last	: perf_ctr_arr(0 to PERF_COUNT-1) := (others => (others => '0'));
+	variable v_flush	: std_logic := '0';
+	begin
+
+		wait until rising_edge(fb_syscon_i.clk);
+		v_t0 := now;
+		wait until rising_edge(fb_syscon_i.clk);
+		v_clk := 1;
+		v_next := G_PERIOD;
+
+		file_open(log_file, G_FILE, write_mode);
+		write(l, "clock_ps " & integer'image((now - v_t0) / 1 ps));
+		writeline(log_file, l);
+		write(l, "count " & integer'image(PERF_COUNT));
+		writeline(log_file, l);
+
+		loop
+			if v_clk >= v_next or (flush_i = '1' and v_flush = '0') then
+				if ctr_i /= v_last then
+					write(l, integer'image(v_clk));
+					for I in ctr_i'range loop
+						-- to_hstring keeps the top bit, integer'image would not
+						write(l, " " & to_hstring(ctr_i(I)));
+					end loop;
+					writeline(log_file, l);
+					v_last := ctr_i;
+				end if;
+				v_next := v_clk + G_PERIOD;
+			end if;
+			v_flush := flush_i;
+
+			wait until rising_edge(fb_syscon_i.clk);
+			v_clk := v_clk + 1;
+		end loop;
+
+	end process;
+
+end rtl;
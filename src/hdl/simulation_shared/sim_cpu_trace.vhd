@@ -0,0 +1,168 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2021 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+
+-- Company: 				Dossytronics
+-- Engineer: 				Dominic Beesley
+-- 
+-- Create Date:    		18/10/2026
+-- Design Name: 
+-- Module Name:    		work.sim_cpu_trace
+-- Project Name: 
+-- Target Devices: 
+-- Tool versions: 
+-- Description: 			Simulation only instruction trace of a 6502 family CPU
+--								to a binary file
+-- Dependencies: 
+--
+-- Revision: 
+-- Additional Comments: 
+--
+-- The trace watches a CPU's own signals, a cycle completes on a rising edge
+-- of clk_i with clken_i high (T65's Enable, the 65816's RDY) and it is an
+-- opcode fetch when sync_i is high with it (T65's SYNC, VPA and VDA on a
+-- 65816), A_i and D_i are the address and data of that cycle.
+--
+-- The file starts with a 16 byte header:
+--		"CPUT", version (1), 0, 0, 0,
+--		clock period in ps (32 bit), 0 (32 bit)
+-- followed by an 8 byte record per instruction, written at the next opcode
+-- fetch:
+--		address of the opcode (24 bit), opcode,
+--		clocks (24 bit), cycles (8 bit)
+-- all little endian. An instruction's cycles are its opcode fetch and the
+-- cycles that complete after it up to the next, its clocks are the clocks of
+-- clk_i from the end of the cycle before its opcode fetch to the end of its
+-- last cycle, so they take in the clocks the CPU was held for. Clocks over
+-- 16777215 and cycles over 255 are clamped. An interrupt's cycles are counted
+-- to the instruction it interrupted, the last instruction is not logged.
+--
+-- With G_FILE = "" the trace does nothing.
+----------------------------------------------------------------------------------
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+entity sim_cpu_trace is
+generic (
+		G_FILE					: string := ""
+	);
+port (
+
+		clk_i						: in	std_logic;
+		clken_i					: in	std_logic;
+
+		sync_i					: in	std_logic;
+		A_i						: in	std_logic_vector(23 downto 0);
+		D_i						: in	std_logic_vector(7 downto 0)
+	);
+
+end sim_cpu_trace;
+
+architecture rtl of sim_cpu_trace is
+begin
+
+	g_trace:if G_FILE /= "" generate
+
+		p_trace:process
+		type char_file_t is file of character;
+		file log_file : char_file_t;
+
+		variable v_clk		: natural := 0;
+		variable v_t0		: time;
+		variable v_period	: natural;
+
+		variable v_open	: boolean := false;		-- an instruction has been fetched
+		variable v_A		: std_logic_vector(23 downto 0);
+		variable v_op		: std_logic_vector(7 downto 0);
+		variable v_start	: natural := 0;			-- end of the cycle before its opcode fetch
+		variable v_last	: natural := 0;			-- end of the last cycle
+		variable v_cycles	: natural := 0;
+
+		procedure put(n : natural; bytes : natural) is
+		variable v : unsigned(31 downto 0);
+		begin
+			v := to_unsigned(n, 32);
+			for i in 0 to bytes-1 loop
+				write(log_file, character'val(to_integer(v(i*8+7 downto i*8))));
+			end loop;
+		end procedure;
+
+		function clamp(n : natural; max : natural) return natural is
+		begin
+			if n > max then
+				return max;
+			else
+				return n;
+			end if;
+		end function;
+
+		begin
+
+			wait until rising_edge(clk_i);
+			v_t0 := now;
+			wait until rising_edge(clk_i);
+			v_period := (now - v_t0) / 1 ps;
+			v_clk := 1;
+
+			file_open(log_file, G_FILE, write_mode);
+			write(log_file, 'C');
+			write(log_file, 'P');
+			write(log_file, 'U');
+			write(log_file, 'T');
+			put(1, 1);
+			put(0, 1);
+			put(0, 1);
+			put(0, 1);
+			put(v_period, 4);
+			put(0, 4);
+
+			loop
+				-- RDY is an open drain pulled up to 'H'
+				if to_X01(clken_i) = '1' then
+					if to_X01(sync_i) = '1' then
+						if v_open then
+							put(to_integer(unsigned(v_A)), 3);
+							put(to_integer(unsigned(v_op)), 1);
+							put(clamp(v_last - v_start, 16#FFFFFF#), 3);
+							put(clamp(v_cycles, 255), 1);
+						end if;
+						v_open := true;
+						v_A := to_X01(A_i);
+						v_op := to_X01(D_i);
+						v_start := v_last;
+						v_cycles := 0;
+					end if;
+					v_cycles := v_cycles + 1;
+					v_last := v_clk;
+				end if;
+
+				wait until rising_edge(clk_i);
+				v_clk := v_clk + 1;
+			end loop;
+
+		end process;
+
+	end generate;
+
+end rtl;
@@ -0,0 +1,174 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2026 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+
+-- Company: 				Dossytronics
+-- Engineer: 				Dominic Beesley
+--
+-- Create Date:    		18/10/2026
+-- Design Name:
+-- Module Name:    		work.sim_fastsim_pack
+-- Project Name:
+-- Target Devices:
+-- Tool versions:
+-- Description: 			The fast-sim profile of the C20K benches (see blitsim.fastsim)
+-- Dependencies:
+--
+-- Revision:
+-- Additional Comments:
+--
+-- The C20K boards' fast clocks, 360 MHz for the video DACs, 270 MHz for the
+-- HDMI serializers and 266 MHz for the chroma DAC, make most of a full system
+-- run's events but are only needed by the serializers. With the fast-sim
+-- profile on, the Gowin stand-ins in gowin_prim_standin.vhd that are in one
+-- of the domains below, by their instance path, run at pixel rate: an rPLL
+-- stops its outputs after a few edges, enough for what it feeds to measure
+-- them, a CLKDIV measures its input and then makes its output itself, and an
+-- OSER10 puts out D0 on each PCLK instead of ten bits on FCLK. Everything
+-- from the pixel clocks down is as before.
+--
+-- A test bench drives fastsim_mode from its generics:
+--
+--		fastsim_mode <= fastsim_flags(G_FAST_SIM, G_FULL_DOMAINS);
+--
+-- where G_FULL_DOMAINS is a comma separated list of the domains to keep at
+-- full fidelity. Left undriven the profile is off.
+--
+--		hdmi		the HDMI PLL, its divide by 5 and the TMDS serializers
+--		dac		the 360 MHz PLL, its divide by 5 and the RGB DACs
+--		chroma	the PAL subcarrier PLL, its dividers and the chroma DAC
+--
+----------------------------------------------------------------------------------
+library ieee;
+use ieee.std_logic_1164.all;
+
+package sim_fastsim_pack is
+
+	-- 0: the profile is on, 1..3: hdmi, dac and chroma are at full fidelity
+	signal fastsim_mode : std_logic_vector(0 to 3) := "0000";
+
+	function fastsim_flags(fast : boolean; full : string) return std_logic_vector;
+	function fastsim_domain(path : string) return natural;
+	function fastsim_fast(mode : std_logic_vector(0 to 3); path : string) return boolean;
+
+end sim_fastsim_pack;
+
+package body sim_fastsim_pack is
+
+	type t_domain is record
+		name	: string(1 to 6);
+		flag	: natural;
+	end record;
+
+	type t_domains is array(natural range <>) of t_domain;
+
+	constant DOMAINS : t_domains := (
+		("hdmi  ", 1),
+		("dac   ", 2),
+		("chroma", 3)
+		);
+
+	-- (instance label, domain flag) in order, the first found in a path wins
+	type t_match is record
+		inst	: string(1 to 16);
+		flag	: natural;
+	end record;
+
+	type t_matches is array(natural range <>) of t_match;
+
+	constant MATCHES : t_matches := (
+		(":e_vid15tohdmi: ", 1),
+		(":e_chroma_dac:  ", 3),
+		(":e_pal_pll:     ", 3),
+		(":e_clkdiv_cdac_ ", 3),
+		(":e_mono_dac_    ", 2),
+		(":e_pll_27_360:  ", 2),
+		(":clkdiv5:       ", 2)
+		);
+
+	function lower(s : string) return string is
+		variable r : string(1 to s'length) := s;
+	begin
+		for i in r'range loop
+			if r(i) >= 'A' and r(i) <= 'Z' then
+				r(i) := character'val(character'pos(r(i)) + 32);
+			end if;
+		end loop;
+		return r;
+	end function;
+
+	function trim(s : string) return string is
+	begin
+		for i in s'reverse_range loop
+			if s(i) /= ' ' then
+				return s(s'left to i);
+			end if;
+		end loop;
+		return "";
+	end function;
+
+	function contains(s : string; sub : string) return boolean is
+	begin
+		for i in s'left to s'right - sub'length + 1 loop
+			if s(i to i + sub'length - 1) = sub then
+				return true;
+			end if;
+		end loop;
+		return false;
+	end function;
+
+	function fastsim_flags(fast : boolean; full : string) return std_logic_vector is
+		variable r : std_logic_vector(0 to 3) := "0000";
+		variable l : string(1 to full'length + 2) := "," & lower(full) & ",";
+	begin
+		if fast then
+			r(0) := '1';
+		end if;
+		for i in DOMAINS'range loop
+			if contains(l, "," & trim(DOMAINS(i).name) & ",") then
+				r(DOMAINS(i).flag) := '1';
+			end if;
+		end loop;
+		return r;
+	end function;
+
+	-- the domain flag of an instance, 0 if it is not in one
+	function fastsim_domain(path : string) return natural is
+		constant p : string(1 to path'length) := lower(path);
+	begin
+		for i in MATCHES'range loop
+			if contains(p, trim(MATCHES(i).inst)) then
+				return MATCHES(i).flag;
+			end if;
+		end loop;
+		return 0;
+	end function;
+
+	-- true when the instance at path should run at pixel rate
+	function fastsim_fast(mode : std_logic_vector(0 to 3); path : string) return boolean is
+		constant d : natural := fastsim_domain(path);
+	begin
+		return mode(0) = '1' and d /= 0 and mode(d) /= '1';
+	end function;
+
+end sim_fastsim_pack;
@@ -0,0 +1,220 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2021 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+
+-- Company: 				Dossytronics
+-- Engineer: 				Dominic Beesley
+-- 
+-- Create Date:    		18/10/2026
+-- Design Name: 
+-- Module Name:    		work.sim_fb_mailbox
+-- Project Name: 
+-- Target Devices: 
+-- Tool versions: 
+-- Description: 			Simulation only mailbox, test code writes results, checkpoints,
+--								clock counts and text to it and the bench ends the run
+--								when it writes an end code
+-- Dependencies: 
+--
+-- Revision: 
+-- Additional Comments: 
+--
+-- The mailbox listens to a peripheral port, the SYS port of a board, and takes
+-- the writes to its eight registers from G_BASE, it never drives the bus so the
+-- peripheral the addresses decode to still answers them. The default is
+-- FF FEF8-FEFF, in the Tube's page which has nothing fitted in the benches,
+-- the last register is where sim_SYS_tb's halt register is so the test ROMs
+-- that write that work as they are.
+--
+--		+0	PRINT			a character of text, LF ends a line, CR is ignored
+--		+1	CHECKPOINT	the number of a checkpoint reached
+--		+2	DATA			a byte of a 32 bit value, shifted in from the top so
+--							write the least significant byte first
+--		+3	VALUE			log the value in DATA with this id
+--		+4	LAP			log the clocks since the last write to LAP with this id
+--		+7	RESULT		bit 7 set, the end of the test, bit 6 set if it failed
+--							bit 7 clear, test number bits 5..0 passed, or failed
+--							with bit 6 set
+--
+-- done_o goes high with an end code, failed_o with a failed test or end code,
+-- active_o with the first write to the mailbox. The log, a line per write:
+--		clock_ps <clock period in ps>
+--		print <clock> <text>
+--		checkpoint <clock> <n>
+--		value <clock> <id> <value in hex>
+--		lap <clock> <id> <clocks>
+--		pass <clock> <n>, fail <clock> <n>
+--		end <clock> pass, end <clock> fail
+-- clocks are counted from the first clock edge. The text lines are also
+-- reported as notes.
+--
+-- With G_FILE = "" there is no log, the outputs still work.
+----------------------------------------------------------------------------------
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library std;
+use std.textio.all;
+
+library work;
+use work.fishbone.all;
+
+entity sim_fb_mailbox is
+generic (
+		G_FILE					: string := "";
+		G_BASE					: std_logic_vector(23 downto 0) := x"FFFEF8"
+	);
+port (
+
+		fb_syscon_i				: in	fb_syscon_t;
+
+		fb_c2p_i					: in	fb_con_o_per_i_t;
+		fb_p2c_i					: in	fb_con_i_per_o_t;
+
+		active_o					: out	std_logic;
+		done_o					: out	std_logic;
+		failed_o					: out	std_logic
+	);
+
+end sim_fb_mailbox;
+
+architecture rtl of sim_fb_mailbox is
+begin
+
+	p_mbox:process
+	file log_file : text;
+	variable l			: line;
+	variable v_text	: line;
+	variable v_clk		: natural := 0;
+	variable v_t0		: time;
+	variable v_reg		: natural range 0 to 7;
+	variable v_D		: std_logic_vector(7 downto 0);
+	variable v_data	: std_logic_vector(31 downto 0) := (others => '0');
+	variable v_lap		: natural := 0;
+
+	procedure log(kind : string; s : string) is
+	begin
+		if G_FILE /= "" then
+			write(l, kind & " " & integer'image(v_clk) & " " & s);
+			writeline(log_file, l);
+		end if;
+	end procedure;
+
+	procedure print_line is
+	begin
+		if v_text = null then
+			write(v_text, string'(""));
+		end if;
+		report "mailbox: " & v_text.all severity note;
+		log("print", v_text.all);
+		deallocate(v_text);
+	end procedure;
+
+	begin
+
+		active_o <= '0';
+		done_o <= '0';
+		failed_o <= '0';
+
+		wait until rising_edge(fb_syscon_i.clk);
+		v_t0 := now;
+		wait until rising_edge(fb_syscon_i.clk);
+		v_clk := 1;
+
+		if G_FILE /= "" then
+			file_open(log_file, G_FILE, write_mode);
+			write(l, "clock_ps " & integer'image((now - v_t0) / 1 ps));
+			writeline(log_file, l);
+		end if;
+
+		loop
+			if fb_syscon_i.rst = '0'
+				and fb_c2p_i.cyc = '1' and fb_c2p_i.A_stb = '1' and fb_p2c_i.stall = '0' and fb_c2p_i.we = '1'
+				and fb_c2p_i.A(23 downto 3) = G_BASE(23 downto 3) then
+
+				v_reg := to_integer(unsigned(fb_c2p_i.A(2 downto 0)));
+
+				-- the data may come with the address or later in the cycle
+				while fb_c2p_i.D_wr_stb /= '1' and fb_c2p_i.cyc = '1' loop
+					wait until rising_edge(fb_syscon_i.clk);
+					v_clk := v_clk + 1;
+				end loop;
+
+				if fb_c2p_i.D_wr_stb = '1' then
+					v_D := fb_c2p_i.D_wr;
+					active_o <= '1';
+
+					case v_reg is
+						when 0 =>
+							if v_D = x"0A" then
+								print_line;
+							elsif v_D /= x"0D" then
+								write(v_text, character'val(to_integer(unsigned(v_D))));
+							end if;
+						when 1 =>
+							log("checkpoint", integer'image(to_integer(unsigned(v_D))));
+						when 2 =>
+							v_data := v_D & v_data(31 downto 8);
+						when 3 =>
+							log("value", integer'image(to_integer(unsigned(v_D))) & " " & to_hstring(v_data));
+						when 4 =>
+							log("lap", integer'image(to_integer(unsigned(v_D))) & " " & integer'image(v_clk - v_lap));
+							v_lap := v_clk;
+						when 7 =>
+							if v_D(6) = '1' then
+								failed_o <= '1';
+							end if;
+							if v_D(7) = '1' then
+								if v_text /= null then
+									print_line;
+								end if;
+								if v_D(6) = '1' then
+									log("end", "fail");
+								else
+									log("end", "pass");
+								end if;
+								done_o <= '1';
+								if G_FILE /= "" then
+									file_close(log_file);
+								end if;
+								wait;
+							elsif v_D(6) = '1' then
+								report "mailbox: test " & integer'image(to_integer(unsigned(v_D(5 downto 0)))) & " failed" severity warning;
+								log("fail", integer'image(to_integer(unsigned(v_D(5 downto 0)))));
+							else
+								log("pass", integer'image(to_integer(unsigned(v_D(5 downto 0)))));
+							end if;
+						when others =>
+							null;
+					end case;
+				end if;
+			end if;
+
+			wait until rising_edge(fb_syscon_i.clk);
+			v_clk := v_clk + 1;
+		end loop;
+
+	end process;
+
+end rtl;
@@ -0,0 +1,206 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2021 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+
+-- Company: 				Dossytronics
+-- Engineer: 				Dominic Beesley
+-- 
+-- Create Date:    		18/10/2026
+-- Design Name: 
+-- Module Name:    		work.sim_fb_monitor
+-- Project Name: 
+-- Target Devices: 
+-- Tool versions: 
+-- Description: 			Passive monitor for the controller side of an intcon, logs every
+--								transaction to a binary file for blitsim.fbmon
+-- Dependencies: 
+--
+-- Revision: 
+-- Additional Comments: 
+--
+-- The file starts with a 16 byte header:
+--		"FBMN", version (1), controller count, peripheral count, 0,
+--		clock period in ps (32 bit), 0 (32 bit)
+-- followed by a 16 byte record per transaction, written when it is acked:
+--		controller, peripheral, flags (bit 0 = write), data,
+--		address (32 bit), start clock (32 bit),
+--		clocks from start to address accepted (16 bit), clocks from start to ack (16 bit)
+-- all little endian. A transaction starts on the first clock that the controller
+-- has cyc and A_stb, the address is accepted when stall is low and it ends with
+-- ack. Clocks are counted from the first clock edge, waits over 65535 clocks
+-- are clamped.
+--
+-- With G_FILE = "" the monitor does nothing.
+----------------------------------------------------------------------------------
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library work;
+use work.fishbone.all;
+use work.common.all;
+
+entity sim_fb_monitor is
+generic (
+		G_FILE					: string := "";
+		G_CONTROLLER_COUNT	: positive;
+		G_PERIPHERAL_COUNT	: positive
+	);
+port (
+
+		fb_syscon_i				: in	fb_syscon_t;
+
+		fb_con_c2p_i			: in	fb_con_o_per_i_arr(G_CONTROLLER_COUNT-1 downto 0);
+		fb_con_p2c_i			: in	fb_con_i_per_o_arr(G_CONTROLLER_COUNT-1 downto 0);
+
+		-- the peripheral each controller's address decodes to, tie to 0 if not known
+		peripheral_sel_i		: in	fb_arr_unsigned(G_CONTROLLER_COUNT-1 downto 0)(numbits(G_PERIPHERAL_COUNT)-1 downto 0) := (others => (others => '0'))
+	);
+
+end sim_fb_monitor;
+
+architecture rtl of sim_fb_monitor is
+begin
+
+	g_mon:if G_FILE /= "" generate
+
+		p_mon:process
+		type char_file_t is file of character;
+		file log_file : char_file_t;
+
+		type t_nat_arr is array(0 to G_CONTROLLER_COUNT-1) of natural;
+		type t_bool_arr is array(0 to G_CONTROLLER_COUNT-1) of boolean;
+		type t_slv_arr is array(0 to G_CONTROLLER_COUNT-1) of std_logic_vector(23 downto 0);
+		type t_byte_arr is array(0 to G_CONTROLLER_COUNT-1) of std_logic_vector(7 downto 0);
+
+		variable v_open	: t_bool_arr := (others => false);	-- transaction in progress
+		variable v_acc		: t_bool_arr := (others => false);	-- address accepted
+		variable v_start	: t_nat_arr;
+		variable v_wait	: t_nat_arr;
+		variable v_per		: t_nat_arr;
+		variable v_we		: t_bool_arr;
+		variable v_A		: t_slv_arr;
+		variable v_D		: t_byte_arr;
+
+		variable v_clk		: natural := 0;
+		variable v_t0		: time;
+		variable v_period	: natural;
+
+		procedure put(n : natural; bytes : natural) is
+		variable v : unsigned(31 downto 0);
+		begin
+			v := to_unsigned(n, 32);
+			for i in 0 to bytes-1 loop
+				write(log_file, character'val(to_integer(v(i*8+7 downto i*8))));
+			end loop;
+		end procedure;
+
+		function clamp(n : natural) return natural is
+		begin
+			if n > 65535 then
+				return 65535;
+			else
+				return n;
+			end if;
+		end function;
+
+		begin
+
+			wait until rising_edge(fb_syscon_i.clk);
+			v_t0 := now;
+			wait until rising_edge(fb_syscon_i.clk);
+			v_period := (now - v_t0) / 1 ps;
+			v_clk := 1;
+
+			file_open(log_file, G_FILE, write_mode);
+			write(log_file, 'F');
+			write(log_file, 'B');
+			write(log_file, 'M');
+			write(log_file, 'N');
+			put(1, 1);
+			put(G_CONTROLLER_COUNT, 1);
+			put(G_PERIPHERAL_COUNT, 1);
+			put(0, 1);
+			put(v_period, 4);
+			put(0, 4);
+
+			loop
+				if fb_syscon_i.rst = '1' then
+					v_open := (others => false);
+				else
+					for I in 0 to G_CONTROLLER_COUNT-1 loop
+						if not v_open(I) and fb_con_c2p_i(I).cyc = '1' and fb_con_c2p_i(I).A_stb = '1' then
+							v_open(I) := true;
+							v_acc(I) := false;
+							v_start(I) := v_clk;
+							v_wait(I) := 0;
+							v_per(I) := to_integer(peripheral_sel_i(I));
+							v_we(I) := fb_con_c2p_i(I).we = '1';
+							v_A(I) := fb_con_c2p_i(I).A;
+							v_D(I) := (others => '0');
+						end if;
+
+						if v_open(I) then
+							if fb_con_c2p_i(I).cyc = '0' then
+								-- abandoned without an ack
+								v_open(I) := false;
+							else
+								if not v_acc(I) and fb_con_p2c_i(I).stall = '0' then
+									v_acc(I) := true;
+									v_wait(I) := v_clk - v_start(I);
+								end if;
+								if v_we(I) and fb_con_c2p_i(I).D_wr_stb = '1' then
+									v_D(I) := fb_con_c2p_i(I).D_wr;
+								end if;
+								if fb_con_p2c_i(I).ack = '1' then
+									if not v_we(I) then
+										v_D(I) := fb_con_p2c_i(I).D_rd;
+									end if;
+									put(I, 1);
+									put(v_per(I), 1);
+									if v_we(I) then
+										put(1, 1);
+									else
+										put(0, 1);
+									end if;
+									put(to_integer(unsigned(v_D(I))), 1);
+									put(to_integer(unsigned(v_A(I))), 4);
+									put(v_start(I), 4);
+									put(clamp(v_wait(I)), 2);
+									put(clamp(v_clk - v_start(I)), 2);
+									v_open(I) := false;
+								end if;
+							end if;
+						end if;
+					end loop;
+				end if;
+
+				wait until rising_edge(fb_syscon_i.clk);
+				v_clk := v_clk + 1;
+			end loop;
+
+		end process;
+
+	end generate;
+
+end rtl;
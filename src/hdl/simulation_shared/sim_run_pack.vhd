@@ -0,0 +1,87 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2026 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+-- Company:          Dossytronics
+-- Engineer:         Dominic Beesley
+--
+-- Create Date:      18/10/2026
+-- Design Name:
+-- Module Name:      sim_run_pack
+-- Project Name:
+-- Target Devices:
+-- Tool versions:
+-- Description:      The VUnit test of a bench that runs test code to the
+--                   sim_SYS_tb halt register
+-- Dependencies:
+--
+-- Revision:
+-- Additional Comments:
+--                   A bench's VUnit process is
+--
+--                     test_runner_setup(runner, runner_cfg);
+--                     sim_run_to_halt(runner_cfg, sim_ENDSIM, sim_reg_halt);
+--                     test_runner_cleanup(runner);
+--
+--                   with no run() of its own so VUnit gives it the one test,
+--                   "all". The test passes when the code writes the halt
+--                   register, which stops the stimulus, and fails when the
+--                   stimulus gives up at its timeout.
+--
+----------------------------------------------------------------------------------
+
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+library work;
+use work.sim_bench_pack.all;
+
+package sim_run_pack is
+
+	procedure sim_run_to_halt(
+		runner_cfg			: string;
+		signal endsim		: in std_logic;
+		signal halt			: in std_logic
+		);
+
+end package;
+
+package body sim_run_pack is
+
+	procedure sim_run_to_halt(
+		runner_cfg			: string;
+		signal endsim		: in std_logic;
+		signal halt			: in std_logic
+		) is
+	begin
+		wait until endsim = '1';
+		check(halt = '1', "the test code did not write the halt register before the timeout");
+
+		wait for 3 us;
+
+		sim_bench_time(output_path(runner_cfg));
+	end procedure;
+
+end package body;
@@ -0,0 +1,196 @@
+-- MIT License
+-- -----------------------------------------------------------------------------
+-- Copyright (c) 2026 Dominic Beesley https://github.com/dominicbeesley
+--
+-- Permission is hereby granted, free of charge, to any person obtaining a copy
+-- of this software and associated documentation files (the "Software"), to deal
+-- in the Software without restriction, including without limitation the rights
+-- to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+-- copies of the Software, and to permit persons to whom the Software is
+-- furnished to do so, subject to the following conditions:
+--
+-- The above copyright notice and this permission notice shall be included in
+-- all copies or substantial portions of the Software.
+--
+-- THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+-- IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+-- FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+-- AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+-- LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+-- OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+-- THE SOFTWARE.
+-- ----------------------------------------------------------------------
+
+
+-- Company: 				Dossytronics
+-- Engineer: 				Dominic Beesley
+--
+-- Create Date:    		18/10/2026
+-- Design Name:
+-- Module Name:    		work.sim_video_sink
+-- Project Name:
+-- Target Devices:
+-- Tool versions:
+-- Description: 			Captures the frames of a video stream as raw RGB for blitsim.frames
+-- Dependencies:
+--
+-- Revision:
+-- Additional Comments:
+--
+-- Pixels are taken on clk_i when clken_i is high and blank_i is low, a line ends
+-- when blank_i goes high and a frame ends on a rising edge of vsync_i, either
+-- polarity of sync works as both edges are in the vertical blanking. The
+-- partial frame before the first vsync is dropped.
+--
+-- The file starts with a 16 byte header:
+--		"VFRM", version (1), bytes per pixel (3), 0, 0,
+--		width (16 bit), height (16 bit), 0 (32 bit)
+-- followed by a fixed size record per frame, written at the frame's vsync:
+--		frame number (32 bit), time in us (32 bit), lines seen (16 bit),
+--		longest line seen (16 bit), 0 (32 bit),
+--		then G_HEIGHT lines of G_WIDTH pixels of R, G, B bytes
+-- all little endian. Pixels past G_WIDTH or lines past G_HEIGHT are dropped,
+-- those not seen are black. As every record is the same size the file can be
+-- memory mapped as an array of frames.
+--
+-- Components of less than 8 bits are widened by repeating their top bits, so
+-- that full scale is 255. With G_FILE = "" the sink does nothing.
+----------------------------------------------------------------------------------
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+entity sim_video_sink is
+generic (
+		G_FILE					: string := "";
+		G_WIDTH					: positive := 720;
+		G_HEIGHT					: positive := 576;
+		G_BITS					: positive := 8;				-- bits per component
+		G_MAX_FRAMES			: natural := 0					-- stop after this many frames, 0 for no limit
+	);
+port (
+		clk_i						: in	std_logic;
+		clken_i					: in	std_logic := '1';
+
+		R_i						: in	std_logic_vector(G_BITS-1 downto 0);
+		G_i						: in	std_logic_vector(G_BITS-1 downto 0);
+		B_i						: in	std_logic_vector(G_BITS-1 downto 0);
+		blank_i					: in	std_logic;
+		vsync_i					: in	std_logic
+	);
+
+end sim_video_sink;
+
+architecture rtl of sim_video_sink is
+begin
+
+	g_sink:if G_FILE /= "" generate
+
+		p_sink:process
+		type char_file_t is file of character;
+		file frame_file : char_file_t;
+
+		type t_frame is array(0 to G_WIDTH*G_HEIGHT*3-1) of character;
+
+		variable v_frame	: t_frame;
+		variable v_count	: natural := 0;
+		variable v_synced	: boolean := false;
+		variable v_in_line: boolean := false;
+		variable v_vs		: std_logic := '0';
+		variable v_x		: natural := 0;
+		variable v_y		: natural := 0;
+		variable v_width	: natural := 0;
+		variable v_ix		: natural;
+
+		procedure put(n : natural; bytes : natural) is
+		variable v : unsigned(31 downto 0);
+		begin
+			v := to_unsigned(n, 32);
+			for i in 0 to bytes-1 loop
+				write(frame_file, character'val(to_integer(v(i*8+7 downto i*8))));
+			end loop;
+		end procedure;
+
+		function widen(c : std_logic_vector) return character is
+		variable v : unsigned(7 downto 0);
+		begin
+			for i in 0 to 7 loop
+				v(7-i) := to_x01(c(c'high - (i mod c'length)));
+			end loop;
+			if is_x(std_logic_vector(v)) then
+				return character'val(0);
+			end if;
+			return character'val(to_integer(v));
+		end function;
+
+		begin
+
+			file_open(frame_file, G_FILE, write_mode);
+			write(frame_file, 'V');
+			write(frame_file, 'F');
+			write(frame_file, 'R');
+			write(frame_file, 'M');
+			put(1, 1);
+			put(3, 1);
+			put(0, 2);
+			put(G_WIDTH, 2);
+			put(G_HEIGHT, 2);
+			put(0, 4);
+
+			v_frame := (others => character'val(0));
+
+			loop
+				wait until rising_edge(clk_i);
+
+				if clken_i = '1' then
+
+					if vsync_i = '1' and v_vs /= '1' then
+						if v_synced and v_y > 0 then
+							put(v_count, 4);
+							put(now / 1 us, 4);
+							put(v_y, 2);
+							put(v_width, 2);
+							put(0, 4);
+							for i in t_frame'range loop
+								write(frame_file, v_frame(i));
+							end loop;
+							v_count := v_count + 1;
+							v_frame := (others => character'val(0));
+							exit when G_MAX_FRAMES /= 0 and v_count >= G_MAX_FRAMES;
+						end if;
+						v_synced := true;
+						v_in_line := false;
+						v_x := 0;
+						v_y := 0;
+						v_width := 0;
+					end if;
+					v_vs := vsync_i;
+
+					if blank_i = '0' then
+						if v_synced and v_x < G_WIDTH and v_y < G_HEIGHT then
+							v_ix := (v_y * G_WIDTH + v_x) * 3;
+							v_frame(v_ix) := widen(R_i);
+							v_frame(v_ix + 1) := widen(G_i);
+							v_frame(v_ix + 2) := widen(B_i);
+						end if;
+						v_x := v_x + 1;
+						v_in_line := true;
+					elsif v_in_line then
+						if v_x > v_width then
+							v_width := v_x;
+						end if;
+						v_x := 0;
+						v_y := v_y + 1;
+						v_in_line := false;
+					end if;
+
+				end if;
+			end loop;
+
+			file_close(frame_file);
+			wait;
+		end process;
+
+	end generate;
+
+end rtl;
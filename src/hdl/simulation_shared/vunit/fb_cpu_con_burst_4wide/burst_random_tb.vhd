@@ -0,0 +1,320 @@
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library std;
+use std.textio.all;
+
+library work;
+use work.fishbone.all;
+use work.common.all;
+use work.fb_sys_pack.all;
+
+-- fb_cpu_con_burst with a random stream of cycles from run.py (blitsim.burst).
+--
+-- p_main plays the cycles in cycles.txt as a wrapper would, holding each
+-- lane's D_wr_stb back by the clocks given, and checks ack_lane_o, rdy_o and
+-- the read bytes of the lanes asked for when ack_o comes. p_mon checks every
+-- access that sim_fb_per_mem takes, in order, with bus.txt: direction, address,
+-- instruction fetch and the byte written or read. stall_i follows the runs of
+-- free and stalled clocks in stall.txt, over and over. The first difference
+-- fails the test, the cycle or access is in the message.
+
+entity burst_random_tb is
+	generic (
+		runner_cfg : string;
+		G_MEM_SIZE			: natural := 256;
+		G_TIMEOUT			: positive := 1000		-- clocks a cycle may take
+		);
+end burst_random_tb;
+
+architecture rtl of burst_random_tb is
+
+	constant CLOCKSPEED : natural := 128;
+
+	constant CLOCK_PER : time := (1000000/CLOCKSPEED) * 1 ps;
+
+	constant G_BYTELANES : natural := 4;
+
+	signal i_fb_syscon : fb_syscon_t;
+	signal i_fb_con_c2p : fb_con_o_per_i_t;
+	signal i_fb_con_p2c : fb_con_i_per_o_t;
+	signal i_instr_fetch : std_logic;
+
+	signal 	ib_BE						: std_logic := '0';
+	signal 	ib_cyc					: std_logic := '0';
+	signal 	ib_A						: std_logic_vector(23 downto 0) := (others => '0');
+	signal 	ib_we						: std_logic := '0';
+	signal 	ib_lane_req				: std_logic_vector(G_BYTELANES-1 downto 0) := (others => '0');
+	signal 	ib_D_wr					: std_logic_vector((8 * G_BYTELANES)-1 downto 0) := (others => 'X');
+	signal 	ib_D_wr_stb				: std_logic_vector(G_BYTELANES-1 downto 0) := (others => '0');
+	signal 	ib_instr_fetch			: std_logic := '0';
+	signal 	ib_rdy					: std_logic;
+	signal 	ib_ack_lane				: std_logic_vector(G_BYTELANES-1 downto 0);
+	signal 	ib_ack					: std_logic;
+	signal 	ib_D_rd					: std_logic_vector((8 * G_BYTELANES)-1 downto 0);
+
+	signal 	r_per_stall 			: std_logic := '0';
+
+	signal	r_run						: std_logic := '0';
+	signal	r_bus_end				: boolean := false;
+
+begin
+	p_syscon_clk:process
+	begin
+		i_fb_syscon.clk <= '1';
+		wait for CLOCK_PER / 2;
+		i_fb_syscon.clk <= '0';
+		wait for CLOCK_PER / 2;
+	end process;
+
+	p_main:process
+	file cyc_file : text;
+	variable l : line;
+	variable v_ix : natural;
+	variable v_be : integer;
+	variable v_we : integer;
+	variable v_fetch : integer;
+	variable v_gap : integer;
+	type t_stb is array(0 to G_BYTELANES-1) of integer;
+	variable v_stb : t_stb;
+	variable v_lanes : std_logic_vector(G_BYTELANES-1 downto 0);
+	variable v_a : std_logic_vector(23 downto 0);
+	variable v_d : std_logic_vector((8 * G_BYTELANES)-1 downto 0);
+	variable v_rd : std_logic_vector((8 * G_BYTELANES)-1 downto 0);
+	variable v_clocks : natural;
+
+	-- lanes whose D_wr_stb is due v_clocks clocks into the cycle
+	procedure strobe is
+	begin
+		for i in 0 to G_BYTELANES-1 loop
+			if v_we = 1 and v_lanes(i) = '1' and v_stb(i) = v_clocks then
+				ib_D_wr_stb(i) <= '1';
+				ib_D_wr(8*i+7 downto 8*i) <= v_d(8*i+7 downto 8*i);
+			end if;
+		end loop;
+	end procedure;
+
+	begin
+
+		test_runner_setup(runner, runner_cfg);
+
+		while test_suite loop
+
+			if run("random") then
+
+				i_fb_syscon.rst <= '1';
+				i_fb_syscon.rst_state <= powerup;
+				wait for 1 us;
+				wait until rising_edge(i_fb_syscon.clk);
+				i_fb_syscon.rst <= '0';
+				i_fb_syscon.rst_state <= run;
+				for i in 0 to 3 loop
+					wait until rising_edge(i_fb_syscon.clk);
+				end loop;
+				r_run <= '1';
+
+				file_open(cyc_file, output_path(runner_cfg) & "cycles.txt", read_mode);
+				v_ix := 0;
+				while not endfile(cyc_file) loop
+					readline(cyc_file, l);
+					read(l, v_be);
+					read(l, v_we);
+					read(l, v_fetch);
+					read(l, v_gap);
+					for i in 0 to G_BYTELANES-1 loop
+						read(l, v_stb(i));
+					end loop;
+					hread(l, v_lanes);
+					hread(l, v_a);
+					hread(l, v_d);
+					hread(l, v_rd);
+
+					-- cyc low between cycles, one clock for back to back
+					for i in 1 to v_gap loop
+						wait until rising_edge(i_fb_syscon.clk);
+					end loop;
+
+					ib_BE <= b2s(v_be = 1);
+					ib_we <= b2s(v_we = 1);
+					ib_instr_fetch <= b2s(v_fetch = 1);
+					ib_lane_req <= v_lanes;
+					ib_A <= v_a;
+					ib_cyc <= '1';
+					v_clocks := 0;
+					strobe;
+
+					loop
+						wait until rising_edge(i_fb_syscon.clk);
+						if ib_ack = '1' then
+							exit;
+						end if;
+						v_clocks := v_clocks + 1;
+						if v_clocks > G_TIMEOUT then
+							error("cycle " & integer'image(v_ix) & " not acknowledged after " & integer'image(G_TIMEOUT) & " clocks");
+							exit;
+						end if;
+						strobe;
+					end loop;
+
+					check_equal(ib_ack_lane, v_lanes, "cycle " & integer'image(v_ix) & " ack_lane_o");
+					check_equal(ib_rdy, '1', "cycle " & integer'image(v_ix) & " rdy_o with ack_o");
+					if v_we = 0 then
+						for i in 0 to G_BYTELANES-1 loop
+							if v_lanes(i) = '1' then
+								check_equal(ib_D_rd(8*i+7 downto 8*i), v_rd(8*i+7 downto 8*i),
+									"cycle " & integer'image(v_ix) & " lane " & integer'image(i) & " read at " & to_hstring(v_a));
+							end if;
+						end loop;
+					end if;
+
+					ib_cyc <= '0';
+					ib_D_wr_stb <= (others => '0');
+					ib_D_wr <= (others => 'X');
+					v_ix := v_ix + 1;
+				end loop;
+				file_close(cyc_file);
+
+				for i in 0 to 7 loop
+					wait until rising_edge(i_fb_syscon.clk);
+				end loop;
+				check(r_bus_end, "fewer fishbone accesses than bus.txt has");
+				info("burst: " & integer'image(v_ix) & " cycles checked");
+
+			end if;
+
+		end loop;
+
+		wait for 3 us;
+
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+	-- the scoreboard for the fishbone side, an access is taken when sim_fb_per_mem takes it
+	p_mon:process
+	file bus_file : text;
+	variable l : line;
+	variable v_ix : natural;
+	variable v_we : integer;
+	variable v_fetch : integer;
+	variable v_a : std_logic_vector(23 downto 0);
+	variable v_d : std_logic_vector(7 downto 0);
+	begin
+		file_open(bus_file, output_path(runner_cfg) & "bus.txt", read_mode);
+		r_bus_end <= endfile(bus_file);
+		v_ix := 0;
+		wait until r_run = '1';
+		loop
+			wait until rising_edge(i_fb_syscon.clk);
+			if i_fb_con_c2p.cyc = '1' and i_fb_con_c2p.A_stb = '1' and i_fb_con_p2c.stall = '0' then
+				if endfile(bus_file) then
+					error("access " & integer'image(v_ix) & " to " & to_hstring(i_fb_con_c2p.A) & " not expected");
+					exit;
+				end if;
+				readline(bus_file, l);
+				read(l, v_we);
+				read(l, v_fetch);
+				hread(l, v_a);
+				hread(l, v_d);
+				check_equal(i_fb_con_c2p.we, b2s(v_we = 1), "access " & integer'image(v_ix) & " we");
+				check_equal(i_fb_con_c2p.A, v_a, "access " & integer'image(v_ix) & " address");
+				check_equal(i_instr_fetch, b2s(v_fetch = 1), "access " & integer'image(v_ix) & " instruction fetch");
+				if v_we = 1 then
+					while i_fb_con_c2p.D_wr_stb /= '1' loop
+						wait until rising_edge(i_fb_syscon.clk);
+					end loop;
+					check_equal(i_fb_con_c2p.D_wr, v_d, "access " & integer'image(v_ix) & " write to " & to_hstring(v_a));
+				else
+					wait until rising_edge(i_fb_syscon.clk) and i_fb_con_p2c.ack = '1';
+					check_equal(i_fb_con_p2c.D_rd, v_d, "access " & integer'image(v_ix) & " read from " & to_hstring(v_a));
+				end if;
+				r_bus_end <= endfile(bus_file);
+				v_ix := v_ix + 1;
+			end if;
+		end loop;
+		file_close(bus_file);
+		wait;
+	end process;
+
+	p_stall:process
+	file stall_file : text;
+	variable l : line;
+	variable v_free : integer;
+	variable v_stalled : integer;
+	begin
+		r_per_stall <= '0';
+		wait until r_run = '1';
+		file_open(stall_file, output_path(runner_cfg) & "stall.txt", read_mode);
+		if endfile(stall_file) then
+			file_close(stall_file);
+			wait;
+		end if;
+		loop
+			if endfile(stall_file) then
+				file_close(stall_file);
+				file_open(stall_file, output_path(runner_cfg) & "stall.txt", read_mode);
+			end if;
+			readline(stall_file, l);
+			read(l, v_free);
+			read(l, v_stalled);
+			for i in 1 to v_free loop
+				wait until rising_edge(i_fb_syscon.clk);
+			end loop;
+			r_per_stall <= '1';
+			for i in 1 to v_stalled loop
+				wait until rising_edge(i_fb_syscon.clk);
+			end loop;
+			r_per_stall <= '0';
+		end loop;
+	end process;
+
+
+	e_sim_per:entity work.sim_fb_per_mem
+	generic map (
+		G_SIZE => G_MEM_SIZE
+		)
+	port map (
+		fb_syscon_i => i_fb_syscon,
+		fb_c2p_i => i_fb_con_c2p,
+		fb_p2c_o => i_fb_con_p2c,
+		stall_i  => r_per_stall
+	);
+
+
+	e_dut:entity work.fb_cpu_con_burst
+	generic map (
+		SIM			=> true,
+		G_BYTELANES => G_BYTELANES
+	)
+	port map (
+
+		fb_syscon_i							=> i_fb_syscon,
+
+		BE_i									=> ib_BE,
+
+		cyc_i									=> ib_cyc,
+		A_i									=> ib_A,
+		we_i									=> ib_we,
+		lane_req_i							=> ib_lane_req,
+		D_wr_i								=> ib_D_wr,
+		D_wr_stb_i							=> ib_D_wr_stb,
+		rdy_ctdn_i							=> RDY_CTDN_MIN,
+		instr_fetch_i						=> ib_instr_fetch,
+
+		rdy_o									=> ib_rdy,
+		act_lane_o							=> open,
+		ack_lane_o							=> ib_ack_lane,
+		ack_o									=> ib_ack,
+		D_rd_o								=> ib_D_rd,
+
+		fb_con_c2p_o						=> i_fb_con_c2p,
+		fb_con_p2c_i						=> i_fb_con_p2c,
+		fb_con_c2pinstr_fetch_o			=> i_instr_fetch
+
+	);
+
+end rtl;
@@ -382,6 +382,7 @@ begin
 		D_wr_i								=> ib_D_wr,
 		D_wr_stb_i							=> ib_D_wr_stb,
 		rdy_ctdn_i							=> RDY_CTDN_MIN,
+		instr_fetch_i						=> '0',
 
 		rdy_o									=> ib_rdy,
 		ack_lane_o							=> ib_ack_lane,
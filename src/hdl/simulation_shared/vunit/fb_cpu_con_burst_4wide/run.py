@@ -1,7 +1,19 @@
-from vunit import VUnit
+import sys
+sys.path.insert(0, "../../python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import burst
 
 # Create VUnit instance by parsing command line arguments
-vu = VUnit.from_argv()
+cli = VUnitCLI()
+cli.parser.add_argument("--seeds", type=int, default=64,
+    help="Number of random cycle streams, each is its own configuration, run them in parallel with -p")
+cli.parser.add_argument("--first-seed", type=int, default=0,
+    help="Seed of the first random stream")
+cli.parser.add_argument("--cycles", type=int, default=500,
+    help="Cycles in each random stream")
+args = cli.parse_args()
+vu = VUnit.from_args(args)
 
 # Create library 'lib'
 lib = vu.add_library("lib")
@@ -14,5 +26,17 @@ lib.add_source_files("../../../shared/fb_SYS_pack.vhd")
 lib.add_source_files("../../../shared/fb_CPU_con_burst.vhd")
 lib.add_source_files("../../../simulation_shared/sim_fb_per_mem.vhd")
 
+# each seed is a random stream of cycles checked by burst_random_tb's scoreboard,
+# seeds that have failed before are kept in failing_seeds.txt with their stream's
+# cycle count and always run with that count
+test = lib.test_bench("burst_random_tb").test("random")
+seeds = {}
+for seed in range(args.first_seed, args.first_seed + args.seeds):
+    seeds["seed%d" % seed] = (seed, args.cycles)
+for seed, count in burst.kept_seeds():
+    seeds["seed%d" % seed if count == args.cycles else "seed%d_%d" % (seed, count)] = (seed, count)
+for name, (seed, count) in seeds.items():
+    burst.add_config(test, name, burst.random_stream(seed, count))
+
 # Run vunit function
-vu.main()
\ No newline at end of file
+vu.main(post_run=lambda results: burst.keep_failures(results, seeds))
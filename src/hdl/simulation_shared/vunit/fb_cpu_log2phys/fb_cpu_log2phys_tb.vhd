@@ -348,26 +348,25 @@ begin
 
 		-- per cpu config
 		cfg_sys_via_block_i				=> '1',
-		cfg_t65_i							=> '1',
 
 		-- system type
 		cfg_sys_type_i						=> SYS_BBC,
 		cfg_swram_enable_i				=> '1',
+		cfg_map0n1_i						=> '1',
 		cfg_mosram_i						=> '0',
-		cfg_swromx_i						=> '0',
 
 		-- extra memory map control signals
 		sys_ROMPG_i							=> x"0F",
 		JIM_page_i							=> x"1234",
 		jim_en_i								=> '1',
 
-		-- SYS VIA slowdown enable
-		sys_via_blocker_en_i				=> '1',
-
 		-- memctl signals
 		swmos_shadow_i						=> '1',
 		turbo_lo_mask_i					=> x"00",
+		throttle_mos_i						=> '0',
+		throttle_all_i						=> '0',
 		rom_throttle_map_i				=> (others => '0'),
+		throttle_act_o						=> open,
 		rom_autohazel_map_i				=> (others => '0'),
 
 		-- noice signals
@@ -0,0 +1,261 @@
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library std;
+use std.textio.all;
+
+library work;
+use work.fishbone.all;
+use work.common.all;
+use work.fb_sys_pack.all;
+
+-- log2phys on its own checked against the table made by run.py
+-- (blitsim.log2phys). Each line of vectors.txt in the test's output path is
+-- one setting of the inputs followed by the physical page and throttle_act_o
+-- expected for all 256 pages of bank FF, first fetched as instructions then as
+-- data after an instruction fetch from a paged ROM. Each line is read with one
+-- hread and its pages checked in a loop, a picosecond apart, only the setting
+-- itself waits for clocks. Mismatches go to mismatches.txt.
+
+entity log2phys_table_tb is
+	generic (
+		runner_cfg : string;
+		G_MK3			: boolean := false;
+		G_C20K		: boolean := false
+		);
+end log2phys_table_tb;
+
+architecture rtl of log2phys_table_tb is
+
+	constant CLOCKSPEED : natural := 128;
+
+	constant CLOCK_PER : time := (1000000/CLOCKSPEED) * 1 ps;
+
+	constant CONFIG_BITS	: natural := 128;
+	constant ENTRY_BITS	: natural := 17;
+	constant LINE_BITS	: natural := CONFIG_BITS + 2 * 256 * ENTRY_BITS;
+	constant MAX_REPORTS	: natural := 16;
+
+	signal i_fb_syscon : fb_syscon_t;
+
+	signal r_cfg_swram_enable	: std_logic := '0';
+	signal r_cfg_map0n1			: std_logic := '0';
+	signal r_cfg_mosram			: std_logic := '0';
+	signal r_cfg_sys_type		: sys_type := SYS_BBC;
+	signal r_sys_ROMPG			: std_logic_vector(7 downto 0) := (others => '0');
+	signal r_JIM_page				: std_logic_vector(15 downto 0) := (others => '0');
+	signal r_turbo_lo_mask		: std_logic_vector(7 downto 0) := (others => '0');
+	signal r_throttle_mos		: std_logic := '0';
+	signal r_rom_throttle_map	: std_logic_vector(15 downto 0) := (others => '0');
+	signal r_throttle_all		: std_logic := '0';
+	signal r_rom_autohazel_map	: std_logic_vector(15 downto 0) := (others => '0');
+	signal r_window				: std_logic_vector(12 downto 0) := (others => '0');
+	signal r_window_wr_en		: std_logic := '0';
+	signal r_jim_en				: std_logic := '0';
+	signal r_swmos_shadow		: std_logic := '0';
+	signal r_noice_debug_shadow: std_logic := '0';
+	signal r_preboot				: std_logic := '0';
+	signal r_A						: std_logic_vector(23 downto 0) := (others => '0');
+	signal r_instruction_fetch	: std_logic := '0';
+
+	signal i_A						: std_logic_vector(23 downto 0);
+	signal i_throttle_act		: std_logic;
+
+begin
+	p_syscon_clk:process
+	begin
+		i_fb_syscon.clk <= '1';
+		wait for CLOCK_PER / 2;
+		i_fb_syscon.clk <= '0';
+		wait for CLOCK_PER / 2;
+	end process;
+
+
+	p_main:process
+	file vec_file : text;
+	file bad_file : text;
+	variable l : line;
+	variable lb : line;
+	variable v : std_logic_vector(0 to LINE_BITS-1);
+	variable v_lo : std_logic_vector(7 downto 0);
+	variable v_ix : natural;
+	variable v_e : natural;
+	variable v_exp : std_logic_vector(15 downto 0);
+	variable v_window_on : boolean;
+	variable v_bad : natural;
+
+	procedure clock(n : positive := 1) is
+	begin
+		for i in 1 to n loop
+			wait until rising_edge(i_fb_syscon.clk);
+		end loop;
+	end procedure;
+
+	procedure mismatch(fetch : natural; page : natural) is
+	begin
+		if v_bad < MAX_REPORTS then
+			report "setting " & integer'image(v_ix) & " FF" & to_hstring(to_unsigned(page, 8)) & to_hstring(v_lo)
+				& " -> " & to_hstring(i_A) & " throttle " & std_logic'image(i_throttle_act) severity warning;
+		end if;
+		write(lb, v_ix);
+		write(lb, ' ');
+		write(lb, fetch);
+		write(lb, ' ');
+		write(lb, page);
+		write(lb, ' ');
+		hwrite(lb, i_A);
+		write(lb, ' ');
+		write(lb, std_logic'image(i_throttle_act)(2));
+		writeline(bad_file, lb);
+		v_bad := v_bad + 1;
+	end procedure;
+
+	begin
+
+		test_runner_setup(runner, runner_cfg);
+
+		while test_suite loop
+
+			if run("table") then
+
+				i_fb_syscon.rst <= '1';
+				i_fb_syscon.rst_state <= powerup;
+				clock(4);
+				i_fb_syscon.rst <= '0';
+				i_fb_syscon.rst_state <= run;
+
+				file_open(vec_file, output_path(runner_cfg) & "vectors.txt", read_mode);
+				file_open(bad_file, output_path(runner_cfg) & "mismatches.txt", write_mode);
+				v_ix := 0;
+				v_bad := 0;
+				v_window_on := false;
+				while not endfile(vec_file) loop
+					readline(vec_file, l);
+					hread(l, v);
+
+					r_sys_ROMPG <= v(0 to 7);
+					r_JIM_page <= v(8 to 23);
+					r_turbo_lo_mask <= v(24 to 31);
+					r_rom_throttle_map <= v(32 to 47);
+					r_rom_autohazel_map <= v(48 to 63);
+					r_window <= v(64 to 76);
+					r_cfg_sys_type <= sys_type'val(to_integer(unsigned(v(78 to 79))));
+					r_cfg_swram_enable <= v(80);
+					r_cfg_map0n1 <= v(81);
+					r_cfg_mosram <= v(82);
+					r_throttle_mos <= v(83);
+					r_throttle_all <= v(84);
+					r_jim_en <= v(85);
+					r_swmos_shadow <= v(86);
+					r_noice_debug_shadow <= v(87);
+					r_preboot <= v(88);
+					v_lo := v(96 to 103);
+					r_instruction_fetch <= '1';
+
+					-- the window can only be turned off by a reset
+					if v(77) = '0' and v_window_on then
+						i_fb_syscon.rst <= '1';
+						clock(2);
+						i_fb_syscon.rst <= '0';
+						v_window_on := false;
+					end if;
+					clock;
+					if v(77) = '1' then
+						r_window_wr_en <= '1';
+						clock;
+						r_window_wr_en <= '0';
+						v_window_on := true;
+					end if;
+					clock;
+
+					for fetch in 0 to 1 loop
+						if fetch = 1 then
+							-- latch the auto-hazel and throttle state of an instruction from the paged ROM
+							r_A <= x"FF80" & v_lo;
+							clock;
+							r_instruction_fetch <= '0';
+						end if;
+						for page in 0 to 255 loop
+							r_A <= x"FF" & std_logic_vector(to_unsigned(page, 8)) & v_lo;
+							wait for 1 ps;
+							v_e := CONFIG_BITS + (fetch * 256 + page) * ENTRY_BITS;
+							v_exp := v(v_e to v_e + 15);
+							if i_A /= v_exp & v_lo or i_throttle_act /= v(v_e + 16) then
+								mismatch(fetch, page);
+							end if;
+						end loop;
+					end loop;
+
+					-- other banks pass through
+					r_A <= v(104 to 127);
+					wait for 1 ps;
+					if i_A /= v(104 to 127) then
+						mismatch(2, 0);
+					end if;
+
+					v_ix := v_ix + 1;
+				end loop;
+				file_close(vec_file);
+				file_close(bad_file);
+
+				info("log2phys: " & integer'image(v_ix) & " settings checked");
+				check_equal(v_bad, 0, "log2phys mismatches");
+
+			end if;
+
+		end loop;
+
+		wait for 3 us;
+
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+
+	e_dut:entity work.log2phys
+	generic map (
+		SIM									=> true,
+		G_MK3									=> G_MK3,
+		G_C20K								=> G_C20K
+	)
+	port map (
+		fb_syscon_i							=> i_fb_syscon,
+
+		cfg_swram_enable_i				=> r_cfg_swram_enable,
+		cfg_map0n1_i						=> r_cfg_map0n1,
+		cfg_mosram_i						=> r_cfg_mosram,
+		cfg_sys_via_block_i				=> '0',
+		cfg_sys_type_i						=> r_cfg_sys_type,
+
+		sys_ROMPG_i							=> r_sys_ROMPG,
+		JIM_page_i							=> r_JIM_page,
+		turbo_lo_mask_i					=> r_turbo_lo_mask,
+
+		throttle_mos_i						=> r_throttle_mos,
+		rom_throttle_map_i				=> r_rom_throttle_map,
+		throttle_all_i						=> r_throttle_all,
+		throttle_act_o						=> i_throttle_act,
+
+		rom_autohazel_map_i				=> r_rom_autohazel_map,
+
+		window_65816_i						=> r_window,
+		window_65816_wr_en_i				=> r_window_wr_en,
+
+		jim_en_i								=> r_jim_en,
+		swmos_shadow_i						=> r_swmos_shadow,
+
+		noice_debug_shadow_i				=> r_noice_debug_shadow,
+
+		preboot_i							=> r_preboot,
+
+		A_i									=> r_A,
+		instruction_fetch_i				=> r_instruction_fetch,
+		A_stb_i								=> '0',
+		A_o									=> i_A
+	);
+
+end rtl;
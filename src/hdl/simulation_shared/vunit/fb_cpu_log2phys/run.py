@@ -1,7 +1,19 @@
-from vunit import VUnit
+import sys
+sys.path.insert(0, "../../python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import log2phys
+
+BOARD_CONFIG_PACK = "../../../modelC20K/boards/C20K/src/board_config_pack.vhd"
 
 # Create VUnit instance by parsing command line arguments
-vu = VUnit.from_argv()
+cli = VUnitCLI()
+cli.parser.add_argument("--seed", type=int, default=0,
+    help="Seed for the randomly chosen inputs of the log2phys table")
+cli.parser.add_argument("--sample", type=int, default=0,
+    help="Check this many random settings instead of the full table")
+args = cli.parse_args()
+vu = VUnit.from_args(args)
 
 # Create library 'lib'
 lib = vu.add_library("lib")
@@ -11,11 +23,16 @@ lib.add_source_files("./*.vhd")
 lib.add_source_files("../../../library/fishbone/fishbone_pack.vhd")
 lib.add_source_files("../../../library/common.vhd")
 lib.add_source_files("../../../shared/fb_SYS_pack.vhd")
+lib.add_source_files("../../../shared/firmware_info_pack.vhd")
+lib.add_source_files(BOARD_CONFIG_PACK)
 lib.add_source_files("../../../shared/fb_CPU_log2phys.vhd")
 lib.add_source_files("../../../shared/log2phys.vhd")
-lib.add_source_files("../../../shared/fb_SYS_via_blocker.vhd")
 lib.add_source_files("../../../simulation_shared/sim_fb_per_mem.vhd")
 lib.add_source_files("../../fb_tester_pack.vhd")
 
+# log2phys on its own against the table from blitsim.log2phys, one configuration
+# per board variant
+log2phys.add_configs(lib.test_bench("log2phys_table_tb"), BOARD_CONFIG_PACK, args.seed, args.sample)
+
 # Run vunit function
-vu.main()
\ No newline at end of file
+vu.main()
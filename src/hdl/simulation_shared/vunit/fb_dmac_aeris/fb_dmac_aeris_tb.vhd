@@ -0,0 +1,233 @@
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library std;
+use std.textio.all;
+
+library work;
+use work.fishbone.all;
+use work.common.all;
+use work.fb_tester_pack.all;
+
+-- The Aeris on its own, its controller port reads its program from a ram_tb
+-- preloaded from program.bitvec in the test's output path and every write it
+-- makes is logged to writes.txt there, as hex address and data. The program
+-- starts at address 0 on the first of G_FRAMES PAL frames of hsync and vsync.
+-- run.py (blitsim.aeris) makes the image and checks the writes.
+
+entity test_tb is
+	generic (
+		runner_cfg : string;
+		G_FRAMES : natural := 1					-- frames to run the program for
+		);
+end test_tb;
+
+architecture rtl of test_tb is
+
+	constant CLOCKSPEED : natural := 128;
+
+	constant CLOCK_PER : time := (1000000/CLOCKSPEED) * 1 ps;
+
+	constant MEM_SIZE : natural := 64*1024;
+	constant MEM_CYCLES : natural := 4;			-- clocks that the ram_tb is selected for
+
+	constant LINES : natural := 312;				-- lines per PAL frame, as blitsim.aeris
+	constant LINE_PER : time := 64 us;
+
+	signal i_fb_syscon : fb_syscon_t;
+
+	signal i_fb_per_c2p : fb_con_o_per_i_t;
+	signal i_fb_per_p2c : fb_con_i_per_o_t;
+
+	signal i_fb_con_c2p : fb_con_o_per_i_t;
+	signal i_fb_con_p2c : fb_con_i_per_o_t;
+
+	signal i_cpu_halt : std_logic;
+
+	signal r_hsync		: std_logic := '0';
+	signal r_vsync		: std_logic := '0';
+	signal r_go			: std_logic := '0';
+	signal r_done		: std_logic := '0';
+
+	signal r_ram_A		: std_logic_vector(numbits(MEM_SIZE)-1 downto 0) := (others => '0');
+	signal i_ram_D		: std_logic_vector(7 downto 0);
+	signal r_ram_nCS	: std_logic := '1';
+	signal r_ram_nOE	: std_logic := '1';
+
+begin
+	p_syscon_clk:process
+	begin
+		i_fb_syscon.clk <= '1';
+		wait for CLOCK_PER / 2;
+		i_fb_syscon.clk <= '0';
+		wait for CLOCK_PER / 2;
+	end process;
+
+	p_syscon_rst:process
+	begin
+		wait for 100 ns;
+		i_fb_syscon.rst <= '1';
+		-- simplify reset sequence
+		i_fb_syscon.rst_state <= powerup;
+		wait for 1 us;
+		i_fb_syscon.rst <= '0';
+		-- simplify reset sequence
+		i_fb_syscon.rst_state <= run;
+		wait;
+	end process;
+
+
+	p_main:process
+	begin
+
+		test_runner_setup(runner, runner_cfg);
+
+		while test_suite loop
+
+			if run("program") then
+
+				fbtest_wait_reset(i_fb_syscon, i_fb_per_c2p);
+
+				-- program at 00 0000 on the new ABI, then wait for vsync
+				fbtest_single_write(i_fb_syscon, i_fb_per_p2c, i_fb_per_c2p, x"000206", x"00");
+				fbtest_single_write(i_fb_syscon, i_fb_per_p2c, i_fb_per_c2p, x"000205", x"00");
+				fbtest_single_write(i_fb_syscon, i_fb_per_p2c, i_fb_per_c2p, x"000204", x"00");
+				fbtest_single_write(i_fb_syscon, i_fb_per_p2c, i_fb_per_c2p, x"000200", x"80");
+
+				r_go <= '1';
+				wait for G_FRAMES * LINES * LINE_PER;
+
+				r_done <= '1';
+				wait for 1 us;
+
+			end if;
+
+		end loop;
+
+		wait for 3 us;
+
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+	-- vsync rises a little before the hsync that starts each frame's first line
+	p_sync:process
+	begin
+		wait until r_go = '1';
+		loop
+			for l in 0 to LINES-1 loop
+				if l = 0 then
+					r_vsync <= '1';
+				elsif l = 3 then
+					r_vsync <= '0';
+				end if;
+				wait for 1 us;
+				r_hsync <= '1';
+				wait for 4 us;
+				r_hsync <= '0';
+				wait for LINE_PER - 5 us;
+			end loop;
+		end loop;
+	end process;
+
+
+	e_aeris:entity work.fb_dmac_aeris
+	generic map (
+		SIM => true,
+		CLOCKSPEED => CLOCKSPEED
+	)
+	port map (
+		fb_syscon_i		=> i_fb_syscon,
+		fb_per_c2p_i	=> i_fb_per_c2p,
+		fb_per_p2c_o	=> i_fb_per_p2c,
+		fb_con_c2p_o	=> i_fb_con_c2p,
+		fb_con_p2c_i	=> i_fb_con_p2c,
+		cpu_halt_o		=> i_cpu_halt,
+		hsync_i			=> r_hsync,
+		vsync_i			=> r_vsync,
+		dbg_state_o		=> open
+	);
+
+	-- program reads from the ram_tb, writes to the log
+	p_mem:process
+	file writes_file : text;
+	variable l : line;
+	begin
+
+		file_open(writes_file, output_path(runner_cfg) & "writes.txt", write_mode);
+
+		loop
+			i_fb_con_p2c <= (
+				D_rd => (others => '-'),
+				ack => '0',
+				rdy => '0',
+				stall => '0'
+				);
+
+			wait until rising_edge(i_fb_syscon.clk) and
+				((i_fb_con_c2p.cyc = '1' and i_fb_con_c2p.A_stb = '1') or r_done = '1');
+
+			exit when r_done = '1';
+
+			i_fb_con_p2c.stall <= '1';
+
+			if i_fb_con_c2p.we = '1' then
+				while i_fb_con_c2p.D_wr_stb /= '1' loop
+					wait until rising_edge(i_fb_syscon.clk);
+				end loop;
+				hwrite(l, i_fb_con_c2p.A);
+				write(l, ' ');
+				hwrite(l, i_fb_con_c2p.D_wr);
+				writeline(writes_file, l);
+			else
+				r_ram_A <= i_fb_con_c2p.A(r_ram_A'range);
+				r_ram_nCS <= '0';
+				r_ram_nOE <= '0';
+				for i in 1 to MEM_CYCLES loop
+					wait until rising_edge(i_fb_syscon.clk);
+				end loop;
+				i_fb_con_p2c.D_rd <= i_ram_D;
+				r_ram_nOE <= '1';
+				r_ram_nCS <= '1';
+			end if;
+
+			i_fb_con_p2c.ack <= '1';
+			i_fb_con_p2c.rdy <= '1';
+			wait until rising_edge(i_fb_syscon.clk);
+		end loop;
+
+		file_close(writes_file);
+		wait;
+
+	end process;
+
+	e_ram: entity work.ram_tb
+	generic map (
+		size				=> MEM_SIZE,
+		dump_filename	=> output_path(runner_cfg) & "ram.bin",
+		romfile			=> output_path(runner_cfg) & "program.bitvec",
+		tco				=> 10 ns,
+		taa				=> 10 ns,
+		toh				=> 2 ns,
+		tohz				=> 3 ns,
+		thz				=> 3 ns,
+		tolz				=> 3 ns,
+		tlz				=> 3 ns,
+		toe				=> 4.5 ns,
+		twed				=> 6.5 ns
+	)
+	port map (
+		A					=> r_ram_A,
+		D					=> i_ram_D,
+		nCS				=> r_ram_nCS,
+		nOE				=> r_ram_nOE,
+		nWE				=> '1',
+
+		tst_dump			=> '0'
+	);
+
+end rtl;
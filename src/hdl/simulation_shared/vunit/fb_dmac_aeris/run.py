@@ -0,0 +1,41 @@
+import sys
+sys.path.insert(0, "../../python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import aeris
+
+# Create VUnit instance by parsing command line arguments
+cli = VUnitCLI()
+args = cli.parse_args()
+vu = VUnit.from_args(args)
+
+# Create library 'lib'
+lib = vu.add_library("lib")
+
+# Add all files ending in .vhd in current working directory to library
+lib.add_source_files("./*.vhd")
+lib.add_source_files("../../../library/fishbone/fishbone_pack.vhd")
+lib.add_source_files("../../../library/common.vhd")
+lib.add_source_files("../../../library/simulation/ram_tb.vhd")
+lib.add_source_files("../../../chipset/blit_types.vhd")
+lib.add_source_files("../../../chipset/aeris.vhd")
+lib.add_source_files("../../fb_tester_pack.vhd")
+
+# directed programs, the writes the RTL makes are checked against blitsim.aeris
+PROGRAMS = {
+    # MOVE16I writes the register then the next one, MOVE16 the same one twice
+    "move16i": """
+            MOVE16I $FE00, 12, $20      ; CRTC R12 = $20
+            MOVE16I $FEF3FF, $11, $22   ; the register number wraps
+            MOVE16  $FE21, $07, $17
+            MOVE    $FE22, $33
+            HALT
+    """,
+}
+
+test = lib.test_bench("test_tb").test("program")
+for name, text in PROGRAMS.items():
+    aeris.add_config(test, name, text)
+
+# Run vunit function
+vu.main()
@@ -0,0 +1,218 @@
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library std;
+use std.textio.all;
+
+library work;
+use work.fishbone.all;
+use work.common.all;
+use work.fb_tester_pack.all;
+
+-- The blitter on its own, its registers are written from regs.txt in the
+-- test's output path and its controller port reads and writes a ram_tb that
+-- is preloaded from before.bitvec and dumped to dump.bin once the blit is
+-- done. run.py (blitsim.blitter) makes the files and checks the dump.
+
+entity test_tb is
+	generic (
+		runner_cfg : string;
+		G_COLLISION : integer := -1			-- expected BLTCON collision bit, -1 don't check
+		);
+end test_tb;
+
+architecture rtl of test_tb is
+
+	constant CLOCKSPEED : natural := 128;
+
+	constant CLOCK_PER : time := (1000000/CLOCKSPEED) * 1 ps;
+
+	constant MEM_SIZE : natural := 64*1024;
+	constant MEM_CYCLES : natural := 4;			-- clocks that the ram_tb is selected for
+
+	signal i_fb_syscon : fb_syscon_t;
+
+	signal i_fb_per_c2p : fb_con_o_per_i_t;
+	signal i_fb_per_p2c : fb_con_i_per_o_t;
+
+	signal i_fb_con_c2p : fb_con_o_per_i_t;
+	signal i_fb_con_p2c : fb_con_i_per_o_t;
+
+	signal i_cpu_halt : std_logic;
+
+	signal r_ram_A		: std_logic_vector(numbits(MEM_SIZE)-1 downto 0) := (others => '0');
+	signal i_ram_D		: std_logic_vector(7 downto 0);
+	signal r_ram_D_wr	: std_logic_vector(7 downto 0) := (others => '0');
+	signal r_ram_D_oe	: std_logic := '0';
+	signal r_ram_nCS	: std_logic := '1';
+	signal r_ram_nOE	: std_logic := '1';
+	signal r_ram_nWE	: std_logic := '1';
+	signal r_dump		: std_logic := '0';
+
+begin
+	p_syscon_clk:process
+	begin
+		i_fb_syscon.clk <= '1';
+		wait for CLOCK_PER / 2;
+		i_fb_syscon.clk <= '0';
+		wait for CLOCK_PER / 2;
+	end process;
+
+	p_syscon_rst:process
+	begin
+		wait for 100 ns;
+		i_fb_syscon.rst <= '1';
+		-- simplify reset sequence
+		i_fb_syscon.rst_state <= powerup;
+		wait for 1 us;
+		i_fb_syscon.rst <= '0';
+		-- simplify reset sequence
+		i_fb_syscon.rst_state <= run;
+		wait;
+	end process;
+
+
+	p_main:process
+	file regs_file : text;
+	variable l : line;
+	variable v_a : std_logic_vector(15 downto 0);
+	variable v_d : std_logic_vector(7 downto 0);
+	variable v_iter : natural;
+	begin
+
+		test_runner_setup(runner, runner_cfg);
+
+		while test_suite loop
+
+			if run("blit") then
+
+				fbtest_wait_reset(i_fb_syscon, i_fb_per_c2p);
+
+				file_open(regs_file, output_path(runner_cfg) & "regs.txt", read_mode);
+				while not endfile(regs_file) loop
+					readline(regs_file, l);
+					hread(l, v_a);
+					hread(l, v_d);
+					fbtest_single_write(i_fb_syscon, i_fb_per_p2c, i_fb_per_c2p, x"00" & v_a, v_d);
+				end loop;
+				file_close(regs_file);
+
+				-- poll BLTCON until the act bit clears
+				v_iter := 0;
+				loop
+					fbtest_single_read(i_fb_syscon, i_fb_per_p2c, i_fb_per_c2p, x"000200", v_d);
+					exit when v_d(7) = '0';
+					v_iter := v_iter + 1;
+					assert v_iter < 100000 report "Blit did not finish" severity failure;
+				end loop;
+
+				if G_COLLISION >= 0 then
+					check_equal(v_d(2), G_COLLISION = 1, "BLTCON collision bit");
+				end if;
+
+				r_dump <= '1';
+				wait for 1 us;
+
+			end if;
+
+		end loop;
+
+		wait for 3 us;
+
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+
+	e_blit:entity work.fb_dmac_blit
+	generic map (
+		SIM => true
+	)
+	port map (
+		fb_syscon_i		=> i_fb_syscon,
+		fb_per_c2p_i	=> i_fb_per_c2p,
+		fb_per_p2c_o	=> i_fb_per_p2c,
+		fb_con_c2p_o	=> i_fb_con_c2p,
+		fb_con_p2c_i	=> i_fb_con_p2c,
+		cpu_halt_o		=> i_cpu_halt,
+		blit_halt_i		=> '0'
+	);
+
+	-- a minimal fishbone to async SRAM bridge for the blitter's dma port
+	p_mem:process
+	begin
+
+		i_fb_con_p2c <= (
+			D_rd => (others => '-'),
+			ack => '0',
+			rdy => '0',
+			stall => '0'
+			);
+
+		wait until rising_edge(i_fb_syscon.clk) and i_fb_con_c2p.cyc = '1' and i_fb_con_c2p.A_stb = '1';
+
+		i_fb_con_p2c.stall <= '1';
+		r_ram_A <= i_fb_con_c2p.A(r_ram_A'range);
+		r_ram_nCS <= '0';
+
+		if i_fb_con_c2p.we = '1' then
+			while i_fb_con_c2p.D_wr_stb /= '1' loop
+				wait until rising_edge(i_fb_syscon.clk);
+			end loop;
+			r_ram_D_wr <= i_fb_con_c2p.D_wr;
+			r_ram_D_oe <= '1';
+			r_ram_nWE <= '0';
+			for i in 1 to MEM_CYCLES loop
+				wait until rising_edge(i_fb_syscon.clk);
+			end loop;
+			r_ram_nWE <= '1';
+			wait until rising_edge(i_fb_syscon.clk);
+			r_ram_D_oe <= '0';
+		else
+			r_ram_nOE <= '0';
+			for i in 1 to MEM_CYCLES loop
+				wait until rising_edge(i_fb_syscon.clk);
+			end loop;
+			i_fb_con_p2c.D_rd <= i_ram_D;
+			r_ram_nOE <= '1';
+		end if;
+
+		r_ram_nCS <= '1';
+		i_fb_con_p2c.ack <= '1';
+		i_fb_con_p2c.rdy <= '1';
+		wait until rising_edge(i_fb_syscon.clk);
+
+	end process;
+
+	i_ram_D <= r_ram_D_wr when r_ram_D_oe = '1' else (others => 'Z');
+
+	e_ram: entity work.ram_tb
+	generic map (
+		size				=> MEM_SIZE,
+		dump_filename	=> output_path(runner_cfg) & "dump.bin",
+		romfile			=> output_path(runner_cfg) & "before.bitvec",
+		tco				=> 10 ns,
+		taa				=> 10 ns,
+		toh				=> 2 ns,
+		tohz				=> 3 ns,
+		thz				=> 3 ns,
+		tolz				=> 3 ns,
+		tlz				=> 3 ns,
+		toe				=> 4.5 ns,
+		twed				=> 6.5 ns
+	)
+	port map (
+		A					=> r_ram_A,
+		D					=> i_ram_D,
+		nCS				=> r_ram_nCS,
+		nOE				=> r_ram_nOE,
+		nWE				=> r_ram_nWE,
+
+		tst_dump			=> r_dump
+	);
+
+end rtl;
@@ -0,0 +1,36 @@
+import sys
+sys.path.insert(0, "../../python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import blitter
+
+# Create VUnit instance by parsing command line arguments
+cli = VUnitCLI()
+cli.parser.add_argument("--seeds", type=int, default=16,
+    help="Number of random blits, each is its own configuration")
+cli.parser.add_argument("--first-seed", type=int, default=0,
+    help="Seed of the first random blit")
+args = cli.parse_args()
+vu = VUnit.from_args(args)
+
+# Create library 'lib'
+lib = vu.add_library("lib")
+
+# Add all files ending in .vhd in current working directory to library
+lib.add_source_files("./*.vhd")
+lib.add_source_files("../../../library/fishbone/fishbone_pack.vhd")
+lib.add_source_files("../../../library/common.vhd")
+lib.add_source_files("../../../library/simulation/ram_tb.vhd")
+lib.add_source_files("../../../chipset/blit_types.vhd")
+lib.add_source_files("../../../chipset/blit_addr.vhd")
+lib.add_source_files("../../../chipset/blit_int.vhd")
+lib.add_source_files("../../fb_tester_pack.vhd")
+
+# each seed is a random blit checked against the golden model in blitsim.blitter
+test = lib.test_bench("test_tb").test("blit")
+for seed in range(args.first_seed, args.first_seed + args.seeds):
+    blit, before = blitter.random_config(seed)
+    blitter.add_config(test, "seed%d" % seed, blit, before)
+
+# Run vunit function
+vu.main()
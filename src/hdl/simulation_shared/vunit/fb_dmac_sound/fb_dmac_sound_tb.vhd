@@ -0,0 +1,262 @@
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library std;
+use std.textio.all;
+
+library work;
+use work.fishbone.all;
+use work.common.all;
+use work.fb_tester_pack.all;
+
+-- The Paula sound DMAC on its own, its registers are written from regs.txt in
+-- the test's output path and its DMA reads samples from a ram_tb preloaded
+-- from samples.bitvec. The time each write finished is logged to writes.txt
+-- so that run.py knows when each channel started.
+--
+-- The mixed output goes both ways it does on the C20K: registered on the
+-- sound clock into shared/i2s and on the fishbone clock into a 1 bit DAC,
+-- sim_audio_sink captures both to i2s.bin and dac.bin for G_RUN_US and
+-- run.py (blitsim.paula) compares them with its mixer model.
+
+entity test_tb is
+	generic (
+		runner_cfg : string;
+		G_SND_CLK_PS	: positive := 281936;		-- sound clock period, ~3.547MHz
+		G_RUN_US			: positive := 5000;			-- how long to capture for after the writes
+		G_DAC_WINDOW	: positive := 2048			-- DAC clocks per count in dac.bin
+		);
+end test_tb;
+
+architecture rtl of test_tb is
+
+	constant CLOCKSPEED : natural := 128;
+
+	constant CLOCK_PER : time := (1000000/CLOCKSPEED) * 1 ps;
+	constant SND_CLOCK_PER : time := G_SND_CLK_PS * 1 ps;
+
+	constant MEM_SIZE : natural := 64*1024;
+	constant MEM_CYCLES : natural := 4;			-- clocks that the ram_tb is selected for
+
+	signal i_fb_syscon : fb_syscon_t;
+
+	signal i_fb_per_c2p : fb_con_o_per_i_t;
+	signal i_fb_per_p2c : fb_con_i_per_o_t;
+
+	signal i_fb_con_c2p : fb_con_o_per_i_t;
+	signal i_fb_con_p2c : fb_con_i_per_o_t;
+
+	signal i_clk_snd		: std_logic;
+	signal i_snd_dat		: signed(9 downto 0);
+	signal r_i2s_sample	: signed(10 downto 0) := (others => '0');
+	signal r_dac_sample	: signed(10 downto 0) := (others => '0');
+
+	signal i_i2s_bck		: std_logic;
+	signal i_i2s_ws		: std_logic;
+	signal i_i2s_dat		: std_logic;
+	signal i_dac			: std_logic;
+
+	signal r_ram_A		: std_logic_vector(numbits(MEM_SIZE)-1 downto 0) := (others => '0');
+	signal i_ram_D		: std_logic_vector(7 downto 0);
+	signal r_ram_nCS	: std_logic := '1';
+	signal r_ram_nOE	: std_logic := '1';
+
+begin
+	p_syscon_clk:process
+	begin
+		i_fb_syscon.clk <= '1';
+		wait for CLOCK_PER / 2;
+		i_fb_syscon.clk <= '0';
+		wait for CLOCK_PER / 2;
+	end process;
+
+	p_syscon_rst:process
+	begin
+		wait for 100 ns;
+		i_fb_syscon.rst <= '1';
+		-- simplify reset sequence
+		i_fb_syscon.rst_state <= powerup;
+		wait for 1 us;
+		i_fb_syscon.rst <= '0';
+		-- simplify reset sequence
+		i_fb_syscon.rst_state <= run;
+		wait;
+	end process;
+
+	p_snd_clk:process
+	begin
+		i_clk_snd <= '0';
+		wait for SND_CLOCK_PER / 2;
+		i_clk_snd <= '1';
+		wait for SND_CLOCK_PER / 2;
+	end process;
+
+
+	p_main:process
+	file regs_file : text;
+	file writes_file : text;
+	variable l : line;
+	variable lw : line;
+	variable v_a : std_logic_vector(15 downto 0);
+	variable v_d : std_logic_vector(7 downto 0);
+	begin
+
+		test_runner_setup(runner, runner_cfg);
+
+		while test_suite loop
+
+			if run("sound") then
+
+				fbtest_wait_reset(i_fb_syscon, i_fb_per_c2p);
+
+				file_open(regs_file, output_path(runner_cfg) & "regs.txt", read_mode);
+				file_open(writes_file, output_path(runner_cfg) & "writes.txt", write_mode);
+				while not endfile(regs_file) loop
+					readline(regs_file, l);
+					hread(l, v_a);
+					hread(l, v_d);
+					fbtest_single_write(i_fb_syscon, i_fb_per_p2c, i_fb_per_c2p, x"00" & v_a, v_d);
+					write(lw, now / 1 ns);
+					writeline(writes_file, lw);
+				end loop;
+				file_close(regs_file);
+				file_close(writes_file);
+
+				wait for G_RUN_US * 1 us;
+
+			end if;
+
+		end loop;
+
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+
+	e_snd:entity work.fb_DMAC_int_sound
+	generic map (
+		SIM => true,
+		G_CHANNELS => 4
+	)
+	port map (
+		fb_syscon_i		=> i_fb_syscon,
+		fb_per_c2p_i	=> i_fb_per_c2p,
+		fb_per_p2c_o	=> i_fb_per_p2c,
+		fb_con_c2p_o	=> i_fb_con_c2p,
+		fb_con_p2c_i	=> i_fb_con_p2c,
+		snd_clk_i		=> i_clk_snd,
+		snd_dat_o		=> i_snd_dat,
+		snd_dat_change_clken_o => open
+	);
+
+	-- as C20K.vhd with G_C20K_I2S and without
+	p_i2s_sample:process(i_clk_snd)
+	begin
+		if rising_edge(i_clk_snd) then
+			r_i2s_sample <= resize(i_snd_dat, 11);
+		end if;
+	end process;
+
+	p_dac_sample:process(i_fb_syscon)
+	begin
+		if rising_edge(i_fb_syscon.clk) then
+			r_dac_sample <= resize(i_snd_dat, 11);
+		end if;
+	end process;
+
+	e_i2s:entity work.i2s
+	port map (
+		rst_i		=> i_fb_syscon.rst,
+		clk_i		=> i_clk_snd,
+		pwm_l_i	=> r_i2s_sample & "00000",
+		pwm_r_i	=> r_i2s_sample & "00000",
+		bck_o		=> i_i2s_bck,
+		ws_o		=> i_i2s_ws,
+		dat_o		=> i_i2s_dat
+	);
+
+	e_dac:entity work.dac_1bit
+	generic map (
+		G_SAMPLE_SIZE	=> 11,
+		G_SYNC_DEPTH	=> 0
+	)
+	port map (
+		rst_i			=> i_fb_syscon.rst,
+		clk_dac		=> i_fb_syscon.clk,
+		sample		=> r_dac_sample,
+		bitstream	=> i_dac
+	);
+
+	e_sink:entity work.sim_audio_sink
+	generic map (
+		G_I2S_FILE		=> output_path(runner_cfg) & "i2s.bin",
+		G_DAC_FILE		=> output_path(runner_cfg) & "dac.bin",
+		G_DAC_WINDOW	=> G_DAC_WINDOW
+	)
+	port map (
+		i2s_bck_i		=> i_i2s_bck,
+		i2s_ws_i			=> i_i2s_ws,
+		i2s_dat_i		=> i_i2s_dat,
+		dac_clk_i		=> i_fb_syscon.clk,
+		dac_i				=> i_dac
+	);
+
+	-- a minimal fishbone to async SRAM bridge for the sample reads
+	p_mem:process
+	begin
+
+		i_fb_con_p2c <= (
+			D_rd => (others => '-'),
+			ack => '0',
+			rdy => '0',
+			stall => '0'
+			);
+
+		wait until rising_edge(i_fb_syscon.clk) and i_fb_con_c2p.cyc = '1' and i_fb_con_c2p.A_stb = '1';
+
+		i_fb_con_p2c.stall <= '1';
+		r_ram_A <= i_fb_con_c2p.A(r_ram_A'range);
+		r_ram_nCS <= '0';
+		r_ram_nOE <= '0';
+		for i in 1 to MEM_CYCLES loop
+			wait until rising_edge(i_fb_syscon.clk);
+		end loop;
+		i_fb_con_p2c.D_rd <= i_ram_D;
+		r_ram_nOE <= '1';
+		r_ram_nCS <= '1';
+		i_fb_con_p2c.ack <= '1';
+		i_fb_con_p2c.rdy <= '1';
+		wait until rising_edge(i_fb_syscon.clk);
+
+	end process;
+
+	e_ram: entity work.ram_tb
+	generic map (
+		size				=> MEM_SIZE,
+		dump_filename	=> output_path(runner_cfg) & "dump.bin",
+		romfile			=> output_path(runner_cfg) & "samples.bitvec",
+		tco				=> 10 ns,
+		taa				=> 10 ns,
+		toh				=> 2 ns,
+		tohz				=> 3 ns,
+		thz				=> 3 ns,
+		tolz				=> 3 ns,
+		tlz				=> 3 ns,
+		toe				=> 4.5 ns,
+		twed				=> 6.5 ns
+	)
+	port map (
+		A					=> r_ram_A,
+		D					=> i_ram_D,
+		nCS				=> r_ram_nCS,
+		nOE				=> r_ram_nOE,
+		nWE				=> '1',
+
+		tst_dump			=> '0'
+	);
+
+end rtl;
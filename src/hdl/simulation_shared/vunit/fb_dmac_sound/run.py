@@ -0,0 +1,42 @@
+import sys
+sys.path.insert(0, "../../python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import paula
+
+# Create VUnit instance by parsing command line arguments
+cli = VUnitCLI()
+cli.parser.add_argument("--seeds", type=int, default=16,
+    help="Number of random channel programs, each is its own configuration")
+cli.parser.add_argument("--first-seed", type=int, default=0,
+    help="Seed of the first random program")
+cli.parser.add_argument("--run-us", type=int, default=5000,
+    help="Microseconds of sound to capture and check after the channels start")
+cli.parser.add_argument("--spectrum-tolerance", type=float, default=0.1,
+    help="Largest relative difference between the captured and model spectra")
+args = cli.parse_args()
+vu = VUnit.from_args(args)
+
+# Create library 'lib'
+lib = vu.add_library("lib")
+
+# Add all files ending in .vhd in current working directory to library
+lib.add_source_files("./*.vhd")
+lib.add_source_files("../../../library/fishbone/fishbone_pack.vhd")
+lib.add_source_files("../../../library/common.vhd")
+lib.add_source_files("../../../library/simulation/ram_tb.vhd")
+lib.add_source_files("../../../chipset/dmac_int_sound_cha.vhd")
+lib.add_source_files("../../../chipset/dmac_int_sound.vhd")
+lib.add_source_files("../../../chipset/dac_1bit.vhd")
+lib.add_source_files("../../../shared/i2s.vhd")
+lib.add_source_files("../../fb_tester_pack.vhd")
+lib.add_source_files("../../sim_audio_sink.vhd")
+
+# each seed is a random set of channels checked against the mixer model in blitsim.paula
+test = lib.test_bench("test_tb").test("sound")
+for seed in range(args.first_seed, args.first_seed + args.seeds):
+    paula.add_config(test, "seed%d" % seed, paula.random_program(seed), args.run_us,
+        args.spectrum_tolerance)
+
+# Run vunit function
+vu.main()
@@ -0,0 +1,250 @@
+library vunit_lib;
+context vunit_lib.vunit_context;
+
+
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library std;
+use std.textio.all;
+
+library work;
+use work.fishbone.all;
+use work.common.all;
+
+-- fb_intcon_shared on its own, for checking the transaction level model in
+-- blitsim.fbarb. Each controller works through m<n>.txt in the test's output
+-- path, a line per cycle of the clocks to wait before it and its address. The
+-- peripherals take their timing from the address: bits 23-16 pick the
+-- peripheral, 15-8 are the clocks it stalls for and 7-0 the clocks from taking
+-- the address to its ack. sim_fb_monitor logs every cycle to fbmon.bin and
+-- run.py compares that with the model.
+
+entity test_tb is
+	generic (
+		runner_cfg						: string;
+		G_CONTROLLERS					: positive := 3;
+		G_ROUND_ROBIN					: boolean := false;
+		G_REGISTER_CONTROLLER_P2C	: boolean := false
+		);
+end test_tb;
+
+architecture rtl of test_tb is
+
+	constant CLOCKSPEED : natural := 128;
+
+	constant CLOCK_PER : time := (1000000/CLOCKSPEED) * 1 ps;
+
+	constant PERIPHERALS : natural := 4;
+
+	signal i_fb_syscon : fb_syscon_t;
+
+	signal i_con_c2p	: fb_con_o_per_i_arr(G_CONTROLLERS-1 downto 0);
+	signal i_con_p2c	: fb_con_i_per_o_arr(G_CONTROLLERS-1 downto 0);
+
+	signal i_per_c2p	: fb_con_o_per_i_arr(PERIPHERALS-1 downto 0);
+	signal i_per_p2c	: fb_con_i_per_o_arr(PERIPHERALS-1 downto 0);
+
+	signal i_sel_addr	: fb_arr_std_logic_vector(G_CONTROLLERS-1 downto 0)(23 downto 0);
+	signal i_sel		: fb_arr_unsigned(G_CONTROLLERS-1 downto 0)(numbits(PERIPHERALS)-1 downto 0);
+	signal i_sel_oh	: fb_arr_std_logic_vector(G_CONTROLLERS-1 downto 0)(PERIPHERALS-1 downto 0);
+
+	signal r_done		: std_logic_vector(G_CONTROLLERS-1 downto 0) := (others => '0');
+
+begin
+	p_syscon_clk:process
+	begin
+		i_fb_syscon.clk <= '1';
+		wait for CLOCK_PER / 2;
+		i_fb_syscon.clk <= '0';
+		wait for CLOCK_PER / 2;
+	end process;
+
+	p_syscon_rst:process
+	begin
+		wait for 100 ns;
+		i_fb_syscon.rst <= '1';
+		-- simplify reset sequence
+		i_fb_syscon.rst_state <= powerup;
+		wait for 1 us;
+		i_fb_syscon.rst <= '0';
+		-- simplify reset sequence
+		i_fb_syscon.rst_state <= run;
+		wait;
+	end process;
+
+
+	p_main:process
+	begin
+
+		test_runner_setup(runner, runner_cfg);
+
+		while test_suite loop
+
+			if run("arb") then
+
+				wait until r_done = (r_done'range => '1');
+				wait for 1 us;
+
+			end if;
+
+		end loop;
+
+		test_runner_cleanup(runner); -- Simulation ends here
+	end process;
+
+	test_runner_watchdog(runner, 100 ms);
+
+
+	-- controllers, each always waits at least a clock between cycles so
+	-- that the intcon sees cyc drop
+	g_con:for I in 0 to G_CONTROLLERS-1 generate
+		p_con:process
+		file trace_file : text;
+		variable l : line;
+		variable v_think : natural;
+		variable v_a : std_logic_vector(23 downto 0);
+		begin
+
+			i_con_c2p(I) <= fb_c2p_unsel;
+
+			if i_fb_syscon.rst /= '1' then
+				wait until i_fb_syscon.rst = '1';
+			end if;
+			wait until i_fb_syscon.rst = '0';
+			wait until rising_edge(i_fb_syscon.clk);
+
+			file_open(trace_file, output_path(runner_cfg) & "m" & integer'image(I) & ".txt", read_mode);
+			while not endfile(trace_file) loop
+				readline(trace_file, l);
+				read(l, v_think);
+				hread(l, v_a);
+
+				for j in 0 to v_think loop
+					wait until rising_edge(i_fb_syscon.clk);
+				end loop;
+
+				i_con_c2p(I) <= (
+					cyc			=> '1',
+					we				=> '0',
+					A				=> v_a,
+					A_stb			=> '1',
+					D_wr			=> x"00",
+					D_wr_stb		=> '0',
+					rdy_ctdn		=> RDY_CTDN_MIN
+				);
+
+				loop
+					wait until rising_edge(i_fb_syscon.clk);
+					exit when i_con_p2c(I).stall = '0';
+				end loop;
+
+				i_con_c2p(I).A_stb <= '0';
+
+				loop
+					wait until rising_edge(i_fb_syscon.clk);
+					exit when i_con_p2c(I).ack = '1';
+				end loop;
+
+				i_con_c2p(I) <= fb_c2p_unsel;
+
+			end loop;
+			file_close(trace_file);
+
+			r_done(I) <= '1';
+			wait;
+		end process;
+
+		i_sel(I) <= resize(unsigned(i_sel_addr(I)(23 downto 16)), i_sel(I)'length);
+
+		p_sel_oh:process(i_sel)
+		begin
+			i_sel_oh(I) <= (others => '0');
+			i_sel_oh(I)(to_integer(i_sel(I))) <= '1';
+		end process;
+
+	end generate;
+
+
+	-- peripherals, stall for A(15 downto 8) clocks then ack A(7 downto 0) clocks
+	-- after taking the address
+	g_per:for I in 0 to PERIPHERALS-1 generate
+		signal r_wait	: natural := 0;
+		signal r_left	: integer := -1;			-- clocks to the ack, -1 when idle
+		signal r_ack	: std_logic := '0';
+		signal i_stall	: std_logic;
+	begin
+
+		i_stall <= '1' when i_per_c2p(I).cyc = '1' and i_per_c2p(I).A_stb = '1' and r_left < 0
+							and r_wait < to_integer(unsigned(i_per_c2p(I).A(15 downto 8))) else
+					  '0';
+
+		p_per:process(i_fb_syscon)
+		variable v_left : integer;
+		begin
+			if rising_edge(i_fb_syscon.clk) then
+				r_ack <= '0';
+				v_left := r_left;
+				if i_per_c2p(I).cyc = '1' and i_per_c2p(I).A_stb = '1' and r_left < 0 then
+					if i_stall = '0' then
+						r_wait <= 0;
+						v_left := to_integer(unsigned(i_per_c2p(I).A(7 downto 0)));
+					else
+						r_wait <= r_wait + 1;
+					end if;
+				elsif r_left > 0 then
+					v_left := r_left - 1;
+				end if;
+				if v_left = 0 then
+					r_ack <= '1';
+					v_left := -1;
+				end if;
+				r_left <= v_left;
+			end if;
+		end process;
+
+		i_per_p2c(I) <= (
+			D_rd	=> std_logic_vector(to_unsigned(I, 8)),
+			rdy	=> r_ack,
+			ack	=> r_ack,
+			stall	=> i_stall
+			);
+
+	end generate;
+
+
+	e_intcon:entity work.fb_intcon_shared
+	generic map (
+		SIM									=> true,
+		G_CONTROLLER_COUNT				=> G_CONTROLLERS,
+		G_PERIPHERAL_COUNT				=> PERIPHERALS,
+		G_ARB_ROUND_ROBIN					=> G_ROUND_ROBIN,
+		G_REGISTER_CONTROLLER_P2C		=> G_REGISTER_CONTROLLER_P2C
+	)
+	port map (
+		fb_syscon_i							=> i_fb_syscon,
+		fb_con_c2p_i						=> i_con_c2p,
+		fb_con_p2c_o						=> i_con_p2c,
+		fb_per_c2p_o						=> i_per_c2p,
+		fb_per_p2c_i						=> i_per_p2c,
+		peripheral_sel_addr_o			=> i_sel_addr,
+		peripheral_sel_we_o				=> open,
+		peripheral_sel_i					=> i_sel,
+		peripheral_sel_oh_i				=> i_sel_oh
+	);
+
+	e_mon:entity work.sim_fb_monitor
+	generic map (
+		G_FILE								=> output_path(runner_cfg) & "fbmon.bin",
+		G_CONTROLLER_COUNT				=> G_CONTROLLERS,
+		G_PERIPHERAL_COUNT				=> PERIPHERALS
+	)
+	port map (
+		fb_syscon_i							=> i_fb_syscon,
+		fb_con_c2p_i						=> i_con_c2p,
+		fb_con_p2c_i						=> i_con_p2c,
+		peripheral_sel_i					=> i_sel
+	);
+
+end rtl;
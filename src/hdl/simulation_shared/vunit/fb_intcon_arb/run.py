@@ -0,0 +1,37 @@
+import sys
+sys.path.insert(0, "../../python")
+
+from vunit import VUnit, VUnitCLI
+from blitsim import fbarb, sources
+
+# Create VUnit instance by parsing command line arguments
+cli = VUnitCLI()
+cli.parser.add_argument("--seeds", type=int, default=4,
+    help="Number of random traces, each is run with both arbiters")
+cli.parser.add_argument("--first-seed", type=int, default=0,
+    help="Seed of the first random trace")
+cli.parser.add_argument("--controllers", type=int, default=3,
+    help="Controllers in each trace")
+args = cli.parse_args()
+vu = VUnit.from_args(args)
+
+# Create library 'lib'
+lib = vu.add_library("lib")
+
+# Add all files ending in .vhd in current working directory to library
+lib.add_source_files("./*.vhd")
+sources.add_groups(lib, "fishbone")
+lib.add_source_files("../../sim_fb_monitor.vhd")
+
+# each seed's traces go through the RTL and the model in blitsim.fbarb, which
+# must agree on every cycle's start, grant and ack
+test = lib.test_bench("test_tb").test("arb")
+for seed in range(args.first_seed, args.first_seed + args.seeds):
+    traces = fbarb.random_traces(seed, args.controllers)
+    for arbiter in fbarb.ARBITERS:
+        for register_p2c in (False, True):
+            name = "seed%d.%s%s" % (seed, arbiter, ".regp2c" if register_p2c else "")
+            fbarb.add_config(test, name, traces, arbiter, register_p2c)
+
+# Run vunit function
+vu.main()
@@ -12,6 +12,7 @@ use std.textio.all;
 library work;
 use work.fishbone.all;
 use work.common.all;
+use work.sim_bench_pack.all;
 
 entity test_tb is
 	generic (runner_cfg : string);
@@ -354,6 +355,7 @@ begin
 
 		wait for 3 us;
 
+		sim_bench_time(output_path(runner_cfg));
 		test_runner_cleanup(runner); -- Simulation ends here
 	end process;
 